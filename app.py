@@ -2,12 +2,35 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.colors
+import plotly.utils
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import numpy as np
 from pathlib import Path
 import sys
+import io
+import threading
+import time
+import base64
+import json
+import struct
+import zlib
+import logging
+import logging.handlers
+import re
+import hashlib
+import pickle
+import shutil
+import codecs
+import sqlite3
+from collections import OrderedDict
+from urllib.parse import urlencode, parse_qs
 import streamlit.components.v1 as components
 
+# Recortes dos dados compartilhados só copiam quando são alterados
+pd.set_option('mode.copy_on_write', True)
+
 def create_responsive_layout_config():
     """
     Retorna configuração de layout responsivo para todos os gráficos Plotly.
@@ -134,388 +157,7013 @@ def carregar_dados():
     
     return panorama_data, ranking_data, cargo_data, setor_data, matriz_data, detalhamento_data
 
-def get_risk_color(value, tipo='score'):
-    if tipo == 'perc':
-        if value >= 0.7:
-            return '#dc2626'
-        elif value >= 0.5:
-            return '#ea580c'
-        elif value >= 0.3:
-            return '#f59e0b'
-        else:
-            return '#10b981'
+def caminho_respostas():
+    """
+    Retorna o caminho do arquivo opcional de respostas brutas (archives/respostas.csv).
+
+    O arquivo tem uma linha por respondente, colunas 'cargo' e 'setor'
+    e uma coluna por pergunta (q1, q2, ...).
+    """
+    if getattr(sys, 'frozen', False):
+        base_dir = Path(sys._MEIPASS)
     else:
-        if value >= 4:
-            return '#dc2626'
-        elif value >= 3:
-            return '#ea580c'
-        elif value >= 2:
-            return '#f59e0b'
-        else:
-            return '#10b981'
+        base_dir = Path(__file__).parent
 
-def get_risk_color_classe(classe):
-    cores = {
-        'alto': '#dc2626',
-        'medio': '#f59e0b',
-        'baixo': '#10b981'
-    }
-    return cores.get(classe, '#6b7280')
+    return base_dir / 'archives' / 'respostas.csv'
 
-import base64
-def get_base64_image(image_path):
-    with open(image_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
+def carregar_respostas():
+    """
+    Carrega as respostas brutas por respondente, quando disponíveis.
 
-## dados geral
-panorama_data, ranking_data, cargo_data, setor_data, matriz_data, detalhamento_data = carregar_dados()
+    Returns:
+        DataFrame com as respostas ou None se o arquivo não existir
+    """
+    caminho = caminho_respostas()
+    if not caminho.exists():
+        return None
+    return pd.read_csv(caminho)
 
-## CSS sidebar
+def caminho_normas():
+    """
+    Retorna o caminho do arquivo opcional de normas de referência (archives/normas.csv).
 
-logo_base64 = get_base64_image("archives/logo.png")
-def get_base64_image(image_path):
-    with open(image_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
+    O arquivo tem uma linha por observação da população de referência (empresa,
+    setor ou unidade de uma norma nacional, setorial ou da carteira de clientes),
+    com as colunas 'subescala' e 'media' na mesma escala de 0 a 5 dos escores.
+    """
+    return caminho_respostas().parent / 'normas.csv'
 
-# Carregar a logo
-logo_base64 = get_base64_image("archives/logo.png")  # Ajuste o nome do arquivo se necessário
+def carregar_normas():
+    """
+    Carrega as normas de referência, quando disponíveis.
 
-st.markdown("""
-    <style>
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, 
-            #c9baa9 0%, 
-            #d4c4a8 20%, 
-            #e8dcc8 40%, 
-            #f0e6d2 50%, 
-            #e8dcc8 60%, 
-            #d4c4a8 80%, 
-            #c9baa9 100%) !important;
-        border-radius: 0 30px 30px 0 !important;
-        box-shadow: 8px 0 40px rgba(0, 0, 0, 0.15), 
-                    inset -2px 0 20px rgba(255, 255, 255, 0.5),
-                    inset 2px 0 30px rgba(184, 148, 102, 0.1);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    [data-testid="stSidebar"]::before {
-        content: '';
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: radial-gradient(circle, rgba(255, 245, 220, 0.4) 0%, transparent 70%);
-        animation: pulse 12s ease-in-out infinite;
-    }
-    
-    [data-testid="stSidebar"]::after {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background: 
-            repeating-linear-gradient(
-                0deg,
-                transparent,
-                transparent 3px,
-                rgba(212, 180, 130, 0.03) 3px,
-                rgba(212, 180, 130, 0.03) 6px
-            );
-        pointer-events: none;
-    }
-    
-    @keyframes pulse {
-        0%, 100% { transform: scale(1) rotate(0deg); opacity: 0.5; }
-        50% { transform: scale(1.1) rotate(180deg); opacity: 0.8; }
-    }
-    
-    [data-testid="stSidebar"] > div:first-child {
-        background: transparent !important;
-        padding: 2rem 1.25rem;
-        position: relative;
-        z-index: 1;
-    }
-    
-    [data-testid="stSidebar"] .stButton button {
-        width: 100%;
-        padding: 1.1rem 1.4rem !important;
-        margin: 0.45rem 0 !important;
-        border: none !important;
-        border-radius: 16px !important;
-        background: linear-gradient(135deg, rgba(255, 255, 255, 0.7) 0%, rgba(248, 242, 230, 0.6) 100%) !important;
-        color: #6b5847 !important;
-        font-size: 0.95rem !important;
-        font-weight: 500 !important;
-        text-align: left !important;
-        cursor: pointer !important;
-        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1) !important;
-        backdrop-filter: blur(10px) !important;
-        border: 1px solid rgba(184, 148, 102, 0.25) !important;
-        box-shadow: 0 2px 8px rgba(107, 88, 71, 0.12), 
-                    inset 0 1px 0 rgba(255, 255, 255, 0.8) !important;
-        position: relative !important;
-        overflow: hidden !important;
-    }
-    
-    [data-testid="stSidebar"] .stButton button::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(212, 180, 130, 0.3), transparent);
-        transition: left 0.6s;
-    }
-    
-    [data-testid="stSidebar"] .stButton button:hover {
-        background: linear-gradient(135deg, rgba(212, 180, 130, 0.35) 0%, rgba(196, 166, 114, 0.35) 100%) !important;
-        transform: translateX(10px) scale(1.02) !important;
-        border-color: rgba(184, 148, 102, 0.5) !important;
-        box-shadow: 0 8px 24px rgba(184, 148, 102, 0.25), 
-                    0 0 30px rgba(212, 180, 130, 0.2),
-                    inset 0 1px 0 rgba(255, 255, 255, 0.9) !important;
-        color: #5a4a3a !important;
-    }
-    
-    [data-testid="stSidebar"] .stButton button:hover::before {
-        left: 100%;
-    }
-    
-    [data-testid="stSidebar"] .stButton button:active {
-        transform: translateX(8px) scale(0.99) !important;
-        box-shadow: 0 4px 12px rgba(184, 148, 102, 0.3) !important;
-    }
-    
-    [data-testid="stSidebar"] .stButton button[kind="primary"],
-    [data-testid="stSidebar"] .stButton button[data-baseweb="button"][kind="primary"] {
-        background: linear-gradient(135deg, #c4a672 0%, #b89656 35%, #a88846 70%, #987a36 100%) !important;
-        color: #ffffff !important;
-        font-weight: 700 !important;
-        border-color: rgba(152, 122, 54, 0.5) !important;
-        box-shadow: 0 8px 32px rgba(168, 136, 70, 0.45), 
-                    0 0 40px rgba(196, 166, 114, 0.3),
-                    inset 0 2px 4px rgba(255, 255, 255, 0.3),
-                    inset 0 -2px 4px rgba(0, 0, 0, 0.15) !important;
-        position: relative !important;
-        text-shadow: 0 1px 3px rgba(0, 0, 0, 0.3) !important;
-    }
-    
-    [data-testid="stSidebar"] .stButton button[kind="primary"]::after {
-        content: '';
-        position: absolute;
-        right: 1.2rem;
-        top: 50%;
-        transform: translateY(-50%);
-        width: 8px;
-        height: 8px;
-        background: #ffffff;
-        border-radius: 50%;
-        box-shadow: 0 0 12px rgba(255, 255, 255, 0.9), 
-                    0 0 20px rgba(255, 255, 255, 0.6);
-        animation: blink 2.5s ease-in-out infinite;
-    }
-    
-    @keyframes blink {
-        0%, 100% { opacity: 1; transform: translateY(-50%) scale(1); }
-        50% { opacity: 0.5; transform: translateY(-50%) scale(1.3); }
-    }
-    
-    [data-testid="stSidebar"] .stButton button[kind="primary"]:hover {
-        background: linear-gradient(135deg, #d0b080 0%, #c4a672 35%, #b89656 70%, #a88846 100%) !important;
-        transform: translateX(10px) scale(1.02) !important;
-        box-shadow: 0 10px 40px rgba(168, 136, 70, 0.55), 
-                    0 0 50px rgba(196, 166, 114, 0.4),
-                    inset 0 2px 4px rgba(255, 255, 255, 0.35) !important;
-    }
-    
-    [data-testid="stSidebar"] .stButton button:focus {
-        outline: none !important;
-        box-shadow: 0 0 0 3px rgba(184, 148, 102, 0.3) !important;
-    }
-    </style>
-""", unsafe_allow_html=True)
+    Returns:
+        DataFrame com as normas ou None se o arquivo não existir
+    """
+    caminho = caminho_normas()
+    if not caminho.exists():
+        return None
+    return pd.read_csv(caminho)
 
-## SIDEBAR
-with st.sidebar:
-    st.markdown(f"""
-        <div style='text-align: center; padding: 2.5rem 1rem 2rem 1rem; background: linear-gradient(135deg, rgba(255, 255, 255, 0.8) 0%, rgba(248, 242, 230, 0.7) 100%); border-radius: 24px; backdrop-filter: blur(15px); margin-bottom: 2.5rem; border: 2px solid rgba(196, 166, 114, 0.3); box-shadow: 0 8px 32px rgba(107, 88, 71, 0.15), inset 0 2px 4px rgba(255, 255, 255, 0.9), 0 0 60px rgba(212, 180, 130, 0.2); position: relative; overflow: hidden;'>
-            <div style='position: absolute; top: -50%; left: -50%; width: 200%; height: 200%; background: radial-gradient(circle, rgba(212, 180, 130, 0.15) 0%, transparent 70%); animation: rotate 15s linear infinite;'></div>
-            <div style='position: relative; z-index: 1;'>
-                <img src="data:image/png;base64,{logo_base64}" alt="Logo" style='width: clamp(100px, 25vw, 150px); height: auto; margin-bottom: 1rem; filter: drop-shadow(0 4px 12px rgba(168, 136, 70, 0.3)); border-radius: 12px;'/>
-                <p style='margin: 0 0 1.5rem 0; font-size: clamp(0.9rem, 2.2vw, 1.1rem); color: #6b5847; font-weight: 600; letter-spacing: 1px; text-shadow: 0 1px 2px rgba(255, 255, 255, 0.8);'>Luana Portella</p>
-                <div style='height: 2px; width: clamp(50px, 15vw, 70px); margin: 1.2rem auto; background: linear-gradient(90deg, transparent, #c4a672, transparent); box-shadow: 0 0 8px rgba(196, 166, 114, 0.5);'></div>
-                <p style='margin: 0; font-size: clamp(0.65rem, 1.8vw, 0.8rem); color: #6b5847; font-weight: 700; letter-spacing: clamp(1.5px, 0.5vw, 2.5px); text-transform: uppercase; text-shadow: 0 1px 2px rgba(255, 255, 255, 0.8);'>Gestão dos Fatores de Riscos Psicossociais</p>
-            </div>
-        </div>
-        <style>
-        @keyframes rotate {{
-            from {{ transform: rotate(0deg); }}
-            to {{ transform: rotate(360deg); }}
-        }}
-        </style>
-    """, unsafe_allow_html=True)
+def caminho_subescalas():
+    """
+    Retorna o caminho do registro de subescalas (archives/subescalas.csv).
 
-    st.markdown("""
-        <div style='margin-bottom: 1.25rem; padding-left: 0.5rem;'>
-            <div style='display: inline-block; padding: 0.5rem 1.2rem;
-                        background: linear-gradient(135deg, rgba(196, 166, 114, 0.25) 0%, rgba(184, 148, 102, 0.2) 100%);
-                        border-radius: 20px;
-                        border: 1px solid rgba(184, 148, 102, 0.35);
-                        box-shadow: 0 3px 10px rgba(107, 88, 71, 0.15), 
-                                    inset 0 1px 0 rgba(255, 255, 255, 0.7);'>
-                <p style='margin: 0; color: #6b5847; font-size: 0.68rem; 
-                          text-transform: uppercase; letter-spacing: 2.5px; 
-                          font-weight: 800;
-                          text-shadow: 0 1px 2px rgba(255, 255, 255, 0.5);'>
-                    Navegação
-                </p>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    if 'pagina_selecionada' not in st.session_state:
-        st.session_state.pagina_selecionada = "Panorama Geral"
-    
-    paginas = [
-        "Panorama Geral",
-        "Priorização de Riscos",
-        "Análise por Cargo",
-        "Análise por Setor",
-        "Matriz de Risco",
-        "Detalhamento & Ações"
+    O arquivo tem uma linha por subescala, com as colunas 'subescala', 'dominio'
+    (domínio do questionário), 'polaridade' ('positiva' para escalas de proteção,
+    'negativa' para escalas de problema) e 'ordem' (ordem de exibição).
+    """
+    return caminho_respostas().parent / 'subescalas.csv'
+
+def carregar_subescalas():
+    """
+    Carrega o registro de subescalas, quando disponível.
+
+    Returns:
+        DataFrame com o registro ou None se o arquivo não existir
+    """
+    caminho = caminho_subescalas()
+    if not caminho.exists():
+        return None
+    return pd.read_csv(caminho)
+
+DOMINIO_PADRAO = 'Outros'
+
+def montar_registro_subescalas(metadados, dados):
+    """
+    Monta o registro único das subescalas: código, domínio, polaridade, ordem e itens.
+
+    Subescalas presentes nos dados e ausentes do arquivo de metadados entram no fim,
+    no domínio DOMINIO_PADRAO e com a polaridade deduzida do detalhamento (escalas
+    positivas têm a criticidade invertida em relação à média). Assim, uma subescala
+    nova só exige uma linha no CSV, ou nem isso.
+
+    Args:
+        metadados: DataFrame de carregar_subescalas ou None
+        dados: Tupla de carregar_dados
+
+    Returns:
+        DataFrame indexado pela subescala, na ordem de exibição, com 'codigo' (int),
+        'dominio', 'positiva' (bool), 'ordem' e 'itens' (tupla de perguntas)
+
+    Raises:
+        ValueError: Se o arquivo de metadados estiver sem colunas obrigatórias
+    """
+    detalhamento = dados[5]
+    nos_dados = pd.unique(pd.concat([df['subescala'] for df in dados], ignore_index=True))
+    invertida = (detalhamento['criticidade'] - detalhamento['media']).abs() > 1e-9
+    positivas = set(detalhamento.loc[invertida, 'subescala'])
+
+    if metadados is None:
+        metadados = pd.DataFrame(columns=['subescala', 'dominio', 'polaridade', 'ordem'])
+    faltando = [c for c in ('subescala', 'dominio', 'polaridade', 'ordem') if c not in metadados.columns]
+    if faltando:
+        raise ValueError(f"subescalas.csv: colunas ausentes {faltando}")
+
+    registro = metadados.drop_duplicates('subescala').set_index('subescala')
+    registro = registro.assign(positiva=registro['polaridade'].str.strip().str.lower().eq('positiva'))
+    novas = sorted(set(nos_dados) - set(registro.index))
+    registro = pd.concat([
+        registro.sort_values('ordem')[['dominio', 'positiva']],
+        pd.DataFrame({'dominio': DOMINIO_PADRAO, 'positiva': [s in positivas for s in novas]}, index=novas)
+    ])
+    itens = detalhamento.groupby('subescala')['pergunta'].agg(tuple)
+    return registro.assign(
+        codigo=np.arange(len(registro), dtype=np.int16),
+        positiva=registro['positiva'].astype(bool),
+        ordem=np.arange(len(registro)),
+        itens=itens.reindex(registro.index).map(lambda valor: valor if isinstance(valor, tuple) else ())
+    ).rename_axis('subescala')[['codigo', 'dominio', 'positiva', 'ordem', 'itens']]
+
+def anotar_subescalas(df, registro):
+    """
+    Acrescenta a uma tabela com coluna 'subescala' o código inteiro e a máscara de
+    polaridade do registro, calculados uma vez na carga.
+
+    Returns:
+        A tabela com as colunas 'codigo_subescala' (-1 se desconhecida) e 'positiva'
+    """
+    codigos = registro['codigo'].reindex(df['subescala']).fillna(-1).to_numpy(dtype=np.int16)
+    positiva = np.append(registro['positiva'].to_numpy(dtype=bool), False)[codigos]
+    return df.assign(codigo_subescala=codigos, positiva=positiva)
+
+def ordenar_subescalas(subescalas, registro):
+    """Subescalas na ordem de exibição do registro (as desconhecidas no fim, em ordem alfabética)."""
+    return sorted(set(subescalas), key=lambda subescala: (registro['ordem'].get(subescala, len(registro)), subescala))
+
+# Percentis guardados por subescala na tabela normativa (0, 1, ..., 100)
+PERCENTIS_NORMA = np.arange(101, dtype=float)
+
+# Subescalas com menos observações de referência ficam sem percentil
+MINIMO_OBSERVACOES_NORMA = 10
+
+def calcular_tabelas_normas(normas):
+    """
+    Resume as normas numa tabela de percentis compacta por subescala.
+
+    Cada tabela guarda os escores nos percentis de PERCENTIS_NORMA; escores repetidos
+    (platôs da distribuição) ficam com o percentil médio do platô, para que a
+    interpolação seja sempre sobre valores crescentes.
+
+    Args:
+        normas: DataFrame de carregar_normas ou None
+
+    Returns:
+        Dicionário subescala -> (escores, percentis) em arrays somente leitura;
+        vazio se não houver normas
+
+    Raises:
+        ValueError: Se o arquivo não tiver as colunas 'subescala' e 'media'
+    """
+    if normas is None:
+        return {}
+    faltando = [c for c in ('subescala', 'media') if c not in normas.columns]
+    if faltando:
+        raise ValueError(f"normas.csv: colunas ausentes {faltando}")
+
+    tabelas = {}
+    for subescala, valores in normas.dropna(subset=['media']).groupby('subescala')['media']:
+        if len(valores) < MINIMO_OBSERVACOES_NORMA:
+            continue
+        escores, posicao = np.unique(np.percentile(valores.to_numpy(dtype=float), PERCENTIS_NORMA), return_inverse=True)
+        percentis = np.bincount(posicao, weights=PERCENTIS_NORMA) / np.bincount(posicao)
+        escores.flags.writeable = False
+        percentis.flags.writeable = False
+        tabelas[subescala] = (escores, percentis)
+    return tabelas
+
+def percentil_normativo(tabelas, subescalas, valores):
+    """
+    Posiciona escores na norma de referência da respectiva subescala.
+
+    A busca é uma interpolação linear vetorizada (np.interp) sobre a tabela de cada
+    subescala: os valores são agrupados por subescala uma única vez (factorize +
+    argsort) e cada grupo é interpolado de uma vez, sem máscara por subescala.
+
+    Args:
+        tabelas: Dicionário de calcular_tabelas_normas
+        subescalas: Subescala de cada valor (array, Series ou algo que se expanda para
+            o formato de valores, como as colunas de um mapa)
+        valores: Escores a posicionar
+
+    Returns:
+        Array de percentis (0 a 100) no formato de valores, NaN onde a subescala não tem
+        norma ou o valor falta
+    """
+    valores = np.asarray(valores, dtype=float)
+    percentis = np.full(valores.size, np.nan)
+    if not tabelas or valores.size == 0:
+        return percentis.reshape(valores.shape)
+
+    planos = valores.ravel()
+    codigos, nomes = pd.factorize(np.broadcast_to(np.asarray(subescalas, dtype=object), valores.shape).ravel(), use_na_sentinel=False)
+    ordem = np.argsort(codigos, kind='stable')
+    limites = np.cumsum(np.bincount(codigos, minlength=len(nomes)))
+    inicio = 0
+    for codigo, subescala in enumerate(nomes):
+        posicoes = ordem[inicio:limites[codigo]]
+        inicio = limites[codigo]
+        if subescala in tabelas:
+            percentis[posicoes] = np.interp(planos[posicoes], *tabelas[subescala])
+    percentis[np.isnan(planos)] = np.nan
+    return percentis.reshape(valores.shape)
+
+# Esboços de quantis: histograma de largura fixa sobre a escala 0-5 dos escores.
+# Somar contagens é exato, associativo e comutativo, e o tamanho não depende do
+# número de respondentes; o erro de um quantil é de no máximo meia faixa.
+RESOLUCAO_ESBOCO = 0.01
+FAIXAS_ESBOCO = int(round(5 / RESOLUCAO_ESBOCO)) + 1
+VERSAO_ESBOCO = 1
+CLASSES_RISCO = ('baixo', 'medio', 'alto')
+
+def criar_esboco(valores, pesos=None):
+    """
+    Cria o esboço de quantis de uma subescala.
+
+    Args:
+        valores: Escores (0 a 5)
+        pesos: Quantas pessoas cada escore representa (None = uma por escore)
+
+    Returns:
+        Dicionário com 'contagens' (array de FAIXAS_ESBOCO posições) e 'classes'
+        (contagem de pessoas por classe de risco, preenchida por quem chama)
+    """
+    valores = np.asarray(valores, dtype=float)
+    validos = np.isfinite(valores)
+    faixas = np.clip(np.rint(valores[validos] / RESOLUCAO_ESBOCO).astype(np.int64), 0, FAIXAS_ESBOCO - 1)
+    pesos = None if pesos is None else np.asarray(pesos, dtype=float)[validos]
+    contagens = np.bincount(faixas, weights=pesos, minlength=FAIXAS_ESBOCO)
+    return {
+        'contagens': np.rint(contagens).astype(np.int64),
+        'classes': dict.fromkeys(CLASSES_RISCO, 0)
+    }
+
+def gerar_esbocos(dados, escores):
+    """
+    Gera, na ingestão, o esboço de quantis de cada subescala desta empresa.
+
+    A distribuição vem dos escores por respondente quando há respostas brutas; sem
+    elas, cada respondente recebe a média do seu cargo (origem 'cargo', que subestima
+    a dispersão). As contagens por classe vêm do panorama.
+
+    Args:
+        dados: Tupla retornada por carregar_dados
+        escores: Saída de calcular_escores_respondentes ou None
+
+    Returns:
+        Esboço da empresa: {'versao', 'empresas', 'origem', 'subescalas': {subescala: esboço}}
+    """
+    panorama, cargo = dados[0], dados[2]
+    if escores is not None:
+        origem = 'respondentes'
+        subescalas = {nome: criar_esboco(grupo['escore']) for nome, grupo in escores.groupby('subescala')}
+    else:
+        origem = 'cargo'
+        subescalas = {nome: criar_esboco(grupo['media'], grupo['qtd']) for nome, grupo in cargo.groupby('subescala')}
+
+    for (nome, classe), qtd in panorama.groupby(['subescala', 'classe_risco'])['qtd'].sum().items():
+        if nome in subescalas and classe in subescalas[nome]['classes']:
+            subescalas[nome]['classes'][classe] = int(qtd)
+    return {'versao': VERSAO_ESBOCO, 'empresas': 1, 'origem': [origem], 'subescalas': subescalas}
+
+def mesclar_esbocos(esbocos):
+    """
+    Mescla esboços de empresas (ou de carteiras já mescladas) num único esboço.
+
+    Returns:
+        Esboço com as contagens somadas por subescala; None se a lista for vazia
+    """
+    mesclado = None
+    for esboco in esbocos:
+        if mesclado is None:
+            mesclado = {'versao': VERSAO_ESBOCO, 'empresas': 0, 'origem': [], 'subescalas': {}}
+        mesclado['empresas'] += esboco['empresas']
+        mesclado['origem'] = sorted(set(mesclado['origem']) | set(esboco['origem']))
+        for nome, parte in esboco['subescalas'].items():
+            alvo = mesclado['subescalas'].setdefault(nome, {
+                'contagens': np.zeros(FAIXAS_ESBOCO, dtype=np.int64),
+                'classes': dict.fromkeys(CLASSES_RISCO, 0)
+            })
+            alvo['contagens'] += parte['contagens']
+            for classe, qtd in parte['classes'].items():
+                alvo['classes'][classe] = alvo['classes'].get(classe, 0) + qtd
+    return mesclado
+
+def quantil_esboco(esboco, quantis):
+    """
+    Lê quantis (posto mais próximo) do esboço de uma subescala.
+
+    Args:
+        esboco: Esboço de uma subescala ({'contagens', 'classes'})
+        quantis: Quantis entre 0 e 1 (escalar ou lista)
+
+    Returns:
+        Array de escores, NaN se o esboço estiver vazio
+    """
+    acumulado = np.cumsum(esboco['contagens'])
+    quantis = np.atleast_1d(np.asarray(quantis, dtype=float))
+    if acumulado[-1] == 0:
+        return np.full(quantis.shape, np.nan)
+    postos = np.maximum(np.ceil(quantis * acumulado[-1]), 1)
+    return np.searchsorted(acumulado, postos, side='left') * RESOLUCAO_ESBOCO
+
+def serializar_esboco(esboco):
+    """Converte um esboço em JSON (só as faixas com contagem são gravadas)."""
+    subescalas = {}
+    for nome, parte in esboco['subescalas'].items():
+        faixas = np.flatnonzero(parte['contagens'])
+        subescalas[nome] = {
+            'faixas': faixas.tolist(),
+            'contagens': parte['contagens'][faixas].tolist(),
+            'classes': parte['classes']
+        }
+    return json.dumps({
+        'versao': esboco['versao'],
+        'resolucao': RESOLUCAO_ESBOCO,
+        'empresas': esboco['empresas'],
+        'origem': esboco['origem'],
+        'subescalas': subescalas
+    }, ensure_ascii=False)
+
+def desserializar_esboco(texto):
+    """
+    Reconstrói um esboço gravado por serializar_esboco.
+
+    Raises:
+        ValueError: Se o JSON for inválido ou de outra versão/resolução
+    """
+    bruto = json.loads(texto)
+    if bruto.get('versao') != VERSAO_ESBOCO or bruto.get('resolucao') != RESOLUCAO_ESBOCO:
+        raise ValueError("esboço de versão ou resolução incompatível")
+    subescalas = {}
+    for nome, parte in bruto['subescalas'].items():
+        contagens = np.zeros(FAIXAS_ESBOCO, dtype=np.int64)
+        contagens[np.asarray(parte['faixas'], dtype=np.int64)] = parte['contagens']
+        subescalas[nome] = {'contagens': contagens, 'classes': dict(parte['classes'])}
+    return {'versao': VERSAO_ESBOCO, 'empresas': bruto['empresas'], 'origem': list(bruto['origem']), 'subescalas': subescalas}
+
+def caminho_esboco_empresa():
+    """Arquivo onde a ingestão grava o esboço desta empresa, para envio à carteira."""
+    return caminho_respostas().parent.parent / 'cache' / 'esboco_quantis.json'
+
+def gravar_esboco_empresa(esboco):
+    """Grava o esboço da empresa de forma atômica; falhas de disco são ignoradas."""
+    caminho = caminho_esboco_empresa()
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_suffix('.tmp')
+        temporario.write_text(serializar_esboco(esboco), encoding='utf-8')
+        temporario.replace(caminho)
+    except OSError:
+        pass
+
+def listar_esbocos_carteira():
+    """
+    Lista os esboços das empresas da carteira em archives/carteira/*.json.
+
+    Returns:
+        Lista de tuplas (caminho, assinatura) onde a assinatura muda quando o arquivo muda
+    """
+    carteira_dir = caminho_respostas().parent / 'carteira'
+    if not carteira_dir.exists():
+        return []
+    return [
+        (str(arq), (arq.stat().st_mtime_ns, arq.stat().st_size))
+        for arq in sorted(carteira_dir.glob('*.json'))
     ]
+
+@st.cache_data(show_spinner=False)
+def carregar_esboco(caminho, assinatura):
+    """
+    Lê o esboço de uma empresa da carteira.
+
+    Args:
+        caminho: Arquivo JSON do esboço
+        assinatura: Assinatura do arquivo (invalida o cache quando muda)
+
+    Returns:
+        Esboço ou None se o arquivo estiver ilegível ou incompatível
+    """
+    try:
+        return desserializar_esboco(Path(caminho).read_text(encoding='utf-8'))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+@st.cache_resource(show_spinner=False)
+def resumir_carteira(esbocos):
+    """
+    Mescla os esboços da carteira e resume cada subescala.
+
+    Args:
+        esbocos: Saída de listar_esbocos_carteira (tupla)
+
+    Returns:
+        Tupla (esboço mesclado ou None, DataFrame por subescala com 'mediana', 'p90',
+        'perc_alto' e 'pessoas')
+    """
+    mesclado = mesclar_esbocos(
+        esboco for esboco in (carregar_esboco(caminho, assinatura) for caminho, assinatura in esbocos)
+        if esboco is not None
+    )
+    if mesclado is None:
+        return None, pd.DataFrame(columns=['mediana', 'p90', 'perc_alto', 'pessoas'])
+
+    linhas = {}
+    for nome, parte in mesclado['subescalas'].items():
+        mediana, p90 = quantil_esboco(parte, [0.5, 0.9])
+        total_classes = sum(parte['classes'].values())
+        linhas[nome] = {
+            'mediana': mediana,
+            'p90': p90,
+            'perc_alto': parte['classes'].get('alto', 0) / total_classes * 100 if total_classes else np.nan,
+            'pessoas': int(parte['contagens'].sum())
+        }
+    return mesclado, pd.DataFrame.from_dict(linhas, orient='index').sort_index()
+
+COLUNAS_OBRIGATORIAS = {
+    'panorama_semaforo.csv': ['subescala', 'classe_risco', 'qtd'],
+    'ranking_subescalas_criticas.csv': ['subescala', 'media_score', 'criticidade_media', 'perc_alto'],
+    'subescala_por_cargo.csv': ['cargo', 'subescala', 'media', 'criticidade_media', 'qtd', 'desvio'],
+    'subescala_por_setor.csv': ['setor', 'subescala', 'media', 'criticidade_media', 'qtd', 'desvio'],
+    'matriz_risco.csv': ['subescala', 'probabilidade', 'severidade', 'n_respondentes'],
+    'detalhamento_geral.csv': ['subescala', 'pergunta', 'media', 'qtd', 'desvio', 'classe_risco', 'criticidade']
+}
+
+INTERVALO_MONITOR_ARQUIVOS = 5
+
+def assinatura_arquivos():
+    """
+    Assinatura dos CSVs de archives/ (sem as ondas): muda quando algum arquivo é trocado.
+
+    Returns:
+        Tupla ordenada de (nome, mtime_ns, tamanho)
+    """
+    arquivos_dir = caminho_respostas().parent
+    return tuple(sorted(
+        (arq.name, arq.stat().st_mtime_ns, arq.stat().st_size) for arq in arquivos_dir.glob('*.csv')
+    ))
+
+FAIXA_RESPOSTAS = (1, 5)
+REGRAS_VALIDACAO = {
+    'sem_cargo_setor': ('erro', "Linhas sem cargo ou setor (descartadas)"),
+    'id_duplicado': ('erro', "Respondentes repetidos (mantida a primeira linha)"),
+    'id_ausente': ('aviso', "Respondentes sem identificador (mantidos sem conferir repetição)"),
+    'fora_da_faixa': ('erro', "Respostas não numéricas ou fora da escala (tratadas como em branco)"),
+    'sem_respostas': ('erro', "Linhas sem nenhuma resposta válida (descartadas)"),
+    'itens_ausentes': ('aviso', "Respondentes com perguntas em branco"),
+    'cargo_desconhecido': ('aviso', "Cargos que não existem nos dados atuais"),
+    'setor_desconhecido': ('aviso', "Setores que não existem nos dados atuais"),
+    'subescala_divergente': ('erro', "Subescalas presentes no panorama e ausentes na matriz, ou o contrário"),
+    'qtd_matriz': ('erro', "n_respondentes da matriz diferente do total de pessoas do panorama"),
+    'qtd_detalhamento': ('erro', "Perguntas do detalhamento com qtd acima do total de pessoas do panorama")
+}
+MAX_EXEMPLOS_VALIDACAO = 5
+COLUNAS_ID_RESPONDENTE = ('id_respondente', 'respondente', 'id')
+
+class RelatorioValidacao:
+    """
+    Relatório compacto da validação: uma linha por regra violada, com o número de
+    ocorrências e alguns exemplos (linhas do arquivo ou valores).
+
+    Pode receber vários blocos de um mesmo arquivo; também guarda o total de respostas
+    preenchidas e os identificadores já vistos, para achar repetições entre blocos.
+    """
+
+    def __init__(self):
+        self.ocorrencias = dict.fromkeys(REGRAS_VALIDACAO, 0)
+        self.exemplos = {regra: [] for regra in REGRAS_VALIDACAO}
+        self.respostas = 0
+        self.ids = np.empty(0, dtype=np.uint64)
+
+    def registrar(self, regra, quantidade, exemplos=()):
+        """Soma ocorrências de uma regra e guarda os primeiros exemplos distintos."""
+        if not quantidade:
+            return
+        self.ocorrencias[regra] += int(quantidade)
+        guardados = self.exemplos[regra]
+        for exemplo in exemplos[:MAX_EXEMPLOS_VALIDACAO]:
+            if len(guardados) >= MAX_EXEMPLOS_VALIDACAO:
+                break
+            if str(exemplo) not in guardados:
+                guardados.append(str(exemplo))
+
+    def ids_vistos(self, hashes):
+        """Marca os identificadores (hashes) já guardados em blocos anteriores."""
+        if len(self.ids) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+        posicao = np.minimum(np.searchsorted(self.ids, hashes), len(self.ids) - 1)
+        return self.ids[posicao] == hashes
+
+    def guardar_ids(self, hashes):
+        """Acrescenta identificadores ao conjunto ordenado dos já vistos."""
+        # Duas sequências já ordenadas: a ordenação estável só intercala, em tempo linear
+        self.ids = np.sort(np.concatenate([self.ids, np.sort(hashes)]), kind='stable')
+
+    def erros(self):
+        """Total de ocorrências das regras de severidade 'erro'."""
+        return sum(qtd for regra, qtd in self.ocorrencias.items() if REGRAS_VALIDACAO[regra][0] == 'erro')
+
+    def tabela(self):
+        """DataFrame com severidade, descrição, ocorrências e exemplos das regras violadas."""
+        return pd.DataFrame(
+            [(REGRAS_VALIDACAO[regra][0], REGRAS_VALIDACAO[regra][1], qtd, ', '.join(self.exemplos[regra]))
+             for regra, qtd in self.ocorrencias.items() if qtd],
+            columns=['severidade', 'regra', 'ocorrencias', 'exemplos']
+        )
+
+    def resumo(self):
+        """Texto curto com as regras de erro violadas, para mensagens de exceção."""
+        return '; '.join(
+            f"{REGRAS_VALIDACAO[regra][1]}: {qtd} ({', '.join(self.exemplos[regra])})"
+            for regra, qtd in self.ocorrencias.items() if qtd and REGRAS_VALIDACAO[regra][0] == 'erro'
+        )
+
+def rotulos_normalizados(coluna):
+    """
+    Tira espaços das bordas de uma coluna de rótulos (cargo, setor) tratando só os
+    valores distintos.
+
+    Returns:
+        Tupla (rótulos, códigos, valores distintos), com '' nos ausentes e código -1
+    """
+    codigos, valores = pd.factorize(coluna)
+    valores = np.array([str(valor).strip() for valor in valores] + [''], dtype=object)
+    return valores[codigos], codigos, valores[:-1]
+
+def validar_respostas(bloco, perguntas, relatorio, linha_inicial=2, conhecidos=None, coluna_id=None):
+    """
+    Valida um bloco de respostas brutas de uma vez, coluna a coluna.
+
+    Respostas não numéricas ou fora de FAIXA_RESPOSTAS ficam em branco; linhas sem
+    cargo/setor, sem nenhuma resposta válida ou com identificador repetido são descartadas.
+    Linhas com identificador em branco são mantidas e ficam fora da conferência de repetição.
+
+    Args:
+        bloco: DataFrame lido do arquivo
+        perguntas: Colunas de pergunta do questionário presentes no arquivo
+        relatorio: RelatorioValidacao que recebe as ocorrências
+        linha_inicial: Linha do arquivo onde o bloco começa (para os exemplos)
+        conhecidos: {'cargo': valores, 'setor': valores} dos dados atuais, para os avisos
+        coluna_id: Coluna com o identificador do respondente, se houver
+
+    Returns:
+        DataFrame com 'cargo', 'setor' e as perguntas em float, só com as linhas mantidas
+    """
+    linhas = np.arange(linha_inicial, linha_inicial + len(bloco))
+    grupos = {dimensao: rotulos_normalizados(bloco[dimensao]) for dimensao in ('cargo', 'setor')}
+    sem_grupo = (grupos['cargo'][0] == '') | (grupos['setor'][0] == '')
+    relatorio.registrar('sem_cargo_setor', sem_grupo.sum(), linhas[sem_grupo])
+
+    # Matriz em ordem de colunas: cada pergunta é convertida de uma vez; só colunas com
+    # texto precisam de conferência extra (valores que não viraram número)
+    x = np.empty((len(bloco), len(perguntas)), order='F')
+    nao_numerico = np.zeros(x.shape, dtype=bool, order='F')
+    for j, pergunta in enumerate(perguntas):
+        coluna = bloco[pergunta]
+        x[:, j] = pd.to_numeric(coluna, errors='coerce')
+        if coluna.dtype == object:
+            nao_numerico[:, j] = coluna.notna().to_numpy() & np.isnan(x[:, j])
+    with np.errstate(invalid='ignore'):
+        fora = (x < FAIXA_RESPOSTAS[0]) | (x > FAIXA_RESPOSTAS[1]) | nao_numerico
+    x[fora] = np.nan
+    respondida = ~np.isnan(x)
+    relatorio.respostas += int(respondida.sum() + fora.sum())
+    relatorio.registrar('fora_da_faixa', fora.sum(), linhas[fora.any(axis=1)])
+
+    respondidas = respondida.sum(axis=1)
+    sem_respostas = ~sem_grupo & (respondidas == 0)
+    relatorio.registrar('sem_respostas', sem_respostas.sum(), linhas[sem_respostas])
+    manter = ~sem_grupo & ~sem_respostas
+    incompleto = manter & (respondidas < len(perguntas))
+    relatorio.registrar('itens_ausentes', incompleto.sum(), linhas[incompleto])
+
+    if coluna_id is not None:
+        ids = rotulos_normalizados(bloco[coluna_id])[0]
+        sem_id = manter & (ids == '')
+        relatorio.registrar('id_ausente', sem_id.sum(), linhas[sem_id])
+        conferir = manter & ~sem_id
+        hashes = pd.util.hash_array(ids[conferir], categorize=False)
+        repetido = np.zeros(len(bloco), dtype=bool)
+        repetido[conferir] = pd.Series(hashes).duplicated().to_numpy() | relatorio.ids_vistos(hashes)
+        relatorio.registrar('id_duplicado', repetido.sum(), ids[repetido])
+        manter &= ~repetido
+        relatorio.guardar_ids(hashes[~repetido[conferir]])
+
+    if conhecidos is not None:
+        for dimensao, (rotulos, codigos, valores) in grupos.items():
+            desconhecido = manter & ~np.append(np.isin(valores, conhecidos[dimensao]), True)[codigos]
+            relatorio.registrar(f'{dimensao}_desconhecido', desconhecido.sum(), pd.unique(rotulos[desconhecido]))
+
+    limpo = pd.DataFrame(x, columns=perguntas, index=bloco.index)
+    limpo.insert(0, 'setor', grupos['setor'][0])
+    limpo.insert(0, 'cargo', grupos['cargo'][0])
+    return limpo[manter]
+
+def validar_consistencia(dados, relatorio=None):
+    """
+    Confere se as contagens dos arquivos agregados batem entre si.
+
+    O total de pessoas por subescala no panorama deve ser igual ao n_respondentes da
+    matriz, e nenhuma pergunta do detalhamento pode ter qtd acima desse total.
+
+    Args:
+        dados: Tupla de DataFrames na ordem de carregar_dados
+        relatorio: RelatorioValidacao a completar (um novo, se omitido)
+
+    Returns:
+        O RelatorioValidacao
+    """
+    relatorio = relatorio or RelatorioValidacao()
+    panorama, _, _, _, matriz, detalhamento = dados
+    total = panorama.groupby('subescala')['qtd'].sum()
+    n_matriz = matriz.groupby('subescala')['n_respondentes'].max()
+
+    so_um = total.index.symmetric_difference(n_matriz.index)
+    relatorio.registrar('subescala_divergente', len(so_um), so_um)
+    comuns = total.index.intersection(n_matriz.index)
+    divergente = comuns[total[comuns].to_numpy() != n_matriz[comuns].to_numpy()]
+    relatorio.registrar('qtd_matriz', len(divergente), [f"{s}: {total[s]} × {n_matriz[s]}" for s in divergente[:MAX_EXEMPLOS_VALIDACAO]])
+
+    acima = (detalhamento['qtd'] > detalhamento['subescala'].map(total)).to_numpy()
+    relatorio.registrar('qtd_detalhamento', acima.sum(), detalhamento['pergunta'].to_numpy()[acima])
+    return relatorio
+
+def validar_dados(dados):
+    """
+    Confere se o conjunto carregado por carregar_dados está completo.
+
+    As contagens entre arquivos não são conferidas aqui (ver validar_consistencia).
+
+    Raises:
+        ValueError: Se algum arquivo estiver vazio ou sem colunas obrigatórias
+    """
+    for (arquivo, colunas), df in zip(COLUNAS_OBRIGATORIAS.items(), dados):
+        faltando = [c for c in colunas if c not in df.columns]
+        if faltando:
+            raise ValueError(f"{arquivo}: colunas ausentes {faltando}")
+        if len(df) == 0:
+            raise ValueError(f"{arquivo}: arquivo vazio")
+
+def carregar_snapshot(assinatura):
+    """
+    Carrega e valida todos os arquivos de dados em um snapshot imutável.
+
+    Args:
+        assinatura: Assinatura dos arquivos no momento da leitura (versão do snapshot)
+
+    Os DataFrames são compartilhados por todas as sessões; com o copy-on-write do
+    pandas, alterações feitas por uma página viram cópias locais e não os afetam.
+
+    Returns:
+        Dicionário com 'versao', 'dados' (tupla de carregar_dados), 'respostas',
+        'filtros_padrao' (ver filtros_padrao), 'visoes_padrao' (ver gerar_visoes_padrao),
+        'indice_detalhamento' (ver
+        indexar_detalhamento), 'normas' (ver calcular_tabelas_normas), 'esboco' (ver
+        gerar_esbocos), 'subescalas' (ver montar_registro_subescalas), 'dominios' (ver
+        calcular_dominios), 'consistencia' (RelatorioValidacao de validar_consistencia,
+        exibido como aviso) e 'tamanho' (bytes).
+        As tabelas de 'dados' trazem o código e a polaridade de cada linha (ver anotar_subescalas)
+    """
+    dados = carregar_dados()
+    validar_dados(dados)
+    consistencia = validar_consistencia(dados)
+    subescalas = montar_registro_subescalas(carregar_subescalas(), dados)
+    dados = tuple(anotar_subescalas(df, subescalas) for df in dados)
+    respostas = carregar_respostas()
+    escores = calcular_escores_respondentes(respostas, dados[5]) if respostas is not None else None
+    indice_detalhamento = indexar_detalhamento(dados[5])
+    normas = calcular_tabelas_normas(carregar_normas())
+    padroes = filtros_padrao(dados, subescalas)
+    visoes_padrao = gerar_visoes_padrao(dados, padroes, escores, normas, indice_detalhamento, assinatura)
+    dominios = calcular_dominios(dados, subescalas)
+    esboco = gerar_esbocos(dados, escores)
+    gravar_esboco_empresa(esboco)
+    return {
+        'versao': assinatura,
+        'dados': dados,
+        'respostas': respostas,
+        'filtros_padrao': padroes,
+        'visoes_padrao': visoes_padrao,
+        'indice_detalhamento': indice_detalhamento,
+        'normas': normas,
+        'esboco': esboco,
+        'subescalas': subescalas,
+        'dominios': dominios,
+        'consistencia': consistencia,
+        'tamanho': medir_memoria((dados, respostas, visoes_padrao, indice_detalhamento, normas, esboco, subescalas, dominios))
+    }
+
+class MonitorArquivos:
+    """
+    Observa archives/ em segundo plano e troca o snapshot de dados de forma atômica.
+
+    A carga e a validação acontecem na thread do monitor, fora das execuções da página.
+    Cada execução lê a referência de snapshot uma única vez no início; execuções em
+    andamento continuam com o snapshot antigo e as seguintes já veem o novo.
+    """
+
+    def __init__(self, intervalo=INTERVALO_MONITOR_ARQUIVOS):
+        self.intervalo = intervalo
+        self.snapshot = carregar_snapshot(assinatura_arquivos())
+        self.erro = None
+        self.ao_trocar = []
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name='monitor-arquivos', daemon=True)
+        self._thread.start()
+
+    def _executar(self):
+        pendente = None
+        while not self._parar.wait(self.intervalo):
+            try:
+                assinatura = assinatura_arquivos()
+            except OSError:
+                continue
+            if assinatura == self.snapshot['versao']:
+                pendente = None
+                continue
+            # Só carrega quando a assinatura se repete: a cópia dos arquivos terminou
+            if assinatura != pendente:
+                pendente = assinatura
+                continue
+            try:
+                novo = carregar_snapshot(assinatura)
+            except Exception as erro:
+                self.erro = str(erro)
+                pendente = None
+                continue
+            self.snapshot = novo
+            self.erro = None
+            for callback in self.ao_trocar:
+                callback(novo)
+
+    def parar(self):
+        self._parar.set()
+
+@st.cache_resource(show_spinner=False)
+def obter_monitor_arquivos():
+    """
+    Monitor de arquivos único do processo, compartilhado entre as sessões.
+    """
+    return MonitorArquivos()
+
+@st.cache_data(show_spinner=False)
+def calcular_escores_respondentes(respostas, detalhamento_data):
+    """
+    Converte respostas brutas em escores por subescala (média dos itens).
+
+    Args:
+        respostas: DataFrame com uma coluna por pergunta e colunas 'cargo'/'setor'
+        detalhamento_data: DataFrame com o mapeamento subescala → pergunta
+
+    Returns:
+        DataFrame longo com colunas cargo, setor, subescala e escore
+    """
+    mapa_itens = detalhamento_data.groupby('subescala')['pergunta'].apply(list)
+    escores = pd.DataFrame(index=respostas.index)
+    for subescala, perguntas in mapa_itens.items():
+        colunas = [p for p in perguntas if p in respostas.columns]
+        if colunas:
+            escores[subescala] = respostas[colunas].mean(axis=1)
+
+    dimensoes = [c for c in ['cargo', 'setor'] if c in respostas.columns]
+    escores = pd.concat([respostas[dimensoes], escores], axis=1)
+    escores_long = escores.melt(id_vars=dimensoes, var_name='subescala', value_name='escore')
+    return escores_long.dropna(subset=['escore'])
+
+TAMANHO_BLOCO_IMPORTACAO = 20_000
+LIMITE_INVALIDOS_IMPORTACAO = 0.05
+INTERVALO_PROGRESSO_IMPORTACAO = 1.0
+SITUACOES_IMPORTACAO_ATIVAS = ('recebida', 'lendo', 'agregando', 'publicando')
+
+class AcumuladorImportacao:
+    """
+    Acumula, bloco a bloco, as somas que geram os CSVs agregados de archives/.
+
+    Guarda só contagens, somas e somas de quadrados por pergunta, por subescala,
+    por (cargo ou setor, subescala) e por classe de risco: a memória depende do
+    número de grupos e perguntas, não do número de respondentes.
+    """
+
+    def __init__(self, detalhamento_data, perguntas, registro):
+        itens = detalhamento_data[detalhamento_data['pergunta'].isin(perguntas)]
+        self.perguntas = itens['pergunta'].tolist()
+        self.subescala_item = itens['subescala'].to_numpy()
+        self.subescalas = np.array(sorted(set(self.subescala_item)), dtype=object)
+        self.positiva = registro['positiva'].reindex(self.subescalas, fill_value=False).to_numpy(dtype=bool)
+        self.pertence = (self.subescala_item[:, None] == self.subescalas[None, :]).astype(float)
+        self.itens = np.zeros((3, len(self.perguntas)))
+        self.geral = np.zeros((3, len(self.subescalas)))
+        self.classes = np.zeros((len(self.subescalas), len(CLASSES_RISCO)), dtype=np.int64)
+        self.grupos = {'cargo': None, 'setor': None}
+        self.respondentes = 0
+
+    def atualizar(self, bloco):
+        """Incorpora um bloco já validado (colunas 'cargo', 'setor' e uma por pergunta)."""
+        x = bloco[self.perguntas].to_numpy(dtype=float)
+        observado = ~np.isnan(x)
+        x0 = np.where(observado, x, 0.0)
+        self.itens += [observado.sum(axis=0), x0.sum(axis=0), (x0 ** 2).sum(axis=0)]
+        self.respondentes += len(bloco)
+
+        # Escore do respondente em cada subescala: média dos itens respondidos
+        n = observado.astype(float) @ self.pertence
+        valido = n > 0
+        escores = np.divide(x0 @ self.pertence, n, out=np.zeros_like(n), where=valido)
+        estatisticas = np.hstack([valido, escores, escores ** 2])
+        self.geral += estatisticas.sum(axis=0).reshape(3, -1)
+
+        criticidade = np.where(self.positiva, sum(FAIXA_RESPOSTAS) - escores, escores)
+        alto = valido & (criticidade > LIMIAR_ALTO_RISCO)
+        baixo = valido & (criticidade < LIMIAR_MEDIO_RISCO)
+        contagem = {'alto': alto, 'baixo': baixo, 'medio': valido & ~alto & ~baixo}
+        for i, classe in enumerate(CLASSES_RISCO):
+            self.classes[:, i] += contagem[classe].sum(axis=0)
+
+        colunas = pd.MultiIndex.from_product([['n', 'soma', 'soma2'], self.subescalas])
+        for dimensao, atual in self.grupos.items():
+            parcial = pd.DataFrame(estatisticas, columns=colunas).groupby(bloco[dimensao].to_numpy()).sum()
+            self.grupos[dimensao] = parcial if atual is None else atual.add(parcial, fill_value=0)
+        return self
+
+    def resultado(self):
+        """
+        Monta os arquivos agregados a partir das somas acumuladas.
+
+        Returns:
+            Tupla de DataFrames na mesma ordem de carregar_dados
+        """
+        inverter = sum(FAIXA_RESPOSTAS)
+
+        def media_desvio(n, soma, soma2):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                media = soma / n
+                variancia = (soma2 - soma * media) / (n - 1)
+            return media, np.sqrt(np.clip(variancia, 0, None))
+
+        def classe(criticidade):
+            return np.select(
+                [criticidade > LIMIAR_ALTO_RISCO, criticidade >= LIMIAR_MEDIO_RISCO], ['alto', 'medio'], default='baixo'
+            )
+
+        media, desvio = media_desvio(*self.itens)
+        criticidade = np.where(np.isin(self.subescala_item, self.subescalas[self.positiva]), inverter - media, media)
+        detalhamento = pd.DataFrame({
+            'subescala': self.subescala_item, 'pergunta': self.perguntas, 'media': media,
+            'qtd': self.itens[0].astype(int), 'desvio': desvio,
+            'classe_risco': classe(criticidade), 'criticidade': criticidade
+        })
+
+        n = self.geral[0]
+        media = self.geral[1] / n
+        percentuais = self.classes / n[:, None]
+        ranking = pd.DataFrame({
+            'subescala': self.subescalas, 'media_score': media,
+            'criticidade_media': np.where(self.positiva, inverter - media, media),
+            **{f'perc_{c}': percentuais[:, CLASSES_RISCO.index(c)] for c in ('alto', 'medio', 'baixo')}
+        }).sort_values('criticidade_media', ascending=False, ignore_index=True)
+
+        panorama = pd.DataFrame(self.classes, index=self.subescalas, columns=list(CLASSES_RISCO)).rename_axis('subescala')
+        panorama = panorama.stack().rename('qtd').rename_axis(['subescala', 'classe_risco']).reset_index()
+        panorama = panorama[panorama['qtd'] > 0].sort_values(['subescala', 'classe_risco'], ignore_index=True)
+
+        grupos = []
+        for dimensao in ('cargo', 'setor'):
+            somas = self.grupos[dimensao].stack(future_stack=True).rename_axis([dimensao, 'subescala']).reset_index()
+            somas = somas[somas['n'] > 0]
+            media_grupo, desvio_grupo = media_desvio(somas['n'], somas['soma'], somas['soma2'])
+            positiva = somas['subescala'].isin(self.subescalas[self.positiva])
+            tabela = pd.DataFrame({
+                dimensao: somas[dimensao], 'subescala': somas['subescala'], 'media': media_grupo,
+                'criticidade_media': np.where(positiva, inverter - media_grupo, media_grupo),
+                'qtd': somas['n'].astype(int), 'desvio': desvio_grupo
+            })
+            grupos.append(tabela.sort_values([dimensao, 'media'], ascending=[True, False], ignore_index=True))
+
+        matriz = pd.DataFrame({
+            'subescala': ranking['subescala'], 'probabilidade': ranking['perc_alto'],
+            'severidade': ranking['criticidade_media'],
+            'n_respondentes': ranking['subescala'].map(pd.Series(n.astype(int), index=self.subescalas))
+        })
+        return panorama, ranking, grupos[0], grupos[1], matriz, detalhamento
+
+def caminho_importacoes():
+    """Pasta de trabalho das importações (arquivo recebido e arquivos gerados)."""
+    return caminho_respostas().parent.parent / 'cache' / 'importacoes'
+
+@st.cache_resource(show_spinner=False)
+def obter_importacoes():
+    """
+    Registro, compartilhado entre sessões, das importações do processo.
+
+    Só uma importação roda por vez, já que todas publicam nos mesmos arquivos de archives/.
+
+    Returns:
+        Dicionário com 'tarefas' ({id: estado}), 'ultima' (id) e 'lock'
+    """
+    return {'tarefas': {}, 'ultima': None, 'lock': threading.Lock()}
+
+def iniciar_importacao(arquivo, nome, snapshot, rotulo_onda=None):
+    """
+    Grava o arquivo recebido em disco e dispara a importação em segundo plano.
+
+    Args:
+        arquivo: Arquivo enviado (objeto com read), lido em blocos
+        nome: Nome original do arquivo, para exibição
+        snapshot: Snapshot de dados atual (mapeamento subescala → pergunta, cargos e
+            setores conhecidos e registro de subescalas)
+        rotulo_onda: Se informado, os arquivos atuais de archives/ são guardados em
+            archives/ondas/<rotulo_onda>/ antes da troca
+
+    Returns:
+        Estado da tarefa criada
+
+    Raises:
+        ValueError: Se já houver uma importação em andamento ou a onda já existir
+    """
+    importacoes = obter_importacoes()
+    with importacoes['lock']:
+        ultima = importacoes['tarefas'].get(importacoes['ultima'])
+        if ultima is not None and ultima['situacao'] in SITUACOES_IMPORTACAO_ATIVAS:
+            raise ValueError("Já existe uma importação em andamento.")
+        if rotulo_onda and (caminho_respostas().parent / 'ondas' / rotulo_onda).exists():
+            raise ValueError(f"A onda '{rotulo_onda}' já existe em archives/ondas/.")
+
+        id_tarefa = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 1_000_000:06d}"
+        pasta = caminho_importacoes() / id_tarefa
+        pasta.mkdir(parents=True, exist_ok=True)
+        with open(pasta / 'entrada.csv', 'wb') as destino:
+            shutil.copyfileobj(arquivo, destino, 1024 * 1024)
+
+        tarefa = {
+            'id': id_tarefa, 'nome': nome, 'pasta': pasta, 'rotulo_onda': rotulo_onda,
+            'situacao': 'recebida', 'progresso': 0.0, 'linhas': 0, 'descartadas': 0,
+            'relatorio': RelatorioValidacao(), 'avisos': [], 'mensagem': '',
+            'inicio': time.time(), 'fim': None, 'cancelar': threading.Event()
+        }
+        importacoes['tarefas'][id_tarefa] = tarefa
+        importacoes['ultima'] = id_tarefa
+
+    threading.Thread(
+        target=executar_importacao, args=(tarefa, snapshot), name='importacao', daemon=True
+    ).start()
+    return tarefa
+
+def detectar_codificacao(caminho):
+    """
+    Codificação de um arquivo de texto: UTF-8 (com ou sem BOM) se todo ele for UTF-8
+    válido, senão cp1252, comum nas exportações de planilhas em português.
+
+    O arquivo é lido em partes, com memória constante.
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    try:
+        with open(caminho, 'rb') as arquivo:
+            for parte in iter(lambda: arquivo.read(1024 * 1024), b''):
+                decodificador.decode(parte)
+        decodificador.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return 'cp1252'
+    return 'utf-8-sig'
+
+def ler_blocos_importacao(tarefa, dados):
+    """
+    Lê o arquivo da tarefa em blocos de linhas, validando cada bloco com validar_respostas.
+
+    As ocorrências vão para o relatório da tarefa. A leitura é interrompida se as
+    respostas inválidas passarem de LIMITE_INVALIDOS_IMPORTACAO.
+
+    Args:
+        tarefa: Estado da tarefa (ver iniciar_importacao)
+        dados: Tupla de carregar_dados com os dados atuais (perguntas, cargos e setores conhecidos)
+
+    Yields:
+        DataFrames com 'cargo', 'setor' e as perguntas conhecidas, em float
+    """
+    detalhamento_data = dados[5]
+    conhecidos = {'cargo': dados[2]['cargo'].unique(), 'setor': dados[3]['setor'].unique()}
+    relatorio = tarefa['relatorio']
+    caminho = tarefa['pasta'] / 'entrada.csv'
+    total = max(caminho.stat().st_size, 1)
+    codificacao = detectar_codificacao(caminho)
+    with open(caminho, 'r', encoding=codificacao, errors='replace') as arquivo:
+        cabecalho = arquivo.readline()
+    # Exportações de planilhas em português costumam usar ';'
+    separador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+
+    # Rótulos e identificadores são lidos como texto, qualquer que seja a caixa do nome
+    nomes = pd.read_csv(caminho, sep=separador, encoding=codificacao, encoding_errors='replace', nrows=0).columns
+    como_texto = {coluna: str for coluna in nomes if str(coluna).strip().lower() in ('cargo', 'setor') + COLUNAS_ID_RESPONDENTE}
+
+    with open(caminho, 'rb') as arquivo:
+        leitor = pd.read_csv(
+            arquivo, sep=separador, encoding=codificacao, encoding_errors='replace', chunksize=TAMANHO_BLOCO_IMPORTACAO,
+            dtype=como_texto,
+            skipinitialspace=True, low_memory=False
+        )
+        perguntas = None
+        linha = 2
+        for bloco in leitor:
+            if tarefa['cancelar'].is_set():
+                raise ValueError("Importação cancelada.")
+            if perguntas is None:
+                bloco.columns = bloco.columns.str.strip()
+                faltando = [c for c in ('cargo', 'setor') if c not in bloco.columns]
+                if faltando:
+                    raise ValueError(f"Colunas obrigatórias ausentes: {faltando}")
+                perguntas = [c for c in detalhamento_data['pergunta'] if c in bloco.columns]
+                if not perguntas:
+                    raise ValueError("Nenhuma coluna de pergunta (q1, q2, ...) do questionário foi encontrada.")
+                coluna_id = next((c for c in bloco.columns if c.lower() in COLUNAS_ID_RESPONDENTE), None)
+                conhecidas = set(detalhamento_data['pergunta']) | {'cargo', 'setor', coluna_id}
+                ignoradas = [c for c in bloco.columns if c not in conhecidas]
+                if ignoradas:
+                    tarefa['avisos'].append(f"Colunas ignoradas: {', '.join(map(str, ignoradas[:10]))}" + (' ...' if len(ignoradas) > 10 else ''))
+                ausentes = len(detalhamento_data) - len(perguntas)
+                if ausentes:
+                    tarefa['avisos'].append(f"{ausentes} pergunta(s) do questionário ausentes do arquivo.")
+                colunas = bloco.columns
+            else:
+                bloco.columns = colunas
+
+            limpo = validar_respostas(bloco, perguntas, relatorio, linha, conhecidos, coluna_id)
+            linha += len(bloco)
+            tarefa['descartadas'] += len(bloco) - len(limpo)
+            tarefa['linhas'] += len(limpo)
+            tarefa['progresso'] = min(arquivo.tell() / total, 1.0)
+
+            invalidas = relatorio.ocorrencias['fora_da_faixa']
+            if invalidas > LIMITE_INVALIDOS_IMPORTACAO * max(relatorio.respostas, 1):
+                raise ValueError(
+                    f"{invalidas} respostas inválidas em {relatorio.respostas} "
+                    f"(limite de {LIMITE_INVALIDOS_IMPORTACAO:.0%}): confira o formato do arquivo."
+                )
+            yield limpo
+
+def executar_importacao(tarefa, snapshot):
+    """
+    Rotina da thread de importação: lê em blocos, agrega e publica em archives/.
+
+    Cada bloco é agregado e acrescentado ao novo respostas.csv antes do próximo ser
+    lido, então a memória fica limitada ao tamanho do bloco. Os arquivos só substituem
+    os de archives/ depois de gerados e validados; o monitor de arquivos carrega o
+    novo snapshot em seguida.
+    """
+    pasta = tarefa['pasta']
+    saida = pasta / 'saida'
+    try:
+        saida.mkdir(exist_ok=True)
+        tarefa['situacao'] = 'lendo'
+        acumulador = None
+        with open(saida / 'respostas.csv', 'w', encoding='utf-8', newline='') as respostas:
+            for bloco in ler_blocos_importacao(tarefa, snapshot['dados']):
+                if acumulador is None:
+                    acumulador = AcumuladorImportacao(snapshot['dados'][5], bloco.columns, snapshot['subescalas'])
+                    bloco[['cargo', 'setor'] + acumulador.perguntas].head(0).to_csv(respostas, index=False)
+                acumulador.atualizar(bloco)
+                bloco[['cargo', 'setor'] + acumulador.perguntas].to_csv(respostas, index=False, header=False)
+        if acumulador is None or acumulador.respondentes == 0:
+            raise ValueError("O arquivo não tem respostas válidas.")
+
+        tarefa['situacao'] = 'agregando'
+        agregados = acumulador.resultado()
+        validar_dados(agregados)
+        # Na importação, contagens que não batem indicam erro na agregação: nada é publicado
+        consistencia = validar_consistencia(agregados)
+        if consistencia.erros():
+            raise ValueError(consistencia.resumo())
+        for arquivo, df in zip(COLUNAS_OBRIGATORIAS, agregados):
+            df.to_csv(saida / arquivo, index=False)
+
+        tarefa['situacao'] = 'publicando'
+        archives_dir = caminho_respostas().parent
+        publicados = list(COLUNAS_OBRIGATORIAS) + ['respostas.csv']
+        if tarefa['rotulo_onda']:
+            onda = archives_dir / 'ondas' / tarefa['rotulo_onda']
+            onda.mkdir(parents=True)
+            for arquivo in publicados:
+                if (archives_dir / arquivo).exists():
+                    shutil.copy2(archives_dir / arquivo, onda / arquivo)
+        for arquivo in publicados:
+            (saida / arquivo).replace(archives_dir / arquivo)
+
+        tarefa['situacao'] = 'concluida'
+        tarefa['progresso'] = 1.0
+        tarefa['mensagem'] = (
+            f"{tarefa['linhas']} respondentes importados em {len(acumulador.perguntas)} perguntas "
+            f"e {len(acumulador.subescalas)} subescalas."
+        )
+    except Exception as erro:
+        # Qualquer falha encerra a tarefa; senão ela ficaria ativa e bloquearia novas importações
+        tarefa['situacao'] = 'erro'
+        tarefa['mensagem'] = str(erro) or type(erro).__name__
+    finally:
+        tarefa['fim'] = time.time()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+def _bootstrap_medias(valores, contagens, n_boot, rng, max_elementos=4_000_000):
+    """
+    Reamostra as médias de várias células de uma vez, a partir dos valores distintos.
+
+    Reamostrar n observações com reposição equivale a sortear quantas vezes cada valor
+    distinto aparece (multinomial com as frequências observadas): o custo depende do
+    número de valores distintos, não do número de respondentes.
+
+    Args:
+        valores: Matriz (células × largura) com os valores distintos de cada célula
+        contagens: Matriz (células × largura) com a frequência de cada valor (0 no preenchimento)
+        n_boot: Número de reamostragens
+        rng: Gerador numpy
+        max_elementos: Limite de elementos por bloco de reamostragem
+
+    Returns:
+        Matriz (células × n_boot) com as médias reamostradas
+    """
+    n_celulas, largura = valores.shape
+    n = contagens.sum(axis=1)
+    proporcoes = contagens / n[:, None]
+    bloco = max(1, max_elementos // max(1, n_celulas * largura))
+    medias = np.empty((n_celulas, n_boot))
+
+    for inicio in range(0, n_boot, bloco):
+        b = min(bloco, n_boot - inicio)
+        sorteio = rng.multinomial(n, proporcoes, size=(b, n_celulas))
+        medias[:, inicio:inicio + b] = np.einsum('bcl,cl->cb', sorteio, valores) / n[:, None]
+
+    return medias
+
+@st.cache_data(show_spinner=False)
+def calcular_intervalos_confianca(dados, dimensao, escores=None, n_boot=10000, nivel=0.95, semente=42):
+    """
+    Calcula intervalos de confiança da média para cada célula (membro da dimensão, subescala).
+
+    Usa bootstrap percentil sobre os escores brutos quando disponíveis e,
+    para as demais células, o intervalo t analítico a partir de desvio e qtd.
+
+    Args:
+        dados: DataFrame agregado (cargo_data ou setor_data)
+        dimensao: 'cargo' ou 'setor'
+        escores: Escores por respondente (calcular_escores_respondentes) ou None
+        n_boot: Número de reamostragens bootstrap
+        nivel: Nível de confiança
+        semente: Semente do gerador para resultados reprodutíveis
+
+    Returns:
+        DataFrame com dimensao, subescala, ic_inf, ic_sup e metodo
+    """
+    from scipy import stats
+
+    resultado = dados[[dimensao, 'subescala', 'media', 'qtd', 'desvio']]
+
+    # Intervalo t analítico (fallback)
+    qtd = resultado['qtd'].to_numpy(dtype=float)
+    erro_padrao = resultado['desvio'].to_numpy(dtype=float) / np.sqrt(qtd)
+    t_critico = stats.t.ppf(0.5 + nivel / 2, np.where(qtd > 1, qtd - 1, np.nan))
+    resultado['ic_inf'] = resultado['media'] - t_critico * erro_padrao
+    resultado['ic_sup'] = resultado['media'] + t_critico * erro_padrao
+    resultado['metodo'] = 'analítico'
+
+    if escores is not None and dimensao in escores.columns:
+        celulas = escores[[dimensao, 'subescala', 'escore']].sort_values([dimensao, 'subescala'])
+        grupos = celulas.groupby([dimensao, 'subescala'], sort=False)
+        n_por_celula = grupos.size()
+        n_por_celula = n_por_celula[n_por_celula > 1]
+
+        if len(n_por_celula) > 0:
+            # Frequência de cada valor distinto do escore em cada célula
+            frequencias = celulas.set_index([dimensao, 'subescala']).loc[n_por_celula.index].reset_index()
+            frequencias = frequencias.groupby([dimensao, 'subescala', 'escore'], sort=False).size()
+            codigo = n_por_celula.index.get_indexer(frequencias.index.droplevel('escore'))
+            distintos = np.bincount(codigo, minlength=len(n_por_celula))
+            posicao = frequencias.groupby(level=[0, 1], sort=False).cumcount().to_numpy()
+
+            valores = np.zeros((len(distintos), distintos.max()))
+            contagens = np.zeros(valores.shape, dtype=np.int64)
+            valores[codigo, posicao] = frequencias.index.get_level_values('escore').to_numpy(dtype=float)
+            contagens[codigo, posicao] = frequencias.to_numpy()
+
+            # Processa células com número parecido de valores distintos juntas para reduzir o preenchimento
+            rng = np.random.default_rng(semente)
+            alpha = (1 - nivel) / 2
+            limites = np.empty((len(distintos), 2))
+            ordem = np.argsort(distintos)
+            for lote in np.array_split(ordem, max(1, len(ordem) // 64)):
+                largura = distintos[lote].max()
+                medias = _bootstrap_medias(valores[lote, :largura], contagens[lote, :largura], n_boot, rng)
+                limites[lote] = np.quantile(medias, [alpha, 1 - alpha], axis=1).T
+
+            bootstrap = pd.DataFrame(limites, index=n_por_celula.index, columns=['ic_inf', 'ic_sup'])
+            resultado = resultado.set_index([dimensao, 'subescala'])
+            comuns = resultado.index.intersection(bootstrap.index)
+            resultado.loc[comuns, ['ic_inf', 'ic_sup']] = bootstrap.loc[comuns].to_numpy()
+            resultado.loc[comuns, 'metodo'] = 'bootstrap'
+            resultado = resultado.reset_index()
+
+    return resultado[[dimensao, 'subescala', 'ic_inf', 'ic_sup', 'metodo']]
+
+def ajustar_p_valores(p, metodo='fdr_bh'):
+    """
+    Ajusta p-valores para comparações múltiplas, coluna a coluna.
+
+    Cada coluna é uma família de testes; valores NaN são ignorados.
+
+    Args:
+        p: Matriz (testes × famílias) de p-valores
+        metodo: 'fdr_bh' (Benjamini-Hochberg), 'holm' ou 'bonferroni'
+
+    Returns:
+        Matriz de p-valores ajustados com o mesmo formato
+    """
+    p = np.asarray(p, dtype=float)
+    validos = ~np.isnan(p)
+    m = validos.sum(axis=0)
+
+    if metodo == 'bonferroni':
+        return np.minimum(p * m, 1.0)
+
+    # NaN vão para o fim da ordenação e não interferem nos acumulados
+    ordem = np.argsort(np.where(validos, p, np.inf), axis=0)
+    p_ordenado = np.take_along_axis(p, ordem, axis=0)
+    posto = np.arange(1, p.shape[0] + 1).reshape((-1,) + (1,) * (p.ndim - 1))
+
+    if metodo == 'holm':
+        ajustado = np.maximum.accumulate(p_ordenado * (m - posto + 1), axis=0)
+    else:
+        escalado = np.where(np.isnan(p_ordenado), np.inf, p_ordenado * m / posto)
+        ajustado = np.flip(np.minimum.accumulate(np.flip(escalado, axis=0), axis=0), axis=0)
+        ajustado[np.isnan(p_ordenado)] = np.nan
+
+    resultado = np.empty_like(p)
+    np.put_along_axis(resultado, ordem, np.minimum(ajustado, 1.0), axis=0)
+    return resultado
+
+@st.cache_resource(show_spinner=False)
+def calcular_comparacoes_pareadas(dados, dimensao, metodo='fdr_bh'):
+    """
+    Testa a diferença de médias entre todos os pares de membros da dimensão (teste de Welch).
+
+    Os testes são feitos de uma vez sobre a grade de pares × subescalas a partir
+    de media, desvio e qtd. A correção é aplicada por subescala.
+
+    Args:
+        dados: DataFrame agregado (cargo_data ou setor_data)
+        dimensao: 'cargo' ou 'setor'
+        metodo: Método de correção (ver ajustar_p_valores)
+
+    Returns:
+        Dicionário com membros, subescalas e as matrizes (membro × membro × subescala)
+        'diferenca' (linha - coluna) e 'p_ajustado'
+    """
+    from scipy import special
+
+    media = dados.pivot_table(index=dimensao, columns='subescala', values='media')
+    desvio = dados.pivot_table(index=dimensao, columns='subescala', values='desvio').reindex_like(media)
+    qtd = dados.pivot_table(index=dimensao, columns='subescala', values='qtd').reindex_like(media)
+
+    m = media.to_numpy(dtype=float)
+    n = qtd.to_numpy(dtype=float)
+    variancia = desvio.to_numpy(dtype=float) ** 2 / n
+
+    i, j = np.triu_indices(len(media), k=1)
+    diferenca = m[i] - m[j]
+    erro2 = variancia[i] + variancia[j]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = diferenca / np.sqrt(erro2)
+        gl = erro2 ** 2 / (variancia[i] ** 2 / (n[i] - 1) + variancia[j] ** 2 / (n[j] - 1))
+    p = 2 * special.stdtr(gl, -np.abs(t))
+    p_ajustado = ajustar_p_valores(p, metodo)
+
+    forma = (len(media), len(media), media.shape[1])
+    matriz_dif = np.full(forma, np.nan, dtype=np.float32)
+    matriz_p = np.full(forma, np.nan, dtype=np.float32)
+    matriz_dif[i, j], matriz_dif[j, i] = diferenca, -diferenca
+    matriz_p[i, j], matriz_p[j, i] = p_ajustado, p_ajustado
+
+    # Resultado compartilhado entre sessões: somente leitura
+    matriz_dif.flags.writeable = False
+    matriz_p.flags.writeable = False
+
+    return {
+        'membros': media.index.tolist(),
+        'subescalas': media.columns.tolist(),
+        'diferenca': matriz_dif,
+        'p_ajustado': matriz_p
+    }
+
+class AcumuladorCovariancia:
+    """
+    Acumula, lote a lote, as somas necessárias para a covariância pareada entre itens.
+
+    Cada par de itens usa apenas os respondentes que responderam ambos.
+    Acumuladores de lotes diferentes podem ser combinados por soma.
+    """
+
+    def __init__(self, itens):
+        self.itens = list(itens)
+        k = len(self.itens)
+        self.n = np.zeros((k, k))
+        self.soma = np.zeros((k, k))
+        self.soma_produtos = np.zeros((k, k))
+
+    def atualizar(self, lote):
+        """Incorpora um lote de respostas (DataFrame com uma coluna por item)."""
+        x = lote.reindex(columns=self.itens).to_numpy(dtype=float)
+        observado = ~np.isnan(x)
+        x0 = np.where(observado, x, 0.0)
+        o = observado.astype(float)
+        self.n += o.T @ o
+        self.soma += x0.T @ o
+        self.soma_produtos += x0.T @ x0
+        return self
+
+    def combinar(self, outro):
+        """Soma as estatísticas de outro acumulador com os mesmos itens."""
+        self.n += outro.n
+        self.soma += outro.soma
+        self.soma_produtos += outro.soma_produtos
+        return self
+
+    def covariancia(self):
+        """Retorna a matriz de covariância pareada (NaN onde n < 2)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (self.soma_produtos - self.soma * self.soma.T / self.n) / (self.n - 1)
+        return np.where(self.n > 1, cov, np.nan)
+
+def calcular_confiabilidade(acumulador, detalhamento_data):
+    """
+    Calcula alfa de Cronbach, correlação item-total corrigida e alfa se o item for excluído.
+
+    Args:
+        acumulador: AcumuladorCovariancia com as respostas já incorporadas
+        detalhamento_data: DataFrame com o mapeamento subescala → pergunta
+
+    Returns:
+        Dicionário subescala -> {'itens', 'respondentes', 'alfa' e 'perguntas' (DataFrame
+        de pergunta, r_item_total e alfa_sem_item, da maior para a menor correlação)}
+    """
+    cov_total = acumulador.covariancia()
+    posicao = {item: i for i, item in enumerate(acumulador.itens)}
+    mapa_itens = detalhamento_data.groupby('subescala')['pergunta'].apply(list)
+
+    indice = {}
+    for subescala, perguntas in mapa_itens.items():
+        perguntas = [p for p in perguntas if p in posicao]
+        if not perguntas:
+            continue
+        idx = [posicao[p] for p in perguntas]
+        cov = cov_total[np.ix_(idx, idx)]
+        k = len(idx)
+        variancias = np.diag(cov)
+        var_total = cov.sum()
+        alfa = k / (k - 1) * (1 - variancias.sum() / var_total) if k > 1 else np.nan
+
+        # Escala sem o item: variância e covariância com o item
+        cov_item_resto = cov.sum(axis=1) - variancias
+        var_resto = var_total - 2 * cov.sum(axis=1) + variancias
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r_item_total = cov_item_resto / np.sqrt(variancias * var_resto)
+            alfa_sem_item = (k - 1) / (k - 2) * (1 - (variancias.sum() - variancias) / var_resto) if k > 2 else np.full(k, np.nan)
+
+        perguntas_confiab = pd.DataFrame({
+            'pergunta': perguntas,
+            'r_item_total': r_item_total if k > 1 else np.nan,
+            'alfa_sem_item': alfa_sem_item
+        })
+        indice[subescala] = {
+            'itens': k,
+            'respondentes': int(acumulador.n[np.ix_(idx, idx)].min()),
+            'alfa': alfa,
+            'perguntas': perguntas_confiab.sort_values('r_item_total', ascending=False)
+        }
+
+    return indice
+
+@st.cache_resource(show_spinner=False)
+def obter_estado_confiabilidade(caminho, itens):
+    """Estado compartilhado da leitura incremental do arquivo de respostas."""
+    return {
+        'acumulador': AcumuladorCovariancia(itens),
+        'colunas': None,
+        'posicao': 0,
+        'lock': threading.Lock()
+    }
+
+def sincronizar_confiabilidade(estado, caminho, tamanho_bloco=8 * 1024 * 1024):
+    """
+    Lê apenas as linhas acrescentadas ao arquivo desde a última leitura.
+
+    O arquivo é percorrido em blocos de bytes, então a memória fica limitada
+    ao tamanho do bloco. Uma linha incompleta no fim fica para a próxima leitura.
+
+    Args:
+        estado: Estado retornado por obter_estado_confiabilidade
+        caminho: Caminho do arquivo de respostas
+        tamanho_bloco: Tamanho de cada bloco lido em bytes
+
+    Returns:
+        AcumuladorCovariancia atualizado
+    """
+    with estado['lock']:
+        info = caminho.stat()
+        if info.st_size < estado['posicao'] or info.st_ino != estado.get('inode', info.st_ino):
+            # Arquivo substituído: recomeça a leitura do zero
+            estado['acumulador'] = AcumuladorCovariancia(estado['acumulador'].itens)
+            estado['colunas'] = None
+            estado['posicao'] = 0
+        estado['inode'] = info.st_ino
+
+        with open(caminho, 'rb') as arquivo:
+            if estado['colunas'] is None:
+                cabecalho = arquivo.readline()
+                if not cabecalho.endswith(b'\n'):
+                    return estado['acumulador']
+                estado['colunas'] = pd.read_csv(io.BytesIO(cabecalho)).columns.tolist()
+                estado['posicao'] = arquivo.tell()
+
+            arquivo.seek(estado['posicao'])
+            pendente = b''
+            while True:
+                bloco = arquivo.read(tamanho_bloco)
+                if not bloco:
+                    break
+                bloco = pendente + bloco
+                corte = bloco.rfind(b'\n') + 1
+                pendente = bloco[corte:]
+                if corte == 0:
+                    continue
+                lote = pd.read_csv(io.BytesIO(bloco[:corte]), header=None, names=estado['colunas'])
+                estado['acumulador'].atualizar(lote)
+                estado['posicao'] += corte
+
+    return estado['acumulador']
+
+def obter_confiabilidade(estado, caminho, detalhamento_data):
+    """
+    Confiabilidade por subescala (ver calcular_confiabilidade), recalculada só quando o
+    arquivo de respostas recebe linhas novas; as reexecuções da página consultam o
+    dicionário pronto.
+
+    Args:
+        estado: Estado retornado por obter_estado_confiabilidade
+        caminho: Caminho do arquivo de respostas
+        detalhamento_data: DataFrame com o mapeamento subescala → pergunta
+
+    Returns:
+        Dicionário subescala -> confiabilidade
+    """
+    sincronizar_confiabilidade(estado, caminho)
+    with estado['lock']:
+        versao = (estado.get('inode'), estado['posicao'], tuple(detalhamento_data['subescala']))
+        if estado.get('versao_indice') != versao:
+            estado['indice'] = calcular_confiabilidade(estado['acumulador'], detalhamento_data)
+            estado['versao_indice'] = versao
+        return estado['indice']
+
+def classificar_risco(prob, sev):
+    """
+    Classifica o risco com base em probabilidade e severidade.
+    
+    Probabilidade (prob): % de pessoas em risco alto (0-1)
+    - ≥0.60 (≥60%) = Permanente (peso 2.0)
+    - 0.40-0.59 (40-59%) = Intermitente (peso 1.5)
+    - 0.20-0.39 (20-39%) = Esporádica (peso 1.0)
+    - <0.20 (<20%) = Eventual (peso 0.5)
+    
+    Severidade (sev): Score médio (0-5)
+    - >3.66 = Crítica (peso 10.0)
+    - 2.33-3.66 = Grave (peso 3.0)
+    - 1.50-2.33 = Moderada (peso 2.0)
+    - <1.50 = Leve (peso 1.0)
+    """
+    # Mapear probabilidade para peso
+    if prob >= 0.60:
+        prob_peso = 2.0
+    elif prob >= 0.40:
+        prob_peso = 1.5
+    elif prob >= 0.20:
+        prob_peso = 1.0
+    else:
+        prob_peso = 0.5
+    
+    # Mapear severidade para peso
+    if sev > 3.66:
+        sev_peso = 10.0
+    elif sev >= 2.33:
+        sev_peso = 3.0
+    elif sev >= 1.50:
+        sev_peso = 2.0
+    else:
+        sev_peso = 1.0
+    
+    # Calcular pontuação
+    pontuacao = prob_peso * sev_peso
+    
+    # Classificar resultado
+    if pontuacao >= 5.0:
+        return 'CRÍTICO', pontuacao
+    elif pontuacao >= 3.0:
+        return 'ALTO', pontuacao
+    elif pontuacao >= 1.5:
+        return 'MÉDIO', pontuacao
+    else:
+        return 'BAIXO', pontuacao
+
+LIMITE_PONTOS_WEBGL = 100
+LIMIAR_ALTO_RISCO = 3.66
+LIMIAR_MEDIO_RISCO = 2.33
+
+def classificar_risco_vetorizado(prob, sev):
+    """
+    Versão vetorizada de classificar_risco para muitos pontos de uma vez.
+
+    Args:
+        prob: Array de probabilidades (0-1)
+        sev: Array de severidades (0-5)
+
+    Returns:
+        Tupla (classificacao, pontuacao) de arrays
+    """
+    prob = np.asarray(prob, dtype=float)
+    sev = np.asarray(sev, dtype=float)
+    prob_peso = np.select([prob >= 0.60, prob >= 0.40, prob >= 0.20], [2.0, 1.5, 1.0], default=0.5)
+    sev_peso = np.select([sev > 3.66, sev >= 2.33, sev >= 1.50], [10.0, 3.0, 2.0], default=1.0)
+    pontuacao = prob_peso * sev_peso
+    classificacao = np.select(
+        [pontuacao >= 5.0, pontuacao >= 3.0, pontuacao >= 1.5],
+        ['CRÍTICO', 'ALTO', 'MÉDIO'],
+        default='BAIXO'
+    )
+    return classificacao, pontuacao
+
+@st.cache_data(show_spinner=False)
+def calcular_matriz_setores(setor_data, escores=None):
+    """
+    Posiciona cada combinação setor × subescala na matriz de risco.
+
+    A severidade é a criticidade média do setor. A probabilidade (% em risco alto) é
+    medida nos escores dos respondentes, como na organização, quando há respostas
+    brutas do setor; senão é estimada pela aproximação normal a partir da criticidade
+    média e do desvio.
+
+    Args:
+        setor_data: DataFrame com setor, subescala, criticidade_media, qtd, desvio e positiva
+        escores: Escores por respondente (calcular_escores_respondentes) ou None
+
+    Returns:
+        DataFrame com setor, subescala, probabilidade, severidade, n_respondentes e
+        probabilidade_estimada (True onde a probabilidade veio da aproximação normal)
+    """
+    from scipy import special
+
+    severidade = setor_data['criticidade_media'].to_numpy(dtype=float)
+    desvio = setor_data['desvio'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probabilidade = special.ndtr((severidade - LIMIAR_ALTO_RISCO) / desvio)
+    # Sem variação no setor: todos acima ou todos abaixo do limiar
+    sem_desvio = ~(desvio > 0)
+    probabilidade[sem_desvio] = (severidade[sem_desvio] > LIMIAR_ALTO_RISCO).astype(float)
+
+    estimada = np.ones(len(setor_data), dtype=bool)
+    if escores is not None and 'setor' in escores.columns:
+        positiva = escores['subescala'].map(setor_data.drop_duplicates('subescala').set_index('subescala')['positiva'])
+        escore = escores['escore'].to_numpy(dtype=float)
+        criticidade = np.where(positiva.fillna(False).to_numpy(dtype=bool), sum(FAIXA_RESPOSTAS) - escore, escore)
+        medida = pd.Series(criticidade > LIMIAR_ALTO_RISCO).groupby(
+            [escores['setor'].to_numpy(), escores['subescala'].to_numpy()]
+        ).mean()
+        medida = medida.reindex(pd.MultiIndex.from_arrays([setor_data['setor'], setor_data['subescala']])).to_numpy()
+        estimada = np.isnan(medida)
+        probabilidade[~estimada] = medida[~estimada]
+
+    return pd.DataFrame({
+        'setor': setor_data['setor'].to_numpy(),
+        'subescala': setor_data['subescala'].to_numpy(),
+        'probabilidade': probabilidade,
+        'severidade': severidade,
+        'n_respondentes': setor_data['qtd'].to_numpy(),
+        'probabilidade_estimada': estimada
+    })
+
+@st.cache_resource(show_spinner=False)
+def template_zonas_matriz():
+    """
+    Monta uma única vez o fundo da matriz de risco (zonas coloridas e linhas de corte)
+    como template de layout, sobre o template padrão ativo.
+
+    Returns:
+        go.layout.Template com as formas e anotações da matriz
+    """
+    fundo = go.Figure()
+
+    # ZONAS CRÍTICAS (Vermelho) - Severidade > 3.66
+    fundo.add_shape(type="rect", x0=6, y0=3.66, x1=10, y1=5, fillcolor="rgba(220, 38, 38, 0.15)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=4, y0=3.66, x1=6, y1=5, fillcolor="rgba(220, 38, 38, 0.15)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=2, y0=3.66, x1=4, y1=5, fillcolor="rgba(220, 38, 38, 0.15)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=0, y0=3.66, x1=2, y1=5, fillcolor="rgba(220, 38, 38, 0.15)", line=dict(width=0), layer="below")
+
+    # ZONAS ALTAS (Laranja) - Severidade 2.33-3.66
+    fundo.add_shape(type="rect", x0=6, y0=2.33, x1=10, y1=3.66, fillcolor="rgba(245, 158, 11, 0.12)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=4, y0=2.33, x1=6, y1=3.66, fillcolor="rgba(245, 158, 11, 0.12)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=2, y0=2.33, x1=4, y1=3.66, fillcolor="rgba(245, 158, 11, 0.12)", line=dict(width=0), layer="below")
+
+    # ZONAS MÉDIAS (Amarelo)
+    fundo.add_shape(type="rect", x0=0, y0=2.33, x1=2, y1=3.66, fillcolor="rgba(234, 179, 8, 0.10)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=2, y0=1.50, x1=4, y1=2.33, fillcolor="rgba(234, 179, 8, 0.10)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=4, y0=1.50, x1=6, y1=2.33, fillcolor="rgba(234, 179, 8, 0.10)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=6, y0=1.50, x1=10, y1=2.33, fillcolor="rgba(234, 179, 8, 0.10)", line=dict(width=0), layer="below")
+
+    # ZONAS BAIXAS (Azul)
+    fundo.add_shape(type="rect", x0=0, y0=0, x1=2, y1=1.50, fillcolor="rgba(59, 130, 246, 0.08)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=2, y0=0, x1=4, y1=1.50, fillcolor="rgba(59, 130, 246, 0.08)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=4, y0=0, x1=6, y1=1.50, fillcolor="rgba(59, 130, 246, 0.08)", line=dict(width=0), layer="below")
+    fundo.add_shape(type="rect", x0=6, y0=0, x1=10, y1=1.50, fillcolor="rgba(59, 130, 246, 0.08)", line=dict(width=0), layer="below")
+
+    # ===== LINHAS HORIZONTAIS =====
+    fundo.add_hline(y=3.66, line_dash="dash", line_color="#dc2626", line_width=2.5,
+                annotation_text="Severidade Crítica (>3.66)", annotation_position="right",
+                annotation_font=dict(size=12, color='#dc2626', family='Arial', weight='bold'))
+    fundo.add_hline(y=2.33, line_dash="dash", line_color="#f59e0b", line_width=2,
+                annotation_text="Severidade Grave (2.33-3.66)", annotation_position="right",
+                annotation_font=dict(size=11, color='#f59e0b', family='Arial'))
+    fundo.add_hline(y=1.50, line_dash="dash", line_color="#eab308", line_width=1.5,
+                annotation_text="Severidade Moderada (1.50-2.33)", annotation_position="right",
+                annotation_font=dict(size=10, color='#eab308', family='Arial'))
+
+    # ===== LINHAS VERTICAIS =====
+    fundo.add_vline(x=6, line_dash="dash", line_color="#dc2626", line_width=2.5,
+                annotation_text="Prob. Permanente (60%)", annotation_position="top",
+                annotation_font=dict(size=12, color='#dc2626', family='Arial', weight='bold'))
+    fundo.add_vline(x=4, line_dash="dash", line_color="#f59e0b", line_width=2,
+                annotation_text="Prob. Intermitente (40%)", annotation_position="top",
+                annotation_font=dict(size=11, color='#f59e0b', family='Arial'))
+    fundo.add_vline(x=2, line_dash="dash", line_color="#eab308", line_width=1.5,
+                annotation_text="Prob. Esporádica (20%)", annotation_position="top",
+                annotation_font=dict(size=10, color='#eab308', family='Arial'))
+
+    template = go.layout.Template(pio.templates[pio.templates.default]) if pio.templates.default else go.layout.Template()
+    # O Plotly só desenha itens de template que tenham nome
+    template.layout.shapes = [forma.update(name=f'zona_{i}') for i, forma in enumerate(fundo.layout.shapes)]
+    template.layout.annotations = [nota.update(name=f'nota_{i}') for i, nota in enumerate(fundo.layout.annotations)]
+    return template
+
+def listar_ondas():
+    """
+    Lista as ondas da pesquisa em archives/ondas/<rótulo>/, em ordem cronológica.
+
+    Cada onda é uma pasta com os mesmos CSVs de archives/; o rótulo da pasta
+    (ex.: 2025-07) define a ordem.
+
+    Returns:
+        Lista de tuplas (rótulo, assinatura) onde a assinatura muda quando algum arquivo muda
+    """
+    if getattr(sys, 'frozen', False):
+        base_dir = Path(sys._MEIPASS)
+    else:
+        base_dir = Path(__file__).parent
+
+    ondas_dir = base_dir / 'archives' / 'ondas'
+    if not ondas_dir.exists():
+        return []
+
+    ondas = []
+    for pasta in sorted(p for p in ondas_dir.iterdir() if p.is_dir()):
+        assinatura = tuple(sorted((arq.name, arq.stat().st_mtime_ns) for arq in pasta.glob('*.csv')))
+        ondas.append((str(pasta), assinatura))
+    return ondas
+
+@st.cache_data(show_spinner=False)
+def resumir_onda(pasta, assinatura):
+    """
+    Resume uma onda nos níveis organização, cargo e setor.
+
+    Args:
+        pasta: Caminho da pasta da onda
+        assinatura: Assinatura dos arquivos (invalida o cache quando mudam)
+
+    Returns:
+        DataFrame longo com nivel, grupo, subescala, media, perc_alto e classe
+    """
+    pasta = Path(pasta)
+    ranking = pd.read_csv(pasta / 'ranking_subescalas_criticas.csv')
+    matriz = pd.read_csv(pasta / 'matriz_risco.csv')
+    cargo = pd.read_csv(pasta / 'subescala_por_cargo.csv')
+    setor = pd.read_csv(pasta / 'subescala_por_setor.csv')
+
+    classes = matriz.set_index('subescala').apply(
+        lambda row: classificar_risco(row['probabilidade'], row['severidade'])[0], axis=1
+    )
+    org = pd.DataFrame({
+        'nivel': 'subescala',
+        'grupo': 'Organização',
+        'subescala': ranking['subescala'],
+        'media': ranking['media_score'],
+        'perc_alto': ranking['perc_alto'],
+        'classe': ranking['subescala'].map(classes)
+    })
+
+    partes = [org]
+    for nivel, dados in [('cargo', cargo), ('setor', setor)]:
+        detalhe = dados.rename(columns={nivel: 'grupo'})[['grupo', 'subescala', 'media']]
+        geral = detalhe.groupby('grupo', as_index=False)['media'].mean().assign(subescala='(Média geral)')
+        partes.append(pd.concat([detalhe, geral], ignore_index=True).assign(nivel=nivel))
+
+    resumo = pd.concat(partes, ignore_index=True)
+    resumo['onda'] = pasta.name
+    return resumo[['nivel', 'grupo', 'subescala', 'onda', 'media', 'perc_alto', 'classe']]
+
+@st.cache_data(show_spinner=False)
+def calcular_deltas_onda(resumo_anterior, resumo_atual):
+    """
+    Calcula as variações de uma onda em relação à anterior.
+
+    Args:
+        resumo_anterior: Resumo da onda anterior (resumir_onda)
+        resumo_atual: Resumo da onda atual
+
+    Returns:
+        Resumo da onda atual com delta_media, delta_perc_alto e classe_anterior
+    """
+    chaves = ['nivel', 'grupo', 'subescala']
+    anterior = resumo_anterior[chaves + ['media', 'perc_alto', 'classe']].rename(
+        columns={'media': 'media_anterior', 'perc_alto': 'perc_alto_anterior', 'classe': 'classe_anterior'}
+    )
+    deltas = resumo_atual.merge(anterior, on=chaves, how='left')
+    deltas['delta_media'] = deltas['media'] - deltas['media_anterior']
+    deltas['delta_perc_alto'] = deltas['perc_alto'] - deltas['perc_alto_anterior']
+    deltas['mudou_classe'] = deltas['classe'].notna() & deltas['classe_anterior'].notna() & (deltas['classe'] != deltas['classe_anterior'])
+    return deltas
+
+@st.cache_resource(show_spinner=False)
+def carregar_historico_ondas(ondas):
+    """
+    Carrega todas as ondas e deixa as variações prontas para consulta.
+
+    Os deltas de cada par de ondas consecutivas são calculados uma única vez
+    (cache por par) quando a onda aparece, e indexados por (nivel, onda).
+
+    Args:
+        ondas: Saída de listar_ondas (tupla)
+
+    Returns:
+        Dicionário com 'rotulos', 'deltas' {(nivel, onda): DataFrame}
+        e 'tendencia' {nivel: DataFrame indexado por (grupo, subescala)}
+    """
+    resumos = [resumir_onda(pasta, assinatura) for pasta, assinatura in ondas]
+    rotulos = [Path(pasta).name for pasta, _ in ondas]
+
+    deltas = {}
+    for anterior, atual, rotulo in zip(resumos, resumos[1:], rotulos[1:]):
+        tabela = calcular_deltas_onda(anterior, atual)
+        for nivel, bloco in tabela.groupby('nivel'):
+            deltas[(nivel, rotulo)] = bloco.reset_index(drop=True)
+
+    historico = pd.concat(resumos, ignore_index=True) if resumos else pd.DataFrame()
+    tendencia = {
+        nivel: bloco.set_index(['grupo', 'subescala']).sort_index()
+        for nivel, bloco in historico.groupby('nivel')
+    } if len(historico) else {}
+
+    return {'rotulos': rotulos, 'deltas': deltas, 'tendencia': tendencia}
+
+SEPARADOR_SETOR = ' / '
+
+@st.cache_resource(show_spinner=False)
+def construir_arvore_setores(setor_data, separador=SEPARADOR_SETOR):
+    """
+    Monta a hierarquia de setores a partir dos nomes (ex.: "Engenharia / Qualidade")
+    e agrega as estatísticas de cada nível, ponderadas pelo número de respondentes.
+
+    As agregações são feitas uma única vez, de baixo para cima, somando as
+    estatísticas suficientes (n, soma, soma dos quadrados) de cada nó no pai.
+
+    Args:
+        setor_data: DataFrame com setor, subescala, media, qtd e desvio
+        separador: Separador de níveis no nome do setor
+
+    Returns:
+        Dicionário com a estrutura da árvore ('caminhos', 'rotulos', 'pais', 'niveis',
+        'filhos', 'indice', 'respondentes') e as matrizes (nó × subescala) 'media', 'qtd' e 'desvio'
+    """
+    caminhos = ['Organização']
+    rotulos = ['Organização']
+    pais = [-1]
+    niveis = [0]
+    indice = {'Organização': 0}
+
+    for setor in sorted(setor_data['setor'].unique()):
+        partes = [p.strip() for p in setor.split(separador)]
+        pai = 0
+        for profundidade in range(1, len(partes) + 1):
+            caminho = separador.join(partes[:profundidade])
+            if caminho not in indice:
+                indice[caminho] = len(caminhos)
+                caminhos.append(caminho)
+                rotulos.append(partes[profundidade - 1])
+                pais.append(pai)
+                niveis.append(profundidade)
+            pai = indice[caminho]
+        indice[setor] = pai
+
+    pais = np.array(pais)
+    niveis = np.array(niveis)
+
+    media = setor_data.pivot_table(index='setor', columns='subescala', values='media')
+    qtd = setor_data.pivot_table(index='setor', columns='subescala', values='qtd').reindex_like(media).fillna(0)
+    desvio = setor_data.pivot_table(index='setor', columns='subescala', values='desvio').reindex_like(media).fillna(0)
+
+    # Estatísticas suficientes por folha: n, soma e soma dos quadrados
+    n_folha = qtd.to_numpy(dtype=float)
+    media_folha = media.fillna(0).to_numpy(dtype=float)
+    soma_folha = n_folha * media_folha
+    quad_folha = np.maximum(n_folha - 1, 0) * desvio.to_numpy(dtype=float) ** 2 + n_folha * media_folha ** 2
+
+    estatisticas = np.zeros((len(caminhos), media.shape[1], 3))
+    linhas = np.array([indice[setor] for setor in media.index])
+    np.add.at(estatisticas, linhas, np.stack((n_folha, soma_folha, quad_folha), axis=2))
+
+    for profundidade in range(niveis.max(), 0, -1):
+        nos = np.where(niveis == profundidade)[0]
+        np.add.at(estatisticas, pais[nos], estatisticas[nos])
+
+    # Colaboradores por nó: maior qtd da folha entre as subescalas, somada para cima
+    respondentes = np.zeros(len(caminhos))
+    np.add.at(respondentes, linhas, n_folha.max(axis=1))
+    for profundidade in range(niveis.max(), 0, -1):
+        nos = np.where(niveis == profundidade)[0]
+        np.add.at(respondentes, pais[nos], respondentes[nos])
+
+    n = estatisticas[:, :, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_no = estatisticas[:, :, 1] / n
+        desvio_no = np.sqrt(np.maximum(estatisticas[:, :, 2] - n * media_no ** 2, 0) / (n - 1))
+
+    filhos = {no: np.where(pais == no)[0] for no in range(len(caminhos))}
+
+    return {
+        'caminhos': caminhos,
+        'rotulos': rotulos,
+        'pais': pais,
+        'niveis': niveis,
+        'filhos': filhos,
+        'indice': indice,
+        'subescalas': media.columns.tolist(),
+        'media': media_no,
+        'qtd': n,
+        'desvio': desvio_no,
+        'respondentes': respondentes
+    }
+
+@st.cache_resource(show_spinner=False)
+def agrupar_perfis_risco(dados, dimensao, k, n_inicios=10, max_iter=100, semente=42):
+    """
+    Agrupa os membros da dimensão pelo perfil de médias nas subescalas (k-means).
+
+    A inicialização é k-means++ com vários reinícios; atribuição e atualização dos
+    centróides são feitas de forma vetorizada sobre todos os membros. O resultado
+    fica em cache para cada versão dos dados, dimensão e k.
+
+    Args:
+        dados: DataFrame agregado (cargo_data ou setor_data)
+        dimensao: 'cargo' ou 'setor'
+        k: Número de grupos
+        n_inicios: Reinícios do k-means (fica o de menor inércia)
+        max_iter: Máximo de iterações por reinício
+        semente: Semente do gerador aleatório
+
+    Returns:
+        Dicionário com membros, subescalas, 'grupos' (grupo de cada membro, 0 = perfil
+        mais crítico), 'centroides' e 'criticidade' (grupo × subescala), 'tamanhos',
+        'variancia_explicada' e 'coordenadas' (projeção dos membros em 2 componentes)
+    """
+    media = dados.pivot_table(index=dimensao, columns='subescala', values='media')
+    criticidade = dados.pivot_table(index=dimensao, columns='subescala', values='criticidade_media').reindex_like(media)
+
+    # Subescala sem resposta no membro assume a média da subescala
+    X = media.fillna(media.mean()).to_numpy(dtype=float)
+    C = criticidade.fillna(criticidade.mean()).to_numpy(dtype=float)
+    k = int(min(k, len(X)))
+    rng = np.random.default_rng(semente)
+    norma_x = (X ** 2).sum(axis=1)
+
+    melhor_inercia = np.inf
+    for _ in range(n_inicios):
+        centros = np.empty((k, X.shape[1]))
+        centros[0] = X[rng.integers(len(X))]
+        d2 = ((X - centros[0]) ** 2).sum(axis=1)
+        for c in range(1, k):
+            prob = d2 / d2.sum() if d2.sum() > 0 else None
+            centros[c] = X[rng.choice(len(X), p=prob)]
+            d2 = np.minimum(d2, ((X - centros[c]) ** 2).sum(axis=1))
+
+        for _ in range(max_iter):
+            dist = norma_x[:, None] - 2 * X @ centros.T + (centros ** 2).sum(axis=1)
+            grupos = dist.argmin(axis=1)
+            indicadora = np.eye(k)[grupos]
+            contagem = indicadora.sum(axis=0)[:, None]
+            # Grupo que ficou vazio mantém o centróide anterior
+            novos = np.where(contagem > 0, indicadora.T @ X / np.maximum(contagem, 1), centros)
+            if np.allclose(novos, centros):
+                break
+            centros = novos
+
+        dist = norma_x[:, None] - 2 * X @ centros.T + (centros ** 2).sum(axis=1)
+        grupos = dist.argmin(axis=1)
+        inercia = np.maximum(dist[np.arange(len(X)), grupos], 0).sum()
+        if inercia < melhor_inercia:
+            melhor_inercia, melhor_grupos = inercia, grupos
+
+    indicadora = np.eye(k)[melhor_grupos]
+    tamanhos = indicadora.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        centroides = indicadora.T @ X / tamanhos[:, None]
+        criticidade_grupo = indicadora.T @ C / tamanhos[:, None]
+
+    # Grupos numerados do perfil mais crítico para o menos crítico
+    ordem = np.argsort(-np.nan_to_num(criticidade_grupo.mean(axis=1), nan=-np.inf))
+    posicao = np.empty(k, dtype=int)
+    posicao[ordem] = np.arange(k)
+
+    centrado = X - X.mean(axis=0)
+    total = (centrado ** 2).sum()
+    _, _, vetores = np.linalg.svd(centrado, full_matrices=False)
+    coordenadas = centrado @ vetores[:2].T
+    if coordenadas.shape[1] < 2:
+        coordenadas = np.column_stack((coordenadas, np.zeros(len(X))))
+
+    return {
+        'membros': media.index.tolist(),
+        'subescalas': media.columns.tolist(),
+        'grupos': posicao[melhor_grupos],
+        'centroides': centroides[ordem],
+        'criticidade': criticidade_grupo[ordem],
+        'tamanhos': tamanhos[ordem].astype(int),
+        'variancia_explicada': 1 - melhor_inercia / total if total > 0 else 1.0,
+        'coordenadas': coordenadas
+    }
+
+@st.cache_data(show_spinner=False)
+def ordenar_seriacao(pivot):
+    """
+    Ordena linhas e colunas de um mapa de calor para evidenciar blocos de perfis parecidos.
+
+    Usa agrupamento hierárquico (ligação média) com ordenação ótima das folhas,
+    separadamente para linhas e colunas. Fica em cache para cada conjunto de filtros.
+
+    Args:
+        pivot: DataFrame (membro × subescala) exibido no mapa de calor
+
+    Returns:
+        Tupla (linhas, colunas) com os rótulos na ordem seriada
+    """
+    from scipy.cluster import hierarchy
+
+    valores = pivot.to_numpy(dtype=float)
+    valores = np.where(np.isnan(valores), np.nanmean(valores, axis=0), valores)
+    valores = np.nan_to_num(valores)
+
+    def ordem_folhas(matriz):
+        if len(matriz) < 3:
+            return np.arange(len(matriz))
+        ligacao = hierarchy.linkage(matriz, method='average')
+        return hierarchy.leaves_list(hierarchy.optimal_leaf_ordering(ligacao, matriz))
+
+    return pivot.index[ordem_folhas(valores)].tolist(), pivot.columns[ordem_folhas(valores.T)].tolist()
+
+LIMITE_CELULAS_HEATMAP = 5000
+
+def _codificar_png(rgba):
+    """
+    Codifica uma imagem RGBA de 8 bits (altura × largura × 4) em PNG, sem renderizador externo.
+    """
+    altura, largura, _ = rgba.shape
+    # Cada linha do PNG começa com o byte de filtro (0 = nenhum)
+    linhas = np.hstack((np.zeros((altura, 1), dtype=np.uint8), rgba.reshape(altura, -1)))
+
+    def bloco(tipo, dados):
+        return struct.pack('>I', len(dados)) + tipo + dados + struct.pack('>I', zlib.crc32(tipo + dados) & 0xffffffff)
+
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + bloco(b'IHDR', struct.pack('>IIBBBBB', largura, altura, 8, 6, 0, 0, 0))
+        + bloco(b'IDAT', zlib.compress(linhas.tobytes(), 9))
+        + bloco(b'IEND', b'')
+    )
+
+@st.cache_data(show_spinner=False)
+def rasterizar_heatmap(pivot, colorscale, zmin=None, zmax=None):
+    """
+    Converte um mapa de calor em PNG (um pixel por célula) no servidor.
+
+    Evita enviar ao navegador os valores e rótulos de cada célula quando a grade é grande.
+    Células sem dado ficam transparentes.
+
+    Args:
+        pivot: DataFrame (membro × subescala) com os scores
+        colorscale: Nome da escala de cores do Plotly (ex.: 'RdYlGn_r') ou lista (posição, cor)
+        zmin, zmax: Limites da escala de cores (None = mínimo e máximo dos dados)
+
+    Returns:
+        Tupla (imagem, zmin, zmax), com a imagem como data URI PNG
+    """
+    valores = pivot.to_numpy(dtype=float)
+    validos = np.isfinite(valores)
+    if zmin is None:
+        zmin = float(valores[validos].min()) if validos.any() else 0.0
+    if zmax is None:
+        zmax = float(valores[validos].max()) if validos.any() else 1.0
+
+    escala = plotly.colors.get_colorscale(colorscale) if isinstance(colorscale, str) else colorscale
+    posicoes = np.array([posicao for posicao, _ in escala])
+    cores = np.array([plotly.colors.unlabel_rgb(plotly.colors.convert_colors_to_same_type(cor, 'rgb')[0][0]) for _, cor in escala])
+
+    relativo = np.clip((np.nan_to_num(valores, nan=zmin) - zmin) / ((zmax - zmin) or 1.0), 0, 1)
+    rgba = np.empty(valores.shape + (4,), dtype=np.uint8)
+    for canal in range(3):
+        rgba[..., canal] = np.round(np.interp(relativo, posicoes, cores[:, canal]))
+    rgba[..., 3] = np.where(validos, 255, 0)
+
+    imagem = 'data:image/png;base64,' + base64.b64encode(_codificar_png(rgba)).decode()
+    return imagem, zmin, zmax
+
+def criar_heatmap_rasterizado(pivot, colorscale, titulo_escala, cor_titulo, cor_ticks, max_rotulos=60, zmin=None, zmax=None):
+    """
+    Monta a figura de um mapa de calor grande a partir da imagem rasterizada.
+
+    Os rótulos das linhas são reduzidos a no máximo max_rotulos marcas no eixo; a
+    consulta de valores por célula é feita por exibir_consulta_celula.
+
+    Returns:
+        Figura Plotly com a imagem e a barra de cores
+    """
+    imagem, zmin, zmax = rasterizar_heatmap(pivot, colorscale, zmin, zmax)
+    passo_linhas = int(np.ceil(len(pivot.index) / max_rotulos))
+
+    fig = go.Figure(go.Image(source=imagem, x0=0, dx=1, y0=0, dy=1, hoverinfo='skip'))
+    # Traço vazio apenas para exibir a barra de cores
+    fig.add_trace(go.Scatter(
+        x=[None],
+        y=[None],
+        mode='markers',
+        showlegend=False,
+        hoverinfo='skip',
+        marker=dict(
+            colorscale=colorscale,
+            cmin=zmin,
+            cmax=zmax,
+            color=[zmin],
+            showscale=True,
+            colorbar=dict(
+                title=dict(
+                    text=titulo_escala,
+                    side='right',
+                    font=dict(size=13, color=cor_titulo, family='Arial', weight='bold')
+                ),
+                tickfont=dict(size=12, color=cor_ticks, family='Arial', weight='bold')
+            )
+        )
+    ))
+    fig.update_layout(
+        xaxis=dict(
+            tickmode='array',
+            tickvals=list(range(len(pivot.columns))),
+            ticktext=pivot.columns.tolist(),
+            showgrid=False,
+            zeroline=False
+        ),
+        yaxis=dict(
+            tickmode='array',
+            tickvals=list(range(0, len(pivot.index), passo_linhas)),
+            ticktext=pivot.index[::passo_linhas].tolist(),
+            showgrid=False,
+            zeroline=False
+        )
+    )
+    return fig
+
+def exibir_consulta_celula(pivot, ic, rotulo_linha, chave):
+    """
+    Consulta o valor de uma célula de um mapa de calor rasterizado.
+
+    Args:
+        pivot: DataFrame (membro × subescala) exibido no mapa
+        ic: Array (membro × subescala × 2) com limites inferior e superior do IC, com o
+            percentil normativo numa terceira camada opcional (ver recortar_mapa)
+        rotulo_linha: Rótulo do seletor de linhas (ex.: 'Cargo')
+        chave: Prefixo das chaves dos widgets
+    """
+    col_linha, col_coluna = st.columns(2)
+    with col_linha:
+        linha = st.selectbox(rotulo_linha, options=range(len(pivot.index)), format_func=lambda i: pivot.index[i], key=f'{chave}_linha')
+    with col_coluna:
+        coluna = st.selectbox("Dimensão", options=range(len(pivot.columns)), format_func=lambda j: pivot.columns[j], key=f'{chave}_coluna')
+
+    valor = pivot.iat[linha, coluna]
+    if np.isnan(valor):
+        st.info("Sem dados para esta combinação.")
+        return
+    ic_inf, ic_sup = ic[linha, coluna, :2]
+    texto_ic = f" · IC 95%: {ic_inf:.2f} – {ic_sup:.2f}" if np.isfinite(ic_inf) else ""
+    if ic.shape[2] > 2 and np.isfinite(ic[linha, coluna, 2]):
+        texto_ic += f" · percentil na norma: {ic[linha, coluna, 2]:.0f}"
+    st.markdown(f"""
+        <div style='color: #5a4a3a; font-size: clamp(0.85rem, 2vw, 0.95rem); padding: 0.5rem 0;'>
+            <strong>{pivot.index[linha]}</strong> · {pivot.columns[coluna]}: Score <strong>{valor:.2f}</strong>{texto_ic}
+        </div>
+    """, unsafe_allow_html=True)
+
+PAINEL_NAVEGADOR_HTML = """
+<style>
+    body { margin: 0; font-family: Arial, sans-serif; color: #5a4a3a; }
+    .controles { display: flex; flex-wrap: wrap; gap: 1rem; align-items: flex-start; margin-bottom: 1rem; font-size: 0.85rem; }
+    .controles label { font-weight: 600; }
+    .controles select, .controles input[type=number] { border: 2px solid rgba(196, 166, 114, 0.3); border-radius: 8px; padding: 0.3rem; background: white; color: #5a4a3a; }
+    details { border: 1px solid rgba(196, 166, 114, 0.3); border-radius: 8px; padding: 0.3rem 0.6rem; background: rgba(248, 242, 230, 0.6); max-width: 320px; }
+    details div { max-height: 180px; overflow-y: auto; }
+    .linha { display: flex; align-items: center; gap: 0.6rem; margin: 6px 0; }
+    .rotulo { width: 32%; text-align: right; font-size: 0.85rem; font-weight: 700; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+    .trilho { flex: 1; display: flex; height: 28px; background: rgba(248, 242, 230, 0.6); border-radius: 4px; overflow: hidden; }
+    .segmento { display: flex; align-items: center; justify-content: center; color: white; font-size: 0.8rem; font-weight: 700; }
+    .valor { min-width: 52px; font-size: 0.85rem; font-weight: 700; }
+    .cartoes { display: grid; grid-template-columns: repeat(auto-fit, minmax(170px, 1fr)); gap: 1rem; margin-bottom: 1.5rem; }
+    .cartao { padding: 1rem; border-radius: 12px; border: 2px solid rgba(196, 166, 114, 0.25); background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%); text-align: center; }
+    .cartao .titulo { font-size: 0.75rem; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.5rem; }
+    .cartao .numero { font-size: 2.2rem; font-weight: 800; line-height: 1; margin-bottom: 0.4rem; }
+    .cartao .nota { font-size: 0.75rem; }
+    .prioridade { text-align: left; border: 2px solid rgba(220, 38, 38, 0.2); border-left: 5px solid #dc2626; background: linear-gradient(135deg, rgba(220, 38, 38, 0.08) 0%, rgba(185, 28, 28, 0.05) 100%); }
+    .critico { margin-top: 1.5rem; padding: 1rem 1.5rem; border-radius: 12px; background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%); color: white; font-weight: 700; }
+    .faixa { margin-top: 0.8rem; }
+    .faixa .barra { background: #e8dcc8; height: 10px; border-radius: 5px; overflow: hidden; margin-top: 0.3rem; }
+    h3 { margin: 1.5rem 0 0.8rem 0; font-size: 1.1rem; }
+</style>
+<div id="indicadores"></div>
+<div class="controles" id="controles"></div>
+<div id="grafico"></div>
+<div id="resumo"></div>
+<script id="dados" type="application/json">__DADOS__</script>
+<script>
+const pacote = JSON.parse(document.getElementById('dados').textContent);
+
+// Colunas chegam como bytes (float32 ou códigos uint16 + dicionário de categorias)
+function decodificar(coluna) {
+    const bytes = Uint8Array.from(atob(coluna.dados), c => c.charCodeAt(0));
+    if (coluna.tipo === 'float32') return new Float32Array(bytes.buffer);
+    return Array.from(new Uint16Array(bytes.buffer), c => coluna.categorias[c]);
+}
+const col = {};
+for (const [nome, coluna] of Object.entries(pacote.colunas)) col[nome] = decodificar(coluna);
+const n = col.subescala.length;
+const subescalas = [...new Set(col.subescala)].sort((a, b) => a.localeCompare(b));
+
+// Textos dos dados (nomes de subescalas) entram no HTML sempre escapados
+function escapar(texto) {
+    return String(texto).replace(/[&<>"']/g, c => ({ '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' })[c]);
+}
+
+// Começa no estado dos filtros da página; daí em diante os controles valem para o painel inteiro
+const inicial = pacote.inicial || {};
+const estado = {
+    subescalas: new Set(inicial.subescalas || subescalas),
+    classes: new Set(inicial.classes || ['baixo', 'medio', 'alto']),
+    ordem: inicial.ordem || 'Maior Risco',
+    percentuais: inicial.percentuais !== undefined ? inicial.percentuais : true,
+    minimo: inicial.minimo !== undefined ? inicial.minimo : 0,
+    maximo: inicial.maximo !== undefined ? inicial.maximo : 100
+};
+const controles = document.getElementById('controles');
+
+function adicionar(html) { const el = document.createElement('div'); el.innerHTML = html; controles.appendChild(el); return el; }
+function marcado(condicao) { return condicao ? ' checked' : ''; }
+
+const caixas = subescalas.map((s, i) => `<label style="display:block;font-weight:400"><input type="checkbox" data-sub="${i}"${marcado(estado.subescalas.has(s))}> ${escapar(s)}</label>`).join('');
+adicionar(`<details><summary><label>Fatores Psicossociais</label></summary><div>${caixas}</div></details>`)
+    .addEventListener('change', e => { const s = subescalas[e.target.dataset.sub]; e.target.checked ? estado.subescalas.add(s) : estado.subescalas.delete(s); desenhar(); });
+
+if (pacote.tipo === 'panorama') {
+    const nomes = { baixo: 'Baixo', medio: 'Médio', alto: 'Alto' };
+    adicionar('<label>Níveis de Risco</label><br>' + Object.entries(nomes).map(([c, r]) => `<label style="font-weight:400"><input type="checkbox" data-classe="${c}"${marcado(estado.classes.has(c))}> ${r}</label>`).join(' '))
+        .addEventListener('change', e => { const c = e.target.dataset.classe; e.target.checked ? estado.classes.add(c) : estado.classes.delete(c); desenhar(); });
+} else {
+    adicionar(`<label>% Alto Risco</label><br><input type="number" id="minimo" min="0" max="100" step="5" value="${Math.floor(10 * estado.minimo) / 10}" style="width:60px"> a <input type="number" id="maximo" min="0" max="100" step="5" value="${Math.ceil(10 * estado.maximo) / 10}" style="width:60px">`)
+        .addEventListener('input', () => { estado.minimo = +document.getElementById('minimo').value; estado.maximo = +document.getElementById('maximo').value; desenhar(); });
+}
+adicionar('<label>Ordenação</label><br><select id="ordem">' + ['Maior Risco', 'Menor Risco', 'Alfabética A-Z', 'Alfabética Z-A'].map(o => `<option${o === estado.ordem ? ' selected' : ''}>${o}</option>`).join('') + '</select>')
+    .addEventListener('change', e => { estado.ordem = e.target.value; desenhar(); });
+adicionar(`<label><input type="checkbox" id="percentuais"${marcado(estado.percentuais)}> Exibir Percentuais</label>`)
+    .addEventListener('change', e => { estado.percentuais = e.target.checked; desenhar(); });
+
+// Mesma ordem de texto do pandas (por código), para empates e "primeiro fator" coincidirem
+function porCodigo(a, b) { return a < b ? -1 : a > b ? 1 : 0; }
+
+function linhasPanorama() {
+    const grupos = {};
+    for (let i = 0; i < n; i++) {
+        if (!estado.subescalas.has(col.subescala[i]) || !estado.classes.has(col.classe_risco[i])) continue;
+        const g = grupos[col.subescala[i]] = grupos[col.subescala[i]] || { baixo: 0, medio: 0, alto: 0 };
+        g[col.classe_risco[i]] += col.qtd[i];
+    }
+    return Object.entries(grupos).sort(([a], [b]) => porCodigo(a, b)).map(([s, g]) => {
+        const total = g.baixo + g.medio + g.alto;
+        const divisor = total || 1;
+        return { rotulo: s, risco: 100 * g.alto / divisor, contagens: g, total: total, segmentos: [[100 * g.baixo / divisor, '#10b981', 'Baixo'], [100 * g.medio / divisor, '#f59e0b', 'Médio'], [100 * g.alto / divisor, '#dc2626', 'Alto']] };
+    });
+}
+
+function cartao(titulo, numero, nota, cor, fundo) {
+    return `<div class="cartao" style="background:${fundo}"><div class="titulo" style="color:${cor}">${titulo}</div><div class="numero" style="color:${cor}">${numero}</div><div class="nota" style="color:${cor}">${nota}</div></div>`;
+}
+
+function faixa(nome, cor, p) {
+    return `<div class="faixa"><div style="display:flex;justify-content:space-between"><span style="color:${cor};font-weight:700">${nome}</span><span style="font-weight:800">${p.toFixed(1)}%</span></div><div class="barra"><div style="background:${cor};height:100%;width:${p}%"></div></div></div>`;
+}
+
+// Indicadores e destaques do Panorama (mesmas contas de calcular_visao_panorama)
+function resumirPanorama(linhas) {
+    const totais = { baixo: 0, medio: 0, alto: 0 };
+    for (const l of linhas) for (const c in totais) totais[c] += l.contagens[c];
+    const geral = totais.baixo + totais.medio + totais.alto;
+    const respondentes = Math.round(linhas[0].total);
+    const arredondado = l => Math.round(10 * l.risco) / 10;
+    const criticos = linhas.filter(l => arredondado(l) >= 50).length;
+    const taxa = respondentes > 0 ? Math.floor(respondentes / 215 * 100) : 0;
+    const destaque = linhas.reduce((maior, l) => arredondado(l) > arredondado(maior) ? l : maior, linhas[0]);
+    const perc = c => geral > 0 ? 100 * totais[c] / geral : 0;
+    document.getElementById('indicadores').innerHTML = '<div class="cartoes">' +
+        cartao('Fatores Avaliados', linhas.length, 'Dimensões COPSOQ', '#b89656', 'rgba(248, 242, 230, 0.9)') +
+        cartao('Alto Risco', criticos, 'Fatores críticos (&gt;50%)', '#dc2626', 'rgba(254, 226, 226, 0.9)') +
+        cartao('Participação', respondentes, 'Colaboradores respondentes', '#b89656', 'rgba(248, 242, 230, 0.9)') +
+        cartao('Taxa de Adesão', taxa + '%', '+12pp acima da meta', '#10b981', 'rgba(209, 250, 229, 0.9)') + '</div>';
+    document.getElementById('resumo').innerHTML = `<div class="cartoes"><div class="critico">Fator Mais Crítico<br><span style="font-size:1.1rem">${escapar(destaque.rotulo)} com ${arredondado(destaque).toFixed(1)}% em alto risco</span></div>` +
+        `<div class="cartao" style="text-align:left"><div class="titulo">Distribuição Geral</div>${faixa('Baixo', '#10b981', perc('baixo'))}${faixa('Médio', '#f59e0b', perc('medio'))}${faixa('Alto', '#dc2626', perc('alto'))}</div></div>`;
+}
+
+function corRanking(p) { return p >= 70 ? '#dc2626' : p >= 50 ? '#f59e0b' : p >= 30 ? 'rgba(245, 158, 11, 0.6)' : '#10b981'; }
+
+function linhasRanking() {
+    const linhas = [];
+    for (let i = 0; i < n; i++) {
+        // float32 -> percentual com 4 casas, para os limites (50%, 70%, faixa inicial) baterem com o servidor
+        const p = Math.round(1e6 * col.perc_alto[i]) / 1e4;
+        if (!estado.subescalas.has(col.subescala[i]) || p < estado.minimo - 1e-3 || p > estado.maximo + 1e-3) continue;
+        linhas.push({ rotulo: col.subescala[i], risco: p, media: col.media_score[i], segmentos: [[p, corRanking(p), 'Alto']] });
+    }
+    return linhas;
+}
+
+// Indicadores e Top 3 da Priorização (mesmas contas de calcular_visao_ranking)
+function resumirRanking(linhas) {
+    const contar = condicao => linhas.filter(l => condicao(l.risco)).length;
+    document.getElementById('indicadores').innerHTML = '<div class="cartoes">' +
+        cartao('Críticos', contar(p => p >= 70), '≥70% | Ação imediata', '#dc2626', 'rgba(254, 226, 226, 0.9)') +
+        cartao('Altos', contar(p => p >= 50 && p < 70), '50-70% | Curto prazo', '#f59e0b', 'rgba(254, 243, 199, 0.9)') +
+        cartao('Monitoramento', contar(p => p < 50), '&lt;50% | Acompanhamento', '#b89656', 'rgba(248, 242, 230, 0.9)') + '</div>';
+    const top3 = [...linhas].sort((a, b) => b.risco - a.risco).slice(0, 3);
+    document.getElementById('resumo').innerHTML = '<h3>Top 3 Prioridades Imediatas</h3><div class="cartoes">' + top3.map((l, i) =>
+        `<div class="cartao prioridade"><div class="titulo" style="color:#991b1b">#${i + 1} Prioridade</div><div style="font-weight:700;color:#7f1d1d;margin-bottom:0.6rem">${escapar(l.rotulo)}</div><div class="numero" style="color:#dc2626">${l.risco.toFixed(1)}%</div><div class="nota" style="color:#991b1b">em alto risco · Ação: 30-60 dias</div></div>`
+    ).join('') + '</div>';
+}
+
+function desenhar() {
+    const linhas = pacote.tipo === 'panorama' ? linhasPanorama() : linhasRanking();
+    if (!linhas.length) {
+        document.getElementById('indicadores').innerHTML = '';
+        document.getElementById('resumo').innerHTML = '';
+    } else if (pacote.tipo === 'panorama') {
+        resumirPanorama(linhas);
+    } else {
+        resumirRanking(linhas);
+    }
+    const ordens = {
+        'Maior Risco': (a, b) => b.risco - a.risco,
+        'Menor Risco': (a, b) => a.risco - b.risco,
+        'Alfabética A-Z': (a, b) => a.rotulo.localeCompare(b.rotulo),
+        'Alfabética Z-A': (a, b) => b.rotulo.localeCompare(a.rotulo)
+    };
+    linhas.sort(ordens[estado.ordem]);
+    document.getElementById('grafico').innerHTML = linhas.length ? linhas.map(l => {
+        const rotulo = escapar(l.rotulo);
+        const segmentos = l.segmentos.map(([p, cor, nome]) =>
+            `<div class="segmento" style="width:${p}%;background:${cor}" title="${rotulo}\\n${nome} Risco: ${p.toFixed(1)}%${l.media !== undefined ? '\\nScore Médio: ' + l.media.toFixed(2) : ''}">${estado.percentuais && p >= 4 && pacote.tipo === 'panorama' ? p.toFixed(0) + '%' : ''}</div>`).join('');
+        const valor = pacote.tipo === 'ranking' && estado.percentuais ? `<div class="valor">${l.risco.toFixed(1)}%</div>` : '';
+        return `<div class="linha"><div class="rotulo" title="${rotulo}">${rotulo}</div><div class="trilho">${segmentos}</div>${valor}</div>`;
+    }).join('') : '<p>Nenhum dado encontrado com os filtros selecionados.</p>';
+}
+desenhar();
+</script>
+"""
+
+@st.cache_data(show_spinner=False)
+def codificar_colunar(dados, colunas):
+    """
+    Codifica colunas de um DataFrame em formato colunar binário compacto (JSON + base64).
+
+    Colunas numéricas viram float32; colunas de texto viram códigos uint16 e um
+    dicionário de categorias.
+
+    Args:
+        dados: DataFrame de origem
+        colunas: Tupla com os nomes das colunas a enviar
+
+    Returns:
+        String JSON com as colunas codificadas, por nome
+    """
+    codificadas = {}
+    for nome in colunas:
+        serie = dados[nome]
+        if pd.api.types.is_numeric_dtype(serie):
+            codificadas[nome] = {
+                'tipo': 'float32',
+                'dados': base64.b64encode(serie.to_numpy(dtype='<f4').tobytes()).decode()
+            }
+        else:
+            codigos, categorias = pd.factorize(serie)
+            codificadas[nome] = {
+                'tipo': 'categoria',
+                'categorias': categorias.tolist(),
+                'dados': base64.b64encode(codigos.astype('<u2').tobytes()).decode()
+            }
+    # Evita que um texto dos dados feche a tag <script> do componente
+    return json.dumps(codificadas, ensure_ascii=False).replace('</', '<\\/')
+
+def exibir_painel_navegador(tipo, dados, colunas, altura, inicial=None):
+    """
+    Exibe os indicadores, o gráfico de barras e os destaques da página com filtros,
+    ordenação e percentuais que rodam no navegador.
+
+    O conjunto de dados completo é enviado uma única vez; mexer nos controles do
+    componente não recarrega a página. Enquanto ele está ativo, a página não mostra
+    os filtros do servidor nem os seus próprios indicadores: há um único estado de
+    filtros, o do componente, que começa no estado dos filtros da página.
+
+    Args:
+        tipo: 'panorama' (barras empilhadas por classe) ou 'ranking' (% em alto risco)
+        dados: DataFrame completo da página
+        colunas: Tupla com as colunas usadas pelo componente
+        altura: Altura do componente em pixels
+        inicial: Estado inicial dos controles ('subescalas', 'classes', 'ordem',
+            'percentuais', 'minimo', 'maximo'); ausentes ficam no padrão
+    """
+    estado_inicial = json.dumps(inicial or {}, ensure_ascii=False).replace('</', '<\\/')
+    pacote = f'{{"tipo": "{tipo}", "inicial": {estado_inicial}, "colunas": {codificar_colunar(dados, colunas)}}}'
+    html = PAINEL_NAVEGADOR_HTML.replace('__DADOS__', pacote)
+    components.html(html, height=altura, scrolling=True)
+
+MAX_COMBINACOES_PREAQUECIMENTO = 10
+# Combinações guardadas no registro de acessos; as menos usadas saem quando ele passa do dobro
+LIMITE_REGISTRO_ACESSOS = 200
+
+def caminho_registro_acessos():
+    """Arquivo onde o registro de acessos persiste entre reinícios do servidor."""
+    if getattr(sys, 'frozen', False):
+        base_dir = Path(sys._MEIPASS)
+    else:
+        base_dir = Path(__file__).parent
+
+    return base_dir / 'logs' / 'acessos.json'
+
+@st.cache_resource(show_spinner=False)
+def obter_registro_acessos():
+    """
+    Contagem, compartilhada entre sessões, das combinações de filtros usadas nas páginas.
+
+    Returns:
+        Dicionário com 'contagem' ({(calculo, parametros): acessos}), 'pendentes' e 'lock'
+    """
+    contagem = {}
+    caminho = caminho_registro_acessos()
+    if caminho.exists():
+        try:
+            for item in json.loads(caminho.read_text(encoding='utf-8')):
+                contagem[(item['calculo'], tuple(item['parametros']))] = item['acessos']
+        except (ValueError, KeyError):
+            contagem = {}
+    return {'contagem': mais_acessadas(contagem), 'pendentes': 0, 'lock': threading.Lock()}
+
+def mais_acessadas(contagem):
+    """Mantém só as LIMITE_REGISTRO_ACESSOS combinações com mais acessos."""
+    ordenadas = sorted(contagem.items(), key=lambda item: -item[1])
+    return dict(ordenadas[:LIMITE_REGISTRO_ACESSOS])
+
+def registrar_acesso(calculo, *parametros, intervalo_gravacao=20):
+    """
+    Registra o uso de uma combinação de filtros, gravando o registro em disco a cada
+    intervalo_gravacao acessos.
+
+    Cada sessão conta uma combinação só quando ela muda: reexecuções da página com
+    os mesmos filtros (cliques, expansores, paginação) não somam acessos.
+
+    Args:
+        calculo: Nome do cálculo em CALCULOS_PREAQUECIMENTO ou 'visao'
+        *parametros: Parâmetros escolhidos pelo usuário (exceto os dados); para
+            'visao', o nome da visão e a chave canônica dos filtros
+    """
+    origem = (calculo, parametros[0]) if calculo == 'visao' else (calculo,)
+    ultimos = st.session_state.setdefault('ultimos_acessos', {})
+    if ultimos.get(origem) == parametros:
+        return
+    ultimos[origem] = parametros
+
+    registro = obter_registro_acessos()
+    with registro['lock']:
+        chave = (calculo, parametros)
+        registro['contagem'][chave] = registro['contagem'].get(chave, 0) + 1
+        if len(registro['contagem']) > 2 * LIMITE_REGISTRO_ACESSOS:
+            registro['contagem'] = mais_acessadas(registro['contagem'])
+        registro['pendentes'] += 1
+        if registro['pendentes'] < intervalo_gravacao:
+            return
+        registro['pendentes'] = 0
+        conteudo = json.dumps([
+            {'calculo': c, 'parametros': list(p), 'acessos': n}
+            for (c, p), n in mais_acessadas(registro['contagem']).items()
+        ], ensure_ascii=False)
+
+    caminho = caminho_registro_acessos()
+    try:
+        caminho.parent.mkdir(exist_ok=True)
+        temporario = caminho.with_suffix('.tmp')
+        temporario.write_text(conteudo, encoding='utf-8')
+        temporario.replace(caminho)
+    except OSError:
+        pass
+
+# Empresa dona das ações registradas por esta instalação (o banco aceita várias)
+EMPRESA_ACOES = 'principal'
+STATUS_ACOES = ('Planejada', 'Em andamento', 'Concluída', 'Cancelada')
+STATUS_ACOES_ABERTAS = ('Planejada', 'Em andamento')
+TIPOS_ACOES = ('Preventiva', 'Corretiva')
+ACOES_POR_PAGINA = 50
+
+def caminho_banco_acoes():
+    """Banco SQLite do plano de ações (persistente; não é cache)."""
+    if getattr(sys, 'frozen', False):
+        base_dir = Path(sys._MEIPASS)
+    else:
+        base_dir = Path(__file__).parent
+
+    return base_dir / 'planos' / 'acoes.db'
+
+@st.cache_resource(show_spinner=False)
+def obter_banco_acoes():
+    """
+    Abre (e cria, se preciso) o banco do plano de ações, compartilhado entre sessões.
+
+    O índice parcial cobre só as ações abertas, por empresa, subescala e setor: a
+    consulta da página lê apenas as linhas daquela unidade, qualquer que seja o
+    tamanho da tabela. O modo WAL deixa leituras e gravações concorrentes.
+
+    Returns:
+        Dicionário com 'conexao' e 'lock' (serializa o uso da conexão entre threads)
+    """
+    caminho = caminho_banco_acoes()
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    conexao = sqlite3.connect(caminho, check_same_thread=False)
+    conexao.execute('PRAGMA journal_mode=WAL')
+    conexao.execute('PRAGMA synchronous=NORMAL')
+    conexao.executescript(f"""
+        CREATE TABLE IF NOT EXISTS acoes (
+            id INTEGER PRIMARY KEY,
+            empresa TEXT NOT NULL,
+            subescala TEXT NOT NULL,
+            setor TEXT NOT NULL DEFAULT '',
+            pergunta TEXT NOT NULL DEFAULT '',
+            tipo TEXT NOT NULL,
+            descricao TEXT NOT NULL,
+            responsavel TEXT NOT NULL DEFAULT '',
+            status TEXT NOT NULL,
+            prazo TEXT,
+            criada_em TEXT NOT NULL,
+            atualizada_em TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_acoes_abertas
+            ON acoes (empresa, subescala, setor, prazo)
+            WHERE status IN {STATUS_ACOES_ABERTAS};
+        CREATE INDEX IF NOT EXISTS idx_acoes_unidade
+            ON acoes (empresa, subescala, status);
+    """)
+    return {'conexao': conexao, 'lock': threading.Lock()}
+
+def gravar_acoes(novas=(), alteracoes=()):
+    """
+    Grava inclusões e alterações do plano de ações numa única transação.
+
+    Args:
+        novas: Dicionários com subescala, setor, pergunta, tipo, descricao,
+            responsavel, status e prazo
+        alteracoes: Dicionários com 'id', 'status' e 'responsavel'
+    """
+    agora = time.strftime('%Y-%m-%d %H:%M:%S')
+    banco = obter_banco_acoes()
+    with banco['lock'], banco['conexao'] as conexao:
+        conexao.executemany("""
+            INSERT INTO acoes (empresa, subescala, setor, pergunta, tipo, descricao, responsavel, status, prazo, criada_em, atualizada_em)
+            VALUES (:empresa, :subescala, :setor, :pergunta, :tipo, :descricao, :responsavel, :status, :prazo, :agora, :agora)
+        """, [dict(acao, empresa=EMPRESA_ACOES, agora=agora) for acao in novas])
+        conexao.executemany("""
+            UPDATE acoes SET status = :status, responsavel = :responsavel, atualizada_em = :agora
+            WHERE id = :id AND empresa = :empresa
+        """, [dict(alteracao, empresa=EMPRESA_ACOES, agora=agora) for alteracao in alteracoes])
+
+def listar_acoes_abertas(subescala, setor=None, pagina=0, por_pagina=ACOES_POR_PAGINA):
+    """
+    Lê uma página das ações abertas de uma subescala (e, opcionalmente, de um setor).
+
+    Returns:
+        DataFrame com id, setor, pergunta, tipo, descricao, responsavel, status e prazo
+        (no máximo por_pagina linhas, ordenadas por prazo)
+    """
+    filtro_setor = '' if setor is None else 'AND setor = :setor'
+    consulta = f"""
+        SELECT id, setor, pergunta, tipo, descricao, responsavel, status, prazo
+        FROM acoes INDEXED BY idx_acoes_abertas
+        WHERE empresa = :empresa AND subescala = :subescala {filtro_setor}
+          AND status IN {STATUS_ACOES_ABERTAS}
+        ORDER BY prazo IS NULL, prazo, id
+        LIMIT :limite OFFSET :deslocamento
+    """
+    banco = obter_banco_acoes()
+    with banco['lock']:
+        return pd.read_sql_query(consulta, banco['conexao'], params={
+            'empresa': EMPRESA_ACOES, 'subescala': subescala, 'setor': setor,
+            'limite': por_pagina, 'deslocamento': pagina * por_pagina
+        })
+
+def contar_acoes_por_status(subescala):
+    """
+    Conta as ações de uma subescala por status e, entre as abertas, por setor.
+
+    Returns:
+        Tupla ({status: quantidade}, {setor: abertas})
+    """
+    banco = obter_banco_acoes()
+    with banco['lock']:
+        por_status = dict(banco['conexao'].execute("""
+            SELECT status, COUNT(*) FROM acoes
+            WHERE empresa = ? AND subescala = ? GROUP BY status
+        """, (EMPRESA_ACOES, subescala)).fetchall())
+        por_setor = dict(banco['conexao'].execute(f"""
+            SELECT setor, COUNT(*) FROM acoes INDEXED BY idx_acoes_abertas
+            WHERE empresa = ? AND subescala = ? AND status IN {STATUS_ACOES_ABERTAS}
+            GROUP BY setor
+        """, (EMPRESA_ACOES, subescala)).fetchall())
+    return por_status, por_setor
+
+# Cálculos em cache que dependem de filtros: nome → função(dados, *parametros)
+CALCULOS_PREAQUECIMENTO = {
+    'comparacoes': lambda dados, dimensao, metodo: calcular_comparacoes_pareadas(dados[dimensao], dimensao, metodo),
+    'agrupamento': lambda dados, dimensao, k: agrupar_perfis_risco(dados[dimensao], dimensao, k)
+}
+
+def preaquecer_caches(snapshot):
+    """
+    Calcula de antemão as visões padrão das páginas e as combinações de filtros mais
+    usadas, para que os caches compartilhados já estejam prontos quando as sessões chegarem.
+
+    As combinações vêm do registro de acessos: cálculos de CALCULOS_PREAQUECIMENTO e
+    chaves canônicas das visões das páginas (ver reproduzir_visao).
+
+    Args:
+        snapshot: Snapshot de dados (ver carregar_snapshot)
+    """
+    panorama, ranking, cargo, setor, matriz, detalhamento = snapshot['dados']
+    respostas = snapshot['respostas']
+    escores = calcular_escores_respondentes(respostas, detalhamento) if respostas is not None else None
+    dados = {'cargo': cargo, 'setor': setor}
+
+    # Visões padrão (todos os filtros selecionados)
+    codificar_colunar(panorama, ('subescala', 'classe_risco', 'qtd'))
+    codificar_colunar(ranking, ('subescala', 'perc_alto', 'media_score'))
+    calcular_intervalos_confianca(cargo, 'cargo', escores)
+    calcular_intervalos_confianca(setor, 'setor', escores)
+    construir_arvore_setores(setor)
+    calcular_matriz_setores(setor, escores)
+    template_zonas_matriz()
+    carregar_historico_ondas(tuple(listar_ondas()))
+
+    combinacoes = {('comparacoes', ('setor', 'fdr_bh')): 0}
+    if setor['setor'].nunique() >= 3:
+        combinacoes[('agrupamento', ('setor', min(4, setor['setor'].nunique())))] = 0
+
+    # Combinações mais acessadas segundo o registro persistido
+    registro = obter_registro_acessos()
+    with registro['lock']:
+        mais_usadas = sorted(registro['contagem'].items(), key=lambda item: -item[1])
+    for chave, _ in mais_usadas[:MAX_COMBINACOES_PREAQUECIMENTO]:
+        combinacoes.setdefault(chave, 0)
+
+    for calculo, parametros in combinacoes:
+        try:
+            if calculo == 'visao':
+                reproduzir_visao(snapshot, escores, *parametros)
+            elif calculo in CALCULOS_PREAQUECIMENTO:
+                CALCULOS_PREAQUECIMENTO[calculo](dados, *parametros)
+        except (KeyError, ValueError, IndexError, TypeError):
+            # Combinação registrada que não existe mais nos dados atuais
+            continue
+
+@st.cache_resource(show_spinner=False)
+def iniciar_preaquecimento():
+    """
+    Dispara o pré-aquecimento uma vez por processo (na primeira execução) e
+    novamente após cada troca de snapshot pelo monitor de arquivos.
+    """
+    def disparar(snapshot):
+        threading.Thread(target=preaquecer_caches, args=(snapshot,), name='preaquecimento', daemon=True).start()
+
+    monitor = obter_monitor_arquivos()
+    monitor.ao_trocar.append(disparar)
+    disparar(monitor.snapshot)
+    return True
+
+LIMITE_MEMORIA_SESSAO_MB = 64
+# Chaves do session_state com resultados recalculáveis, guardados como tupla
+# (identificação, resultado, bytes): as únicas que o limite por sessão descarta
+PREFIXO_CACHE_SESSAO = 'cache_sessao_'
+TEMPO_SESSAO_INATIVA = 30 * 60
+
+def medir_memoria(objeto, vistos=None):
+    """
+    Estima os bytes ocupados por um objeto, percorrendo contêineres.
+
+    DataFrames e arrays são medidos pelo conteúdo; objetos já contados são ignorados.
+    """
+    vistos = set() if vistos is None else vistos
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+
+    if isinstance(objeto, pd.DataFrame):
+        return int(objeto.memory_usage(deep=True).sum())
+    if isinstance(objeto, pd.Series):
+        return int(objeto.memory_usage(deep=True))
+    if isinstance(objeto, np.ndarray):
+        return int(objeto.nbytes)
+    if isinstance(objeto, dict):
+        return sys.getsizeof(objeto) + sum(medir_memoria(k, vistos) + medir_memoria(v, vistos) for k, v in objeto.items())
+    if isinstance(objeto, (list, tuple, set, frozenset)):
+        return sys.getsizeof(objeto) + sum(medir_memoria(item, vistos) for item in objeto)
+    return sys.getsizeof(objeto)
+
+def memoria_processo():
+    """
+    Memória residente (RSS) do processo em bytes, ou None quando não disponível.
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as status:
+            for linha in status:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def obter_contabilidade_memoria():
+    """Registro compartilhado do uso de memória de cada sessão."""
+    return {'sessoes': {}, 'lock': threading.Lock()}
+
+def contabilizar_memoria_sessao():
+    """
+    Mede o session_state da sessão atual, registra no painel compartilhado e aplica o limite.
+
+    Ao passar de LIMITE_MEMORIA_SESSAO_MB, descarta da sessão as chaves com
+    PREFIXO_CACHE_SESSAO (as figuras guardadas por figura_compartilhada), maiores
+    primeiro, que são refeitas na próxima execução que precisar delas; widgets e demais
+    estados da sessão nunca são descartados. Essas entradas são medidas pelos bytes
+    que registram, pois medir_memoria não enxerga dentro de uma figura.
+
+    Returns:
+        Dicionário com 'sessao' e 'compartilhado' (bytes), 'processo' (RSS) e 'sessoes' ativas
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    contexto = get_script_run_ctx()
+    id_sessao = contexto.session_id if contexto else 'local'
+
+    tamanhos = {
+        chave: valor[2] if chave.startswith(PREFIXO_CACHE_SESSAO) else medir_memoria(valor)
+        for chave, valor in st.session_state.items()
+    }
+    limite = LIMITE_MEMORIA_SESSAO_MB * 1024 * 1024
+    if sum(tamanhos.values()) > limite:
+        for chave in sorted(tamanhos, key=tamanhos.get, reverse=True):
+            if sum(tamanhos.values()) <= limite:
+                break
+            if not chave.startswith(PREFIXO_CACHE_SESSAO):
+                continue
+            del st.session_state[chave]
+            del tamanhos[chave]
+
+    contabilidade = obter_contabilidade_memoria()
+    agora = time.time()
+    with contabilidade['lock']:
+        contabilidade['sessoes'][id_sessao] = (sum(tamanhos.values()), agora)
+        for sessao, (_, visto) in list(contabilidade['sessoes'].items()):
+            if agora - visto > TEMPO_SESSAO_INATIVA:
+                del contabilidade['sessoes'][sessao]
+        sessoes = dict(contabilidade['sessoes'])
+
+    return {
+        'sessao': sum(tamanhos.values()),
+        'compartilhado': snapshot_dados['tamanho'],
+        'processo': memoria_processo(),
+        'sessoes': sessoes
+    }
+
+# Filtros de cada página que vão para a URL: chave do widget -> (tipo, limites)
+FILTROS_URL = {
+    "Panorama Geral": {
+        'panorama_subescalas': ('lista', None),
+        'panorama_riscos': ('lista', None),
+        'panorama_ordenacao': ('texto', None),
+        'panorama_percentuais': ('bool', None),
+        'panorama_navegador': ('bool', None)
+    },
+    "Visão por Domínios": {
+        'dominio_nivel': ('texto', None),
+        'dominio_grupo': ('texto', None)
+    },
+    "Priorização de Riscos": {
+        'rank_subescalas': ('lista', None),
+        'rank_faixa': ('faixa', (0.0, 100.0)),
+        'rank_ordenacao': ('texto', None),
+        'rank_show_perc': ('bool', None),
+        'rank_navegador': ('bool', None)
+    },
+    "Análise por Cargo": {
+        'cargo_cargos': ('lista', None),
+        'cargo_subescalas': ('lista', None),
+        'cargo_ordenacao': ('texto', None),
+        'cargo_show_values': ('bool', None),
+        'cargo_show_ic': ('bool', None),
+        'cargo_seriacao': ('bool', None)
+    },
+    "Análise por Setor": {
+        'setor_setores': ('lista', None),
+        'setor_subescalas': ('lista', None),
+        'setor_ordenacao': ('texto', None),
+        'setor_show_values': ('bool', None),
+        'setor_show_ic': ('bool', None),
+        'setor_seriacao': ('bool', None)
+    },
+    "Comparações entre Grupos": {
+        'comp_dimensao': ('texto', None),
+        'comp_subescala': ('texto', None),
+        'comp_correcao': ('texto', None),
+        'comp_alpha': ('opcao', (0.01, 0.05, 0.10))
+    },
+    "Agrupamento de Perfis": {
+        'agrup_dimensao': ('texto', None),
+        'agrup_k': ('inteiro', (2, 8))
+    },
+    "Evolução entre Ondas": {
+        'onda_nivel': ('texto', None),
+        'onda_atual': ('texto', None),
+        'onda_indicador': ('texto', None),
+        'onda_subescala': ('texto', None),
+        'onda_tendencia': ('lista', None)
+    },
+    "Matriz de Risco": {
+        'matriz2_subescalas': ('lista', None),
+        'matriz2_nivel': ('texto', None),
+        'matriz2_labels': ('bool', None)
+    },
+    "Detalhamento & Ações": {
+        'detalhe_subescala': ('texto', None)
+    },
+    "Importar Dados": {}
+}
+LIMITE_VISOES_COMPARTILHADAS = 128
+
+def formatar_numero_url(valor):
+    """Formata um número de forma estável para a URL (3.0 -> '3', 0.050 -> '0.05')."""
+    return f'{float(valor):g}'
+
+def valor_url(tipo, valor):
+    """Valor de um filtro na forma canônica da URL (str ou lista de str)."""
+    if tipo == 'lista':
+        # Lista vazia vira um valor vazio para não se confundir com "sem filtro"
+        return sorted({str(item) for item in valor}) or ['']
+    if tipo == 'bool':
+        return '1' if valor else '0'
+    if tipo == 'faixa':
+        return [formatar_numero_url(v) for v in sorted(valor)]
+    if tipo in ('inteiro', 'opcao'):
+        return formatar_numero_url(valor)
+    return str(valor)
+
+def serializar_filtros(pagina, estado, padroes):
+    """
+    Converte o estado dos filtros de uma página em parâmetros de URL canônicos.
+
+    A forma canônica não depende da ordem de seleção: listas são ordenadas e sem
+    repetições e as chaves saem em ordem alfabética. Filtros no valor inicial da
+    página ficam de fora (inclusive "todos selecionados"), e quem lê a URL os
+    completa com filtros_padrao. Assim, a mesma visão gera sempre a mesma URL, curta
+    mesmo com centenas de setores, que também serve de chave para os caches
+    compartilhados.
+
+    Args:
+        pagina: Nome da página (chave de FILTROS_URL)
+        estado: Mapeamento chave do widget -> valor (normalmente st.session_state)
+        padroes: Estado inicial dos filtros (filtros_padrao) da versão dos dados
+
+    Returns:
+        Dicionário ordenado parâmetro -> valor (str ou lista de str)
+    """
+    parametros = {'pagina': pagina}
+    padroes_pagina = padroes.get(pagina, {})
+    for chave, (tipo, _) in FILTROS_URL.get(pagina, {}).items():
+        if chave not in estado:
+            continue
+        valor = valor_url(tipo, estado[chave])
+        if chave in padroes_pagina and valor == valor_url(tipo, padroes_pagina[chave]):
+            continue
+        parametros[chave] = valor
+    return dict(sorted(parametros.items()))
+
+def chave_filtros(parametros):
+    """Query string canônica dos parâmetros (chave dos caches compartilhados)."""
+    return urlencode(sorted(parametros.items()), doseq=True)
+
+def desserializar_filtros(pagina, parametros):
+    """
+    Converte parâmetros de URL (forma de serializar_filtros) de volta em valores de widgets.
+
+    Controles deslizantes são limitados ao intervalo permitido; valores que não
+    podem ser lidos são ignorados.
+
+    Args:
+        pagina: Nome da página (chave de FILTROS_URL)
+        parametros: Mapeamento parâmetro -> lista de valores (str)
+
+    Returns:
+        Dicionário chave do widget -> valor
+    """
+    estado = {}
+    for chave, (tipo, limites) in FILTROS_URL[pagina].items():
+        if chave not in parametros:
+            continue
+        valores = parametros[chave]
+        try:
+            if tipo == 'lista':
+                valor = [v for v in valores if v != '']
+            elif tipo == 'bool':
+                valor = valores[-1] == '1'
+            elif tipo == 'faixa':
+                if len(valores) != 2:
+                    continue
+                valor = tuple(sorted(min(max(float(v), limites[0]), limites[1]) for v in valores))
+            elif tipo == 'inteiro':
+                valor = min(max(int(valores[-1]), limites[0]), limites[1])
+            elif tipo == 'opcao':
+                valor = min(limites, key=lambda opcao: abs(opcao - float(valores[-1])))
+            else:
+                valor = valores[-1]
+        except ValueError:
+            continue
+        estado[chave] = valor
+    return estado
+
+def restaurar_filtros_url():
+    """
+    Restaura na sessão os filtros recebidos pela URL (links compartilhados).
+
+    Deve ser chamada uma vez, no início da sessão, antes da criação dos widgets.
+    Valores fora das opções dos seletores são descartados pelo próprio Streamlit.
+
+    Returns:
+        Nome da página indicada na URL ou None se ausente/inválida
+    """
+    pagina = st.query_params.get('pagina')
+    if pagina not in FILTROS_URL:
+        return None
+
+    parametros = {parametro: st.query_params.get_all(parametro) for parametro in st.query_params}
+    for chave, valor in desserializar_filtros(pagina, parametros).items():
+        st.session_state[chave] = valor
+    return pagina
+
+def semear_filtros(pagina):
+    """
+    Grava na sessão o valor inicial dos filtros da página que ainda não têm valor.
+
+    Chamada no início da página, antes dos widgets, que por isso não recebem
+    default/value: o valor de cada um vem só do session_state (o inicial, o restaurado
+    da URL por restaurar_filtros_url ou a última escolha do usuário).
+    """
+    for chave, valor in snapshot_dados['filtros_padrao'].get(pagina, {}).items():
+        # Cópia: a lista padrão é do snapshot, compartilhado entre sessões
+        st.session_state.setdefault(chave, list(valor) if isinstance(valor, list) else valor)
+
+def sincronizar_filtros_url(pagina):
+    """
+    Grava na URL o estado atual dos filtros da página, em forma canônica.
+
+    Chamada logo após os filtros da página; só reescreve a URL quando algo mudou.
+
+    Returns:
+        Query string canônica da visão (chave para visao_compartilhada)
+    """
+    parametros = serializar_filtros(pagina, st.session_state, snapshot_dados['filtros_padrao'])
+    chave = chave_filtros(parametros)
+    atual = chave_filtros({parametro: st.query_params.get_all(parametro) for parametro in st.query_params})
+    if atual != chave:
+        st.query_params.from_dict(parametros)
+    return chave
+
+@st.cache_resource(show_spinner=False)
+def obter_cache_visoes():
+    """Cache compartilhado (LRU) dos resultados de cada visão filtrada."""
+    return {'resultados': OrderedDict(), 'lock': threading.Lock()}
+
+def visao_compartilhada(chave, nome, calcular):
+    """
+    Retorna o resultado de uma visão filtrada, calculando-o uma única vez por processo.
+
+    Usuários diferentes com os mesmos filtros (mesma URL canônica) reaproveitam o
+    mesmo resultado. A versão do snapshot faz parte da chave, então uma troca de
+    dados invalida as visões antigas, que saem do cache pela ordem de uso. As visões
+    padrão pré-calculadas na ingestão (gerar_visoes_padrao) são consultadas primeiro.
+
+    Args:
+        chave: Query string canônica retornada por sincronizar_filtros_url
+        nome: Identificador do cálculo dentro da página
+        calcular: Função sem argumentos que produz o resultado
+
+    Os DataFrames retornados são compartilhados (protegidos pelo copy-on-write do pandas).
+
+    Returns:
+        Resultado de calcular() (calculado agora ou reaproveitado)
+    """
+    # Visões que podem ser refeitas a partir da chave entram no registro de acessos
+    if nome in VISOES_REPRODUZIVEIS:
+        registrar_acesso('visao', nome, chave)
+
+    padrao = snapshot_dados['visoes_padrao'].get((nome, chave))
+    if padrao is not None:
+        return padrao
+
+    cache = obter_cache_visoes()
+    chave_cache = (snapshot_dados['versao'], nome, chave)
+    with cache['lock']:
+        if chave_cache in cache['resultados']:
+            cache['resultados'].move_to_end(chave_cache)
+            return cache['resultados'][chave_cache]
+
+    resultado = calcular()
+    guardar_visao_compartilhada(snapshot_dados['versao'], nome, chave, resultado)
+    return resultado
+
+def guardar_visao_compartilhada(versao, nome, chave, resultado):
+    """Põe um resultado no cache compartilhado de visões, descartando as menos usadas."""
+    cache = obter_cache_visoes()
+    with cache['lock']:
+        cache['resultados'][(versao, nome, chave)] = resultado
+        cache['resultados'].move_to_end((versao, nome, chave))
+        while len(cache['resultados']) > LIMITE_VISOES_COMPARTILHADAS:
+            cache['resultados'].popitem(last=False)
+
+def figura_compartilhada(chave, nome, construir):
+    """
+    Figura de uma página: a pré-montada na ingestão, na carga padrão, ou montada agora.
+
+    As figuras das visões padrão são montadas, minimizadas e serializadas por
+    gerar_visoes_padrao; na chave padrão a figura só é consultada e enviada. Nas
+    demais chaves, a figura preparada fica na sessão (PREFIXO_CACHE_SESSAO) e é
+    reaproveitada nas reexecuções com os mesmos filtros, como cliques e edições do
+    plano de ação, enquanto as figuras guardadas couberem em LIMITE_MEMORIA_SESSAO_MB.
+
+    Args:
+        chave: Query string canônica retornada por sincronizar_filtros_url
+        nome: Identificador da figura dentro da página
+        construir: Função sem argumentos que monta a figura
+
+    Returns:
+        Tupla (figura já preparada, tamanho em bytes do seu JSON)
+    """
+    pronta = snapshot_dados['visoes_padrao'].get((nome, chave))
+    if pronta is not None:
+        return pronta
+
+    chave_sessao = PREFIXO_CACHE_SESSAO + nome
+    identificacao = (snapshot_dados['versao'], chave)
+    guardada = st.session_state.get(chave_sessao)
+    if guardada is not None and guardada[0] == identificacao:
+        return guardada[1], guardada[2]
+    fig = construir()
+    tamanho, _ = preparar_figura(fig)
+    # Não guarda o que faria as figuras da sessão passarem do limite de memória
+    guardadas = sum(
+        valor[2] for chave_guardada, valor in st.session_state.items()
+        if chave_guardada.startswith(PREFIXO_CACHE_SESSAO) and chave_guardada != chave_sessao
+    )
+    if guardadas + tamanho <= LIMITE_MEMORIA_SESSAO_MB * 1024 * 1024:
+        st.session_state[chave_sessao] = (identificacao, fig, tamanho)
+    else:
+        st.session_state.pop(chave_sessao, None)
+    return fig, tamanho
+
+# Visões que o pré-aquecimento sabe refazer a partir da chave canônica:
+# nome → (página, função(dados, escores, estado dos filtros))
+VISOES_REPRODUZIVEIS = {
+    'panorama': ("Panorama Geral", lambda dados, escores, e: calcular_visao_panorama(
+        dados[0], e['panorama_subescalas'], e['panorama_riscos'], e['panorama_ordenacao'])),
+    'ranking': ("Priorização de Riscos", lambda dados, escores, e: calcular_visao_ranking(
+        dados[1], e['rank_subescalas'], e['rank_faixa'], e['rank_ordenacao'])),
+    'cargo': ("Análise por Cargo", lambda dados, escores, e: calcular_visao_grupos(
+        dados[2], 'cargo', e['cargo_cargos'], e['cargo_subescalas'], escores, e['cargo_ordenacao'])),
+    'setor': ("Análise por Setor", lambda dados, escores, e: calcular_visao_grupos(
+        dados[3], 'setor', e['setor_setores'], e['setor_subescalas'], escores, e['setor_ordenacao'])),
+    'matriz': ("Matriz de Risco", lambda dados, escores, e: calcular_visao_matriz(
+        calcular_matriz_setores(dados[3], escores) if e['matriz2_nivel'] == 'setor' else dados[4],
+        e['matriz2_subescalas'], e['matriz2_nivel']))
+}
+
+def reproduzir_visao(snapshot, escores, nome, chave):
+    """
+    Refaz uma visão registrada a partir da sua chave canônica e a guarda no cache compartilhado.
+
+    Filtros ausentes da chave ficam no estado inicial da página (filtros_padrao).
+    """
+    if (nome, chave) in snapshot['visoes_padrao'] or nome not in VISOES_REPRODUZIVEIS:
+        return
+    pagina, calcular = VISOES_REPRODUZIVEIS[nome]
+    parametros = parse_qs(chave, keep_blank_values=True)
+    if parametros.get('pagina') != [pagina]:
+        return
+    estado = dict(snapshot['filtros_padrao'][pagina])
+    estado.update(desserializar_filtros(pagina, parametros))
+    guardar_visao_compartilhada(snapshot['versao'], nome, chave, calcular(snapshot['dados'], escores, estado))
+
+def ordenar_visao(tabela, ordenacao, valor, nome=None):
+    """
+    Aplica a ordenação escolhida no filtro "Ordenação" das páginas.
+
+    Args:
+        tabela: DataFrame a ordenar
+        ordenacao: 'Maior Risco', 'Menor Risco', 'Alfabética A-Z' ou 'Alfabética Z-A'
+        valor: Coluna usada nas ordenações por risco
+        nome: Coluna usada nas ordenações alfabéticas (None = índice)
+
+    Returns:
+        DataFrame ordenado (barras horizontais: o maior risco fica no topo)
+    """
+    if ordenacao == 'Maior Risco':
+        return tabela.sort_values(valor, ascending=True)
+    if ordenacao == 'Menor Risco':
+        return tabela.sort_values(valor, ascending=False)
+    alfabetica = ordenacao == 'Alfabética A-Z'
+    if nome is None:
+        return tabela.sort_index(ascending=alfabetica)
+    return tabela.sort_values(nome, ascending=alfabetica)
+
+def calcular_visao_panorama(dados, subescalas, riscos, ordenacao):
+    """
+    Monta a visão do Panorama Geral: dados filtrados, distribuição por fator e indicadores.
+
+    Returns:
+        Dicionário com 'filtrado', 'tabela' (contagens, total e percentuais por subescala, já
+        ordenada), 'kpis' e 'destaque' (fator com maior % de alto risco); sem 'tabela' se o
+        filtro ficou vazio
+    """
+    filtrado = dados[
+        (dados['subescala'].isin(subescalas)) &
+        (dados['classe_risco'].isin(riscos))
+    ]
+    if len(filtrado) == 0:
+        return {'filtrado': filtrado}
+
+    tabela = filtrado.pivot_table(
+        index='subescala', columns='classe_risco', values='qtd', fill_value=0
+    )
+    tabela['total'] = tabela.sum(axis=1)
+    tabela['alto_perc'] = 0
+    for col in ['baixo', 'medio', 'alto']:
+        if col in tabela.columns:
+            tabela[f'{col}_perc'] = (tabela[col] / tabela['total'] * 100).round(1)
+
+    totais = {col: tabela[col].sum() if col in tabela.columns else 0 for col in ['baixo', 'medio', 'alto']}
+    total_geral = sum(totais.values())
+    kpis = {
+        'total_respondentes': filtrado.groupby('subescala')['qtd'].sum().iloc[0],
+        'total_subscalas': filtrado['subescala'].nunique(),
+        'fatores_criticos': int((tabela['alto_perc'] >= 50).sum()),
+        'total_geral': total_geral
+    }
+    for col, total in totais.items():
+        kpis[f'total_{col}'] = total
+        kpis[f'perc_{col}'] = (total / total_geral * 100) if total_geral > 0 else 0
+
+    return {
+        'filtrado': filtrado,
+        'tabela': ordenar_visao(tabela, ordenacao, 'alto_perc'),
+        'kpis': kpis,
+        'destaque': (tabela['alto_perc'].idxmax(), tabela['alto_perc'].max())
+    }
+
+def calcular_visao_ranking(dados, subescalas, faixa, ordenacao):
+    """
+    Monta a visão da Priorização de Riscos: fatores filtrados, faixas de urgência e top 3.
+
+    Returns:
+        Dicionário com 'filtrado', 'ordenado', 'kpis' (criticos, altos, monitoramento) e 'top_3'
+    """
+    filtrado = dados[
+        (dados['subescala'].isin(subescalas)) &
+        (dados['perc_alto'] * 100 >= faixa[0]) &
+        (dados['perc_alto'] * 100 <= faixa[1])
+    ]
+    return {
+        'filtrado': filtrado,
+        'ordenado': ordenar_visao(filtrado, ordenacao, 'perc_alto', 'subescala'),
+        'kpis': {
+            'criticos': int((filtrado['perc_alto'] >= 0.7).sum()),
+            'altos': int(((filtrado['perc_alto'] >= 0.5) & (filtrado['perc_alto'] < 0.7)).sum()),
+            'monitoramento': int((filtrado['perc_alto'] < 0.5).sum())
+        },
+        'top_3': filtrado.nlargest(3, 'perc_alto') if len(filtrado) >= 3 else filtrado
+    }
+
+def calcular_visao_grupos(dados, dimensao, membros, subescalas, escores, ordenacao):
+    """
+    Monta a visão das análises por cargo ou setor.
+
+    Filtra as células, junta os intervalos de confiança e calcula os mapas
+    (membro × subescala), o ranking de médias e os indicadores da página.
+
+    Returns:
+        Dicionário com 'filtrado', 'mapa', 'mapa_ic_inf', 'mapa_ic_sup', 'positiva' (máscara
+        das colunas do mapa que são escalas de proteção), 'ranking' (ordenado), 'destaques'
+        (3 maiores médias) e 'kpis'; só 'filtrado' se o filtro ficou vazio
+    """
+    filtrado = dados[
+        (dados[dimensao].isin(membros)) &
+        (dados['subescala'].isin(subescalas))
+    ]
+    ic = calcular_intervalos_confianca(dados, dimensao, escores)
+    filtrado = filtrado.merge(ic, on=[dimensao, 'subescala'], how='left')
+    if len(filtrado) == 0:
+        return {'filtrado': filtrado}
+
+    mapa = filtrado.pivot_table(index=dimensao, columns='subescala', values='media', aggfunc='mean')
+    mapa_ic = filtrado.pivot_table(index=dimensao, columns='subescala', values=['ic_inf', 'ic_sup'], aggfunc='mean')
+
+    ranking = filtrado.assign(
+        ic_meia=(filtrado['ic_sup'] - filtrado['ic_inf']) / 2
+    ).groupby(dimensao).agg({
+        'media': 'mean',
+        'qtd': 'first',
+        'ic_meia': 'mean'
+    }).reset_index()
+
+    media_membros = filtrado.groupby(dimensao)['media'].mean()
+    media_geral = filtrado['media'].mean()
+    return {
+        'filtrado': filtrado,
+        'mapa': mapa,
+        'mapa_ic_inf': mapa_ic['ic_inf'].reindex(index=mapa.index, columns=mapa.columns),
+        'mapa_ic_sup': mapa_ic['ic_sup'].reindex(index=mapa.index, columns=mapa.columns),
+        'positiva': filtrado.groupby('subescala')['positiva'].first().reindex(mapa.columns).to_numpy(dtype=bool),
+        'ranking': ordenar_visao(ranking, ordenacao, 'media', dimensao),
+        'destaques': ranking.nlargest(3, 'media'),
+        'kpis': {
+            'membros': filtrado[dimensao].nunique(),
+            'critico': media_membros.idxmax(),
+            'media_critico': media_membros.max(),
+            'media_geral': media_geral,
+            'diferenca_max': media_membros.max() - media_geral,
+            'desvio_padrao': media_membros.std()
+        }
+    }
+
+def recortar_mapa(visao, colunas, normas=None):
+    """
+    Recorta os mapas de uma visão de grupos para um conjunto de subescalas.
+
+    Args:
+        visao: Resultado de calcular_visao_grupos
+        colunas: Subescalas a manter
+        normas: Tabelas de calcular_tabelas_normas; se houver, cada célula ganha o percentil normativo
+
+    Returns:
+        Tupla (mapa de médias sem linhas vazias, array (linhas, colunas, 2) com o IC de cada
+        célula, ou (linhas, colunas, 3) com o percentil normativo na última camada)
+    """
+    mapa = visao['mapa'][[c for c in visao['mapa'].columns if c in colunas]].dropna(how='all')
+    camadas = [
+        visao['mapa_ic_inf'].loc[mapa.index, mapa.columns].values,
+        visao['mapa_ic_sup'].loc[mapa.index, mapa.columns].values
+    ]
+    if normas:
+        camadas.append(percentil_normativo(normas, mapa.columns.values, mapa.values))
+    return mapa, np.dstack(camadas)
+
+def ranking_da_subescala(visao, dimensao, subescala, ordenacao):
+    """
+    Ranking de uma visão de grupos restrito à subescala clicada num mapa de calor.
+
+    Lê só a coluna da subescala nos mapas já calculados, sem voltar aos dados.
+
+    Returns:
+        DataFrame com as colunas de visao['ranking'] (dimensao, 'media', 'qtd', 'ic_meia')
+    """
+    media = visao['mapa'][subescala].dropna()
+    ranking = pd.DataFrame({
+        dimensao: media.index,
+        'media': media.values,
+        'qtd': visao['ranking'].set_index(dimensao)['qtd'].reindex(media.index).values,
+        'ic_meia': ((visao['mapa_ic_sup'][subescala] - visao['mapa_ic_inf'][subescala]) / 2).reindex(media.index).values
+    })
+    return ordenar_visao(ranking, ordenacao, 'media', dimensao)
+
+def calcular_visao_matriz(base, subescalas, nivel):
+    """
+    Monta a visão da Matriz de Risco: pontos classificados, rótulos e contagem por zona.
+
+    Returns:
+        Dicionário com 'filtrado' e 'contagens' (classificação -> quantidade de pontos);
+        'filtrado' sempre traz probabilidade_estimada (False na organização, que é medida)
+    """
+    filtrado = base[base['subescala'].isin(subescalas)]
+    if 'probabilidade_estimada' not in filtrado.columns:
+        filtrado = filtrado.assign(probabilidade_estimada=False)
+    if len(filtrado) == 0:
+        return {'filtrado': filtrado, 'contagens': {}}
+
+    classificacao, pontuacao = classificar_risco_vetorizado(filtrado['probabilidade'], filtrado['severidade'])
+    filtrado = filtrado.assign(
+        classificacao=classificacao,
+        pontuacao=pontuacao,
+        rotulo=filtrado['setor'] + ' · ' + filtrado['subescala'] if nivel == 'setor' else filtrado['subescala']
+    )
+    return {
+        'filtrado': filtrado,
+        'contagens': filtrado['classificacao'].value_counts().to_dict()
+    }
+
+def indexar_detalhamento(dados):
+    """
+    Agrupa as perguntas do detalhamento por subescala, uma única vez na ingestão.
+
+    A página Detalhamento & Ações troca a varredura da tabela inteira a cada
+    seleção por uma consulta ao dicionário.
+
+    Args:
+        dados: DataFrame de detalhamento (uma linha por pergunta)
+
+    Returns:
+        Dicionário subescala (em ordem alfabética) -> {'itens' (da menor para a maior
+        média), 'qtd', 'media', 'cores' (cor de cada item) e 'item_critico'}
+    """
+    indice = {}
+    for subescala, itens in dados.groupby('subescala', sort=True):
+        itens = itens.sort_values('media', ascending=True)
+        indice[subescala] = {
+            'itens': itens,
+            'qtd': len(itens),
+            'media': itens['media'].mean(),
+            'cores': [get_risk_color_classe(classe) for classe in itens['classe_risco']],
+            'item_critico': itens.loc[itens['media'].idxmax()]
+        }
+    return indice
+
+def calcular_dominios(dados, registro):
+    """
+    Consolida as subescalas nos domínios do questionário, uma única vez na ingestão.
+
+    A criticidade de cada domínio é a média das criticidades das suas subescalas
+    ponderada pelo número de respondentes de cada uma (qtd); na organização, o
+    % de alto risco também é ponderado pelos respondentes. Os mesmos totais são
+    calculados para cada cargo e cada setor.
+
+    Args:
+        dados: Tupla de carregar_dados, já anotada por anotar_subescalas
+        registro: Registro de subescalas (ver montar_registro_subescalas)
+
+    Returns:
+        Dicionário com 'hierarquia' (domínio -> subescala -> tabela das perguntas da
+        organização, da mais para a menos crítica, na ordem de exibição) e, para 'organizacao', 'cargo' e 'setor', {'dominios', 'subescalas'}:
+        tabelas indexadas por ([grupo,] dominio) e ([grupo,] dominio, subescala), com
+        criticidade, qtd, perc_alto (só na organização) e classe
+    """
+    _, ranking, cargo, setor, matriz, detalhamento = dados
+    dominio_por_codigo = np.append(registro['dominio'].to_numpy(dtype=object), DOMINIO_PADRAO)
+    ordem_dominio = {dominio: i for i, dominio in enumerate(pd.unique(dominio_por_codigo))}
+    ordem_subescala = np.append(registro['ordem'].to_numpy(), len(registro))
+
+    def classe(criticidade):
+        return np.select(
+            [criticidade > LIMIAR_ALTO_RISCO, criticidade >= LIMIAR_MEDIO_RISCO], ['alto', 'medio'], default='baixo'
+        )
+
+    def consolidar(tabela, grupo=None):
+        chaves = [grupo] if grupo else []
+        subescalas = pd.DataFrame({
+            **{chave: tabela[chave].to_numpy() for chave in chaves},
+            'dominio': dominio_por_codigo[tabela['codigo_subescala'].to_numpy()],
+            'subescala': tabela['subescala'].to_numpy(),
+            'criticidade': tabela['criticidade'].to_numpy(dtype=float),
+            'qtd': tabela['qtd'].to_numpy(dtype=float),
+            'perc_alto': tabela['perc_alto'].to_numpy(dtype=float) if 'perc_alto' in tabela else np.nan,
+            '_ordem_dominio': [ordem_dominio[d] for d in dominio_por_codigo[tabela['codigo_subescala'].to_numpy()]],
+            '_ordem': ordem_subescala[tabela['codigo_subescala'].to_numpy()]
+        })
+        subescalas['classe'] = classe(subescalas['criticidade'].to_numpy())
+        pesos = subescalas.assign(
+            _criticidade=subescalas['criticidade'] * subescalas['qtd'],
+            _alto=subescalas['perc_alto'] * subescalas['qtd']
+        ).groupby(chaves + ['_ordem_dominio', 'dominio'], sort=True).agg(
+            _criticidade=('_criticidade', 'sum'), _alto=('_alto', 'sum'), _peso=('qtd', 'sum'),
+            qtd=('qtd', 'max'), subescalas=('subescala', 'size')
+        ).reset_index()
+        dominios = pd.DataFrame({
+            **{chave: pesos[chave] for chave in chaves},
+            'dominio': pesos['dominio'],
+            'criticidade': pesos['_criticidade'] / pesos['_peso'],
+            'qtd': pesos['qtd'].astype(int),
+            'subescalas': pesos['subescalas'],
+            'perc_alto': pesos['_alto'] / pesos['_peso']
+        })
+        if 'perc_alto' not in tabela:
+            dominios = dominios.drop(columns='perc_alto')
+            subescalas = subescalas.drop(columns='perc_alto')
+        dominios['classe'] = classe(dominios['criticidade'].to_numpy())
+        subescalas = subescalas.sort_values(chaves + ['_ordem_dominio', '_ordem']).drop(columns=['_ordem_dominio', '_ordem'])
+        return {
+            'dominios': dominios.set_index(chaves + ['dominio']),
+            'subescalas': subescalas.astype({'qtd': int}).set_index(chaves + ['dominio', 'subescala'])
+        }
+
+    organizacao = ranking.assign(
+        criticidade=ranking['criticidade_media'],
+        qtd=ranking['subescala'].map(matriz.groupby('subescala')['n_respondentes'].max()).fillna(0)
+    )
+    colunas_itens = ['pergunta', 'media', 'criticidade', 'classe_risco', 'qtd']
+    itens_por_subescala = dict(tuple(detalhamento.groupby('subescala', sort=False)[colunas_itens]))
+    hierarquia = {}
+    for subescala, linha in registro.iterrows():
+        itens = itens_por_subescala.get(subescala, detalhamento[colunas_itens].iloc[:0])
+        hierarquia.setdefault(linha['dominio'], {})[subescala] = itens.sort_values('criticidade', ascending=False, ignore_index=True)
+    return {
+        'hierarquia': hierarquia,
+        'organizacao': consolidar(organizacao),
+        'cargo': consolidar(cargo.rename(columns={'criticidade_media': 'criticidade'}), 'cargo'),
+        'setor': consolidar(setor.rename(columns={'criticidade_media': 'criticidade'}), 'setor')
+    }
+
+def filtros_padrao(dados, registro):
+    """
+    Estado inicial dos filtros de cada página, que semear_filtros grava na sessão.
+
+    Filtros cujo valor inicial depende de outros filtros da página (ondas, número de
+    grupos) são semeados pela própria página.
+
+    Args:
+        dados: Tupla retornada por carregar_dados
+        registro: Registro de subescalas (montar_registro_subescalas), para a ordem de exibição
+
+    Returns:
+        Dicionário página -> {chave do widget: valor inicial}
+    """
+    panorama, ranking, cargo, setor, matriz, detalhamento = dados
+    ordenacao = 'Maior Risco'
+    return {
+        "Panorama Geral": {
+            'panorama_subescalas': ordenar_subescalas(panorama['subescala'], registro),
+            'panorama_riscos': [r for r in ['baixo', 'medio', 'alto'] if r in panorama['classe_risco'].unique()],
+            'panorama_ordenacao': ordenacao,
+            'panorama_percentuais': True,
+            'panorama_navegador': True
+        },
+        "Priorização de Riscos": {
+            'rank_subescalas': ordenar_subescalas(ranking['subescala'], registro),
+            'rank_faixa': (float(ranking['perc_alto'].min() * 100), float(ranking['perc_alto'].max() * 100)),
+            'rank_ordenacao': ordenacao,
+            'rank_show_perc': True,
+            'rank_navegador': True
+        },
+        "Análise por Cargo": {
+            'cargo_cargos': sorted(cargo['cargo'].unique().tolist()),
+            'cargo_subescalas': ordenar_subescalas(cargo['subescala'], registro),
+            'cargo_ordenacao': ordenacao,
+            'cargo_show_values': True,
+            'cargo_show_ic': True,
+            'cargo_seriacao': False
+        },
+        "Análise por Setor": {
+            'setor_setores': sorted(setor['setor'].unique().tolist()),
+            'setor_subescalas': ordenar_subescalas(setor['subescala'], registro),
+            'setor_ordenacao': ordenacao,
+            'setor_show_values': True,
+            'setor_show_ic': True,
+            'setor_seriacao': False
+        },
+        "Comparações entre Grupos": {
+            'comp_alpha': 0.05
+        },
+        "Matriz de Risco": {
+            'matriz2_subescalas': ordenar_subescalas(matriz['subescala'], registro),
+            'matriz2_nivel': 'organizacao',
+            'matriz2_labels': True
+        },
+        "Detalhamento & Ações": {
+            'detalhe_subescala': sorted(detalhamento['subescala'].unique())[0]
+        }
+    }
+
+def caminho_visoes_padrao(versao):
+    """
+    Arquivo com as visões padrão pré-calculadas de uma versão dos dados.
+
+    O nome também leva o hash do código do app, que monta as visões, figuras e
+    cartões gravados: qualquer mudança nele gera outro arquivo, sem versão manual.
+    """
+    if getattr(sys, 'frozen', False):
+        base_dir = Path(sys._MEIPASS)
+    else:
+        base_dir = Path(__file__).parent
+
+    codigo = hashlib.sha1(Path(__file__).read_bytes()).hexdigest()
+    nome = hashlib.sha1(repr((codigo, versao)).encode('utf-8')).hexdigest()[:16]
+    return base_dir / 'cache' / 'visoes' / f'{nome}.pkl'
+
+def gerar_visoes_padrao(dados, padroes, escores, normas, indice_detalhamento, versao):
+    """
+    Pré-calcula, na ingestão, as visões das páginas com todos os filtros no estado inicial.
+
+    Além dos resultados das visões, guarda os cartões de texto e as figuras já
+    minimizadas e serializadas em JSON. O resultado é gravado em cache/visoes/ por
+    versão dos dados; um reinício do servidor com os mesmos arquivos só lê o arquivo.
+    A carga padrão de cada página vira consultas em visao_compartilhada e
+    figura_compartilhada, sem trabalho do pandas nem montagem de figuras na requisição.
+
+    Args:
+        dados: Tupla retornada por carregar_dados
+        padroes: Estado inicial dos filtros (filtros_padrao)
+        escores: Escores por respondente (calcular_escores_respondentes) ou None
+        normas: Tabelas de calcular_tabelas_normas ou None
+        indice_detalhamento: Resultado de indexar_detalhamento
+        versao: Assinatura dos arquivos (versão do snapshot)
+
+    Returns:
+        Dicionário (nome da visão ou figura, chave canônica dos filtros) -> resultado;
+        as figuras vêm como tupla (figura, tamanho em bytes do JSON)
+    """
+    caminho = caminho_visoes_padrao(versao)
+    if caminho.exists():
+        try:
+            with open(caminho, 'rb') as arquivo:
+                gravado = pickle.load(arquivo)
+            return abrir_visoes_padrao(gravado['visoes'], gravado['figuras'])
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, ValueError):
+            pass
+
+    panorama, ranking, cargo, setor, matriz, detalhamento = dados
+
+    def chave(pagina, **alterados):
+        return chave_filtros(serializar_filtros(pagina, dict(padroes[pagina], **alterados), padroes))
+
+    p = padroes["Panorama Geral"]
+    r = padroes["Priorização de Riscos"]
+    c = padroes["Análise por Cargo"]
+    s = padroes["Análise por Setor"]
+    m = padroes["Matriz de Risco"]
+    d = padroes["Detalhamento & Ações"]
+    # Panorama e Priorização abrem com o painel do navegador, que calcula os próprios
+    # indicadores e gráfico; as visões e figuras do servidor servem ao painel desligado
+    chave_p = chave("Panorama Geral", panorama_navegador=False)
+    chave_r = chave("Priorização de Riscos", rank_navegador=False)
+    chave_c = chave("Análise por Cargo")
+    chave_s, chave_m, chave_d = chave("Análise por Setor"), chave("Matriz de Risco"), chave("Detalhamento & Ações")
+
+    visao_p = calcular_visao_panorama(panorama, p['panorama_subescalas'], p['panorama_riscos'], p['panorama_ordenacao'])
+    visao_r = calcular_visao_ranking(ranking, r['rank_subescalas'], r['rank_faixa'], r['rank_ordenacao'])
+    visao_c = calcular_visao_grupos(cargo, 'cargo', c['cargo_cargos'], c['cargo_subescalas'], escores, c['cargo_ordenacao'])
+    visao_s = calcular_visao_grupos(setor, 'setor', s['setor_setores'], s['setor_subescalas'], escores, s['setor_ordenacao'])
+    visao_m = calcular_visao_matriz(matriz, m['matriz2_subescalas'], m['matriz2_nivel'])
+    mapas_c = preparar_mapas_grupos(visao_c, normas, c['cargo_seriacao'])
+    mapas_s = preparar_mapas_grupos(visao_s, normas, s['setor_seriacao'])
+    arvore = construir_arvore_setores(setor)
+    no_inicial = next(no for no, filhos in arvore['filhos'].items() if len(filhos) > 0)
+    pontos_m = posicionar_pontos_matriz(visao_m['filtrado'])
+
+    visoes = {
+        ('panorama', chave_p): visao_p,
+        ('ranking', chave_r): visao_r,
+        ('ranking', chave("Priorização de Riscos")): visao_r,
+        ('ranking_cartoes', chave_r): cartoes_prioridades(visao_r['top_3']),
+        ('cargo', chave_c): visao_c,
+        ('cargo_mapas', chave_c): mapas_c,
+        ('setor', chave_s): visao_s,
+        ('setor_mapas', chave_s): mapas_s,
+        ('setor_arvore', chave_s): arvore,
+        ('setor_cartoes', chave_s): cartoes_setores_prioritarios(visao_s['destaques']),
+        ('matriz', chave_m): visao_m,
+        ('matriz_pontos', chave_m): pontos_m
+    }
+
+    # Mesmas figuras e opções que as páginas exibem no estado inicial dos filtros
+    figuras = {
+        ('fig1', chave_p): figura_panorama(visao_p['tabela'], p['panorama_percentuais']),
+        ('fig2', chave_r): figura_ranking(visao_r['ordenado'], r['rank_show_perc'], normas),
+        ('fig4', chave_c): figura_ranking_grupos(visao_c['ranking'], 'cargo', 'Respondentes', c['cargo_show_values'], c['cargo_show_ic']),
+        ('fig5', chave_s): figura_ranking_grupos(visao_s['ranking'], 'setor', 'Colaboradores', s['setor_show_values'], s['setor_show_ic']),
+        ('fig_arvore', chave_s + '&' + urlencode({'no': no_inicial})): figura_arvore_setores(
+            arvore, s['setor_subescalas'], no_inicial, s['setor_show_values']),
+        ('fig_treemap', chave_s): figura_treemap_setores(arvore, s['setor_subescalas']),
+        ('fig7', chave_m): figura_matriz(pontos_m, m['matriz2_labels'], normas),
+        ('fig7', chave_d): figura_detalhamento(indice_detalhamento[d['detalhe_subescala']])
+    }
+    for (nome, sufixo), mapas, chave_grupo, e, dimensao in (
+        (('fig3_neg', 'fig3_pos'), mapas_c, chave_c, c, 'cargo'),
+        (('fig_heatmap_neg', 'fig_heatmap_pos'), mapas_s, chave_s, s, 'setor')
+    ):
+        for positiva, nome_figura in zip((False, True), (nome, sufixo)):
+            mapa, ic = mapas[positiva]
+            if len(mapa) > 0:
+                figuras[(nome_figura, chave_grupo)] = figura_mapa_grupos(
+                    mapa, ic, positiva, e[f'{dimensao}_show_values'], e[f'{dimensao}_show_ic'], normas)
+
+    for chave_figura, fig in figuras.items():
+        _, texto = preparar_figura(fig)
+        figuras[chave_figura] = texto or pio.to_json(fig, validate=False)
+
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_suffix('.tmp')
+        with open(temporario, 'wb') as arquivo:
+            pickle.dump({'visoes': visoes, 'figuras': figuras}, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+        temporario.replace(caminho)
+        # Só a versão atual interessa; versões antigas são descartadas
+        for antigo in caminho.parent.glob('*.pkl'):
+            if antigo != caminho:
+                antigo.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+    return abrir_visoes_padrao(visoes, figuras)
+
+def abrir_visoes_padrao(visoes, figuras):
+    """
+    Junta às visões padrão as figuras remontadas do JSON, uma vez por versão dos dados.
+
+    A figura remontada já está minimizada: a página só a envia (figura_compartilhada).
+
+    Args:
+        visoes: Dicionário (nome da visão, chave) -> resultado
+        figuras: Dicionário (nome da figura, chave) -> JSON da figura
+
+    Returns:
+        Dicionário com as visões e as figuras, estas como tupla (figura, tamanho em bytes do JSON)
+    """
+    padrao = dict(visoes)
+    for chave, texto in figuras.items():
+        padrao[chave] = (go.Figure(json.loads(texto)), len(texto.encode('utf-8')))
+    return padrao
+
+ORCAMENTO_FIGURA_KB = 200
+CASAS_PADRAO_FIGURA = 3
+CASAS_MINIMAS_FIGURA = 1
+TAMANHO_LOG_FIGURAS = 5 * 1024 * 1024
+ARQUIVOS_LOG_FIGURAS = 3
+ATRIBUTOS_ESTILO_TRACO = ('textfont', 'insidetextfont', 'outsidetextfont', 'hoverlabel')
+
+@st.cache_resource(show_spinner=False)
+def obter_log_figuras():
+    """
+    Logger que grava em logs/figuras.log o tamanho de cada figura enviada.
+
+    O arquivo é rotacionado ao chegar a TAMANHO_LOG_FIGURAS, mantendo ARQUIVOS_LOG_FIGURAS
+    arquivos antigos, para não crescer sem limite com as execuções de todas as sessões.
+    """
+    logger = logging.getLogger('nr01.figuras')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    caminho = caminho_registro_acessos().parent / 'figuras.log'
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        manipulador = logging.handlers.RotatingFileHandler(
+            caminho, maxBytes=TAMANHO_LOG_FIGURAS, backupCount=ARQUIVOS_LOG_FIGURAS, encoding='utf-8'
+        )
+    except OSError:
+        manipulador = logging.NullHandler()
+    manipulador.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    logger.addHandler(manipulador)
+    return logger
+
+def casas_exibidas(traco):
+    """
+    Lê nos templates de texto e hover de um traço quantas casas decimais cada atributo exibe.
+
+    Returns:
+        Dicionário atributo raiz ('x', 'z', 'customdata'...) -> casas decimais; None quando
+        o atributo usa notação científica e não deve ser arredondado
+    """
+    casas = {}
+    modelos = ' '.join(str(traco[attr] or '') for attr in ('hovertemplate', 'texttemplate') if attr in traco)
+    for raiz, formato in re.findall(r'%\{(\w+)(?:\[\d+\])?(?::([^}]*))?\}', modelos):
+        if raiz in casas and casas[raiz] is None:
+            continue
+        precisao = re.search(r'\.(\d+)~?([a-z%])', formato or '')
+        if precisao is None:
+            necessario = CASAS_PADRAO_FIGURA
+        elif precisao.group(2) in 'eg':
+            necessario = None
+        else:
+            necessario = int(precisao.group(1)) + (2 if precisao.group(2) == '%' else 0)
+        casas[raiz] = None if necessario is None else max(casas.get(raiz, 0), necessario)
+    return casas
+
+def quantizar_traco(traco, casas, casas_padrao):
+    """
+    Arredonda os arrays numéricos de um traço para a precisão exibida.
+
+    O Plotly envia arrays NumPy em binário (base64), então arredondar não basta: o array
+    também é convertido para o menor tipo que representa os valores arredondados
+    (inteiros de 8/16/32 bits ou float32). Listas Python são arredondadas e continuam listas.
+    """
+    for caminho, valor in listar_arrays(traco.to_plotly_json()):
+        decimais = casas.get(caminho[0], casas_padrao)
+        if decimais is None:
+            continue
+        if not isinstance(valor, np.ndarray):
+            # Listas (inclusive aninhadas, como customdata de heatmaps) seguem como texto JSON
+            numeros = np.asarray(valor)
+            if numeros.dtype.kind == 'O':
+                try:
+                    numeros = numeros.astype(np.float64)
+                except (TypeError, ValueError):
+                    continue
+            if numeros.dtype.kind == 'f':
+                traco[caminho] = np.round(numeros, decimais).tolist()
+            continue
+        if valor.dtype.kind != 'f':
+            continue
+        valores = np.round(valor, decimais)
+        finitos = valores[np.isfinite(valores)]
+        if len(finitos) == len(valores.ravel()) and np.array_equal(finitos, np.trunc(finitos)):
+            for tipo in (np.int8, np.int16, np.int32):
+                limites = np.iinfo(tipo)
+                if len(finitos) == 0 or (finitos.min() >= limites.min and finitos.max() <= limites.max):
+                    valores = valores.astype(tipo)
+                    break
+        elif np.array_equal(np.round(valores.astype(np.float32).astype(np.float64), decimais), valores, equal_nan=True):
+            valores = valores.astype(np.float32)
+        traco[caminho] = valores
+
+def listar_arrays(objeto, caminho=()):
+    """Percorre o dicionário de um traço e devolve (caminho, valor) de cada array."""
+    for chave, valor in objeto.items():
+        if isinstance(valor, dict):
+            yield from listar_arrays(valor, caminho + (chave,))
+        elif isinstance(valor, (list, tuple, np.ndarray)):
+            yield caminho + (chave,), valor
+
+def remover_arrays_redundantes(traco):
+    """
+    Remove arrays que não mudam o que é exibido.
+
+    - text vazio ou idêntico a x, y ou z vira um texttemplate sobre a própria coordenada;
+    - customdata não citado em nenhum template deixa de ser enviado.
+    """
+    if 'text' in traco and traco.text is not None and not isinstance(traco.text, str):
+        texto = np.asarray(traco.text)
+        modelo = traco.texttemplate if 'texttemplate' in traco else None
+        if texto.dtype.kind in 'US' and not texto.astype(str).any():
+            traco.text = None
+        elif texto.dtype.kind == 'f' and modelo in (None, '%{text}'):
+            for origem in ('x', 'y', 'z'):
+                if origem not in traco or traco[origem] is None:
+                    continue
+                valores = np.asarray(traco[origem])
+                if valores.shape == texto.shape and valores.dtype.kind == 'f' and np.array_equal(valores, texto, equal_nan=True):
+                    texto_exato = texto.astype(np.float64)
+                    decimais = next((d for d in range(7) if np.allclose(np.round(texto_exato, d), texto_exato, atol=1e-6, equal_nan=True)), 6)
+                    traco.text = None
+                    traco.texttemplate = f'%{{{origem}:.{decimais}~f}}'
+                    break
+
+    if 'customdata' in traco and traco.customdata is not None:
+        modelos = ''.join(str(traco[attr] or '') for attr in ('hovertemplate', 'texttemplate') if attr in traco)
+        if 'customdata' not in modelos:
+            traco.customdata = None
+
+def mover_estilos_para_template(fig):
+    """
+    Move para o template da figura os estilos repetidos em todos os traços de um mesmo tipo.
+
+    O plotly.js aplica template.data[tipo] a cada traço daquele tipo, então fontes de
+    texto e de hover iguais são enviadas uma vez em vez de uma vez por traço.
+    """
+    por_tipo = {}
+    for traco in fig.data:
+        por_tipo.setdefault(traco.type, []).append(traco)
+
+    for tipo, tracos in por_tipo.items():
+        if len(tracos) < 2:
+            continue
+        for attr in ATRIBUTOS_ESTILO_TRACO:
+            if attr not in tracos[0]:
+                continue
+            estilos = [traco[attr].to_plotly_json() for traco in tracos]
+            if not estilos[0] or any(estilo != estilos[0] for estilo in estilos[1:]):
+                continue
+            modelos = fig.layout.template.data[tipo] or [{}]
+            fig.layout.template.data[tipo] = [dict(modelo.to_plotly_json() if hasattr(modelo, 'to_plotly_json') else modelo, **{attr: estilos[0]}) for modelo in modelos]
+            for traco in tracos:
+                traco[attr] = None
+
+def estimar_tamanho_figura(fig):
+    """
+    Estimativa, por cima, do JSON da figura sem serializar os traços.
+
+    Arrays NumPy numéricos vão em base64 (4 bytes a cada 3); listas e textos são
+    contados pela sua representação (inclusive textos longos, como a imagem de um mapa
+    rasterizado). Só o layout é serializado de fato.
+    """
+    tamanho = len(json.dumps(fig.layout.to_plotly_json(), cls=plotly.utils.PlotlyJSONEncoder))
+    for traco in fig.data:
+        # Margem para os atributos escalares e a chave de cada array
+        tamanho += 1024
+        atributos = traco.to_plotly_json()
+        # O JSON do Plotly escapa '/', '<', '>' e '&' como \uXXXX (6 caracteres)
+        tamanho += sum(len(valor) + 5 * sum(map(valor.count, '/<>&')) for valor in atributos.values() if isinstance(valor, str))
+        for _, valor in listar_arrays(atributos):
+            if isinstance(valor, np.ndarray) and valor.dtype.kind in 'biuf':
+                tamanho += valor.nbytes * 4 // 3 + 64
+            else:
+                tamanho += len(str(valor.tolist() if isinstance(valor, np.ndarray) else valor))
+    return tamanho
+
+def minimizar_figura(fig, casas_padrao=CASAS_PADRAO_FIGURA):
+    """
+    Reduz o JSON de uma figura sem mudar o que aparece na tela.
+
+    Arredonda os arrays numéricos para a precisão usada nos templates (ou casas_padrao),
+    troca textos redundantes por texttemplate, descarta customdata não usado e move
+    estilos repetidos para o template.
+
+    Returns:
+        A própria figura, alterada
+    """
+    for traco in fig.data:
+        quantizar_traco(traco, casas_exibidas(traco), casas_padrao)
+        remover_arrays_redundantes(traco)
+    mover_estilos_para_template(fig)
+    return fig
+
+def remover_rotulos_figura(fig):
+    """
+    Tira da figura os rótulos de texto escritos sobre os traços.
+
+    O texto citado no hover é mantido; só deixa de ser desenhado no gráfico.
+    """
+    for traco in fig.data:
+        if 'mode' in traco and traco.mode and 'text' in traco.mode.split('+'):
+            traco.mode = '+'.join(parte for parte in traco.mode.split('+') if parte != 'text') or 'markers'
+        if 'texttemplate' in traco:
+            traco.texttemplate = None
+        if 'text' in traco and '%{text}' not in str(traco['hovertemplate'] if 'hovertemplate' in traco else ''):
+            traco.text = None
+
+def rasterizar_figura(fig):
+    """
+    Troca o mapa de calor de uma figura pela imagem rasterizada (criar_heatmap_rasterizado).
+
+    Só vale para figuras com um único traço Heatmap; os demais traços (alvos de clique)
+    são descartados, pois a imagem não aceita cliques. O layout da figura é mantido.
+
+    Returns:
+        True se a figura foi rasterizada
+    """
+    mapas = [traco for traco in fig.data if traco.type == 'heatmap']
+    if len(mapas) != 1:
+        return False
+    traco = mapas[0]
+    valores = np.asarray(traco.z, dtype=float)
+    pivot = pd.DataFrame(
+        valores,
+        index=list(traco.y) if traco.y is not None else list(range(valores.shape[0])),
+        columns=list(traco.x) if traco.x is not None else list(range(valores.shape[1]))
+    )
+    barra = traco.colorbar
+    rasterizada = criar_heatmap_rasterizado(
+        pivot, [list(par) for par in traco.colorscale], barra.title.text,
+        barra.title.font.color, barra.tickfont.color, zmin=traco.zmin, zmax=traco.zmax
+    )
+    fig.data = []
+    fig.add_traces(rasterizada.data)
+    fig.update_layout(xaxis=rasterizada.layout.xaxis.to_plotly_json(), yaxis=rasterizada.layout.yaxis.to_plotly_json())
+    return True
+
+def preparar_figura(fig, orcamento_kb=ORCAMENTO_FIGURA_KB):
+    """
+    Minimiza a figura até caber no orçamento de bytes.
+
+    O tamanho é estimado sem serializar a figura (estimar_tamanho_figura, que erra para
+    cima). Enquanto a estimativa passar do orçamento, a figura perde, nesta ordem: uma
+    casa decimal por vez nos arrays sem formato explícito (até CASAS_MINIMAS_FIGURA) e
+    os rótulos de texto. Só então o JSON é medido, uma única vez; se ainda passar, um
+    mapa de calor vira imagem (rasterizar_figura).
+
+    Returns:
+        Tupla (tamanho em bytes do JSON, JSON medido ou None se o tamanho for só a
+        estimativa); um tamanho acima do orçamento indica figura que não deve ser enviada
+    """
+    limite = orcamento_kb * 1024
+    minimizar_figura(fig)
+    tamanho = estimar_tamanho_figura(fig)
+    for casas in range(CASAS_PADRAO_FIGURA - 1, CASAS_MINIMAS_FIGURA - 1, -1):
+        if tamanho <= limite:
+            return tamanho, None
+        minimizar_figura(fig, casas_padrao=casas)
+        tamanho = estimar_tamanho_figura(fig)
+    if tamanho <= limite:
+        return tamanho, None
+    remover_rotulos_figura(fig)
+    tamanho = estimar_tamanho_figura(fig)
+    if tamanho <= limite:
+        return tamanho, None
+
+    texto = pio.to_json(fig, validate=False)
+    tamanho = len(texto.encode('utf-8'))
+    if tamanho > limite and rasterizar_figura(fig):
+        return estimar_tamanho_figura(fig), None
+    return tamanho, texto
+
+def exibir_figura(fig, nome, orcamento_kb=ORCAMENTO_FIGURA_KB, selecao=None, tamanho=None):
+    """
+    Prepara a figura (preparar_figura), registra os tamanhos e exibe.
+
+    Uma figura que não coube no orçamento não é enviada: a página mostra um aviso no
+    lugar do gráfico. Figuras rasterizadas não aceitam cliques.
+
+    Args:
+        fig: Figura Plotly
+        nome: Identificador da figura no log
+        orcamento_kb: Tamanho máximo do JSON da figura, em KB
+        selecao: Chave do widget para aceitar cliques em pontos (None = gráfico estático)
+        tamanho: Tamanho em bytes do JSON de uma figura já preparada (figuras padrão, ver
+            figura_compartilhada); None prepara a figura agora
+
+    Returns:
+        Evento de seleção do gráfico (ver ponto_selecionado) ou None se selecao for None
+    """
+    if tamanho is None:
+        tamanho, texto = preparar_figura(fig, orcamento_kb)
+        estimado = texto is None
+    else:
+        estimado = False
+
+    obter_log_figuras().info(
+        'pagina=%s figura=%s bytes=%s%d orcamento=%d%s',
+        st.session_state.get('pagina_selecionada'), nome, '~' if estimado else '', tamanho, orcamento_kb * 1024,
+        ' ACIMA_DO_ORCAMENTO' if tamanho > orcamento_kb * 1024 else ''
+    )
+    if tamanho > orcamento_kb * 1024:
+        st.warning(
+            f"Este gráfico tem dados demais para exibir ({tamanho / 1024:.0f} KB, limite de "
+            f"{orcamento_kb} KB). Refine os filtros para reduzir a quantidade de itens."
+        )
+        return None
+    if selecao is None or any(traco.type == 'image' for traco in fig.data):
+        st.plotly_chart(fig, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
+        return None
+    return st.plotly_chart(
+        fig, use_container_width=True, config={'responsive': True, 'displayModeBar': False},
+        key=selecao, on_select=lambda: registrar_clique(selecao), selection_mode='points'
+    )
+
+def registrar_clique(chave):
+    """Guarda qual gráfico recebeu o último clique (callback de on_select)."""
+    st.session_state['grafico_ultimo_clique'] = chave
+
+def ponto_selecionado(eventos):
+    """
+    Ponto clicado por último entre os gráficos selecionáveis de uma página.
+
+    O Streamlit zera a seleção de um gráfico quando a figura muda (outros filtros),
+    então o ponto devolvido sempre se refere à figura exibida nesta execução.
+
+    Args:
+        eventos: Dicionário chave do gráfico -> retorno de exibir_figura (None se não exibido)
+
+    Returns:
+        Tupla (chave do gráfico, ponto) ou None se nada estiver selecionado
+    """
+    ultimo = st.session_state.get('grafico_ultimo_clique')
+    for chave in sorted(eventos, key=lambda c: c != ultimo):
+        evento = eventos[chave]
+        if evento is not None and evento.selection.points:
+            return chave, evento.selection.points[0]
+    return None
+
+def adicionar_alvos_celulas(fig, mapa, ic):
+    """
+    Torna clicáveis as células de um mapa de calor.
+
+    O plotly.js não seleciona células de heatmap, então cada célula ganha um marcador
+    invisível de scatter no centro, que passa a responder pelo hover e pelo clique
+    (hoverdistance=-1 leva o cursor ao centro mais próximo, isto é, à célula sob ele).
+
+    Args:
+        fig: Figura com o go.Heatmap de mapa
+        mapa: DataFrame membro × subescala exibido
+        ic: Array (linhas, colunas, k) com o customdata de cada célula (ver recortar_mapa)
+    """
+    modelo_hover = fig.data[0].hovertemplate
+    linhas, colunas = np.nonzero(mapa.notna().values)
+    fig.update_traces(hoverinfo='skip', hovertemplate=None, customdata=None, selector=dict(type='heatmap'))
+    fig.add_trace(go.Scatter(
+        x=mapa.columns.values[colunas],
+        y=mapa.index.values[linhas],
+        mode='markers',
+        marker=dict(size=1, opacity=0),
+        customdata=np.column_stack((ic[linhas, colunas], mapa.values[linhas, colunas])),
+        hovertemplate=modelo_hover.replace('%{z', f'%{{customdata[{ic.shape[2]}]'),
+        showlegend=False
+    ))
+    fig.update_layout(hoverdistance=-1)
+
+def abrir_detalhamento(subescala):
+    """Leva à página Detalhamento & Ações já filtrada na subescala (callback de botão)."""
+    st.session_state['detalhe_subescala'] = subescala
+    st.session_state.pagina_selecionada = "Detalhamento & Ações"
+
+def exibir_resumo_subescala(subescala, chave, contexto=''):
+    """
+    Resumo da subescala clicada num gráfico, vindo do índice do detalhamento, com atalho
+    para as perguntas em Detalhamento & Ações.
+
+    Args:
+        subescala: Nome da subescala selecionada
+        chave: Chave do botão (única por página)
+        contexto: Texto opcional sobre o ponto clicado (ex.: cargo e score)
+    """
+    resumo = snapshot_dados['indice_detalhamento'].get(subescala)
+    if resumo is None:
+        return
+    item = resumo['item_critico']
+    st.markdown(f"""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(0.8rem, 2vw, 1.2rem) clamp(1rem, 3vw, 1.5rem);
+                    border-radius: clamp(10px, 2vw, 14px);
+                    border: 2px solid rgba(196, 166, 114, 0.25);
+                    border-left: 4px solid #c4a672;
+                    margin: 1rem 0 0.6rem 0;'>
+            <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.4rem;'>
+                Seleção no gráfico
+            </div>
+            <div style='color: #5a4a3a; font-size: clamp(0.9rem, 2vw, 1rem); line-height: 1.6;'>
+                <strong>{subescala}</strong>{f' · {contexto}' if contexto else ''}<br>
+                {resumo['qtd']} {'pergunta' if resumo['qtd'] == 1 else 'perguntas'} · média {resumo['media']:.2f} · item mais crítico
+                <strong>{item['pergunta']}</strong> ({item['media']:.2f})
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    st.button("Ver perguntas em Detalhamento & Ações", key=chave, on_click=abrir_detalhamento, args=(subescala,))
+
+def get_risk_color(value, tipo='score'):
+    if tipo == 'perc':
+        if value >= 0.7:
+            return '#dc2626'
+        elif value >= 0.5:
+            return '#ea580c'
+        elif value >= 0.3:
+            return '#f59e0b'
+        else:
+            return '#10b981'
+    else:
+        if value >= 4:
+            return '#dc2626'
+        elif value >= 3:
+            return '#ea580c'
+        elif value >= 2:
+            return '#f59e0b'
+        else:
+            return '#10b981'
+
+def get_risk_color_classe(classe):
+    cores = {
+        'alto': '#dc2626',
+        'medio': '#f59e0b',
+        'baixo': '#10b981'
+    }
+    return cores.get(classe, '#6b7280')
+
+# ===== FIGURAS E CARTÕES DAS PÁGINAS =====
+# Montados fora das páginas para que gerar_visoes_padrao prepare os das visões padrão
+# na ingestão; as páginas os obtêm por figura_compartilhada e visao_compartilhada.
+
+def figura_panorama(tabela, percentuais):
+    """
+    Semáforo de risco do Panorama Geral: barras empilhadas baixo/médio/alto por subescala.
+
+    Args:
+        tabela: Pivô da visão do panorama (calcular_visao_panorama)
+        percentuais: Se True, escreve os percentuais dentro das barras
+    """
+    fig = go.Figure()
+    for classe, nome, cor in (('baixo', 'Baixo Risco', '#10b981'), ('medio', 'Médio Risco', '#f59e0b'), ('alto', 'Alto Risco', '#dc2626')):
+        coluna = f'{classe}_perc'
+        if coluna in tabela.columns and not tabela[coluna].empty:
+            fig.add_trace(go.Bar(
+                name=nome,
+                y=tabela.index,
+                x=tabela[coluna],
+                orientation='h',
+                marker=dict(color=cor, line=dict(width=0)),
+                text=tabela[coluna].apply(lambda x: f'{x:.0f}%' if percentuais and x >= 4 else ''),
+                textposition='inside',
+                textfont=dict(color='white', size=13, family='Arial', weight='bold'),
+                hovertemplate='<b>%{y}</b><br>' + nome + ': %{x:.1f}%<extra></extra>'
+            ))
+
+    fig.update_layout(
+        **create_responsive_layout_config(),
+        barmode='stack',
+        height=calculate_responsive_height(len(tabela), min_height=400, item_height=40),
+        showlegend=False,
+        xaxis=dict(
+            range=[0, 100],
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            showline=False,
+            ticksuffix='%',
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+        ),
+        yaxis=dict(
+            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+            showline=False
+        )
+    )
+    return fig
+
+def figura_ranking(ordenado, percentuais, normas):
+    """
+    Ranking de criticidade da Priorização de Riscos (% em alto risco por subescala).
+
+    Args:
+        ordenado: Subescalas na ordem de exibição (visao['ordenado'] de calcular_visao_ranking)
+        percentuais: Se True, escreve os percentuais ao lado das barras
+        normas: Tabelas de calcular_tabelas_normas ou None
+    """
+    cores = []
+    for perc in ordenado['perc_alto']:
+        if perc >= 0.7:
+            cores.append('#dc2626')
+        elif perc >= 0.5:
+            cores.append('#f59e0b')
+        elif perc >= 0.3:
+            cores.append('rgba(245, 158, 11, 0.6)')
+        else:
+            cores.append('#10b981')
+
+    fig = go.Figure(go.Bar(
+        x=ordenado['perc_alto'] * 100,
+        y=ordenado['subescala'],
+        orientation='h',
+        marker=dict(
+            color=cores,
+            line=dict(color='rgba(0,0,0,0.05)', width=1)
+        ),
+        text=ordenado['perc_alto'].apply(lambda x: f"{x*100:.1f}%" if percentuais else ""),
+        textposition='outside',
+        textfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+        customdata=np.column_stack((
+            ordenado['media_score'],
+            ordenado['perc_alto']*100,
+            percentil_normativo(normas, ordenado['subescala'], ordenado['media_score'])
+        )),
+        hovertemplate='<b>%{y}</b><br>Alto Risco: %{customdata[1]:.1f}%<br>Score Médio: %{customdata[0]:.2f}' + ('<br>Percentil na norma: %{customdata[2]:.0f}' if normas else '') + '<extra></extra>'
+    ))
+
+    fig.update_layout(
+        **create_responsive_layout_config(),
+        height=calculate_responsive_height(len(ordenado), min_height=400, item_height=40),
+        showlegend=False,
+        xaxis=dict(
+            range=[0, 100],
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            showline=False,
+            ticksuffix='%',
+            title='Percentual em Alto Risco',
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold'),
+            title_font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
+        ),
+        yaxis=dict(
+            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+            showline=False
+        )
+    )
+    return fig
+
+def cartoes_prioridades(top_3):
+    """
+    Cartões das Top 3 Prioridades Imediatas da Priorização de Riscos.
+
+    Args:
+        top_3: visao['top_3'] de calcular_visao_ranking
+
+    Returns:
+        Lista de HTML, um por subescala, na ordem de prioridade
+    """
+    return [f"""
+        <div style='background: linear-gradient(135deg, rgba(220, 38, 38, 0.08) 0%, rgba(185, 28, 28, 0.05) 100%);
+                    padding: clamp(1.2rem, 3vw, 1.8rem);
+                    border-radius: clamp(10px, 2vw, 14px);
+                    border: 2px solid rgba(220, 38, 38, 0.2);
+                    border-left: 5px solid #dc2626;
+                    box-shadow: 0 4px 16px rgba(220, 38, 38, 0.1);'>
+            <div style='display: flex; align-items: center; gap: 0.8rem; margin-bottom: 1rem;'>
+                <div style='width: 40px; height: 40px;
+                            background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
+                            border-radius: 10px;
+                            display: flex; align-items: center; justify-content: center;
+                            color: white; font-weight: 800; font-size: 1.2rem;
+                            box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);'>
+                    #{idx}
+                </div>
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px;'>
+                    Prioridade
+                </div>
+            </div>
+            <h3 style='margin: 0 0 1rem 0; color: #7f1d1d; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700; line-height: 1.3;'>
+                {row.subescala}
+            </h3>
+            <div style='margin-bottom: 1rem;'>
+                <div style='font-size: clamp(2rem, 4.5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1;'>
+                    {row.perc_alto*100:.1f}%
+                </div>
+                <div style='color: #991b1b; font-size: clamp(0.75rem, 1.8vw, 0.85rem); margin-top: 0.3rem;'>
+                    em alto risco
+                </div>
+            </div>
+            <div style='background: rgba(220, 38, 38, 0.08);
+                        padding: 0.8rem;
+                        border-radius: 8px;
+                        border-left: 3px solid #dc2626;'>
+                <div style='color: #7f1d1d; font-size: clamp(0.75rem, 1.8vw, 0.8rem); font-weight: 600;'>
+                    <svg width="14" height="14" fill="none" stroke="currentColor" stroke-width="2.5" viewBox="0 0 24 24" style='display: inline; margin-right: 0.5rem; vertical-align: middle;'>
+                        <path d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z"/>
+                    </svg>
+                    Ação: 30-60 dias
+                </div>
+            </div>
+        </div>
+        """ for idx, row in enumerate(top_3.itertuples(), 1)]
+
+def cartoes_setores_prioritarios(destaques):
+    """
+    Cartões dos Setores Prioritários para Intervenção da Análise por Setor.
+
+    Args:
+        destaques: visao['destaques'] de calcular_visao_grupos
+
+    Returns:
+        Lista de HTML, um por setor, na ordem de prioridade
+    """
+    return [f"""
+        <div style='background: linear-gradient(135deg, rgba(220, 38, 38, 0.08) 0%, rgba(185, 28, 28, 0.05) 100%);
+                    padding: clamp(1.2rem, 3vw, 1.8rem);
+                    border-radius: clamp(10px, 2vw, 14px);
+                    border: 2px solid rgba(220, 38, 38, 0.2);
+                    border-left: 5px solid #dc2626;
+                    box-shadow: 0 4px 16px rgba(220, 38, 38, 0.1);'>
+            <div style='display: flex; align-items: center; gap: 0.8rem; margin-bottom: 1rem;'>
+                <div style='width: 40px; height: 40px;
+                            background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
+                            border-radius: 10px;
+                            display: flex; align-items: center; justify-content: center;
+                            color: white; font-weight: 800; font-size: 1.2rem;
+                            box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);'>
+                    #{idx}
+                </div>
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px;'>
+                    Prioridade
+                </div>
+            </div>
+            <h3 style='margin: 0 0 1rem 0; color: #7f1d1d; font-size: clamp(1rem, 2.2vw, 1.2rem); font-weight: 700; line-height: 1.3;'>
+                {row.setor}
+            </h3>
+            <div style='margin-bottom: 1rem;'>
+                <div style='font-size: clamp(2rem, 4.5vw, 2.8rem); font-weight: 800; color: #dc2626; line-height: 1;'>
+                    {row.media:.2f}
+                </div>
+                <div style='color: #991b1b; font-size: clamp(0.75rem, 1.8vw, 0.85rem); margin-top: 0.3rem;'>
+                    score médio
+                </div>
+            </div>
+            <div style='background: rgba(220, 38, 38, 0.08);
+                        padding: 0.8rem;
+                        border-radius: 8px;
+                        border-left: 3px solid #dc2626;'>
+                <div style='color: #7f1d1d; font-size: clamp(0.75rem, 1.8vw, 0.8rem); font-weight: 600;'>
+                    <svg width="14" height="14" fill="none" stroke="currentColor" stroke-width="2.5" viewBox="0 0 24 24" style='display: inline; margin-right: 0.5rem; vertical-align: middle;'>
+                        <path d="M17 20h5v-2a3 3 0 00-5.356-1.857M17 20H7m10 0v-2c0-.656-.126-1.283-.356-1.857M7 20H2v-2a3 3 0 015.356-1.857M7 20v-2c0-.656.126-1.283.356-1.857m0 0a5.002 5.002 0 019.288 0M15 7a3 3 0 11-6 0 3 3 0 016 0zm6 3a2 2 0 11-4 0 2 2 0 014 0zM7 10a2 2 0 11-4 0 2 2 0 014 0z"/>
+                    </svg>
+                    {row.qtd} colaboradores
+                </div>
+            </div>
+        </div>
+        """ for idx, row in enumerate(destaques.itertuples(), 1)]
+
+# Escala, título e cores da barra de cores, cores dos eixos e leitura do score dos
+# mapas de calor de cargo e setor: escalas negativas (problemas) e positivas (proteções)
+ESTILOS_MAPA_GRUPOS = {
+    False: ('RdYlGn_r', "Score<br>(Problema)", '#991b1b', '#7f1d1d', '(Quanto maior, pior)'),
+    True: ('RdYlGn', "Score<br>(Proteção)", '#065f46', '#064e3b', '(Quanto maior, melhor)')
+}
+
+def preparar_mapas_grupos(visao, normas, seriar):
+    """
+    Recorta os mapas de calor de uma visão de grupos em escalas negativas e positivas.
+
+    Args:
+        visao: Resultado de calcular_visao_grupos
+        normas: Tabelas de calcular_tabelas_normas ou None
+        seriar: Se True, reordena linhas e colunas por semelhança de perfil (ordenar_seriacao)
+
+    Returns:
+        Dicionário positiva (False/True) -> (mapa, ic), como em recortar_mapa
+    """
+    mapas = {}
+    for positiva in (False, True):
+        mapa, ic = recortar_mapa(visao, visao['mapa'].columns[visao['positiva'] if positiva else ~visao['positiva']], normas)
+        if len(mapa) > 0 and seriar:
+            linhas_seriadas, colunas_seriadas = ordenar_seriacao(mapa)
+            ordem_linhas = mapa.index.get_indexer(linhas_seriadas)
+            ordem_colunas = mapa.columns.get_indexer(colunas_seriadas)
+            mapa = mapa.iloc[ordem_linhas, ordem_colunas]
+            ic = ic[ordem_linhas][:, ordem_colunas]
+        mapas[positiva] = (mapa, ic)
+    return mapas
+
+def figura_mapa_grupos(mapa, ic, positiva, valores, mostrar_ic, normas):
+    """
+    Mapa de calor membro × subescala das páginas de cargo e setor.
+
+    Acima de LIMITE_CELULAS_HEATMAP células o mapa é rasterizado (criar_heatmap_rasterizado)
+    e deixa de aceitar cliques.
+
+    Args:
+        mapa, ic: Saída de preparar_mapas_grupos para a polaridade
+        positiva: True para escalas positivas (proteções), False para negativas (problemas)
+        valores: Se True, escreve o score em cada célula
+        mostrar_ic: Se True, o hover traz o IC de 95%
+        normas: Tabelas de calcular_tabelas_normas ou None
+    """
+    escala, titulo, cor_titulo, cor_ticks, leitura = ESTILOS_MAPA_GRUPOS[positiva]
+    if mapa.size > LIMITE_CELULAS_HEATMAP:
+        fig = criar_heatmap_rasterizado(mapa, escala, titulo, cor_titulo, cor_ticks)
+    else:
+        fig = go.Figure(data=go.Heatmap(
+            z=mapa.values,
+            x=mapa.columns,
+            y=mapa.index,
+            colorscale=escala,
+            text=mapa.values.round(2),
+            texttemplate='%{text}' if valores else '',
+            textfont={"size": 12, "color": "#1e293b", "family": "Arial", "weight": "bold"},
+            colorbar=dict(
+                title=dict(
+                    text=titulo,
+                    side='right',
+                    font=dict(size=13, color=cor_titulo, family='Arial', weight='bold')
+                ),
+                tickfont=dict(size=12, color=cor_ticks, family='Arial', weight='bold')
+            ),
+            customdata=ic,
+            hovertemplate='<b>%{y}</b><br>%{x}<br>Score: <b>%{z:.2f}</b>' + ('<br>IC 95%: %{customdata[0]:.2f} – %{customdata[1]:.2f}' if mostrar_ic else '') + ('<br>Percentil na norma: %{customdata[2]:.0f}' if normas else '') + '<br>' + leitura + '<extra></extra>'
+        ))
+        adicionar_alvos_celulas(fig, mapa, ic)
+
+    fig.update_layout(
+        **create_responsive_layout_config(),
+        height=calculate_responsive_height(len(mapa), min_height=500, item_height=45),
+        xaxis=dict(
+            title='',
+            tickfont=dict(size=13, color=cor_titulo, family='Arial', weight='bold'),
+            tickangle=-45
+        ),
+        yaxis=dict(
+            title='',
+            tickfont=dict(size=13, color=cor_titulo, family='Arial', weight='bold')
+        )
+    )
+    return fig
+
+def figura_ranking_grupos(ranking, dimensao, rotulo_qtd, valores, mostrar_ic, destaque=None):
+    """
+    Ranking de cargos ou setores por score médio, com o IC de cada barra.
+
+    Args:
+        ranking: visao['ranking'] de calcular_visao_grupos (ou ranking_da_subescala)
+        dimensao: 'cargo' ou 'setor'
+        rotulo_qtd: Rótulo da quantidade de pessoas no hover
+        valores: Se True, escreve o score ao lado das barras
+        mostrar_ic: Se True, exibe as barras de erro e o IC no hover
+        destaque: Membro clicado no mapa de calor (os demais ficam esmaecidos) ou None
+    """
+    fig = go.Figure(go.Bar(
+        x=ranking['media'],
+        y=ranking[dimensao],
+        orientation='h',
+        marker=dict(
+            color=[get_risk_color(score) for score in ranking['media']],
+            opacity=None if destaque is None else np.where(ranking[dimensao] == destaque, 1.0, 0.45),
+            line=dict(width=1, color='rgba(0,0,0,0.05)')
+        ),
+        text=ranking['media'].round(2) if valores else '',
+        # Meia-amplitude média dos ICs das subescalas: limite conservador, pois as
+        # subescalas são respondidas pelas mesmas pessoas e não são independentes
+        error_x=dict(
+            type='data',
+            array=ranking['ic_meia'],
+            visible=mostrar_ic,
+            color='rgba(90, 74, 58, 0.6)',
+            thickness=1.5,
+            width=4
+        ),
+        textposition='outside',
+        textfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+        customdata=np.column_stack((ranking['qtd'], ranking['ic_meia'])),
+        hovertemplate='<b>%{y}</b><br>Score: <b>%{x:.2f}</b>' + (' ± %{customdata[1]:.2f}' if mostrar_ic else '') + '<br>' + rotulo_qtd + ': %{customdata[0]}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        **create_responsive_layout_config(),
+        height=calculate_responsive_height(len(ranking), min_height=400, item_height=40),
+        showlegend=False,
+        xaxis=dict(
+            range=[0, 5],
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            showline=False,
+            title=dict(
+                text='Score Médio de Risco',
+                font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
+            ),
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+        ),
+        yaxis=dict(
+            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+            showline=False
+        )
+    )
+    return fig
+
+def medias_arvore_setores(arvore, subescalas):
+    """Score médio de cada nó da hierarquia (construir_arvore_setores) nas subescalas escolhidas."""
+    colunas = [arvore['subescalas'].index(s) for s in subescalas if s in arvore['subescalas']]
+    return np.nanmean(arvore['media'][:, colunas], axis=1)
+
+def figura_arvore_setores(arvore, subescalas, no, valores):
+    """
+    Unidades logo abaixo de um nó da hierarquia de setores, ordenadas pelo score.
+
+    Args:
+        arvore: Resultado de construir_arvore_setores
+        subescalas: Subescalas que entram na média
+        no: Índice do nó expandido
+        valores: Se True, escreve o score ao lado das barras
+    """
+    media_nos = medias_arvore_setores(arvore, subescalas)
+    colaboradores_nos = arvore['respondentes']
+    filhos_no = arvore['filhos'][no]
+    filhos_no = filhos_no[np.argsort(media_nos[filhos_no])]
+
+    fig = go.Figure(go.Bar(
+        x=media_nos[filhos_no],
+        y=[arvore['rotulos'][f] + (' ▸' if len(arvore['filhos'][f]) > 0 else '') for f in filhos_no],
+        orientation='h',
+        marker=dict(
+            color=[get_risk_color(score) for score in media_nos[filhos_no]],
+            line=dict(width=1, color='rgba(0,0,0,0.05)')
+        ),
+        text=np.round(media_nos[filhos_no], 2) if valores else '',
+        textposition='outside',
+        textfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+        customdata=colaboradores_nos[filhos_no],
+        hovertemplate='<b>%{y}</b><br>Score: <b>%{x:.2f}</b><br>Colaboradores: %{customdata:.0f}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        **create_responsive_layout_config(),
+        height=calculate_responsive_height(len(filhos_no), min_height=300, item_height=40),
+        showlegend=False,
+        title=dict(
+            text=f"{arvore['caminhos'][no]} — Média: {media_nos[no]:.2f} ({colaboradores_nos[no]:.0f} colaboradores)",
+            font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
+        ),
+        xaxis=dict(
+            range=[0, 5],
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            showline=False,
+            title=dict(
+                text='Score Médio Ponderado',
+                font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
+            ),
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+        ),
+        yaxis=dict(
+            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+            showline=False
+        )
+    )
+    return fig
+
+def figura_treemap_setores(arvore, subescalas):
+    """
+    Treemap da hierarquia de setores: área pelos colaboradores, cor pelo score médio.
+
+    Args:
+        arvore: Resultado de construir_arvore_setores
+        subescalas: Subescalas que entram na média
+    """
+    media_nos = medias_arvore_setores(arvore, subescalas)
+    fig = go.Figure(go.Treemap(
+        ids=arvore['caminhos'],
+        labels=arvore['rotulos'],
+        parents=['' if p < 0 else arvore['caminhos'][p] for p in arvore['pais']],
+        values=arvore['respondentes'],
+        branchvalues='total',
+        marker=dict(
+            colors=media_nos,
+            colorscale='RdYlGn_r',
+            cmin=1,
+            cmax=5,
+            colorbar=dict(
+                title=dict(text='Score', font=dict(size=13, color='#5a4a3a', family='Arial', weight='bold')),
+                tickfont=dict(size=12, color='#6b5847', family='Arial', weight='bold')
+            )
+        ),
+        maxdepth=3,
+        customdata=media_nos,
+        texttemplate='<b>%{label}</b><br>%{customdata:.2f}',
+        hovertemplate='<b>%{id}</b><br>Score: <b>%{customdata:.2f}</b><br>Colaboradores: %{value:.0f}<extra></extra>'
+    ))
+    layout_config = create_responsive_layout_config()
+    layout_config['margin'] = dict(l=10, r=10, t=30, b=10)
+    fig.update_layout(
+        **layout_config,
+        height=500
+    )
+    return fig
+
+def separar_pontos_sobrepostos(df, threshold=0.4):
+    """Separa pontos que estão muito próximos na matriz"""
+    df_plot = df.copy()
+    positions = df_plot[['prob_norm', 'severidade']].values.astype(float)
+    n_points = len(positions)
+    
+    if n_points <= 1:
+        df_plot['prob_ajustado'] = df_plot['prob_norm']
+        df_plot['sev_ajustado'] = df_plot['severidade']
+        return df_plot
+    
+    # Aplicar deslocamento iterativo
+    for iteration in range(50):
+        moved = False
+        for i in range(n_points):
+            for j in range(i + 1, n_points):
+                dx = positions[i, 0] - positions[j, 0]
+                dy = positions[i, 1] - positions[j, 1]
+                dist = np.sqrt(dx**2 + dy**2)
+                
+                if dist < threshold and dist > 0:
+                    # Normalizar vetor
+                    if dist > 0:
+                        dx /= dist
+                        dy /= dist
+                    else:
+                        angle = np.random.uniform(0, 2 * np.pi)
+                        dx = np.cos(angle)
+                        dy = np.sin(angle)
+                    
+                    # Aplicar deslocamento
+                    offset = 0.15
+                    positions[i, 0] += dx * offset
+                    positions[i, 1] += dy * offset
+                    positions[j, 0] -= dx * offset
+                    positions[j, 1] -= dy * offset
+                    moved = True
+        
+        if not moved:
+            break
+    
+    # Manter dentro dos limites
+    positions[:, 0] = np.clip(positions[:, 0], 0.5, 9.5)
+    positions[:, 1] = np.clip(positions[:, 1], 0.3, 4.7)
+    
+    df_plot['prob_ajustado'] = positions[:, 0]
+    df_plot['sev_ajustado'] = positions[:, 1]
+    
+    return df_plot
+
+def posicionar_pontos_matriz(filtrado):
+    """
+    Posição de cada ponto da matriz de risco: probabilidade em 0-10 e posições ajustadas.
+
+    Acima de LIMITE_PONTOS_WEBGL pontos a matriz usa WebGL e os pontos ficam na posição
+    real; abaixo, separar_pontos_sobrepostos afasta os que se sobrepõem.
+
+    Args:
+        filtrado: visao['filtrado'] de calcular_visao_matriz
+
+    Returns:
+        DataFrame com prob_norm, prob_ajustado e sev_ajustado
+    """
+    # Normalizar probabilidade para eixo X (0-10)
+    pontos = filtrado.assign(prob_norm=filtrado['probabilidade'] * 10)
+    if len(pontos) > LIMITE_PONTOS_WEBGL:
+        return pontos.assign(prob_ajustado=pontos['prob_norm'], sev_ajustado=pontos['severidade'])
+    return separar_pontos_sobrepostos(pontos)
+
+def tracos_matriz(pontos):
+    """
+    Pontos de cada traço da matriz de risco, na ordem em que figura_matriz os adiciona.
+
+    A probabilidade estimada (setores sem respostas brutas) fica em traços próprios.
+    Serve também para traduzir cliques (curve_number, point_index) de volta às linhas.
+
+    Returns:
+        Lista de tuplas (classificação, estimada, DataFrame)
+    """
+    tracos = []
+    for classificacao in ['BAIXO', 'MÉDIO', 'ALTO', 'CRÍTICO']:
+        for estimada in (False, True):
+            df_class = pontos[(pontos['classificacao'] == classificacao) & (pontos['probabilidade_estimada'] == estimada)]
+            if len(df_class) > 0:
+                tracos.append((classificacao, estimada, df_class))
+    return tracos
+
+def figura_matriz(pontos, rotulos, normas):
+    """
+    Matriz de risco probabilidade × severidade sobre as zonas de template_zonas_matriz.
+
+    Muitos pontos (acima de LIMITE_PONTOS_WEBGL): WebGL, marcadores menores e rótulos só
+    nos 15 mais críticos.
+
+    Args:
+        pontos: Resultado de posicionar_pontos_matriz
+        rotulos: Se True, exibe os nomes dos fatores no gráfico
+        normas: Tabelas de calcular_tabelas_normas ou None
+    """
+    matriz_lod = len(pontos) > LIMITE_PONTOS_WEBGL
+
+    # Zonas coloridas e linhas de corte vêm prontas do template em cache
+    fig = go.Figure(layout=dict(template=template_zonas_matriz()))
+
+    color_map_class = {
+        'CRÍTICO': '#dc2626',
+        'ALTO': '#f59e0b',
+        'MÉDIO': '#eab308',
+        'BAIXO': '#3b82f6'
+    }
+
+    TracoMatriz = go.Scattergl if matriz_lod else go.Scatter
+
+    # Probabilidade estimada com losango, legenda e hover indicando a estimativa
+    for classificacao, estimada, df_class in tracos_matriz(pontos):
+        rotulo_probabilidade = 'Probabilidade estimada' if estimada else 'Probabilidade'
+        fig.add_trace(TracoMatriz(
+            x=df_class['prob_ajustado'],
+            y=df_class['sev_ajustado'],
+            mode='markers+text' if rotulos and not matriz_lod else 'markers',
+            name=f'{classificacao} (prob. estimada)' if estimada else classificacao,
+            marker=dict(
+                size=10 if matriz_lod else 24,
+                color=color_map_class[classificacao],
+                symbol='diamond' if estimada else 'circle',
+                line=dict(width=1 if matriz_lod else 3, color='white'),
+                opacity=0.7 if matriz_lod else 0.9
+            ),
+            text=df_class['rotulo'].str[:20] if rotulos and not matriz_lod else None,
+            hovertext=df_class['rotulo'],
+            textposition='top center',
+            textfont=dict(size=11, color='#1e293b', family='Arial', weight='bold'),
+            hovertemplate='<b>%{hovertext}</b><br>' + rotulo_probabilidade + ': %{customdata[0]:.1f}/10 (%{customdata[1]:.0%})<br>Severidade: %{customdata[2]:.2f}/5' + (' (percentil na norma: %{customdata[4]:.0f})' if normas else '') + '<br>Pontuação: %{customdata[3]:.1f}<br><b>Risco: ' + classificacao + '</b><extra></extra>',
+            customdata=np.column_stack((
+                df_class[['prob_norm', 'probabilidade', 'severidade', 'pontuacao']].values,
+                percentil_normativo(normas, df_class['subescala'], df_class['severidade'])
+            ))
+        ))
+
+    if matriz_lod and rotulos:
+        destaques = pontos.nlargest(15, ['pontuacao', 'severidade'])
+        fig.add_trace(go.Scatter(
+            x=destaques['prob_ajustado'],
+            y=destaques['sev_ajustado'],
+            mode='text',
+            text=destaques['rotulo'].str[:30],
+            textposition='top center',
+            textfont=dict(size=11, color='#1e293b', family='Arial', weight='bold'),
+            hoverinfo='skip',
+            showlegend=False
+        ))
+
+    # Layout
+    layout_config = create_responsive_layout_config()
+    fig.update_layout(
+        **layout_config,
+        height=calculate_responsive_height(len(pontos), min_height=600, item_height=25, max_height=850),
+        xaxis=dict(
+            range=[0, 10],
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            showline=True,
+            linewidth=2,
+            linecolor='rgba(107, 88, 71, 0.3)',
+            title=dict(
+                text='<b>Probabilidade de Ocorrência</b> (0 = Eventual → 10 = Permanente)',
+                font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
+            ),
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold'),
+            dtick=1
+        ),
+        yaxis=dict(
+            range=[0, 5],
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            showline=True,
+            linewidth=2,
+            linecolor='rgba(107, 88, 71, 0.3)',
+            title=dict(
+                text='<b>Severidade do Impacto</b> (0 = Leve → 5 = Catastrófica)',
+                font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
+            ),
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold'),
+            dtick=1
+        ),
+        showlegend=True,
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='center',
+            x=0.5,
+            bgcolor='rgba(255, 255, 255, 0.95)',
+            bordercolor='rgba(196, 166, 114, 0.4)',
+            borderwidth=2,
+            font=dict(size=13, family='Arial', color='#5a4a3a', weight='bold')
+        )
+    )
+    return fig
+
+def figura_detalhamento(visao_detalhe):
+    """
+    Score médio de cada pergunta de uma subescala (Detalhamento & Ações).
+
+    Args:
+        visao_detalhe: Entrada de indexar_detalhamento para a subescala
+    """
+    df_detalhe = visao_detalhe['itens']
+    fig = go.Figure(go.Bar(
+        x=df_detalhe['media'],
+        y=df_detalhe['pergunta'],
+        orientation='h',
+        marker=dict(
+            color=visao_detalhe['cores'],
+            line=dict(width=1, color='rgba(0,0,0,0.05)')
+        ),
+        text=df_detalhe['media'].round(2),
+        textposition='outside',
+        textfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+        customdata=df_detalhe['classe_risco'],
+        hovertemplate='<b>%{y}</b><br>Score Médio: <b>%{x:.2f}</b><br>Classe: %{customdata}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        **create_responsive_layout_config(),
+        height=calculate_responsive_height(len(df_detalhe), min_height=400, item_height=35),
+        showlegend=False,
+        xaxis=dict(
+            range=[0, 5],
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            showline=False,
+            title=dict(
+                text='Score Médio (0 = Baixo Risco → 5 = Alto Risco)',
+                font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
+            ),
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+        ),
+        yaxis=dict(
+            tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
+            showline=False
+        )
+    )
+    return fig
+
+import base64
+def get_base64_image(image_path):
+    with open(image_path, "rb") as img_file:
+        return base64.b64encode(img_file.read()).decode()
+
+## dados geral
+# Referência lida uma vez por execução: trocas do monitor valem a partir da próxima
+snapshot_dados = obter_monitor_arquivos().snapshot
+panorama_data, ranking_data, cargo_data, setor_data, matriz_data, detalhamento_data = snapshot_dados['dados']
+respostas_data = snapshot_dados['respostas']
+registro_subescalas = snapshot_dados['subescalas']
+iniciar_preaquecimento()
+escores_data = calcular_escores_respondentes(respostas_data, detalhamento_data) if respostas_data is not None else None
+
+## CSS sidebar
+
+logo_base64 = get_base64_image("archives/logo.png")
+def get_base64_image(image_path):
+    with open(image_path, "rb") as img_file:
+        return base64.b64encode(img_file.read()).decode()
+
+# Carregar a logo
+logo_base64 = get_base64_image("archives/logo.png")  # Ajuste o nome do arquivo se necessário
+
+st.markdown("""
+    <style>
+    [data-testid="stSidebar"] {
+        background: linear-gradient(180deg, 
+            #c9baa9 0%, 
+            #d4c4a8 20%, 
+            #e8dcc8 40%, 
+            #f0e6d2 50%, 
+            #e8dcc8 60%, 
+            #d4c4a8 80%, 
+            #c9baa9 100%) !important;
+        border-radius: 0 30px 30px 0 !important;
+        box-shadow: 8px 0 40px rgba(0, 0, 0, 0.15), 
+                    inset -2px 0 20px rgba(255, 255, 255, 0.5),
+                    inset 2px 0 30px rgba(184, 148, 102, 0.1);
+        position: relative;
+        overflow: hidden;
+    }
+    
+    [data-testid="stSidebar"]::before {
+        content: '';
+        position: absolute;
+        top: -50%;
+        left: -50%;
+        width: 200%;
+        height: 200%;
+        background: radial-gradient(circle, rgba(255, 245, 220, 0.4) 0%, transparent 70%);
+        animation: pulse 12s ease-in-out infinite;
+    }
+    
+    [data-testid="stSidebar"]::after {
+        content: '';
+        position: absolute;
+        top: 0;
+        left: 0;
+        width: 100%;
+        height: 100%;
+        background: 
+            repeating-linear-gradient(
+                0deg,
+                transparent,
+                transparent 3px,
+                rgba(212, 180, 130, 0.03) 3px,
+                rgba(212, 180, 130, 0.03) 6px
+            );
+        pointer-events: none;
+    }
+    
+    @keyframes pulse {
+        0%, 100% { transform: scale(1) rotate(0deg); opacity: 0.5; }
+        50% { transform: scale(1.1) rotate(180deg); opacity: 0.8; }
+    }
+    
+    [data-testid="stSidebar"] > div:first-child {
+        background: transparent !important;
+        padding: 2rem 1.25rem;
+        position: relative;
+        z-index: 1;
+    }
+    
+    [data-testid="stSidebar"] .stButton button {
+        width: 100%;
+        padding: 1.1rem 1.4rem !important;
+        margin: 0.45rem 0 !important;
+        border: none !important;
+        border-radius: 16px !important;
+        background: linear-gradient(135deg, rgba(255, 255, 255, 0.7) 0%, rgba(248, 242, 230, 0.6) 100%) !important;
+        color: #6b5847 !important;
+        font-size: 0.95rem !important;
+        font-weight: 500 !important;
+        text-align: left !important;
+        cursor: pointer !important;
+        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1) !important;
+        backdrop-filter: blur(10px) !important;
+        border: 1px solid rgba(184, 148, 102, 0.25) !important;
+        box-shadow: 0 2px 8px rgba(107, 88, 71, 0.12), 
+                    inset 0 1px 0 rgba(255, 255, 255, 0.8) !important;
+        position: relative !important;
+        overflow: hidden !important;
+    }
+    
+    [data-testid="stSidebar"] .stButton button::before {
+        content: '';
+        position: absolute;
+        top: 0;
+        left: -100%;
+        width: 100%;
+        height: 100%;
+        background: linear-gradient(90deg, transparent, rgba(212, 180, 130, 0.3), transparent);
+        transition: left 0.6s;
+    }
+    
+    [data-testid="stSidebar"] .stButton button:hover {
+        background: linear-gradient(135deg, rgba(212, 180, 130, 0.35) 0%, rgba(196, 166, 114, 0.35) 100%) !important;
+        transform: translateX(10px) scale(1.02) !important;
+        border-color: rgba(184, 148, 102, 0.5) !important;
+        box-shadow: 0 8px 24px rgba(184, 148, 102, 0.25), 
+                    0 0 30px rgba(212, 180, 130, 0.2),
+                    inset 0 1px 0 rgba(255, 255, 255, 0.9) !important;
+        color: #5a4a3a !important;
+    }
+    
+    [data-testid="stSidebar"] .stButton button:hover::before {
+        left: 100%;
+    }
+    
+    [data-testid="stSidebar"] .stButton button:active {
+        transform: translateX(8px) scale(0.99) !important;
+        box-shadow: 0 4px 12px rgba(184, 148, 102, 0.3) !important;
+    }
+    
+    [data-testid="stSidebar"] .stButton button[kind="primary"],
+    [data-testid="stSidebar"] .stButton button[data-baseweb="button"][kind="primary"] {
+        background: linear-gradient(135deg, #c4a672 0%, #b89656 35%, #a88846 70%, #987a36 100%) !important;
+        color: #ffffff !important;
+        font-weight: 700 !important;
+        border-color: rgba(152, 122, 54, 0.5) !important;
+        box-shadow: 0 8px 32px rgba(168, 136, 70, 0.45), 
+                    0 0 40px rgba(196, 166, 114, 0.3),
+                    inset 0 2px 4px rgba(255, 255, 255, 0.3),
+                    inset 0 -2px 4px rgba(0, 0, 0, 0.15) !important;
+        position: relative !important;
+        text-shadow: 0 1px 3px rgba(0, 0, 0, 0.3) !important;
+    }
+    
+    [data-testid="stSidebar"] .stButton button[kind="primary"]::after {
+        content: '';
+        position: absolute;
+        right: 1.2rem;
+        top: 50%;
+        transform: translateY(-50%);
+        width: 8px;
+        height: 8px;
+        background: #ffffff;
+        border-radius: 50%;
+        box-shadow: 0 0 12px rgba(255, 255, 255, 0.9), 
+                    0 0 20px rgba(255, 255, 255, 0.6);
+        animation: blink 2.5s ease-in-out infinite;
+    }
+    
+    @keyframes blink {
+        0%, 100% { opacity: 1; transform: translateY(-50%) scale(1); }
+        50% { opacity: 0.5; transform: translateY(-50%) scale(1.3); }
+    }
+    
+    [data-testid="stSidebar"] .stButton button[kind="primary"]:hover {
+        background: linear-gradient(135deg, #d0b080 0%, #c4a672 35%, #b89656 70%, #a88846 100%) !important;
+        transform: translateX(10px) scale(1.02) !important;
+        box-shadow: 0 10px 40px rgba(168, 136, 70, 0.55), 
+                    0 0 50px rgba(196, 166, 114, 0.4),
+                    inset 0 2px 4px rgba(255, 255, 255, 0.35) !important;
+    }
+    
+    [data-testid="stSidebar"] .stButton button:focus {
+        outline: none !important;
+        box-shadow: 0 0 0 3px rgba(184, 148, 102, 0.3) !important;
+    }
+    </style>
+""", unsafe_allow_html=True)
+
+## SIDEBAR
+with st.sidebar:
+    st.markdown(f"""
+        <div style='text-align: center; padding: 2.5rem 1rem 2rem 1rem; background: linear-gradient(135deg, rgba(255, 255, 255, 0.8) 0%, rgba(248, 242, 230, 0.7) 100%); border-radius: 24px; backdrop-filter: blur(15px); margin-bottom: 2.5rem; border: 2px solid rgba(196, 166, 114, 0.3); box-shadow: 0 8px 32px rgba(107, 88, 71, 0.15), inset 0 2px 4px rgba(255, 255, 255, 0.9), 0 0 60px rgba(212, 180, 130, 0.2); position: relative; overflow: hidden;'>
+            <div style='position: absolute; top: -50%; left: -50%; width: 200%; height: 200%; background: radial-gradient(circle, rgba(212, 180, 130, 0.15) 0%, transparent 70%); animation: rotate 15s linear infinite;'></div>
+            <div style='position: relative; z-index: 1;'>
+                <img src="data:image/png;base64,{logo_base64}" alt="Logo" style='width: clamp(100px, 25vw, 150px); height: auto; margin-bottom: 1rem; filter: drop-shadow(0 4px 12px rgba(168, 136, 70, 0.3)); border-radius: 12px;'/>
+                <p style='margin: 0 0 1.5rem 0; font-size: clamp(0.9rem, 2.2vw, 1.1rem); color: #6b5847; font-weight: 600; letter-spacing: 1px; text-shadow: 0 1px 2px rgba(255, 255, 255, 0.8);'>Luana Portella</p>
+                <div style='height: 2px; width: clamp(50px, 15vw, 70px); margin: 1.2rem auto; background: linear-gradient(90deg, transparent, #c4a672, transparent); box-shadow: 0 0 8px rgba(196, 166, 114, 0.5);'></div>
+                <p style='margin: 0; font-size: clamp(0.65rem, 1.8vw, 0.8rem); color: #6b5847; font-weight: 700; letter-spacing: clamp(1.5px, 0.5vw, 2.5px); text-transform: uppercase; text-shadow: 0 1px 2px rgba(255, 255, 255, 0.8);'>Gestão dos Fatores de Riscos Psicossociais</p>
+            </div>
+        </div>
+        <style>
+        @keyframes rotate {{
+            from {{ transform: rotate(0deg); }}
+            to {{ transform: rotate(360deg); }}
+        }}
+        </style>
+    """, unsafe_allow_html=True)
+
+    st.markdown("""
+        <div style='margin-bottom: 1.25rem; padding-left: 0.5rem;'>
+            <div style='display: inline-block; padding: 0.5rem 1.2rem;
+                        background: linear-gradient(135deg, rgba(196, 166, 114, 0.25) 0%, rgba(184, 148, 102, 0.2) 100%);
+                        border-radius: 20px;
+                        border: 1px solid rgba(184, 148, 102, 0.35);
+                        box-shadow: 0 3px 10px rgba(107, 88, 71, 0.15), 
+                                    inset 0 1px 0 rgba(255, 255, 255, 0.7);'>
+                <p style='margin: 0; color: #6b5847; font-size: 0.68rem; 
+                          text-transform: uppercase; letter-spacing: 2.5px; 
+                          font-weight: 800;
+                          text-shadow: 0 1px 2px rgba(255, 255, 255, 0.5);'>
+                    Navegação
+                </p>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    if 'pagina_selecionada' not in st.session_state:
+        st.session_state.pagina_selecionada = restaurar_filtros_url() or "Panorama Geral"
+    
+    paginas = [
+        "Panorama Geral",
+        "Visão por Domínios",
+        "Priorização de Riscos",
+        "Análise por Cargo",
+        "Análise por Setor",
+        "Comparações entre Grupos",
+        "Agrupamento de Perfis",
+        "Evolução entre Ondas",
+        "Matriz de Risco",
+        "Detalhamento & Ações",
+        "Importar Dados"
+    ]
+    
+    for pagina_item in paginas:
+        if st.button(
+            pagina_item,
+            key=f"nav_{pagina_item}",
+            use_container_width=True,
+            type="primary" if st.session_state.pagina_selecionada == pagina_item else "secondary"
+        ):
+            st.session_state.pagina_selecionada = pagina_item
+            st.rerun()
+    
+    pagina = st.session_state.pagina_selecionada
+    
+    st.markdown("<div style='height: 2.5rem;'></div>", unsafe_allow_html=True)
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.75) 0%, rgba(248, 242, 230, 0.65) 100%); 
+                    padding: 1.5rem; 
+                    border-radius: 20px; 
+                    margin-bottom: 2rem;
+                    border: 2px solid rgba(196, 166, 114, 0.3);
+                    backdrop-filter: blur(10px);
+                    box-shadow: 0 6px 24px rgba(107, 88, 71, 0.12), 
+                                inset 0 2px 4px rgba(255, 255, 255, 0.8);
+                    position: relative;'>
+            <div style='display: flex; align-items: center; margin-bottom: 1.25rem; gap: 0.75rem;'>
+                <div style='width: 42px; height: 42px; 
+                            background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
+                            border-radius: 12px;
+                            display: flex; align-items: center; justify-content: center;
+                            box-shadow: 0 4px 12px rgba(168, 136, 70, 0.35), 
+                                        inset 0 1px 0 rgba(255, 255, 255, 0.4);'>
+                    <svg width="22" height="22" viewBox="0 0 24 24" fill="none" stroke="#ffffff" stroke-width="2.5">
+                        <path d="M9 5H7a2 2 0 00-2 2v12a2 2 0 002 2h10a2 2 0 002-2V7a2 2 0 00-2-2h-2M9 5a2 2 0 002 2h2a2 2 0 002-2M9 5a2 2 0 012-2h2a2 2 0 012 2"/>
+                    </svg>
+                </div>
+                <p style='margin: 0; color: #6b5847; font-weight: 800; font-size: 0.8rem; 
+                          text-transform: uppercase; letter-spacing: 1.8px;
+                          text-shadow: 0 1px 2px rgba(255, 255, 255, 0.7);'>
+                    Conforme NR-01
+                </p>
+            </div>
+            <div style='background: rgba(255, 255, 255, 0.5); 
+                        padding: 1.3rem; 
+                        border-radius: 14px;
+                        border-left: 3px solid #b89656;
+                        box-shadow: inset 0 1px 3px rgba(107, 88, 71, 0.1);'>
+                <p style='margin: 0 0 1rem 0; font-weight: 700; color: #5a4a3a; font-size: 0.85rem;
+                          text-shadow: 0 1px 1px rgba(255, 255, 255, 0.5);'>
+                    Narrativa estruturada:
+                </p>
+                <div style='color: #6b5847; font-size: 0.85rem; line-height: 2;'>
+                    <div style='display: flex; align-items: center; margin-bottom: 0.5rem;'>
+                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
+                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
+                        <span>Identificação do cenário</span>
+                    </div>
+                    <div style='display: flex; align-items: center; margin-bottom: 0.5rem;'>
+                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
+                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
+                        <span>Caracterização dos riscos</span>
+                    </div>
+                    <div style='display: flex; align-items: center; margin-bottom: 0.5rem;'>
+                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
+                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
+                        <span>Hierarquização</span>
+                    </div>
+                    <div style='display: flex; align-items: center; margin-bottom: 0.5rem;'>
+                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
+                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
+                        <span>Contextualização</span>
+                    </div>
+                    <div style='display: flex; align-items: center;'>
+                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
+                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
+                        <span>Fundamentação de ações</span>
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Divider suave
+    st.markdown("""
+        <div style='position: relative; height: 1px; margin: 2.5rem 0;'>
+            <div style='position: absolute; width: 100%; height: 1px;
+                        background: linear-gradient(90deg, transparent, rgba(184, 148, 102, 0.4), transparent);
+                        box-shadow: 0 0 8px rgba(184, 148, 102, 0.3);'></div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='text-align: center; padding: 1.3rem;
+                    background: linear-gradient(135deg, rgba(255, 255, 255, 0.7) 0%, rgba(248, 242, 230, 0.6) 100%);
+                    border-radius: 18px;
+                    border: 2px solid rgba(196, 166, 114, 0.25);
+                    backdrop-filter: blur(10px);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.12), 
+                                inset 0 2px 4px rgba(255, 255, 255, 0.8);'>
+            <div style='display: inline-block; padding: 0.5rem 1.2rem;
+                        background: linear-gradient(135deg, rgba(196, 166, 114, 0.3) 0%, rgba(184, 148, 102, 0.25) 100%);
+                        border-radius: 20px;
+                        margin-bottom: 0.75rem;
+                        border: 1px solid rgba(184, 148, 102, 0.3);
+                        box-shadow: 0 2px 6px rgba(107, 88, 71, 0.1), 
+                                    inset 0 1px 0 rgba(255, 255, 255, 0.6);'>
+                <p style='margin: 0; color: #6b5847; font-size: 0.75rem; font-weight: 800;
+                          letter-spacing: 1.2px;
+                          text-shadow: 0 1px 2px rgba(255, 255, 255, 0.5);'>
+                    Dashboard v1.0
+                </p>
+            </div>
+            <p style='margin: 0.5rem 0; color: #8b7663; font-size: 0.7rem; font-weight: 500;'>
+                Janeiro 2026
+            </p>
+            <div style='height: 1px; width: 50%; margin: 1rem auto;
+                        background: linear-gradient(90deg, transparent, rgba(184, 148, 102, 0.35), transparent);'></div>
+            <p style='margin: 0; color: #6b5847; font-size: 0.7rem; font-weight: 700;
+                      letter-spacing: 2px;
+                      text-shadow: 0 1px 2px rgba(255, 255, 255, 0.6);'>
+                LUANA PORTELLA
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    memoria = contabilizar_memoria_sessao()
+    with st.expander("Uso de Memória", expanded=False):
+        st.markdown(f"""
+            <div style='color: #6b5847; font-size: 0.8rem; line-height: 1.8;'>
+                <strong>Esta sessão:</strong> {memoria['sessao'] / 1024:.0f} KB<br>
+                <strong>Dados compartilhados:</strong> {memoria['compartilhado'] / 1024 ** 2:.1f} MB<br>
+                <strong>Sessões ativas:</strong> {len(memoria['sessoes'])}<br>
+                <strong>Processo (RSS):</strong> {f"{memoria['processo'] / 1024 ** 2:.0f} MB" if memoria['processo'] else 'indisponível'}<br>
+                <strong>Limite por sessão:</strong> {LIMITE_MEMORIA_SESSAO_MB} MB
+            </div>
+        """, unsafe_allow_html=True)
+
+# Contagens inconsistentes entre os arquivos não impedem a carga: ficam como aviso
+if snapshot_dados['consistencia'].erros():
+    st.warning(f"Os arquivos de archives/ têm contagens inconsistentes entre si: {snapshot_dados['consistencia'].resumo()}")
+
+####### PANORAMA GERAL ########
+if pagina == "Panorama Geral":
+    semear_filtros(pagina)
+    st.markdown("""
+        <style>
+        .main .block-container {
+            max-width: 100%;
+            padding: clamp(0.5rem, 2vw, 2rem);
+        }
+        @media (max-width: 768px) {
+            .main .block-container {
+                padding: 0.5rem;
+            }
+            [data-testid="stHorizontalBlock"] > div {
+                width: 100% !important;
+                flex: 1 1 100% !important;
+            }
+        }
+        
+        [data-testid="stExpander"] {
+            background: linear-gradient(135deg, rgba(255, 255, 255, 0.8) 0%, rgba(248, 242, 230, 0.6) 100%);
+            border: 1px solid rgba(196, 166, 114, 0.3);
+            border-radius: 10px;
+        }
+        
+        [data-testid="stExpander"] summary {
+            color: #5a4a3a !important;
+            font-weight: 600;
+        }
+        
+        .stMultiSelect [data-baseweb="select"] {
+            min-height: 38px;
+            background: white;
+            border: 2px solid rgba(196, 166, 114, 0.3);
+            border-radius: 8px;
+        }
+        
+        .stMultiSelect [data-baseweb="select"]:hover {
+            border-color: #c4a672;
+        }
+        
+        .stMultiSelect [data-baseweb="tag"] {
+            background-color: #c4a672 !important;
+            color: white !important;
+            border-radius: 6px;
+        }
+        
+        .stSelectbox [data-baseweb="select"] {
+            background: white;
+            border: 2px solid rgba(196, 166, 114, 0.3);
+            border-radius: 8px;
+        }
+        
+        .stSelectbox [data-baseweb="select"]:hover {
+            border-color: #c4a672;
+        }
+        
+        .stSlider [data-baseweb="slider"] [role="slider"] {
+            background-color: #c4a672 !important;
+        }
+        
+        .stSlider [data-baseweb="slider"] [data-testid="stTickBar"] > div {
+            background: linear-gradient(90deg, #c4a672 0%, #b89656 100%);
+        }
+        
+        .stCheckbox label {
+            color: #5a4a3a;
+            font-weight: 500;
+        }
+        
+        .stCheckbox [data-testid="stCheckbox"] {
+            accent-color: #c4a672;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.12) 0%, rgba(232, 220, 200, 0.08) 100%);
+                    padding: clamp(1rem, 3vw, 1.5rem) clamp(1.5rem, 4vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    margin-bottom: 2rem;
+                    border-left: 4px solid #c4a672;
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
+            <div style='display: flex; align-items: center; justify-content: space-between; flex-wrap: wrap; gap: 1rem;'>
+                <div style='flex: 1; min-width: 200px;'>
+                    <h1 style='margin: 0; color: #5a4a3a; font-size: clamp(1.5rem, 4vw, 2.2rem); font-weight: 800; letter-spacing: -0.5px;'>
+                        Panorama Geral
+                    </h1>
+                    <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.85rem, 2vw, 1rem);'>
+                        Identificação e caracterização dos riscos psicossociais
+                    </p>
+                </div>
+                <div style='background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
+                            padding: 0.7rem 1.3rem;
+                            border-radius: 10px;
+                            text-align: center;
+                            box-shadow: 0 4px 12px rgba(168, 136, 70, 0.3);'>
+                    <div style='color: rgba(255, 255, 255, 0.85); font-size: 0.7rem; font-weight: 600; letter-spacing: 0.5px;'>
+                        CONFORME
+                    </div>
+                    <div style='color: white; font-size: 1.3rem; font-weight: 800; letter-spacing: 1.5px;'>
+                        NR-01
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    unique_subescalas = ordenar_subescalas(panorama_data['subescala'], registro_subescalas)
+    with st.expander("Filtros e Configurações", expanded=False):
+        filtros_navegador = st.checkbox("Filtros no Navegador", help="Filtros, indicadores e gráfico rodam no navegador, sem recarregar a página. Desmarque para filtrar no servidor e clicar nas barras para ver o detalhe de cada fator", key='panorama_navegador')
+        if filtros_navegador:
+            st.caption("Os filtros ficam no painel do Semáforo de Risco, abaixo, junto com os indicadores que eles atualizam.")
+            selected_subescalas = st.session_state['panorama_subescalas']
+            selected_risks = st.session_state['panorama_riscos']
+            selected_ordenacao = st.session_state['panorama_ordenacao']
+            show_percentages = st.session_state['panorama_percentuais']
+        else:
+            filter_cols = st.columns([1, 1, 1, 1])
+        
+            with filter_cols[0]:
+                selected_subescalas = st.multiselect(
+                    "Fatores Psicossociais",
+                    options=unique_subescalas,
+                    help="Selecione os fatores que deseja analisar",
+                    key='panorama_subescalas'
+                )
+        
+            with filter_cols[1]:
+                risk_options = ['baixo', 'medio', 'alto']
+                risk_labels = {'baixo': 'Baixo Risco', 'medio': 'Médio Risco', 'alto': 'Alto Risco'}
+                available_risks = [r for r in risk_options if r in panorama_data['classe_risco'].unique()]
+                selected_risks = st.multiselect(
+                    "Níveis de Risco",
+                    options=available_risks,
+                    format_func=lambda x: risk_labels.get(x, x),
+                    help="Filtre por nível de risco",
+                    key='panorama_riscos'
+                )
+        
+            with filter_cols[2]:
+                ordenacao_options = ['Maior Risco', 'Menor Risco', 'Alfabética A-Z', 'Alfabética Z-A']
+                selected_ordenacao = st.selectbox(
+                    "Ordenação",
+                    options=ordenacao_options,
+                    help="Escolha como ordenar os dados",
+                    key='panorama_ordenacao'
+                )
+        
+            with filter_cols[3]:
+                show_percentages = st.checkbox("Exibir Percentuais", help="Mostrar percentuais nos gráficos", key='panorama_percentuais')
+    
+    chave_visao = sincronizar_filtros_url(pagina)
+    if not filtros_navegador:
+        visao_panorama = visao_compartilhada(
+            chave_visao, 'panorama',
+            lambda: calcular_visao_panorama(panorama_data, selected_subescalas, selected_risks, selected_ordenacao)
+        )
+        filtered_panorama = visao_panorama['filtrado']
+    
+        if len(filtered_panorama) == 0:
+            st.warning("Nenhum dado encontrado com os filtros selecionados. Ajuste os filtros acima.")
+            st.stop()
+    
+        panorama_pivot = visao_panorama['tabela']
+        kpis_panorama = visao_panorama['kpis']
+        total_respondentes = kpis_panorama['total_respondentes']
+        total_subscalas = kpis_panorama['total_subscalas']
+        fatores_criticos = kpis_panorama['fatores_criticos']
+    
+        total_baixo = kpis_panorama['total_baixo']
+        total_medio = kpis_panorama['total_medio']
+        total_alto = kpis_panorama['total_alto']
+        total_geral = kpis_panorama['total_geral']
+    
+        perc_baixo = kpis_panorama['perc_baixo']
+        perc_medio = kpis_panorama['perc_medio']
+        perc_alto = kpis_panorama['perc_alto']
+    
+        kpi_cols = st.columns(4)
+    
+        with kpi_cols[0]:
+            st.markdown(f"""
+                <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                            padding: clamp(1rem, 3vw, 1.5rem);
+                            border-radius: clamp(10px, 2vw, 14px);
+                            border: 2px solid rgba(196, 166, 114, 0.25);
+                            box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
+                            text-align: center;
+                            min-height: 120px;
+                            display: flex;
+                            flex-direction: column;
+                            justify-content: center;'>
+                    <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Fatores Avaliados
+                    </div>
+                    <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                        {total_subscalas}
+                    </div>
+                    <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                        Dimensões COPSOQ
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+    
+        with kpi_cols[1]:
+            st.markdown(f"""
+                <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
+                            padding: clamp(1rem, 3vw, 1.5rem);
+                            border-radius: clamp(10px, 2vw, 14px);
+                            border: 2px solid rgba(220, 38, 38, 0.3);
+                            box-shadow: 0 3px 12px rgba(220, 38, 38, 0.12);
+                            text-align: center;
+                            min-height: 120px;
+                            display: flex;
+                            flex-direction: column;
+                            justify-content: center;'>
+                    <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Alto Risco
+                    </div>
+                    <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1; margin-bottom: 0.4rem;'>
+                        {fatores_criticos}
+                    </div>
+                    <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                        Fatores críticos (&gt;50%)
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+    
+        with kpi_cols[2]:
+            st.markdown(f"""
+                <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                            padding: clamp(1rem, 3vw, 1.5rem);
+                            border-radius: clamp(10px, 2vw, 14px);
+                            border: 2px solid rgba(196, 166, 114, 0.25);
+                            box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
+                            text-align: center;
+                            min-height: 120px;
+                            display: flex;
+                            flex-direction: column;
+                            justify-content: center;'>
+                    <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Participação
+                    </div>
+                    <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #b89656; line-height: 1; margin-bottom: 0.4rem;'>
+                        {total_respondentes}
+                    </div>
+                    <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                        Colaboradores respondentes
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+    
+        with kpi_cols[3]:
+            taxa = int((total_respondentes / 215) * 100) if total_respondentes > 0 else 0
+            st.markdown(f"""
+                <div style='background: linear-gradient(135deg, rgba(209, 250, 229, 0.95) 0%, rgba(187, 247, 208, 0.8) 100%);
+                            padding: clamp(1rem, 3vw, 1.5rem);
+                            border-radius: clamp(10px, 2vw, 14px);
+                            border: 2px solid rgba(16, 185, 129, 0.3);
+                            box-shadow: 0 3px 12px rgba(16, 185, 129, 0.12);
+                            text-align: center;
+                            min-height: 120px;
+                            display: flex;
+                            flex-direction: column;
+                            justify-content: center;'>
+                    <div style='color: #065f46; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Taxa de Adesão
+                    </div>
+                    <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #10b981; line-height: 1; margin-bottom: 0.4rem;'>
+                        {taxa}%
+                    </div>
+                    <div style='color: #065f46; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                        +12pp acima da meta
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+    
+        st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.1) 0%, rgba(232, 220, 200, 0.06) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border-left: 4px solid #c4a672;
+                    margin-bottom: 2rem;
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
+            <h3 style='margin: 0 0 1.5rem 0; color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
+                Entendendo o Cenário
+            </h3>
+            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: clamp(1rem, 3vw, 2rem);'>
+                <div>
+                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Problema Resolvido
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                        Percepções fragmentadas transformadas em <strong>diagnóstico estruturado e mensurável</strong>
+                    </div>
+                </div>
+                <div>
+                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Pergunta Respondida
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6; font-style: italic;'>
+                        "Qual o real estado psicossocial da organização hoje?"
+                    </div>
+                </div>
+                <div>
+                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Valor Estratégico
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                        Base objetiva para <strong>identificação e caracterização</strong> conforme NR-01
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 1.5rem; flex-wrap: wrap; gap: 1rem;'>
+                <div style='flex: 1; min-width: 250px;'>
+                    <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                        Semáforo de Risco por Fator Psicossocial
+                    </h3>
+                    <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                        Distribuição percentual de colaboradores por nível de risco em cada dimensão
+                    </p>
+                </div>
+                <div style='display: flex; gap: clamp(0.8rem, 2vw, 1.5rem); font-size: clamp(0.75rem, 1.8vw, 0.85rem); flex-wrap: wrap;'>
+                    <div style='display: flex; align-items: center; gap: 0.5rem;'>
+                        <div style='width: 14px; height: 14px; background: #10b981; border-radius: 3px;'></div>
+                        <span style='color: #6b5847; font-weight: 600;'>Baixo Risco</span>
+                    </div>
+                    <div style='display: flex; align-items: center; gap: 0.5rem;'>
+                        <div style='width: 14px; height: 14px; background: #f59e0b; border-radius: 3px;'></div>
+                        <span style='color: #6b5847; font-weight: 600;'>Médio Risco</span>
+                    </div>
+                    <div style='display: flex; align-items: center; gap: 0.5rem;'>
+                        <div style='width: 14px; height: 14px; background: #dc2626; border-radius: 3px;'></div>
+                        <span style='color: #6b5847; font-weight: 600;'>Alto Risco</span>
+                    </div>
+                </div>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    if filtros_navegador:
+        exibir_painel_navegador(
+            'panorama', panorama_data, ('subescala', 'classe_risco', 'qtd'),
+            calculate_responsive_height(len(unique_subescalas), min_height=400, item_height=40) + 480,
+            inicial={'subescalas': selected_subescalas, 'classes': selected_risks, 'ordem': selected_ordenacao, 'percentuais': show_percentages}
+        )
+    else:
+        fig1, tamanho_fig1 = figura_compartilhada(chave_visao, 'fig1', lambda: figura_panorama(panorama_pivot, show_percentages))
+        evento_fig1 = exibir_figura(fig1, 'fig1', selecao='panorama_selecao', tamanho=tamanho_fig1)
+        selecao_panorama = ponto_selecionado({'panorama_selecao': evento_fig1})
+        if selecao_panorama is not None:
+            selecao_panorama = selecao_panorama[1]['y']
+            exibir_resumo_subescala(selecao_panorama, 'panorama_abrir_detalhe')
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    if not filtros_navegador:
+        # Clique numa barra: a distribuição ao lado passa a ser a do fator selecionado
+        titulo_distribuicao = "Distribuição Geral"
+        if selecao_panorama in panorama_pivot.index:
+            linha_selecao = panorama_pivot.loc[selecao_panorama]
+            titulo_distribuicao = f"Distribuição · {selecao_panorama}"
+            perc_baixo = linha_selecao.get('baixo_perc', 0)
+            perc_medio = linha_selecao.get('medio_perc', 0)
+            perc_alto = linha_selecao.get('alto_perc', 0)
+    
+        col_alert, col_dist = st.columns([2, 1])
+    
+        with col_alert:
+            if len(panorama_pivot) > 0 and 'alto_perc' in panorama_pivot.columns:
+                maior_risco, valor_maior = visao_panorama['destaque']
+            
+                st.markdown(f"""
+                    <div style='background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
+                                padding: clamp(1rem, 3vw, 1.5rem) clamp(1.5rem, 4vw, 2rem);
+                                border-radius: clamp(10px, 2vw, 14px);
+                                box-shadow: 0 6px 20px rgba(220, 38, 38, 0.25);
+                                height: 100%;
+                                display: flex;
+                                align-items: center;'>
+                        <div style='display: flex; align-items: center; gap: clamp(1rem, 2vw, 1.5rem); width: 100%; flex-wrap: wrap;'>
+                            <div style='min-width: 50px; height: 50px;
+                                        background: rgba(255, 255, 255, 0.15);
+                                        border-radius: 10px;
+                                        display: flex; align-items: center; justify-content: center;'>
+                                <svg width="28" height="28" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                                    <path d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-3L13.732 4c-.77-1.333-2.694-1.333-3.464 0L3.34 16c-.77 1.333.192 3 1.732 3z"/>
+                                </svg>
+                            </div>
+                            <div style='flex: 1; min-width: 200px;'>
+                                <div style='color: rgba(255, 255, 255, 0.85); font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.4rem;'>
+                                    Fator Mais Crítico
+                                </div>
+                                <div style='color: white; font-size: clamp(1rem, 2.5vw, 1.15rem); font-weight: 700; line-height: 1.4;'>
+                                    <strong>{maior_risco}</strong> com <span style='font-size: clamp(1.3rem, 3vw, 1.5rem); font-weight: 800;'>{valor_maior:.1f}%</span> em alto risco
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                """, unsafe_allow_html=True)
+    
+        with col_dist:
+            st.markdown(f"""
+                <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                            padding: clamp(1rem, 3vw, 1.5rem);
+                            border-radius: clamp(10px, 2vw, 14px);
+                            border: 2px solid rgba(196, 166, 114, 0.2);
+                            height: 100%;'>
+                    <h4 style='margin: 0 0 1.2rem 0; color: #5a4a3a; font-size: clamp(0.9rem, 2vw, 1rem); font-weight: 700;'>
+                        {titulo_distribuicao}
+                    </h4>
+                    <div style='margin-bottom: 1rem;'>
+                        <div style='display: flex; justify-content: space-between; margin-bottom: 0.4rem;'>
+                            <span style='color: #10b981; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Baixo</span>
+                            <span style='color: #5a4a3a; font-weight: 800; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>{perc_baixo:.1f}%</span>
+                        </div>
+                        <div style='background: #e8dcc8; height: 10px; border-radius: 5px; overflow: hidden;'>
+                            <div style='background: #10b981; height: 100%; width: {perc_baixo}%; transition: width 0.3s;'></div>
+                        </div>
+                    </div>
+                    <div style='margin-bottom: 1rem;'>
+                        <div style='display: flex; justify-content: space-between; margin-bottom: 0.4rem;'>
+                            <span style='color: #f59e0b; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Médio</span>
+                            <span style='color: #5a4a3a; font-weight: 800; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>{perc_medio:.1f}%</span>
+                        </div>
+                        <div style='background: #e8dcc8; height: 10px; border-radius: 5px; overflow: hidden;'>
+                            <div style='background: #f59e0b; height: 100%; width: {perc_medio}%; transition: width 0.3s;'></div>
+                        </div>
+                    </div>
+                    <div>
+                        <div style='display: flex; justify-content: space-between; margin-bottom: 0.4rem;'>
+                            <span style='color: #dc2626; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Alto</span>
+                            <span style='color: #5a4a3a; font-weight: 800; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>{perc_alto:.1f}%</span>
+                        </div>
+                        <div style='background: #e8dcc8; height: 10px; border-radius: 5px; overflow: hidden;'>
+                            <div style='background: #dc2626; height: 100%; width: {perc_alto}%; transition: width 0.3s;'></div>
+                        </div>
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+    
+    st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
+    
+    col_prox1, col_prox2 = st.columns(2)
+    
+    with col_prox1:
+        st.markdown("""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(219, 234, 254, 0.8) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(59, 130, 246, 0.25);
+                        border-left: 4px solid #3b82f6;
+                        box-shadow: 0 3px 12px rgba(59, 130, 246, 0.1);'>
+                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
+                    <div style='width: 42px; height: 42px;
+                                background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
+                                border-radius: 10px;
+                                display: flex; align-items: center; justify-content: center;
+                                box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);'>
+                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                            <path d="M9 5l7 7-7 7"/>
+                        </svg>
+                    </div>
+                    <h4 style='margin: 0; color: #1e40af; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
+                        Próximo Passo
+                    </h4>
+                </div>
+                <p style='margin: 0; color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                    Acesse <strong>Priorização de Riscos</strong> para definir cronograma estratégico de intervenções
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    with col_prox2:
+        st.markdown("""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(209, 250, 229, 0.8) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(16, 185, 129, 0.25);
+                        border-left: 4px solid #10b981;
+                        box-shadow: 0 3px 12px rgba(16, 185, 129, 0.1);'>
+                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
+                    <div style='width: 42px; height: 42px;
+                                background: linear-gradient(135deg, #10b981 0%, #059669 100%);
+                                border-radius: 10px;
+                                display: flex; align-items: center; justify-content: center;
+                                box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
+                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                            <path d="M5 13l4 4L19 7"/>
+                        </svg>
+                    </div>
+                    <h4 style='margin: 0; color: #065f46; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
+                        Conformidade NR-01
+                    </h4>
+                </div>
+                <p style='margin: 0; color: #064e3b; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                    Atende requisitos de <strong>identificação</strong> e <strong>caracterização</strong> de riscos
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+
+####### VISÃO POR DOMÍNIOS ########
+elif pagina == "Visão por Domínios":
+    st.markdown("""
+        <style>
+        .main .block-container {
+            max-width: 100%;
+            padding: clamp(0.5rem, 2vw, 2rem);
+        }
+        @media (max-width: 768px) {
+            .main .block-container {
+                padding: 0.5rem;
+            }
+            [data-testid="stHorizontalBlock"] > div {
+                width: 100% !important;
+                flex: 1 1 100% !important;
+            }
+        }
+        
+        [data-testid="stExpander"] {
+            background: linear-gradient(135deg, rgba(255, 255, 255, 0.8) 0%, rgba(248, 242, 230, 0.6) 100%);
+            border: 1px solid rgba(196, 166, 114, 0.3);
+            border-radius: 10px;
+        }
+        
+        [data-testid="stExpander"] summary {
+            color: #5a4a3a !important;
+            font-weight: 600;
+        }
+        
+        .stMultiSelect [data-baseweb="select"] {
+            min-height: 38px;
+            background: white;
+            border: 2px solid rgba(196, 166, 114, 0.3);
+            border-radius: 8px;
+        }
+        
+        .stMultiSelect [data-baseweb="select"]:hover {
+            border-color: #c4a672;
+        }
+        
+        .stMultiSelect [data-baseweb="tag"] {
+            background-color: #c4a672 !important;
+            color: white !important;
+            border-radius: 6px;
+        }
+        
+        .stSelectbox [data-baseweb="select"] {
+            background: white;
+            border: 2px solid rgba(196, 166, 114, 0.3);
+            border-radius: 8px;
+        }
+        
+        .stSelectbox [data-baseweb="select"]:hover {
+            border-color: #c4a672;
+        }
+        
+        .stSlider [data-baseweb="slider"] [role="slider"] {
+            background-color: #c4a672 !important;
+        }
+        
+        .stSlider [data-baseweb="slider"] [data-testid="stTickBar"] > div {
+            background: linear-gradient(90deg, #c4a672 0%, #b89656 100%);
+        }
+        
+        .stCheckbox label {
+            color: #5a4a3a;
+            font-weight: 500;
+        }
+        
+        .stCheckbox [data-testid="stCheckbox"] {
+            accent-color: #c4a672;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.12) 0%, rgba(232, 220, 200, 0.08) 100%);
+                    padding: clamp(1rem, 3vw, 1.5rem) clamp(1.5rem, 4vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    margin-bottom: 2rem;
+                    border-left: 4px solid #c4a672;
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
+            <div style='display: flex; align-items: center; justify-content: space-between; flex-wrap: wrap; gap: 1rem;'>
+                <div style='flex: 1; min-width: 200px;'>
+                    <h1 style='margin: 0; color: #5a4a3a; font-size: clamp(1.5rem, 4vw, 2.2rem); font-weight: 800; letter-spacing: -0.5px;'>
+                        Visão por Domínios
+                    </h1>
+                    <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.85rem, 2vw, 1rem);'>
+                        Subescalas agrupadas nos domínios do COPSOQ - Do domínio à pergunta
+                    </p>
+                </div>
+                <div style='background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
+                            padding: 0.7rem 1.3rem;
+                            border-radius: 10px;
+                            text-align: center;
+                            box-shadow: 0 4px 12px rgba(168, 136, 70, 0.3);'>
+                    <div style='color: rgba(255, 255, 255, 0.85); font-size: 0.7rem; font-weight: 600; letter-spacing: 0.5px;'>
+                        CONFORME
+                    </div>
+                    <div style='color: white; font-size: 1.3rem; font-weight: 800; letter-spacing: 1.5px;'>
+                        NR-01
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    dominios_snapshot = snapshot_dados['dominios']
+    nomes_nivel_dominio = {'organizacao': 'Organização', 'cargo': 'Cargo', 'setor': 'Setor'}
+    
+    with st.expander("Filtros e Configurações", expanded=False):
+        filter_cols = st.columns([1, 2])
+        
+        with filter_cols[0]:
+            nivel_dominio = st.selectbox(
+                "Nível",
+                options=list(nomes_nivel_dominio),
+                format_func=nomes_nivel_dominio.get,
+                help="Consolidação da organização inteira ou de um cargo ou setor",
+                key='dominio_nivel'
+            )
+        
+        grupo_dominio = None
+        if nivel_dominio != 'organizacao':
+            opcoes_grupo_dominio = list(dominios_snapshot[nivel_dominio]['dominios'].index.unique(level=nivel_dominio))
+            # Valor vindo de link ou do outro nível pode não existir neste
+            if st.session_state.get('dominio_grupo') not in opcoes_grupo_dominio:
+                st.session_state.pop('dominio_grupo', None)
+            with filter_cols[1]:
+                grupo_dominio = st.selectbox(
+                    nomes_nivel_dominio[nivel_dominio],
+                    options=opcoes_grupo_dominio,
+                    help="Grupo cujos domínios e subescalas serão detalhados",
+                    key='dominio_grupo'
+                )
+    
+    sincronizar_filtros_url(pagina)
+    
+    tabelas_dominio = dominios_snapshot[nivel_dominio]
+    if grupo_dominio is None:
+        dominios_vis = tabelas_dominio['dominios']
+        subescalas_dominio_vis = tabelas_dominio['subescalas']
+    else:
+        dominios_vis = tabelas_dominio['dominios'].xs(grupo_dominio, level=nivel_dominio)
+        subescalas_dominio_vis = tabelas_dominio['subescalas'].xs(grupo_dominio, level=nivel_dominio)
+    
+    if dominios_vis.empty:
+        st.warning("Nenhum domínio disponível para a seleção atual.")
+        st.stop()
+    
+    dominio_critico = dominios_vis['criticidade'].idxmax()
+    n_alto_dominio = int((dominios_vis['classe'] == 'alto').sum())
+    
+    kpi1, kpi2, kpi3 = st.columns(3)
+    
+    with kpi1:
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(196, 166, 114, 0.25);
+                        box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
+                        text-align: center;
+                        min-height: 120px;
+                        display: flex;
+                        flex-direction: column;
+                        justify-content: center;'>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Domínios
+                </div>
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                    {len(dominios_vis)}
+                </div>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Reunindo {int(dominios_vis['subescalas'].sum())} subescalas
+                </div>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    with kpi2:
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(220, 38, 38, 0.3);
+                        box-shadow: 0 3px 12px rgba(220, 38, 38, 0.12);
+                        text-align: center;
+                        min-height: 120px;
+                        display: flex;
+                        flex-direction: column;
+                        justify-content: center;'>
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Domínio Mais Crítico
+                </div>
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1; margin-bottom: 0.4rem;'>
+                    {dominios_vis.loc[dominio_critico, 'criticidade']:.2f}
+                </div>
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    {dominio_critico}
+                </div>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    with kpi3:
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(196, 166, 114, 0.25);
+                        box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
+                        text-align: center;
+                        min-height: 120px;
+                        display: flex;
+                        flex-direction: column;
+                        justify-content: center;'>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Domínios em Alto Risco
+                </div>
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                    {n_alto_dominio}
+                </div>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    {int(dominios_vis['qtd'].max())} respondentes{f' · {grupo_dominio}' if grupo_dominio else ''}
+                </div>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Criticidade por Domínio
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Média das subescalas ponderada pelos respondentes - Clique num domínio para ver suas subescalas
+                </p>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    layout_config = create_responsive_layout_config()
+    if 'perc_alto' in dominios_vis:
+        hover_dominio = '<b>%{y}</b><br>Criticidade: <b>%{x:.2f}</b><br>Subescalas: %{customdata[0]}<br>Alto Risco: %{customdata[1]:.1%}<extra></extra>'
+        customdata_dominio = np.column_stack((dominios_vis['subescalas'], dominios_vis['perc_alto']))
+    else:
+        hover_dominio = '<b>%{y}</b><br>Criticidade: <b>%{x:.2f}</b><br>Subescalas: %{customdata[0]}<extra></extra>'
+        customdata_dominio = dominios_vis[['subescalas']].to_numpy()
+    
+    fig_dominios = go.Figure(go.Bar(
+        y=dominios_vis.index,
+        x=dominios_vis['criticidade'],
+        orientation='h',
+        marker=dict(color=[get_risk_color_classe(classe) for classe in dominios_vis['classe']], line=dict(width=0)),
+        text=[f'{valor:.2f}' for valor in dominios_vis['criticidade']],
+        textposition='outside',
+        textfont=dict(color='#5a4a3a', size=13, family='Arial', weight='bold'),
+        customdata=customdata_dominio,
+        hovertemplate=hover_dominio
+    ))
+    fig_dominios.update_layout(
+        **layout_config,
+        height=calculate_responsive_height(len(dominios_vis), min_height=350, item_height=45),
+        showlegend=False,
+        xaxis=dict(
+            range=[1, 5.3],
+            title='Criticidade',
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            showline=False,
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+        ),
+        yaxis=dict(
+            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+            showline=False,
+            autorange='reversed'
+        )
+    )
+    evento_dominios = exibir_figura(fig_dominios, 'fig_dominios', selecao='dominio_selecao')
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    # Sem clique, o detalhamento abre no domínio mais crítico
+    selecao_dominio = ponto_selecionado({'dominio_selecao': evento_dominios})
+    dominio_escolhido = selecao_dominio[1]['y'] if selecao_dominio is not None else dominio_critico
+    if dominio_escolhido not in dominios_vis.index:
+        dominio_escolhido = dominio_critico
+    
+    if grupo_dominio is not None:
+        mapa_dominios = tabelas_dominio['dominios']['criticidade'].unstack(nivel_dominio).T
+        mapa_dominios = mapa_dominios[[d for d in dominios_vis.index if d in mapa_dominios.columns]]
+        
+        with st.expander(f"Todos os {'Cargos' if nivel_dominio == 'cargo' else 'Setores'} × Domínios", expanded=False):
+            mostrar_texto_dominios = mapa_dominios.size <= 400
+            fig_mapa_dominios = go.Figure(data=go.Heatmap(
+                z=mapa_dominios.values,
+                x=mapa_dominios.columns,
+                y=mapa_dominios.index,
+                zmin=1,
+                zmax=5,
+                colorscale='RdYlGn_r',
+                text=np.round(mapa_dominios.values, 2) if mostrar_texto_dominios else None,
+                texttemplate='%{text}' if mostrar_texto_dominios else '',
+                textfont={"size": 12, "color": "#1e293b", "family": "Arial", "weight": "bold"},
+                colorbar=dict(
+                    title=dict(
+                        text="Criticidade",
+                        side='right',
+                        font=dict(size=13, color='#5a4a3a', family='Arial', weight='bold')
+                    ),
+                    tickfont=dict(size=12, color='#6b5847', family='Arial', weight='bold')
+                ),
+                hovertemplate='<b>%{y}</b><br>%{x}<br>Criticidade: <b>%{z:.2f}</b><extra></extra>'
+            ))
+            layout_config = create_responsive_layout_config()
+            fig_mapa_dominios.update_layout(
+                **layout_config,
+                height=calculate_responsive_height(len(mapa_dominios), min_height=400, item_height=40),
+                xaxis=dict(
+                    title='',
+                    tickfont=dict(size=12, color='#5a4a3a', family='Arial', weight='bold'),
+                    tickangle=-30
+                ),
+                yaxis=dict(
+                    title='',
+                    tickfont=dict(size=12, color='#5a4a3a', family='Arial', weight='bold'),
+                    autorange='reversed'
+                )
+            )
+            exibir_figura(fig_mapa_dominios, 'fig_mapa_dominios')
+    
+    subescalas_escolhidas = subescalas_dominio_vis.xs(dominio_escolhido, level='dominio')
+    
+    st.markdown(f"""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Subescalas · {dominio_escolhido}
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Criticidade de cada subescala do domínio (escalas de proteção já invertidas) - Clique numa subescala para ver as perguntas
+                </p>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    fig_subescalas_dominio = go.Figure(go.Bar(
+        y=subescalas_escolhidas.index,
+        x=subescalas_escolhidas['criticidade'],
+        orientation='h',
+        marker=dict(color=[get_risk_color_classe(classe) for classe in subescalas_escolhidas['classe']], line=dict(width=0)),
+        text=[f'{valor:.2f}' for valor in subescalas_escolhidas['criticidade']],
+        textposition='outside',
+        textfont=dict(color='#5a4a3a', size=13, family='Arial', weight='bold'),
+        customdata=subescalas_escolhidas[['qtd']].to_numpy(),
+        hovertemplate='<b>%{y}</b><br>Criticidade: <b>%{x:.2f}</b><br>Respondentes: %{customdata[0]}<extra></extra>'
+    ))
+    layout_config = create_responsive_layout_config()
+    fig_subescalas_dominio.update_layout(
+        **layout_config,
+        height=calculate_responsive_height(len(subescalas_escolhidas), min_height=300, item_height=45),
+        showlegend=False,
+        xaxis=dict(
+            range=[1, 5.3],
+            title='Criticidade',
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            showline=False,
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+        ),
+        yaxis=dict(
+            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+            showline=False,
+            autorange='reversed'
+        )
+    )
+    evento_subescalas_dominio = exibir_figura(fig_subescalas_dominio, 'fig_subescalas_dominio', selecao='dominio_subescala_selecao')
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    selecao_subescala_dominio = ponto_selecionado({'dominio_subescala_selecao': evento_subescalas_dominio})
+    subescala_escolhida = selecao_subescala_dominio[1]['y'] if selecao_subescala_dominio is not None else subescalas_escolhidas['criticidade'].idxmax()
+    if subescala_escolhida not in subescalas_escolhidas.index:
+        subescala_escolhida = subescalas_escolhidas['criticidade'].idxmax()
+    
+    itens_subescala_dominio = dominios_snapshot['hierarquia'].get(dominio_escolhido, {}).get(subescala_escolhida)
+    if itens_subescala_dominio is not None and len(itens_subescala_dominio) > 0:
+        st.markdown(f"""
+            <div style='margin: 2rem 0 1rem 0;'>
+                <h3 style='color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
+                    Perguntas · {subescala_escolhida}
+                </h3>
+                <p style='color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem); margin: 0.4rem 0 0 0;'>
+                    Resultado de cada pergunta na organização inteira{f' (não há médias por pergunta para {grupo_dominio})' if grupo_dominio else ''}
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+        st.dataframe(
+            itens_subescala_dominio,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'pergunta': st.column_config.TextColumn("Pergunta"),
+                'media': st.column_config.NumberColumn("Média", format="%.2f"),
+                'criticidade': st.column_config.NumberColumn("Criticidade", format="%.2f"),
+                'classe_risco': st.column_config.TextColumn("Classe de Risco"),
+                'qtd': st.column_config.NumberColumn("Respondentes", format="%d")
+            }
+        )
+        exibir_resumo_subescala(
+            subescala_escolhida, 'dominio_abrir_detalhe',
+            f"{dominio_escolhido} · criticidade {subescalas_escolhidas.loc[subescala_escolhida, 'criticidade']:.2f}"
+        )
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(59, 130, 246, 0.1) 0%, rgba(37, 99, 235, 0.05) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(10px, 2vw, 14px);
+                    border-left: 4px solid #3b82f6;
+                    margin-bottom: 2rem;
+                    box-shadow: 0 4px 16px rgba(59, 130, 246, 0.08);'>
+            <h4 style='margin: 0 0 0.8rem 0; color: #1e40af; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
+                Como Usar
+            </h4>
+            <div style='color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.7;'>
+                Cada domínio reúne as subescalas do questionário que tratam do mesmo tema. Sua criticidade é a 
+                <strong>média das subescalas ponderada pelo número de respondentes</strong>, calculada na carga dos dados 
+                para a organização, cada cargo e cada setor. Comece pelo domínio <strong>mais crítico</strong>, 
+                desça às subescalas e, delas, às <strong>perguntas</strong> em Detalhamento & Ações.
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+
+elif pagina == "Priorização de Riscos":
+    semear_filtros(pagina)
+    st.markdown("""
+        <style>
+        .main .block-container {
+            max-width: 100%;
+            padding: clamp(0.5rem, 2vw, 2rem);
+        }
+        @media (max-width: 768px) {
+            .main .block-container {
+                padding: 0.5rem;
+            }
+            [data-testid="stHorizontalBlock"] > div {
+                width: 100% !important;
+                flex: 1 1 100% !important;
+            }
+        }
+        
+        [data-testid="stExpander"] {
+            background: linear-gradient(135deg, rgba(255, 255, 255, 0.8) 0%, rgba(248, 242, 230, 0.6) 100%);
+            border: 1px solid rgba(196, 166, 114, 0.3);
+            border-radius: 10px;
+        }
+        
+        [data-testid="stExpander"] summary {
+            color: #5a4a3a !important;
+            font-weight: 600;
+        }
+        
+        .stMultiSelect [data-baseweb="select"] {
+            min-height: 38px;
+            background: white;
+            border: 2px solid rgba(196, 166, 114, 0.3);
+            border-radius: 8px;
+        }
+        
+        .stMultiSelect [data-baseweb="select"]:hover {
+            border-color: #c4a672;
+        }
+        
+        .stMultiSelect [data-baseweb="tag"] {
+            background-color: #c4a672 !important;
+            color: white !important;
+            border-radius: 6px;
+        }
+        
+        .stSelectbox [data-baseweb="select"] {
+            background: white;
+            border: 2px solid rgba(196, 166, 114, 0.3);
+            border-radius: 8px;
+        }
+        
+        .stSelectbox [data-baseweb="select"]:hover {
+            border-color: #c4a672;
+        }
+        
+        .stSlider [data-baseweb="slider"] [role="slider"] {
+            background-color: #c4a672 !important;
+        }
+        
+        .stSlider [data-baseweb="slider"] [data-testid="stTickBar"] > div {
+            background: linear-gradient(90deg, #c4a672 0%, #b89656 100%);
+        }
+        
+        .stCheckbox label {
+            color: #5a4a3a;
+            font-weight: 500;
+        }
+        
+        .stCheckbox [data-testid="stCheckbox"] {
+            accent-color: #c4a672;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.12) 0%, rgba(232, 220, 200, 0.08) 100%);
+                    padding: clamp(1rem, 3vw, 1.5rem) clamp(1.5rem, 4vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    margin-bottom: 2rem;
+                    border-left: 4px solid #c4a672;
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
+            <div style='display: flex; align-items: center; justify-content: space-between; flex-wrap: wrap; gap: 1rem;'>
+                <div style='flex: 1; min-width: 200px;'>
+                    <h1 style='margin: 0; color: #5a4a3a; font-size: clamp(1.5rem, 4vw, 2.2rem); font-weight: 800; letter-spacing: -0.5px;'>
+                        Priorização de Riscos
+                    </h1>
+                    <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.85rem, 2vw, 1rem);'>
+                        Hierarquização estratégica para tomada de decisão
+                    </p>
+                </div>
+                <div style='background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
+                            padding: 0.7rem 1.3rem;
+                            border-radius: 10px;
+                            text-align: center;
+                            box-shadow: 0 4px 12px rgba(168, 136, 70, 0.3);'>
+                    <div style='color: rgba(255, 255, 255, 0.85); font-size: 0.7rem; font-weight: 600; letter-spacing: 0.5px;'>
+                        CONFORME
+                    </div>
+                    <div style='color: white; font-size: 1.3rem; font-weight: 800; letter-spacing: 1.5px;'>
+                        NR-01
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    unique_subescalas_rank = ordenar_subescalas(ranking_data['subescala'], registro_subescalas)
+    with st.expander("Filtros e Configurações", expanded=False):
+        filtros_navegador_rank = st.checkbox("Filtros no Navegador", help="Filtros, indicadores, ranking e Top 3 rodam no navegador, sem recarregar a página. Desmarque para filtrar no servidor", key='rank_navegador')
+        if filtros_navegador_rank:
+            st.caption("Os filtros ficam no painel do Ranking de Criticidade, abaixo, junto com os indicadores e o Top 3 que eles atualizam.")
+            selected_subescalas_rank = st.session_state['rank_subescalas']
+            selected_perc_range = st.session_state['rank_faixa']
+            selected_ordenacao_rank = st.session_state['rank_ordenacao']
+            show_percentages_rank = st.session_state['rank_show_perc']
+        else:
+            filter_cols = st.columns([1, 1, 1, 1])
+        
+            with filter_cols[0]:
+                selected_subescalas_rank = st.multiselect(
+                    "Fatores Psicossociais",
+                    options=unique_subescalas_rank,
+                    help="Selecione os fatores que deseja analisar",
+                    key='rank_subescalas'
+                )
+        
+            with filter_cols[1]:
+                selected_perc_range = st.slider(
+                    "Percentual Alto Risco",
+                    min_value=0.0,
+                    max_value=100.0,
+                    step=5.0,
+                    help="Filtre pelo percentual de alto risco",
+                    key='rank_faixa'
+                )
+        
+            with filter_cols[2]:
+                ordenacao_rank_options = ['Maior Risco', 'Menor Risco', 'Alfabética A-Z', 'Alfabética Z-A']
+                selected_ordenacao_rank = st.selectbox(
+                    "Ordenação",
+                    options=ordenacao_rank_options,
+                    help="Escolha como ordenar os dados",
+                    key='rank_ordenacao'
+                )
+        
+            with filter_cols[3]:
+                show_percentages_rank = st.checkbox("Exibir Percentuais", help="Mostrar percentuais nos gráficos", key='rank_show_perc')
+    
+    chave_visao = sincronizar_filtros_url(pagina)
+    visao_ranking = visao_compartilhada(
+        chave_visao, 'ranking',
+        lambda: calcular_visao_ranking(ranking_data, selected_subescalas_rank, selected_perc_range, selected_ordenacao_rank)
+    )
+    filtered_ranking = visao_ranking['filtrado']
+    
+    if len(filtered_ranking) == 0:
+        st.warning("Nenhum dado encontrado com os filtros selecionados. Ajuste os filtros acima.")
+        st.stop()
+    
+    if not filtros_navegador_rank:
+        criticos = visao_ranking['kpis']['criticos']
+        altos = visao_ranking['kpis']['altos']
+        monitoramento = visao_ranking['kpis']['monitoramento']
+    
+        kpi_cols = st.columns(3)
+    
+        with kpi_cols[0]:
+            st.markdown(f"""
+                <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
+                            padding: clamp(1rem, 3vw, 1.5rem);
+                            border-radius: clamp(10px, 2vw, 14px);
+                            border: 2px solid rgba(220, 38, 38, 0.3);
+                            box-shadow: 0 3px 12px rgba(220, 38, 38, 0.12);
+                            text-align: center;
+                            min-height: 120px;
+                            display: flex;
+                            flex-direction: column;
+                            justify-content: center;'>
+                    <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Críticos
+                    </div>
+                    <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1; margin-bottom: 0.4rem;'>
+                        {criticos}
+                    </div>
+                    <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                        ≥70% | Ação imediata
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+    
+        with kpi_cols[1]:
+            st.markdown(f"""
+                <div style='background: linear-gradient(135deg, rgba(254, 243, 199, 0.95) 0%, rgba(253, 224, 171, 0.8) 100%);
+                            padding: clamp(1rem, 3vw, 1.5rem);
+                            border-radius: clamp(10px, 2vw, 14px);
+                            border: 2px solid rgba(245, 158, 11, 0.3);
+                            box-shadow: 0 3px 12px rgba(245, 158, 11, 0.12);
+                            text-align: center;
+                            min-height: 120px;
+                            display: flex;
+                            flex-direction: column;
+                            justify-content: center;'>
+                    <div style='color: #92400e; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Altos
+                    </div>
+                    <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #f59e0b; line-height: 1; margin-bottom: 0.4rem;'>
+                        {altos}
+                    </div>
+                    <div style='color: #92400e; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                        50-70% | Curto prazo
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+    
+        with kpi_cols[2]:
+            st.markdown(f"""
+                <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                            padding: clamp(1rem, 3vw, 1.5rem);
+                            border-radius: clamp(10px, 2vw, 14px);
+                            border: 2px solid rgba(196, 166, 114, 0.25);
+                            box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
+                            text-align: center;
+                            min-height: 120px;
+                            display: flex;
+                            flex-direction: column;
+                            justify-content: center;'>
+                    <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Monitoramento
+                    </div>
+                    <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #b89656; line-height: 1; margin-bottom: 0.4rem;'>
+                        {monitoramento}
+                    </div>
+                    <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                        &lt;50% | Acompanhamento
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+    
+        st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.1) 0%, rgba(232, 220, 200, 0.06) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border-left: 4px solid #c4a672;
+                    margin-bottom: 2rem;
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
+            <h3 style='margin: 0 0 1.5rem 0; color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
+                Entendendo a Priorização
+            </h3>
+            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: clamp(1rem, 3vw, 2rem);'>
+                <div>
+                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Problema Resolvido
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                        Elimina dispersão de recursos. Nem tudo pode ser tratado simultaneamente - <strong>foco estratégico</strong> é essencial
+                    </div>
+                </div>
+                <div>
+                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Pergunta Respondida
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6; font-style: italic;'>
+                        "Quais fatores exigem atenção primeiro e quais podem aguardar?"
+                    </div>
+                </div>
+                <div>
+                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Valor Estratégico
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                        Demonstra <strong>critério objetivo de hierarquização</strong>, atendendo à avaliação de riscos da NR-01
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Ranking de Criticidade
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Do mais urgente ao menos urgente - Percentual de colaboradores em alto risco por fator
+                </p>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    ranking_sorted = visao_ranking['ordenado']
+    
+    if filtros_navegador_rank:
+        exibir_painel_navegador(
+            'ranking', ranking_data, ('subescala', 'perc_alto', 'media_score'),
+            calculate_responsive_height(len(unique_subescalas_rank), min_height=400, item_height=40) + 560,
+            inicial={
+                'subescalas': selected_subescalas_rank, 'ordem': selected_ordenacao_rank, 'percentuais': show_percentages_rank,
+                'minimo': selected_perc_range[0], 'maximo': selected_perc_range[1]
+            }
+        )
+    else:
+        fig2, tamanho_fig2 = figura_compartilhada(
+            chave_visao, 'fig2', lambda: figura_ranking(ranking_sorted, show_percentages_rank, snapshot_dados['normas'])
+        )
+        exibir_figura(fig2, 'fig2', tamanho=tamanho_fig2)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    # ===== COMPARAÇÃO COM A CARTEIRA (ESBOÇOS MESCLADOS) =====
+    esboco_carteira, resumo_carteira = resumir_carteira(tuple(listar_esbocos_carteira()))
+    if esboco_carteira is not None:
+        with st.expander(f"Comparação com a Carteira ({esboco_carteira['empresas']} empresas)", expanded=False):
+            esboco_empresa = snapshot_dados['esboco']['subescalas']
+            subescalas_carteira = [n for n in ranking_sorted['subescala'][::-1] if n in resumo_carteira.index]
+            comparacao_carteira = resumo_carteira.loc[subescalas_carteira].assign(
+                mediana_empresa=[quantil_esboco(esboco_empresa[n], 0.5)[0] if n in esboco_empresa else np.nan for n in subescalas_carteira]
+            )
+            st.dataframe(
+                comparacao_carteira[['mediana_empresa', 'mediana', 'p90', 'perc_alto', 'pessoas']],
+                use_container_width=True,
+                column_config={
+                    'mediana_empresa': st.column_config.NumberColumn("Mediana (empresa)", format="%.2f"),
+                    'mediana': st.column_config.NumberColumn("Mediana (carteira)", format="%.2f"),
+                    'p90': st.column_config.NumberColumn("P90 (carteira)", format="%.2f"),
+                    'perc_alto': st.column_config.NumberColumn("Alto Risco (carteira)", format="%.1f%%"),
+                    'pessoas': st.column_config.NumberColumn("Respondentes (carteira)", format="%d")
+                }
+            )
+            if 'cargo' in esboco_carteira['origem'] or 'cargo' in snapshot_dados['esboco']['origem']:
+                st.caption("Parte dos esboços foi gerada sem respostas brutas (médias por cargo): a dispersão real é maior que a exibida.")
+    
+    if not filtros_navegador_rank:
+        st.markdown("""
+            <div style='margin: 2rem 0 1rem 0;'>
+                <h3 style='color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
+                    Top 3 Prioridades Imediatas
+                </h3>
+                <p style='color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem); margin: 0.4rem 0 0 0;'>
+                    Fatores que exigem ação estratégica nos próximos 30-60 dias
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+    
+        cartoes_top_3 = visao_compartilhada(chave_visao, 'ranking_cartoes', lambda: cartoes_prioridades(visao_ranking['top_3']))
+    
+        cols = st.columns(min(3, len(cartoes_top_3)))
+        for col, cartao in zip(cols, cartoes_top_3):
+            with col:
+                st.markdown(cartao, unsafe_allow_html=True)
+    
+    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1rem, 3vw, 1.5rem) clamp(1.5rem, 4vw, 2rem);
+                    border-radius: clamp(10px, 2vw, 14px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    margin-bottom: 2rem;'>
+            <h4 style='margin: 0 0 1.2rem 0; color: #5a4a3a; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
+                Critérios de Classificação
+            </h4>
+            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: clamp(1rem, 2vw, 1.5rem);'>
+                <div>
+                    <div style='display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;'>
+                        <div style='width: 16px; height: 16px; background: #dc2626; border-radius: 4px;'></div>
+                        <span style='color: #991b1b; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Crítico</span>
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.75rem, 1.7vw, 0.85rem); line-height: 1.5;'>
+                        ≥70% | Curto prazo<br>
+                        <strong>30-60 dias</strong>
+                    </div>
+                </div>
+                <div>
+                    <div style='display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;'>
+                        <div style='width: 16px; height: 16px; background: #f59e0b; border-radius: 4px;'></div>
+                        <span style='color: #92400e; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Alto</span>
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.75rem, 1.7vw, 0.85rem); line-height: 1.5;'>
+                        50-70% | Médio prazo<br>
+                        <strong>3-6 meses</strong>
+                    </div>
+                </div>
+                <div>
+                    <div style='display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;'>
+                        <div style='width: 16px; height: 16px; background: #f59e0b; opacity: 0.6; border-radius: 4px;'></div>
+                        <span style='color: #92400e; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Moderado</span>
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.75rem, 1.7vw, 0.85rem); line-height: 1.5;'>
+                        30-50% | Longo prazo<br>
+                        <strong>6-12 meses</strong>
+                    </div>
+                </div>
+                <div>
+                    <div style='display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;'>
+                        <div style='width: 16px; height: 16px; background: #10b981; border-radius: 4px;'></div>
+                        <span style='color: #065f46; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Baixo</span>
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.75rem, 1.7vw, 0.85rem); line-height: 1.5;'>
+                        &lt;30% | Contínuo<br>
+                        <strong>Monitoramento</strong>
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    col_prox1, col_prox2 = st.columns(2)
+    
+    with col_prox1:
+        st.markdown("""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(219, 234, 254, 0.8) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(59, 130, 246, 0.25);
+                        border-left: 4px solid #3b82f6;
+                        box-shadow: 0 3px 12px rgba(59, 130, 246, 0.1);'>
+                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
+                    <div style='width: 42px; height: 42px;
+                                background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
+                                border-radius: 10px;
+                                display: flex; align-items: center; justify-content: center;
+                                box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);'>
+                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                            <path d="M9 5l7 7-7 7"/>
+                        </svg>
+                    </div>
+                    <h4 style='margin: 0; color: #1e40af; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
+                        Próximo Passo
+                    </h4>
+                </div>
+                <p style='margin: 0; color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                    Explore <strong>Análise por Cargo</strong> para entender como os riscos se distribuem por função
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    with col_prox2:
+        st.markdown("""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(209, 250, 229, 0.8) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(16, 185, 129, 0.25);
+                        border-left: 4px solid #10b981;
+                        box-shadow: 0 3px 12px rgba(16, 185, 129, 0.1);'>
+                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
+                    <div style='width: 42px; height: 42px;
+                                background: linear-gradient(135deg, #10b981 0%, #059669 100%);
+                                border-radius: 10px;
+                                display: flex; align-items: center; justify-content: center;
+                                box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
+                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                            <path d="M5 13l4 4L19 7"/>
+                        </svg>
+                    </div>
+                    <h4 style='margin: 0; color: #065f46; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
+                        Conformidade NR-01
+                    </h4>
+                </div>
+                <p style='margin: 0; color: #064e3b; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                    Atende requisitos de <strong>avaliação</strong> e <strong>hierarquização</strong> de riscos
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+
+####### ANALISE POR CARGO ########
+elif pagina == "Análise por Cargo":
+    semear_filtros(pagina)
+    st.markdown("""
+        <style>
+        .main .block-container {
+            max-width: 100%;
+            padding: clamp(0.5rem, 2vw, 2rem);
+        }
+        @media (max-width: 768px) {
+            .main .block-container {
+                padding: 0.5rem;
+            }
+            [data-testid="stHorizontalBlock"] > div {
+                width: 100% !important;
+                flex: 1 1 100% !important;
+            }
+        }
+        
+        [data-testid="stExpander"] {
+            background: linear-gradient(135deg, rgba(255, 255, 255, 0.8) 0%, rgba(248, 242, 230, 0.6) 100%);
+            border: 1px solid rgba(196, 166, 114, 0.3);
+            border-radius: 10px;
+        }
+        
+        [data-testid="stExpander"] summary {
+            color: #5a4a3a !important;
+            font-weight: 600;
+        }
+        
+        .stMultiSelect [data-baseweb="select"] {
+            min-height: 38px;
+            background: white;
+            border: 2px solid rgba(196, 166, 114, 0.3);
+            border-radius: 8px;
+        }
+        
+        .stMultiSelect [data-baseweb="select"]:hover {
+            border-color: #c4a672;
+        }
+        
+        .stMultiSelect [data-baseweb="tag"] {
+            background-color: #c4a672 !important;
+            color: white !important;
+            border-radius: 6px;
+        }
+        
+        .stSelectbox [data-baseweb="select"] {
+            background: white;
+            border: 2px solid rgba(196, 166, 114, 0.3);
+            border-radius: 8px;
+        }
+        
+        .stSelectbox [data-baseweb="select"]:hover {
+            border-color: #c4a672;
+        }
+        
+        .stSlider [data-baseweb="slider"] [role="slider"] {
+            background-color: #c4a672 !important;
+        }
+        
+        .stSlider [data-baseweb="slider"] [data-testid="stTickBar"] > div {
+            background: linear-gradient(90deg, #c4a672 0%, #b89656 100%);
+        }
+        
+        .stCheckbox label {
+            color: #5a4a3a;
+            font-weight: 500;
+        }
+        
+        .stCheckbox [data-testid="stCheckbox"] {
+            accent-color: #c4a672;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.12) 0%, rgba(232, 220, 200, 0.08) 100%);
+                    padding: clamp(1rem, 3vw, 1.5rem) clamp(1.5rem, 4vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    margin-bottom: 2rem;
+                    border-left: 4px solid #c4a672;
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
+            <div style='display: flex; align-items: center; justify-content: space-between; flex-wrap: wrap; gap: 1rem;'>
+                <div style='flex: 1; min-width: 200px;'>
+                    <h1 style='margin: 0; color: #5a4a3a; font-size: clamp(1.5rem, 4vw, 2.2rem); font-weight: 800; letter-spacing: -0.5px;'>
+                        Análise por Cargo
+                    </h1>
+                    <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.85rem, 2vw, 1rem);'>
+                        Risco associado à atividade profissional, não ao indivíduo
+                    </p>
+                </div>
+                <div style='background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
+                            padding: 0.7rem 1.3rem;
+                            border-radius: 10px;
+                            text-align: center;
+                            box-shadow: 0 4px 12px rgba(168, 136, 70, 0.3);'>
+                    <div style='color: rgba(255, 255, 255, 0.85); font-size: 0.7rem; font-weight: 600; letter-spacing: 0.5px;'>
+                        CONFORME
+                    </div>
+                    <div style='color: white; font-size: 1.3rem; font-weight: 800; letter-spacing: 1.5px;'>
+                        NR-01
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    with st.expander("Filtros e Configurações", expanded=False):
+        filter_cols = st.columns([1, 1, 1, 1])
+        
+        with filter_cols[0]:
+            unique_cargos = sorted(cargo_data['cargo'].unique().tolist())
+            selected_cargos = st.multiselect(
+                "Cargos",
+                options=unique_cargos,
+                help="Selecione os cargos que deseja analisar",
+                key='cargo_cargos'
+            )
+        
+        with filter_cols[1]:
+            unique_subescalas_cargo = ordenar_subescalas(cargo_data['subescala'], registro_subescalas)
+            selected_subescalas_cargo = st.multiselect(
+                "Dimensões Psicossociais",
+                options=unique_subescalas_cargo,
+                help="Selecione as dimensões para análise",
+                key='cargo_subescalas'
+            )
+        
+        with filter_cols[2]:
+            ordenacao_cargo_options = ['Maior Risco', 'Menor Risco', 'Alfabética A-Z', 'Alfabética Z-A']
+            selected_ordenacao_cargo = st.selectbox(
+                "Ordenação",
+                options=ordenacao_cargo_options,
+                help="Escolha como ordenar os dados",
+                key='cargo_ordenacao'
+            )
+        
+        with filter_cols[3]:
+            show_values_cargo = st.checkbox("Exibir Valores", help="Mostrar valores nos gráficos", key='cargo_show_values')
+            show_ic_cargo = st.checkbox("Intervalos de Confiança", help="Exibir intervalos de confiança de 95% das médias", key='cargo_show_ic')
+            seriar_cargo = st.checkbox("Agrupar Padrões nos Mapas", help="Reordenar linhas e colunas dos mapas de calor por semelhança de perfil", key='cargo_seriacao')
+    
+    chave_visao = sincronizar_filtros_url(pagina)
+    visao_cargo = visao_compartilhada(
+        chave_visao, 'cargo',
+        lambda: calcular_visao_grupos(cargo_data, 'cargo', selected_cargos, selected_subescalas_cargo, escores_data, selected_ordenacao_cargo)
+    )
+    filtered_cargo = visao_cargo['filtrado']
+    
+    if len(filtered_cargo) == 0:
+        st.warning("Nenhum dado encontrado com os filtros selecionados. Ajuste os filtros acima.")
+        st.stop()
+    
+    cargos_unicos = visao_cargo['kpis']['membros']
+    cargo_critico = visao_cargo['kpis']['critico']
+    cargo_critico_nome = cargo_critico.split('(')[0].strip()
+    media_geral = visao_cargo['kpis']['media_geral']
+    diferenca_max = visao_cargo['kpis']['diferenca_max']
+    
+    kpi1, kpi2, kpi3 = st.columns(3)
+    
+    with kpi1:
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(196, 166, 114, 0.25);
+                        box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
+                        text-align: center;
+                        min-height: 120px;
+                        display: flex;
+                        flex-direction: column;
+                        justify-content: center;'>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Cargos Mapeados
+                </div>
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                    {cargos_unicos}
+                </div>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Funções analisadas
+                </div>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    with kpi2:
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(220, 38, 38, 0.3);
+                        box-shadow: 0 3px 12px rgba(220, 38, 38, 0.12);
+                        text-align: center;
+                        min-height: 120px;
+                        display: flex;
+                        flex-direction: column;
+                        justify-content: center;'>
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Cargo Mais Crítico
+                </div>
+                <div style='font-size: clamp(1.1rem, 2.5vw, 1.4rem); font-weight: 800; color: #dc2626; line-height: 1.2; margin-bottom: 0.4rem; min-height: 3.5rem; display: flex; align-items: center; justify-content: center; padding: 0 0.5rem;'>
+                    {cargo_critico_nome}
+                </div>
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Score: {visao_cargo['kpis']['media_critico']:.2f}
+                </div>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    with kpi3:
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(196, 166, 114, 0.25);
+                        box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
+                        text-align: center;
+                        min-height: 120px;
+                        display: flex;
+                        flex-direction: column;
+                        justify-content: center;'>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Média Organizacional
+                </div>
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #b89656; line-height: 1; margin-bottom: 0.4rem;'>
+                    {media_geral:.2f}
+                </div>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Baseline geral
+                </div>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.1) 0%, rgba(232, 220, 200, 0.06) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border-left: 4px solid #c4a672;
+                    margin-bottom: 2rem;
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
+            <h3 style='margin: 0 0 1.5rem 0; color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
+                Entendendo o Risco por Função
+            </h3>
+            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: clamp(1rem, 3vw, 2rem);'>
+                <div>
+                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Problema Resolvido
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                        Evita interpretação pessoal dos riscos. <strong>Desloca o foco da pessoa para a atividade</strong> profissional
+                    </div>
+                </div>
+                <div>
+                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Pergunta Respondida
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6; font-style: italic;'>
+                        "Alguns riscos estão associados ao tipo de função exercida?"
+                    </div>
+                </div>
+                <div>
+                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                        Valor Estratégico
+                    </div>
+                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                        Protege contra personalização e <strong>direciona para mudanças organizacionais</strong>
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    eventos_cargo = {}
+
+    # ===== HEATMAP 1: PROBLEMAS (ESCALAS NEGATIVAS) =====
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(220, 38, 38, 0.08) 0%, rgba(185, 28, 28, 0.05) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(220, 38, 38, 0.2);
+                    border-left: 4px solid #dc2626;
+                    box-shadow: 0 4px 16px rgba(220, 38, 38, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1.5rem;'>
+                <div style='width: 48px; height: 48px;
+                            background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
+                            border-radius: 10px;
+                            display: flex; align-items: center; justify-content: center;
+                            box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);'>
+                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                        <path d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-3L13.732 4c-.77-1.333-2.694-1.333-3.464 0L3.34 16c-.77 1.333.192 3 1.732 3z"/>
+                    </svg>
+                </div>
+                <div>
+                    <h3 style='margin: 0; color: #991b1b; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                        Mapa de Problemas por Cargo
+                    </h3>
+                    <p style='margin: 0.3rem 0 0 0; color: #7f1d1d; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                        Quanto mais vermelho, maior o problema - Identifica onde os riscos são mais graves
+                    </p>
+                </div>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    mapas_cargo = visao_compartilhada(
+        chave_visao, 'cargo_mapas', lambda: preparar_mapas_grupos(visao_cargo, snapshot_dados['normas'], seriar_cargo)
+    )
+
+    # Filtrar apenas escalas NEGATIVAS
+    cargo_pivot_neg, ic_neg_custom = mapas_cargo[False]
+    
+    if len(cargo_pivot_neg) > 0:
+        rasterizar_neg = cargo_pivot_neg.size > LIMITE_CELULAS_HEATMAP
+        fig3_neg, tamanho_fig3_neg = figura_compartilhada(
+            chave_visao, 'fig3_neg',
+            lambda: figura_mapa_grupos(cargo_pivot_neg, ic_neg_custom, False, show_values_cargo, show_ic_cargo, snapshot_dados['normas'])
+        )
+        eventos_cargo['cargo_selecao_neg'] = exibir_figura(fig3_neg, 'fig3_neg', selecao=None if rasterizar_neg else 'cargo_selecao_neg', tamanho=tamanho_fig3_neg)
+        if rasterizar_neg:
+            exibir_consulta_celula(cargo_pivot_neg, ic_neg_custom, 'Cargo', 'cargo_consulta_neg')
+    else:
+        st.info("Nenhuma escala negativa (problemas) selecionada nos filtros.")
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    # ===== HEATMAP 2: PROTEÇÕES (ESCALAS POSITIVAS) =====
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(16, 185, 129, 0.08) 0%, rgba(5, 150, 105, 0.05) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(16, 185, 129, 0.2);
+                    border-left: 4px solid #10b981;
+                    box-shadow: 0 4px 16px rgba(16, 185, 129, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1.5rem;'>
+                <div style='width: 48px; height: 48px;
+                            background: linear-gradient(135deg, #10b981 0%, #059669 100%);
+                            border-radius: 10px;
+                            display: flex; align-items: center; justify-content: center;
+                            box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
+                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                        <path d="M9 12l2 2 4-4m5.618-4.016A11.955 11.955 0 0112 2.944a11.955 11.955 0 01-8.618 3.04A12.02 12.02 0 003 9c0 5.591 3.824 10.29 9 11.622 5.176-1.332 9-6.03 9-11.622 0-1.042-.133-2.052-.382-3.016z"/>
+                    </svg>
+                </div>
+                <div>
+                    <h3 style='margin: 0; color: #065f46; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                        Mapa de Proteções por Cargo
+                    </h3>
+                    <p style='margin: 0.3rem 0 0 0; color: #064e3b; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                        Quanto mais verde, maior a proteção - Identifica onde há mais fatores protetivos
+                    </p>
+                </div>
+            </div>
+    """, unsafe_allow_html=True)
     
-    for pagina_item in paginas:
-        if st.button(
-            pagina_item,
-            key=f"nav_{pagina_item}",
-            use_container_width=True,
-            type="primary" if st.session_state.pagina_selecionada == pagina_item else "secondary"
-        ):
-            st.session_state.pagina_selecionada = pagina_item
-            st.rerun()
+    # Filtrar apenas escalas POSITIVAS
+    cargo_pivot_pos, ic_pos_custom = mapas_cargo[True]
     
-    pagina = st.session_state.pagina_selecionada
+    if len(cargo_pivot_pos) > 0:
+        rasterizar_pos = cargo_pivot_pos.size > LIMITE_CELULAS_HEATMAP
+        fig3_pos, tamanho_fig3_pos = figura_compartilhada(
+            chave_visao, 'fig3_pos',
+            lambda: figura_mapa_grupos(cargo_pivot_pos, ic_pos_custom, True, show_values_cargo, show_ic_cargo, snapshot_dados['normas'])
+        )
+        eventos_cargo['cargo_selecao_pos'] = exibir_figura(fig3_pos, 'fig3_pos', selecao=None if rasterizar_pos else 'cargo_selecao_pos', tamanho=tamanho_fig3_pos)
+        if rasterizar_pos:
+            exibir_consulta_celula(cargo_pivot_pos, ic_pos_custom, 'Cargo', 'cargo_consulta_pos')
+    else:
+        st.info("Nenhuma escala positiva (proteções) selecionada nos filtros.")
     
-    st.markdown("<div style='height: 2.5rem;'></div>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    # ===== RANKING (CONTINUA IGUAL) =====
     st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.75) 0%, rgba(248, 242, 230, 0.65) 100%); 
-                    padding: 1.5rem; 
-                    border-radius: 20px; 
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Ranking de Cargos por Score Médio
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Cargos ordenados do menor ao maior risco médio - Identificação de funções prioritárias
+                </p>
+            </div>
+    """, unsafe_allow_html=True)
+
+    cargo_ranking = visao_cargo['ranking']
+
+    # Clique numa célula dos mapas: o ranking passa a ser o da subescala clicada
+    selecao_cargo = ponto_selecionado(eventos_cargo)
+    if selecao_cargo is not None:
+        cargo_selecionado, subescala_selecao_cargo = selecao_cargo[1]['y'], selecao_cargo[1]['x']
+        cargo_ranking = visao_compartilhada(
+            chave_visao + '&' + urlencode({'selecao': subescala_selecao_cargo}), 'cargo_selecao',
+            lambda: ranking_da_subescala(visao_cargo, 'cargo', subescala_selecao_cargo, selected_ordenacao_cargo)
+        )
+        exibir_resumo_subescala(
+            subescala_selecao_cargo, 'cargo_abrir_detalhe',
+            f"ranking abaixo restrito a esta dimensão, com {cargo_selecionado} em destaque"
+        )
+
+    if selecao_cargo is None:
+        fig4, tamanho_fig4 = figura_compartilhada(
+            chave_visao, 'fig4', lambda: figura_ranking_grupos(cargo_ranking, 'cargo', 'Respondentes', show_values_cargo, show_ic_cargo)
+        )
+    else:
+        fig4, tamanho_fig4 = figura_ranking_grupos(cargo_ranking, 'cargo', 'Respondentes', show_values_cargo, show_ic_cargo, destaque=cargo_selecionado), None
+    exibir_figura(fig4, 'fig4', tamanho=tamanho_fig4)
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    st.markdown(f"""
+        <div style='background: linear-gradient(135deg, rgba(59, 130, 246, 0.1) 0%, rgba(37, 99, 235, 0.05) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(10px, 2vw, 14px);
+                    border-left: 4px solid #3b82f6;
                     margin-bottom: 2rem;
-                    border: 2px solid rgba(196, 166, 114, 0.3);
-                    backdrop-filter: blur(10px);
-                    box-shadow: 0 6px 24px rgba(107, 88, 71, 0.12), 
-                                inset 0 2px 4px rgba(255, 255, 255, 0.8);
-                    position: relative;'>
-            <div style='display: flex; align-items: center; margin-bottom: 1.25rem; gap: 0.75rem;'>
-                <div style='width: 42px; height: 42px; 
-                            background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
-                            border-radius: 12px;
+                    box-shadow: 0 4px 16px rgba(59, 130, 246, 0.08);'>
+            <div style='display: flex; align-items: flex-start; gap: clamp(0.8rem, 2vw, 1.2rem); flex-wrap: wrap;'>
+                <div style='min-width: 48px; height: 48px;
+                            background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
+                            border-radius: 10px;
                             display: flex; align-items: center; justify-content: center;
-                            box-shadow: 0 4px 12px rgba(168, 136, 70, 0.35), 
-                                        inset 0 1px 0 rgba(255, 255, 255, 0.4);'>
-                    <svg width="22" height="22" viewBox="0 0 24 24" fill="none" stroke="#ffffff" stroke-width="2.5">
-                        <path d="M9 5H7a2 2 0 00-2 2v12a2 2 0 002 2h10a2 2 0 002-2V7a2 2 0 00-2-2h-2M9 5a2 2 0 002 2h2a2 2 0 002-2M9 5a2 2 0 012-2h2a2 2 0 012 2"/>
+                            box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);'>
+                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                        <path d="M9.663 17h4.673M12 3v1m6.364 1.636l-.707.707M21 12h-1M4 12H3m3.343-5.657l-.707-.707m2.828 9.9a5 5 0 117.072 0l-.548.547A3.374 3.374 0 0014 18.469V19a2 2 0 11-4 0v-.531c0-.895-.356-1.754-.988-2.386l-.548-.547z"/>
                     </svg>
                 </div>
-                <p style='margin: 0; color: #6b5847; font-weight: 800; font-size: 0.8rem; 
-                          text-transform: uppercase; letter-spacing: 1.8px;
-                          text-shadow: 0 1px 2px rgba(255, 255, 255, 0.7);'>
-                    Conforme NR-01
-                </p>
-            </div>
-            <div style='background: rgba(255, 255, 255, 0.5); 
-                        padding: 1.3rem; 
-                        border-radius: 14px;
-                        border-left: 3px solid #b89656;
-                        box-shadow: inset 0 1px 3px rgba(107, 88, 71, 0.1);'>
-                <p style='margin: 0 0 1rem 0; font-weight: 700; color: #5a4a3a; font-size: 0.85rem;
-                          text-shadow: 0 1px 1px rgba(255, 255, 255, 0.5);'>
-                    Narrativa estruturada:
-                </p>
-                <div style='color: #6b5847; font-size: 0.85rem; line-height: 2;'>
-                    <div style='display: flex; align-items: center; margin-bottom: 0.5rem;'>
-                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
-                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
-                        <span>Identificação do cenário</span>
-                    </div>
-                    <div style='display: flex; align-items: center; margin-bottom: 0.5rem;'>
-                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
-                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
-                        <span>Caracterização dos riscos</span>
-                    </div>
-                    <div style='display: flex; align-items: center; margin-bottom: 0.5rem;'>
-                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
-                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
-                        <span>Hierarquização</span>
-                    </div>
-                    <div style='display: flex; align-items: center; margin-bottom: 0.5rem;'>
-                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
-                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
-                        <span>Contextualização</span>
-                    </div>
-                    <div style='display: flex; align-items: center;'>
-                        <div style='width: 7px; height: 7px; background: #b89656; border-radius: 50%; margin-right: 0.85rem;
-                                    box-shadow: 0 0 6px rgba(184, 150, 86, 0.6);'></div>
-                        <span>Fundamentação de ações</span>
+                <div style='flex: 1; min-width: 250px;'>
+                    <h4 style='margin: 0 0 0.8rem 0; color: #1e40af; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
+                        Insight Estratégico
+                    </h4>
+                    <div style='color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.7;'>
+                        Os riscos variam <strong>significativamente entre funções</strong>. A diferença de {diferenca_max:.2f} pontos 
+                        entre o cargo mais crítico e a média organizacional evidencia que <strong>o problema não está nas pessoas, 
+                        mas nas condições e demandas da atividade</strong>.
+                        <br><br>
+                        <strong>Recomendação:</strong> Intervenções devem focar em <strong>redesenho de processos</strong>, 
+                        <strong>gestão da carga de trabalho</strong> e <strong>ajuste de demandas por cargo</strong>.
                     </div>
                 </div>
             </div>
         </div>
     """, unsafe_allow_html=True)
     
-    # Divider suave
-    st.markdown("""
-        <div style='position: relative; height: 1px; margin: 2.5rem 0;'>
-            <div style='position: absolute; width: 100%; height: 1px;
-                        background: linear-gradient(90deg, transparent, rgba(184, 148, 102, 0.4), transparent);
-                        box-shadow: 0 0 8px rgba(184, 148, 102, 0.3);'></div>
-        </div>
-    """, unsafe_allow_html=True)
+    col_prox1, col_prox2 = st.columns(2)
     
-    st.markdown("""
-        <div style='text-align: center; padding: 1.3rem;
-                    background: linear-gradient(135deg, rgba(255, 255, 255, 0.7) 0%, rgba(248, 242, 230, 0.6) 100%);
-                    border-radius: 18px;
-                    border: 2px solid rgba(196, 166, 114, 0.25);
-                    backdrop-filter: blur(10px);
-                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.12), 
-                                inset 0 2px 4px rgba(255, 255, 255, 0.8);'>
-            <div style='display: inline-block; padding: 0.5rem 1.2rem;
-                        background: linear-gradient(135deg, rgba(196, 166, 114, 0.3) 0%, rgba(184, 148, 102, 0.25) 100%);
-                        border-radius: 20px;
-                        margin-bottom: 0.75rem;
-                        border: 1px solid rgba(184, 148, 102, 0.3);
-                        box-shadow: 0 2px 6px rgba(107, 88, 71, 0.1), 
-                                    inset 0 1px 0 rgba(255, 255, 255, 0.6);'>
-                <p style='margin: 0; color: #6b5847; font-size: 0.75rem; font-weight: 800;
-                          letter-spacing: 1.2px;
-                          text-shadow: 0 1px 2px rgba(255, 255, 255, 0.5);'>
-                    Dashboard v1.0
+    with col_prox1:
+        st.markdown("""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(219, 234, 254, 0.8) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(59, 130, 246, 0.25);
+                        border-left: 4px solid #3b82f6;
+                        box-shadow: 0 3px 12px rgba(59, 130, 246, 0.1);'>
+                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
+                    <div style='width: 42px; height: 42px;
+                                background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
+                                border-radius: 10px;
+                                display: flex; align-items: center; justify-content: center;
+                                box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);'>
+                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                            <path d="M9 5l7 7-7 7"/>
+                        </svg>
+                    </div>
+                    <h4 style='margin: 0; color: #1e40af; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
+                        Próximo Passo
+                    </h4>
+                </div>
+                <p style='margin: 0; color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                    Explore <strong>Análise por Setor</strong> para entender como os riscos se distribuem por área
                 </p>
             </div>
-            <p style='margin: 0.5rem 0; color: #8b7663; font-size: 0.7rem; font-weight: 500;'>
-                Janeiro 2026
-            </p>
-            <div style='height: 1px; width: 50%; margin: 1rem auto;
-                        background: linear-gradient(90deg, transparent, rgba(184, 148, 102, 0.35), transparent);'></div>
-            <p style='margin: 0; color: #6b5847; font-size: 0.7rem; font-weight: 700;
-                      letter-spacing: 2px;
-                      text-shadow: 0 1px 2px rgba(255, 255, 255, 0.6);'>
-                LUANA PORTELLA
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
-
+        """, unsafe_allow_html=True)
+    
+    with col_prox2:
+        st.markdown("""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(209, 250, 229, 0.8) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(16, 185, 129, 0.25);
+                        border-left: 4px solid #10b981;
+                        box-shadow: 0 3px 12px rgba(16, 185, 129, 0.1);'>
+                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
+                    <div style='width: 42px; height: 42px;
+                                background: linear-gradient(135deg, #10b981 0%, #059669 100%);
+                                border-radius: 10px;
+                                display: flex; align-items: center; justify-content: center;
+                                box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
+                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                            <path d="M5 13l4 4L19 7"/>
+                        </svg>
+                    </div>
+                    <h4 style='margin: 0; color: #065f46; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
+                        Conformidade NR-01
+                    </h4>
+                </div>
+                <p style='margin: 0; color: #064e3b; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
+                    Atende análise de <strong>ambiente</strong> e <strong>organização do trabalho</strong>
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
 
-####### PANORAMA GERAL ########
-if pagina == "Panorama Geral":
+elif pagina == "Análise por Setor":
+    semear_filtros(pagina)
     st.markdown("""
         <style>
         .main .block-container {
@@ -599,10 +7247,10 @@ if pagina == "Panorama Geral":
             <div style='display: flex; align-items: center; justify-content: space-between; flex-wrap: wrap; gap: 1rem;'>
                 <div style='flex: 1; min-width: 200px;'>
                     <h1 style='margin: 0; color: #5a4a3a; font-size: clamp(1.5rem, 4vw, 2.2rem); font-weight: 800; letter-spacing: -0.5px;'>
-                        Panorama Geral
+                        Análise por Setor
                     </h1>
                     <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.85rem, 2vw, 1rem);'>
-                        Identificação e caracterização dos riscos psicossociais
+                        Onde agir na organização - Mapeamento territorial dos riscos
                     </p>
                 </div>
                 <div style='background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
@@ -625,73 +7273,57 @@ if pagina == "Panorama Geral":
         filter_cols = st.columns([1, 1, 1, 1])
         
         with filter_cols[0]:
-            unique_subescalas = sorted(panorama_data['subescala'].unique().tolist())
-            selected_subescalas = st.multiselect(
-                "Fatores Psicossociais",
-                options=unique_subescalas,
-                default=unique_subescalas,
-                help="Selecione os fatores que deseja analisar"
+            unique_setores = sorted(setor_data['setor'].unique().tolist())
+            selected_setores = st.multiselect(
+                "Setores",
+                options=unique_setores,
+                help="Selecione os setores que deseja analisar",
+                key='setor_setores'
             )
         
         with filter_cols[1]:
-            risk_options = ['baixo', 'medio', 'alto']
-            risk_labels = {'baixo': 'Baixo Risco', 'medio': 'Médio Risco', 'alto': 'Alto Risco'}
-            available_risks = [r for r in risk_options if r in panorama_data['classe_risco'].unique()]
-            selected_risks = st.multiselect(
-                "Níveis de Risco",
-                options=available_risks,
-                default=available_risks,
-                format_func=lambda x: risk_labels.get(x, x),
-                help="Filtre por nível de risco"
+            unique_subescalas_setor = ordenar_subescalas(setor_data['subescala'], registro_subescalas)
+            selected_subescalas_setor = st.multiselect(
+                "Dimensões Psicossociais",
+                options=unique_subescalas_setor,
+                help="Selecione as dimensões para análise",
+                key='setor_subescalas'
             )
         
         with filter_cols[2]:
-            ordenacao_options = ['Maior Risco', 'Menor Risco', 'Alfabética A-Z', 'Alfabética Z-A']
-            selected_ordenacao = st.selectbox(
+            ordenacao_setor_options = ['Maior Risco', 'Menor Risco', 'Alfabética A-Z', 'Alfabética Z-A']
+            selected_ordenacao_setor = st.selectbox(
                 "Ordenação",
-                options=ordenacao_options,
-                help="Escolha como ordenar os dados"
+                options=ordenacao_setor_options,
+                help="Escolha como ordenar os dados",
+                key='setor_ordenacao'
             )
         
         with filter_cols[3]:
-            show_percentages = st.checkbox("Exibir Percentuais", value=True, help="Mostrar percentuais nos gráficos")
-    
-    filtered_panorama = panorama_data[
-        (panorama_data['subescala'].isin(selected_subescalas)) &
-        (panorama_data['classe_risco'].isin(selected_risks))
-    ]
+            show_values_setor = st.checkbox("Exibir Valores", help="Mostrar valores nos gráficos", key='setor_show_values')
+            show_ic_setor = st.checkbox("Intervalos de Confiança", help="Exibir intervalos de confiança de 95% das médias", key='setor_show_ic')
+            seriar_setor = st.checkbox("Agrupar Padrões nos Mapas", help="Reordenar linhas e colunas dos mapas de calor por semelhança de perfil", key='setor_seriacao')
+    
+    chave_visao = sincronizar_filtros_url(pagina)
+    visao_setor = visao_compartilhada(
+        chave_visao, 'setor',
+        lambda: calcular_visao_grupos(setor_data, 'setor', selected_setores, selected_subescalas_setor, escores_data, selected_ordenacao_setor)
+    )
+    filtered_setor = visao_setor['filtrado']
     
-    if len(filtered_panorama) == 0:
+    if len(filtered_setor) == 0:
         st.warning("Nenhum dado encontrado com os filtros selecionados. Ajuste os filtros acima.")
         st.stop()
     
-    total_respondentes = filtered_panorama.groupby('subescala')['qtd'].sum().iloc[0] if len(filtered_panorama) > 0 else 0
-    total_subscalas = filtered_panorama['subescala'].nunique()
-    
-    panorama_pivot = filtered_panorama.pivot_table(
-        index='subescala', columns='classe_risco', values='qtd', fill_value=0
-    )
-    panorama_pivot['total'] = panorama_pivot.sum(axis=1)
-    
-    if 'alto' in panorama_pivot.columns:
-        panorama_pivot['alto_perc'] = (panorama_pivot['alto'] / panorama_pivot['total'] * 100).round(1)
-        fatores_criticos = len(panorama_pivot[panorama_pivot['alto_perc'] >= 50])
-    else:
-        panorama_pivot['alto_perc'] = 0
-        fatores_criticos = 0
-    
-    total_baixo = panorama_pivot['baixo'].sum() if 'baixo' in panorama_pivot.columns else 0
-    total_medio = panorama_pivot['medio'].sum() if 'medio' in panorama_pivot.columns else 0
-    total_alto = panorama_pivot['alto'].sum() if 'alto' in panorama_pivot.columns else 0
-    total_geral = total_baixo + total_medio + total_alto
-    
-    perc_baixo = (total_baixo / total_geral * 100) if total_geral > 0 else 0
-    perc_medio = (total_medio / total_geral * 100) if total_geral > 0 else 0
-    perc_alto = (total_alto / total_geral * 100) if total_geral > 0 else 0
+    setores_unicos = visao_setor['kpis']['membros']
+    setor_critico = visao_setor['kpis']['critico']
+    media_org = visao_setor['kpis']['media_geral']
+    diferenca_max = visao_setor['kpis']['diferenca_max']
+    desvio_padrao = visao_setor['kpis']['desvio_padrao']
     
-    kpi_cols = st.columns(4)
+    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
     
-    with kpi_cols[0]:
+    with kpi1:
         st.markdown(f"""
             <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
@@ -704,18 +7336,18 @@ if pagina == "Panorama Geral":
                         flex-direction: column;
                         justify-content: center;'>
                 <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Fatores Avaliados
+                    Setores Mapeados
                 </div>
                 <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
-                    {total_subscalas}
+                    {setores_unicos}
                 </div>
                 <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Dimensões COPSOQ
+                    Áreas organizacionais
                 </div>
             </div>
         """, unsafe_allow_html=True)
     
-    with kpi_cols[1]:
+    with kpi2:
         st.markdown(f"""
             <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
@@ -728,18 +7360,18 @@ if pagina == "Panorama Geral":
                         flex-direction: column;
                         justify-content: center;'>
                 <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Alto Risco
+                    Setor Mais Crítico
                 </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1; margin-bottom: 0.4rem;'>
-                    {fatores_criticos}
+                <div style='font-size: clamp(1.1rem, 2.5vw, 1.4rem); font-weight: 800; color: #dc2626; line-height: 1.2; margin-bottom: 0.4rem; min-height: 3.5rem; display: flex; align-items: center; justify-content: center; padding: 0 0.5rem;'>
+                    {setor_critico}
                 </div>
                 <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Fatores críticos (&gt;50%)
+                    Score: {visao_setor['kpis']['media_critico']:.2f}
                 </div>
             </div>
         """, unsafe_allow_html=True)
     
-    with kpi_cols[2]:
+    with kpi3:
         st.markdown(f"""
             <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
@@ -752,38 +7384,37 @@ if pagina == "Panorama Geral":
                         flex-direction: column;
                         justify-content: center;'>
                 <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Participação
+                    Média Organizacional
                 </div>
                 <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #b89656; line-height: 1; margin-bottom: 0.4rem;'>
-                    {total_respondentes}
+                    {media_org:.2f}
                 </div>
                 <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Colaboradores respondentes
+                    Baseline geral
                 </div>
             </div>
         """, unsafe_allow_html=True)
     
-    with kpi_cols[3]:
-        taxa = int((total_respondentes / 215) * 100) if total_respondentes > 0 else 0
+    with kpi4:
         st.markdown(f"""
-            <div style='background: linear-gradient(135deg, rgba(209, 250, 229, 0.95) 0%, rgba(187, 247, 208, 0.8) 100%);
+            <div style='background: linear-gradient(135deg, rgba(254, 243, 199, 0.95) 0%, rgba(253, 224, 171, 0.8) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
                         border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(16, 185, 129, 0.3);
-                        box-shadow: 0 3px 12px rgba(16, 185, 129, 0.12);
+                        border: 2px solid rgba(245, 158, 11, 0.3);
+                        box-shadow: 0 3px 12px rgba(245, 158, 11, 0.12);
                         text-align: center;
                         min-height: 120px;
                         display: flex;
                         flex-direction: column;
                         justify-content: center;'>
-                <div style='color: #065f46; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Taxa de Adesão
+                <div style='color: #92400e; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Dispersão
                 </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #10b981; line-height: 1; margin-bottom: 0.4rem;'>
-                    {taxa}%
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #f59e0b; line-height: 1; margin-bottom: 0.4rem;'>
+                    {desvio_padrao:.2f}
                 </div>
-                <div style='color: #065f46; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    +12pp acima da meta
+                <div style='color: #92400e; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Desvio padrão
                 </div>
             </div>
         """, unsafe_allow_html=True)
@@ -798,7 +7429,7 @@ if pagina == "Panorama Geral":
                     margin-bottom: 2rem;
                     box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
             <h3 style='margin: 0 0 1.5rem 0; color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
-                Entendendo o Cenário
+                Entendendo o Risco Territorial
             </h3>
             <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: clamp(1rem, 3vw, 2rem);'>
                 <div>
@@ -806,7 +7437,7 @@ if pagina == "Panorama Geral":
                         Problema Resolvido
                     </div>
                     <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                        Percepções fragmentadas transformadas em <strong>diagnóstico estruturado e mensurável</strong>
+                        Elimina dúvida sobre <strong>onde agir primeiro</strong>. Mapeia geograficamente os pontos críticos da organização
                     </div>
                 </div>
                 <div>
@@ -814,7 +7445,7 @@ if pagina == "Panorama Geral":
                         Pergunta Respondida
                     </div>
                     <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6; font-style: italic;'>
-                        "Qual o real estado psicossocial da organização hoje?"
+                        "Em quais áreas da empresa esses riscos aparecem com mais força?"
                     </div>
                 </div>
                 <div>
@@ -822,202 +7453,252 @@ if pagina == "Panorama Geral":
                         Valor Estratégico
                     </div>
                     <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                        Base objetiva para <strong>identificação e caracterização</strong> conforme NR-01
+                        Risco é <strong>contextual</strong> - ligado a processos, fluxos e gestão local. Base para ações territoriais
                     </div>
                 </div>
             </div>
         </div>
     """, unsafe_allow_html=True)
     
+    eventos_setor = {}
+
+    # ===== HEATMAP 1: PROBLEMAS (ESCALAS NEGATIVAS) =====
     st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+        <div style='background: linear-gradient(135deg, rgba(220, 38, 38, 0.08) 0%, rgba(185, 28, 28, 0.05) 100%);
                     padding: clamp(1.5rem, 3vw, 2rem);
                     border-radius: clamp(12px, 2vw, 16px);
-                    border: 2px solid rgba(196, 166, 114, 0.2);
-                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    border: 2px solid rgba(220, 38, 38, 0.2);
+                    border-left: 4px solid #dc2626;
+                    box-shadow: 0 4px 16px rgba(220, 38, 38, 0.08);
                     margin-bottom: 2rem;'>
-            <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 1.5rem; flex-wrap: wrap; gap: 1rem;'>
-                <div style='flex: 1; min-width: 250px;'>
-                    <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
-                        Semáforo de Risco por Fator Psicossocial
+            <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1.5rem;'>
+                <div style='width: 48px; height: 48px;
+                            background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
+                            border-radius: 10px;
+                            display: flex; align-items: center; justify-content: center;
+                            box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);'>
+                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                        <path d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-3L13.732 4c-.77-1.333-2.694-1.333-3.464 0L3.34 16c-.77 1.333.192 3 1.732 3z"/>
+                    </svg>
+                </div>
+                <div>
+                    <h3 style='margin: 0; color: #991b1b; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                        Mapa de Problemas por Setor
                     </h3>
-                    <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
-                        Distribuição percentual de colaboradores por nível de risco em cada dimensão
+                    <p style='margin: 0.3rem 0 0 0; color: #7f1d1d; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                        Quanto mais vermelho, maior o problema - Identifica onde os riscos são mais graves por área
                     </p>
                 </div>
-                <div style='display: flex; gap: clamp(0.8rem, 2vw, 1.5rem); font-size: clamp(0.75rem, 1.8vw, 0.85rem); flex-wrap: wrap;'>
-                    <div style='display: flex; align-items: center; gap: 0.5rem;'>
-                        <div style='width: 14px; height: 14px; background: #10b981; border-radius: 3px;'></div>
-                        <span style='color: #6b5847; font-weight: 600;'>Baixo Risco</span>
-                    </div>
-                    <div style='display: flex; align-items: center; gap: 0.5rem;'>
-                        <div style='width: 14px; height: 14px; background: #f59e0b; border-radius: 3px;'></div>
-                        <span style='color: #6b5847; font-weight: 600;'>Médio Risco</span>
-                    </div>
-                    <div style='display: flex; align-items: center; gap: 0.5rem;'>
-                        <div style='width: 14px; height: 14px; background: #dc2626; border-radius: 3px;'></div>
-                        <span style='color: #6b5847; font-weight: 600;'>Alto Risco</span>
-                    </div>
-                </div>
             </div>
     """, unsafe_allow_html=True)
     
-    for col in ['baixo', 'medio', 'alto']:
-        if col in panorama_pivot.columns:
-            panorama_pivot[f'{col}_perc'] = (panorama_pivot[col] / panorama_pivot['total'] * 100).round(1)
-    
-    if selected_ordenacao == 'Maior Risco':
-        panorama_pivot = panorama_pivot.sort_values('alto_perc', ascending=True)
-    elif selected_ordenacao == 'Menor Risco':
-        panorama_pivot = panorama_pivot.sort_values('alto_perc', ascending=False)
-    elif selected_ordenacao == 'Alfabética A-Z':
-        panorama_pivot = panorama_pivot.sort_index(ascending=True)
-    elif selected_ordenacao == 'Alfabética Z-A':
-        panorama_pivot = panorama_pivot.sort_index(ascending=False)
-    
-    num_items = len(panorama_pivot)
-    chart_height = calculate_responsive_height(num_items, min_height=400, item_height=40)
-    layout_config = create_responsive_layout_config()
+    mapas_setor = visao_compartilhada(
+        chave_visao, 'setor_mapas', lambda: preparar_mapas_grupos(visao_setor, snapshot_dados['normas'], seriar_setor)
+    )
 
-    fig1 = go.Figure()
+    # Filtrar apenas escalas NEGATIVAS
+    setor_pivot_neg, ic_neg_custom = mapas_setor[False]
+    
+    if len(setor_pivot_neg) > 0:
+        rasterizar_neg = setor_pivot_neg.size > LIMITE_CELULAS_HEATMAP
+        fig_heatmap_neg, tamanho_fig_heatmap_neg = figura_compartilhada(
+            chave_visao, 'fig_heatmap_neg',
+            lambda: figura_mapa_grupos(setor_pivot_neg, ic_neg_custom, False, show_values_setor, show_ic_setor, snapshot_dados['normas'])
+        )
+        eventos_setor['setor_selecao_neg'] = exibir_figura(fig_heatmap_neg, 'fig_heatmap_neg', selecao=None if rasterizar_neg else 'setor_selecao_neg', tamanho=tamanho_fig_heatmap_neg)
+        if rasterizar_neg:
+            exibir_consulta_celula(setor_pivot_neg, ic_neg_custom, 'Setor', 'setor_consulta_neg')
+    else:
+        st.info("Nenhuma escala negativa (problemas) selecionada nos filtros.")
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    # ===== HEATMAP 2: PROTEÇÕES (ESCALAS POSITIVAS) =====
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(16, 185, 129, 0.08) 0%, rgba(5, 150, 105, 0.05) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(16, 185, 129, 0.2);
+                    border-left: 4px solid #10b981;
+                    box-shadow: 0 4px 16px rgba(16, 185, 129, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1.5rem;'>
+                <div style='width: 48px; height: 48px;
+                            background: linear-gradient(135deg, #10b981 0%, #059669 100%);
+                            border-radius: 10px;
+                            display: flex; align-items: center; justify-content: center;
+                            box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
+                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                        <path d="M9 12l2 2 4-4m5.618-4.016A11.955 11.955 0 0112 2.944a11.955 11.955 0 01-8.618 3.04A12.02 12.02 0 003 9c0 5.591 3.824 10.29 9 11.622 5.176-1.332 9-6.03 9-11.622 0-1.042-.133-2.052-.382-3.016z"/>
+                    </svg>
+                </div>
+                <div>
+                    <h3 style='margin: 0; color: #065f46; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                        Mapa de Proteções por Setor
+                    </h3>
+                    <p style='margin: 0.3rem 0 0 0; color: #064e3b; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                        Quanto mais verde, maior a proteção - Identifica onde há mais fatores protetivos por área
+                    </p>
+                </div>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    # Filtrar apenas escalas POSITIVAS
+    setor_pivot_pos, ic_pos_custom = mapas_setor[True]
+    
+    if len(setor_pivot_pos) > 0:
+        rasterizar_pos = setor_pivot_pos.size > LIMITE_CELULAS_HEATMAP
+        fig_heatmap_pos, tamanho_fig_heatmap_pos = figura_compartilhada(
+            chave_visao, 'fig_heatmap_pos',
+            lambda: figura_mapa_grupos(setor_pivot_pos, ic_pos_custom, True, show_values_setor, show_ic_setor, snapshot_dados['normas'])
+        )
+        eventos_setor['setor_selecao_pos'] = exibir_figura(fig_heatmap_pos, 'fig_heatmap_pos', selecao=None if rasterizar_pos else 'setor_selecao_pos', tamanho=tamanho_fig_heatmap_pos)
+        if rasterizar_pos:
+            exibir_consulta_celula(setor_pivot_pos, ic_pos_custom, 'Setor', 'setor_consulta_pos')
+    else:
+        st.info("Nenhuma escala positiva (proteções) selecionada nos filtros.")
+    
+    st.markdown("</div>", unsafe_allow_html=True)
 
-    if 'baixo_perc' in panorama_pivot.columns and not panorama_pivot['baixo_perc'].empty:
-        fig1.add_trace(go.Bar(
-            name='Baixo Risco',
-            y=panorama_pivot.index,
-            x=panorama_pivot['baixo_perc'],
-            orientation='h',
-            marker=dict(color='#10b981', line=dict(width=0)),
-            text=panorama_pivot['baixo_perc'].apply(lambda x: f'{x:.0f}%' if show_percentages and x >= 4 else ''),
-            textposition='inside',
-            textfont=dict(color='white', size=13, family='Arial', weight='bold'),
-            hovertemplate='<b>%{y}</b><br>Baixo Risco: %{x:.1f}%<extra></extra>'
-        ))
+    # ===== RANKING (CONTINUA IGUAL) =====
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Ranking de Setores por Score Médio
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Áreas ordenadas do menor ao maior risco - Priorização territorial de recursos
+                </p>
+            </div>
+    """, unsafe_allow_html=True)
 
-    if 'medio_perc' in panorama_pivot.columns and not panorama_pivot['medio_perc'].empty:
-        fig1.add_trace(go.Bar(
-            name='Médio Risco',
-            y=panorama_pivot.index,
-            x=panorama_pivot['medio_perc'],
-            orientation='h',
-            marker=dict(color='#f59e0b', line=dict(width=0)),
-            text=panorama_pivot['medio_perc'].apply(lambda x: f'{x:.0f}%' if show_percentages and x >= 4 else ''),
-            textposition='inside',
-            textfont=dict(color='white', size=13, family='Arial', weight='bold'),
-            hovertemplate='<b>%{y}</b><br>Médio Risco: %{x:.1f}%<extra></extra>'
-        ))
+    setor_ranking = visao_setor['ranking']
 
-    if 'alto_perc' in panorama_pivot.columns and not panorama_pivot['alto_perc'].empty:
-        fig1.add_trace(go.Bar(
-            name='Alto Risco',
-            y=panorama_pivot.index,
-            x=panorama_pivot['alto_perc'],
-            orientation='h',
-            marker=dict(color='#dc2626', line=dict(width=0)),
-            text=panorama_pivot['alto_perc'].apply(lambda x: f'{x:.0f}%' if show_percentages and x >= 4 else ''),
-            textposition='inside',
-            textfont=dict(color='white', size=13, family='Arial', weight='bold'),
-            hovertemplate='<b>%{y}</b><br>Alto Risco: %{x:.1f}%<extra></extra>'
-        ))
+    # Clique numa célula dos mapas: o ranking passa a ser o da subescala clicada
+    selecao_setor = ponto_selecionado(eventos_setor)
+    if selecao_setor is not None:
+        setor_selecionado, subescala_selecao_setor = selecao_setor[1]['y'], selecao_setor[1]['x']
+        setor_ranking = visao_compartilhada(
+            chave_visao + '&' + urlencode({'selecao': subescala_selecao_setor}), 'setor_selecao',
+            lambda: ranking_da_subescala(visao_setor, 'setor', subescala_selecao_setor, selected_ordenacao_setor)
+        )
+        exibir_resumo_subescala(
+            subescala_selecao_setor, 'setor_abrir_detalhe',
+            f"ranking abaixo restrito a esta dimensão, com {setor_selecionado} em destaque"
+        )
 
-    fig1.update_layout(
-        **layout_config,
-        barmode='stack',
-        height=chart_height,
-        showlegend=False,
-        xaxis=dict(
-            range=[0, 100],
-            gridcolor='rgba(196, 166, 114, 0.2)',
-            showline=False,
-            ticksuffix='%',
-            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
-        ),
-        yaxis=dict(
-            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
-            showline=False
+    if selecao_setor is None:
+        fig5, tamanho_fig5 = figura_compartilhada(
+            chave_visao, 'fig5', lambda: figura_ranking_grupos(setor_ranking, 'setor', 'Colaboradores', show_values_setor, show_ic_setor)
         )
-    )
+    else:
+        fig5, tamanho_fig5 = figura_ranking_grupos(setor_ranking, 'setor', 'Colaboradores', show_values_setor, show_ic_setor, destaque=setor_selecionado), None
+    exibir_figura(fig5, 'fig5', tamanho=tamanho_fig5)
+    st.markdown("</div>", unsafe_allow_html=True)
 
-    st.plotly_chart(fig1, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
+    # ===== HIERARQUIA DE SETORES =====
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Hierarquia de Setores
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Da diretoria à equipe - Scores ponderados pelo número de colaboradores em cada nível
+                </p>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    arvore_setores = visao_compartilhada(chave_visao, 'setor_arvore', lambda: construir_arvore_setores(setor_data))
+    
+    nos_com_filhos = [no for no, filhos in arvore_setores['filhos'].items() if len(filhos) > 0]
+    no_expandido = st.selectbox(
+        "Expandir a partir de",
+        options=nos_com_filhos,
+        format_func=lambda no: '· ' * arvore_setores['niveis'][no] + arvore_setores['rotulos'][no],
+        help="Escolha o nível da hierarquia para ver as unidades abaixo dele",
+        key='setor_arvore_no'
+    )
+    
+    fig_arvore, tamanho_fig_arvore = figura_compartilhada(
+        chave_visao + '&' + urlencode({'no': no_expandido}), 'fig_arvore',
+        lambda: figura_arvore_setores(arvore_setores, selected_subescalas_setor, no_expandido, show_values_setor)
+    )
+    exibir_figura(fig_arvore, 'fig_arvore', tamanho=tamanho_fig_arvore)
+    
+    fig_treemap, tamanho_fig_treemap = figura_compartilhada(
+        chave_visao, 'fig_treemap', lambda: figura_treemap_setores(arvore_setores, selected_subescalas_setor)
+    )
+    exibir_figura(fig_treemap, 'fig_treemap', tamanho=tamanho_fig_treemap)
     st.markdown("</div>", unsafe_allow_html=True)
     
-    col_alert, col_dist = st.columns([2, 1])
+    st.markdown("""
+        <div style='margin: 2rem 0 1rem 0;'>
+            <h3 style='color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
+                Setores Prioritários para Intervenção
+            </h3>
+            <p style='color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem); margin: 0.4rem 0 0 0;'>
+                Áreas que demandam atenção estratégica imediata
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+    cartoes_setores = visao_compartilhada(chave_visao, 'setor_cartoes', lambda: cartoes_setores_prioritarios(visao_setor['destaques']))
+    cols = st.columns(min(3, len(cartoes_setores)))
+    
+    for col, cartao in zip(cols, cartoes_setores):
+        with col:
+            st.markdown(cartao, unsafe_allow_html=True)
     
-    with col_alert:
-        if len(panorama_pivot) > 0 and 'alto_perc' in panorama_pivot.columns:
-            maior_risco = panorama_pivot['alto_perc'].idxmax()
-            valor_maior = panorama_pivot['alto_perc'].max()
-            
-            st.markdown(f"""
-                <div style='background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
-                            padding: clamp(1rem, 3vw, 1.5rem) clamp(1.5rem, 4vw, 2rem);
-                            border-radius: clamp(10px, 2vw, 14px);
-                            box-shadow: 0 6px 20px rgba(220, 38, 38, 0.25);
-                            height: 100%;
-                            display: flex;
-                            align-items: center;'>
-                    <div style='display: flex; align-items: center; gap: clamp(1rem, 2vw, 1.5rem); width: 100%; flex-wrap: wrap;'>
-                        <div style='min-width: 50px; height: 50px;
-                                    background: rgba(255, 255, 255, 0.15);
-                                    border-radius: 10px;
-                                    display: flex; align-items: center; justify-content: center;'>
-                            <svg width="28" height="28" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                                <path d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-3L13.732 4c-.77-1.333-2.694-1.333-3.464 0L3.34 16c-.77 1.333.192 3 1.732 3z"/>
-                            </svg>
-                        </div>
-                        <div style='flex: 1; min-width: 200px;'>
-                            <div style='color: rgba(255, 255, 255, 0.85); font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.4rem;'>
-                                Fator Mais Crítico
-                            </div>
-                            <div style='color: white; font-size: clamp(1rem, 2.5vw, 1.15rem); font-weight: 700; line-height: 1.4;'>
-                                <strong>{maior_risco}</strong> com <span style='font-size: clamp(1.3rem, 3vw, 1.5rem); font-weight: 800;'>{valor_maior:.1f}%</span> em alto risco
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
+    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
     
-    with col_dist:
-        st.markdown(f"""
-            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
-                        border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(196, 166, 114, 0.2);
-                        height: 100%;'>
-                <h4 style='margin: 0 0 1.2rem 0; color: #5a4a3a; font-size: clamp(0.9rem, 2vw, 1rem); font-weight: 700;'>
-                    Distribuição Geral
-                </h4>
-                <div style='margin-bottom: 1rem;'>
-                    <div style='display: flex; justify-content: space-between; margin-bottom: 0.4rem;'>
-                        <span style='color: #10b981; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Baixo</span>
-                        <span style='color: #5a4a3a; font-weight: 800; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>{perc_baixo:.1f}%</span>
-                    </div>
-                    <div style='background: #e8dcc8; height: 10px; border-radius: 5px; overflow: hidden;'>
-                        <div style='background: #10b981; height: 100%; width: {perc_baixo}%; transition: width 0.3s;'></div>
-                    </div>
-                </div>
-                <div style='margin-bottom: 1rem;'>
-                    <div style='display: flex; justify-content: space-between; margin-bottom: 0.4rem;'>
-                        <span style='color: #f59e0b; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Médio</span>
-                        <span style='color: #5a4a3a; font-weight: 800; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>{perc_medio:.1f}%</span>
-                    </div>
-                    <div style='background: #e8dcc8; height: 10px; border-radius: 5px; overflow: hidden;'>
-                        <div style='background: #f59e0b; height: 100%; width: {perc_medio}%; transition: width 0.3s;'></div>
-                    </div>
+    st.markdown(f"""
+        <div style='background: linear-gradient(135deg, rgba(16, 185, 129, 0.1) 0%, rgba(5, 150, 105, 0.05) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(10px, 2vw, 14px);
+                    border-left: 4px solid #10b981;
+                    margin-bottom: 2rem;
+                    box-shadow: 0 4px 16px rgba(16, 185, 129, 0.08);'>
+            <div style='display: flex; align-items: flex-start; gap: clamp(0.8rem, 2vw, 1.2rem); flex-wrap: wrap;'>
+                <div style='min-width: 48px; height: 48px;
+                            background: linear-gradient(135deg, #10b981 0%, #059669 100%);
+                            border-radius: 10px;
+                            display: flex; align-items: center; justify-content: center;
+                            box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
+                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
+                        <path d="M9 12l2 2 4-4m6 2a9 9 0 11-18 0 9 9 0 0118 0z"/>
+                    </svg>
                 </div>
-                <div>
-                    <div style='display: flex; justify-content: space-between; margin-bottom: 0.4rem;'>
-                        <span style='color: #dc2626; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Alto</span>
-                        <span style='color: #5a4a3a; font-weight: 800; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>{perc_alto:.1f}%</span>
-                    </div>
-                    <div style='background: #e8dcc8; height: 10px; border-radius: 5px; overflow: hidden;'>
-                        <div style='background: #dc2626; height: 100%; width: {perc_alto}%; transition: width 0.3s;'></div>
+                <div style='flex: 1; min-width: 250px;'>
+                    <h4 style='margin: 0 0 0.8rem 0; color: #065f46; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
+                        Recomendação Estratégica
+                    </h4>
+                    <div style='color: #064e3b; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.7;'>
+                        Iniciar intervenções pelos <strong>3 setores prioritários</strong> identificados. A diferença de 
+                        {diferenca_max:.2f} pontos entre o setor mais crítico e a média organizacional indica 
+                        <strong>variação contextual significativa</strong>.
+                        <br><br>
+                        <strong>Próximas ações:</strong>
+                        <ul style='margin: 0.5rem 0 0 0; padding-left: 1.5rem;'>
+                            <li>Diagnóstico aprofundado dos setores críticos</li>
+                            <li>Investigar causas raiz: sobrecarga, recursos, conflitos de gestão, ambiente físico</li>
+                            <li>Desenvolver plano de ação <strong>contextualizado</strong> para cada realidade setorial</li>
+                        </ul>
                     </div>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
     
     col_prox1, col_prox2 = st.columns(2)
     
@@ -1044,7 +7725,7 @@ if pagina == "Panorama Geral":
                     </h4>
                 </div>
                 <p style='margin: 0; color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                    Acesse <strong>Priorização de Riscos</strong> para definir cronograma estratégico de intervenções
+                    Acesse <strong>Matriz de Risco</strong> para visualizar probabilidade × severidade
                 </p>
             </div>
         """, unsafe_allow_html=True)
@@ -1072,12 +7753,15 @@ if pagina == "Panorama Geral":
                     </h4>
                 </div>
                 <p style='margin: 0; color: #064e3b; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                    Atende requisitos de <strong>identificação</strong> e <strong>caracterização</strong> de riscos
+                    Atende análise de <strong>ambiente</strong> e <strong>organização do trabalho</strong>
                 </p>
             </div>
         """, unsafe_allow_html=True)
 
-elif pagina == "Priorização de Riscos":
+
+####### COMPARAÇÕES ENTRE GRUPOS ########
+elif pagina == "Comparações entre Grupos":
+    semear_filtros(pagina)
     st.markdown("""
         <style>
         .main .block-container {
@@ -1161,10 +7845,10 @@ elif pagina == "Priorização de Riscos":
             <div style='display: flex; align-items: center; justify-content: space-between; flex-wrap: wrap; gap: 1rem;'>
                 <div style='flex: 1; min-width: 200px;'>
                     <h1 style='margin: 0; color: #5a4a3a; font-size: clamp(1.5rem, 4vw, 2.2rem); font-weight: 800; letter-spacing: -0.5px;'>
-                        Priorização de Riscos
+                        Comparações entre Grupos
                     </h1>
                     <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.85rem, 2vw, 1rem);'>
-                        Hierarquização estratégica para tomada de decisão
+                        Diferenças estatisticamente significativas entre setores e entre cargos
                     </p>
                 </div>
                 <div style='background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
@@ -1187,104 +7871,118 @@ elif pagina == "Priorização de Riscos":
         filter_cols = st.columns([1, 1, 1, 1])
         
         with filter_cols[0]:
-            unique_subescalas_rank = sorted(ranking_data['subescala'].unique().tolist())
-            selected_subescalas_rank = st.multiselect(
-                "Fatores Psicossociais",
-                options=unique_subescalas_rank,
-                default=unique_subescalas_rank,
-                help="Selecione os fatores que deseja analisar",
-                key='rank_subescalas'
+            dimensao_comp = st.selectbox(
+                "Comparar",
+                options=['setor', 'cargo'],
+                format_func=lambda x: {'setor': 'Setores', 'cargo': 'Cargos'}[x],
+                help="Escolha entre comparar setores ou cargos",
+                key='comp_dimensao'
             )
         
+        dados_comp = setor_data if dimensao_comp == 'setor' else cargo_data
+        
         with filter_cols[1]:
-            min_perc = float(ranking_data['perc_alto'].min() * 100)
-            max_perc = float(ranking_data['perc_alto'].max() * 100)
-            selected_perc_range = st.slider(
-                "Percentual Alto Risco",
-                min_value=0.0,
-                max_value=100.0,
-                value=(min_perc, max_perc),
-                step=5.0,
-                help="Filtre pelo percentual de alto risco"
+            unique_subescalas_comp = ordenar_subescalas(dados_comp['subescala'], registro_subescalas)
+            subescala_comp = st.selectbox(
+                "Dimensão Psicossocial",
+                options=unique_subescalas_comp,
+                help="Dimensão exibida na matriz de diferenças",
+                key='comp_subescala'
             )
         
         with filter_cols[2]:
-            ordenacao_rank_options = ['Maior Risco', 'Menor Risco', 'Alfabética A-Z', 'Alfabética Z-A']
-            selected_ordenacao_rank = st.selectbox(
-                "Ordenação",
-                options=ordenacao_rank_options,
-                help="Escolha como ordenar os dados",
-                key='rank_ordenacao'
+            correcao_labels = {
+                'fdr_bh': 'Benjamini-Hochberg (FDR)',
+                'holm': 'Holm',
+                'bonferroni': 'Bonferroni'
+            }
+            correcao_comp = st.selectbox(
+                "Correção Múltipla",
+                options=list(correcao_labels.keys()),
+                format_func=lambda x: correcao_labels[x],
+                help="Correção aplicada ao conjunto de pares de cada dimensão",
+                key='comp_correcao'
             )
         
         with filter_cols[3]:
-            show_percentages_rank = st.checkbox("Exibir Percentuais", value=True, help="Mostrar percentuais nos gráficos", key='rank_show_perc')
+            alpha_comp = st.select_slider(
+                "Nível de Significância",
+                options=[0.01, 0.05, 0.10],
+                help="Pares com p ajustado abaixo deste valor são destacados",
+                key='comp_alpha'
+            )
     
-    filtered_ranking = ranking_data[
-        (ranking_data['subescala'].isin(selected_subescalas_rank)) &
-        (ranking_data['perc_alto'] * 100 >= selected_perc_range[0]) &
-        (ranking_data['perc_alto'] * 100 <= selected_perc_range[1])
-    ]
+    sincronizar_filtros_url(pagina)
     
-    if len(filtered_ranking) == 0:
-        st.warning("Nenhum dado encontrado com os filtros selecionados. Ajuste os filtros acima.")
+    registrar_acesso('comparacoes', dimensao_comp, correcao_comp)
+    comparacoes = calcular_comparacoes_pareadas(dados_comp, dimensao_comp, correcao_comp)
+    membros_comp = comparacoes['membros']
+    
+    if len(membros_comp) < 2:
+        st.warning("São necessários ao menos dois grupos para comparação.")
         st.stop()
     
-    criticos = len(filtered_ranking[filtered_ranking['perc_alto'] >= 0.7])
-    altos = len(filtered_ranking[(filtered_ranking['perc_alto'] >= 0.5) & (filtered_ranking['perc_alto'] < 0.7)])
-    monitoramento = len(filtered_ranking[filtered_ranking['perc_alto'] < 0.5])
+    idx_subescala = comparacoes['subescalas'].index(subescala_comp)
+    dif_subescala = comparacoes['diferenca'][:, :, idx_subescala]
+    p_subescala = comparacoes['p_ajustado'][:, :, idx_subescala]
+    significativo = p_subescala < alpha_comp
     
-    kpi_cols = st.columns(3)
+    n_pares = len(membros_comp) * (len(membros_comp) - 1) // 2
+    n_testes = n_pares * len(comparacoes['subescalas'])
+    pares_sig = int(np.triu(significativo, k=1).sum())
+    contagem_sig = (comparacoes['p_ajustado'] < alpha_comp).sum(axis=2)
+    
+    kpi1, kpi2, kpi3 = st.columns(3)
     
-    with kpi_cols[0]:
+    with kpi1:
         st.markdown(f"""
-            <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
                         border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(220, 38, 38, 0.3);
-                        box-shadow: 0 3px 12px rgba(220, 38, 38, 0.12);
+                        border: 2px solid rgba(196, 166, 114, 0.25);
+                        box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
                         text-align: center;
                         min-height: 120px;
                         display: flex;
                         flex-direction: column;
                         justify-content: center;'>
-                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Críticos
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Pares Comparados
                 </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1; margin-bottom: 0.4rem;'>
-                    {criticos}
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                    {n_pares}
                 </div>
-                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    ≥70% | Ação imediata
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    {n_testes} testes no total
                 </div>
             </div>
         """, unsafe_allow_html=True)
     
-    with kpi_cols[1]:
+    with kpi2:
         st.markdown(f"""
-            <div style='background: linear-gradient(135deg, rgba(254, 243, 199, 0.95) 0%, rgba(253, 224, 171, 0.8) 100%);
+            <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
                         border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(245, 158, 11, 0.3);
-                        box-shadow: 0 3px 12px rgba(245, 158, 11, 0.12);
+                        border: 2px solid rgba(220, 38, 38, 0.3);
+                        box-shadow: 0 3px 12px rgba(220, 38, 38, 0.12);
                         text-align: center;
                         min-height: 120px;
                         display: flex;
                         flex-direction: column;
                         justify-content: center;'>
-                <div style='color: #92400e; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Altos
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Diferenças Significativas
                 </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #f59e0b; line-height: 1; margin-bottom: 0.4rem;'>
-                    {altos}
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1; margin-bottom: 0.4rem;'>
+                    {pares_sig}
                 </div>
-                <div style='color: #92400e; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    50-70% | Curto prazo
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Pares em {subescala_comp}
                 </div>
             </div>
         """, unsafe_allow_html=True)
     
-    with kpi_cols[2]:
+    with kpi3:
         st.markdown(f"""
             <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
@@ -1297,313 +7995,160 @@ elif pagina == "Priorização de Riscos":
                         flex-direction: column;
                         justify-content: center;'>
                 <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Monitoramento
-                </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #b89656; line-height: 1; margin-bottom: 0.4rem;'>
-                    {monitoramento}
-                </div>
-                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    &lt;50% | Acompanhamento
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
-    
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.1) 0%, rgba(232, 220, 200, 0.06) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(12px, 2vw, 16px);
-                    border-left: 4px solid #c4a672;
-                    margin-bottom: 2rem;
-                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
-            <h3 style='margin: 0 0 1.5rem 0; color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
-                Entendendo a Priorização
-            </h3>
-            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: clamp(1rem, 3vw, 2rem);'>
-                <div>
-                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                        Problema Resolvido
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                        Elimina dispersão de recursos. Nem tudo pode ser tratado simultaneamente - <strong>foco estratégico</strong> é essencial
-                    </div>
-                </div>
-                <div>
-                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                        Pergunta Respondida
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6; font-style: italic;'>
-                        "Quais fatores exigem atenção primeiro e quais podem aguardar?"
-                    </div>
-                </div>
-                <div>
-                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                        Valor Estratégico
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                        Demonstra <strong>critério objetivo de hierarquização</strong>, atendendo à avaliação de riscos da NR-01
-                    </div>
-                </div>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(12px, 2vw, 16px);
-                    border: 2px solid rgba(196, 166, 114, 0.2);
-                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
-                    margin-bottom: 2rem;'>
-            <div style='margin-bottom: 1.5rem;'>
-                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
-                    Ranking de Criticidade
-                </h3>
-                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
-                    Do mais urgente ao menos urgente - Percentual de colaboradores em alto risco por fator
-                </p>
-            </div>
-    """, unsafe_allow_html=True)
-    
-    if selected_ordenacao_rank == 'Maior Risco':
-        ranking_sorted = filtered_ranking.sort_values('perc_alto', ascending=True)
-    elif selected_ordenacao_rank == 'Menor Risco':
-        ranking_sorted = filtered_ranking.sort_values('perc_alto', ascending=False)
-    elif selected_ordenacao_rank == 'Alfabética A-Z':
-        ranking_sorted = filtered_ranking.sort_values('subescala', ascending=True)
-    elif selected_ordenacao_rank == 'Alfabética Z-A':
-        ranking_sorted = filtered_ranking.sort_values('subescala', ascending=False)
-    
-    colors_rank = []
-    for perc in ranking_sorted['perc_alto']:
-        if perc >= 0.7:
-            colors_rank.append('#dc2626')
-        elif perc >= 0.5:
-            colors_rank.append('#f59e0b')
-        elif perc >= 0.3:
-            colors_rank.append('rgba(245, 158, 11, 0.6)')
-        else:
-            colors_rank.append('#10b981')
-    
-    num_items_rank = len(ranking_sorted)
-    chart_height_rank = calculate_responsive_height(num_items_rank, min_height=400, item_height=40)
-
-    fig2 = go.Figure(go.Bar(
-        x=ranking_sorted['perc_alto'] * 100,
-        y=ranking_sorted['subescala'],
-        orientation='h',
-        marker=dict(
-            color=colors_rank,
-            line=dict(color='rgba(0,0,0,0.05)', width=1)
-        ),
-        text=ranking_sorted['perc_alto'].apply(lambda x: f"{x*100:.1f}%" if show_percentages_rank else ""),
-        textposition='outside',
-        textfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
-        customdata=np.column_stack((ranking_sorted['media_score'], ranking_sorted['perc_alto']*100)),
-        hovertemplate='<b>%{y}</b><br>Alto Risco: %{customdata[1]:.1f}%<br>Score Médio: %{customdata[0]:.2f}<extra></extra>'
-    ))
-
-    layout_config = create_responsive_layout_config()
-    fig2.update_layout(
-        **layout_config,
-        height=chart_height_rank,
-        showlegend=False,
-        xaxis=dict(
-            range=[0, 100],
-            gridcolor='rgba(196, 166, 114, 0.2)',
-            showline=False,
-            ticksuffix='%',
-            title='Percentual em Alto Risco',
-            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold'),
-            title_font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
-        ),
-        yaxis=dict(
-            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
-            showline=False
-        )
-    )
-
-    st.plotly_chart(fig2, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
-    st.markdown("</div>", unsafe_allow_html=True)
-    
-    st.markdown("""
-        <div style='margin: 2rem 0 1rem 0;'>
-            <h3 style='color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
-                Top 3 Prioridades Imediatas
-            </h3>
-            <p style='color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem); margin: 0.4rem 0 0 0;'>
-                Fatores que exigem ação estratégica nos próximos 30-60 dias
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    top_3 = filtered_ranking.nlargest(3, 'perc_alto') if len(filtered_ranking) >= 3 else filtered_ranking
-    
-    cols = st.columns(min(3, len(top_3)))
-    for idx, (col, row) in enumerate(zip(cols, top_3.itertuples()), 1):
-        with col:
-            st.markdown(f"""
-                <div style='background: linear-gradient(135deg, rgba(220, 38, 38, 0.08) 0%, rgba(185, 28, 28, 0.05) 100%);
-                            padding: clamp(1.2rem, 3vw, 1.8rem);
-                            border-radius: clamp(10px, 2vw, 14px);
-                            border: 2px solid rgba(220, 38, 38, 0.2);
-                            border-left: 5px solid #dc2626;
-                            box-shadow: 0 4px 16px rgba(220, 38, 38, 0.1);'>
-                    <div style='display: flex; align-items: center; gap: 0.8rem; margin-bottom: 1rem;'>
-                        <div style='width: 40px; height: 40px;
-                                    background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
-                                    border-radius: 10px;
-                                    display: flex; align-items: center; justify-content: center;
-                                    color: white; font-weight: 800; font-size: 1.2rem;
-                                    box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);'>
-                            #{idx}
-                        </div>
-                        <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px;'>
-                            Prioridade
-                        </div>
-                    </div>
-                    <h3 style='margin: 0 0 1rem 0; color: #7f1d1d; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700; line-height: 1.3;'>
-                        {row.subescala}
-                    </h3>
-                    <div style='margin-bottom: 1rem;'>
-                        <div style='font-size: clamp(2rem, 4.5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1;'>
-                            {row.perc_alto*100:.1f}%
-                        </div>
-                        <div style='color: #991b1b; font-size: clamp(0.75rem, 1.8vw, 0.85rem); margin-top: 0.3rem;'>
-                            em alto risco
-                        </div>
-                    </div>
-                    <div style='background: rgba(220, 38, 38, 0.08);
-                                padding: 0.8rem;
-                                border-radius: 8px;
-                                border-left: 3px solid #dc2626;'>
-                        <div style='color: #7f1d1d; font-size: clamp(0.75rem, 1.8vw, 0.8rem); font-weight: 600;'>
-                            <svg width="14" height="14" fill="none" stroke="currentColor" stroke-width="2.5" viewBox="0 0 24 24" style='display: inline; margin-right: 0.5rem; vertical-align: middle;'>
-                                <path d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z"/>
-                            </svg>
-                            Ação: 30-60 dias
-                        </div>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-    
-    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
-    
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
-                    padding: clamp(1rem, 3vw, 1.5rem) clamp(1.5rem, 4vw, 2rem);
-                    border-radius: clamp(10px, 2vw, 14px);
-                    border: 2px solid rgba(196, 166, 114, 0.2);
-                    margin-bottom: 2rem;'>
-            <h4 style='margin: 0 0 1.2rem 0; color: #5a4a3a; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
-                Critérios de Classificação
-            </h4>
-            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: clamp(1rem, 2vw, 1.5rem);'>
-                <div>
-                    <div style='display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;'>
-                        <div style='width: 16px; height: 16px; background: #dc2626; border-radius: 4px;'></div>
-                        <span style='color: #991b1b; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Crítico</span>
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.75rem, 1.7vw, 0.85rem); line-height: 1.5;'>
-                        ≥70% | Curto prazo<br>
-                        <strong>30-60 dias</strong>
-                    </div>
-                </div>
-                <div>
-                    <div style='display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;'>
-                        <div style='width: 16px; height: 16px; background: #f59e0b; border-radius: 4px;'></div>
-                        <span style='color: #92400e; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Alto</span>
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.75rem, 1.7vw, 0.85rem); line-height: 1.5;'>
-                        50-70% | Médio prazo<br>
-                        <strong>3-6 meses</strong>
-                    </div>
-                </div>
-                <div>
-                    <div style='display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;'>
-                        <div style='width: 16px; height: 16px; background: #f59e0b; opacity: 0.6; border-radius: 4px;'></div>
-                        <span style='color: #92400e; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Moderado</span>
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.75rem, 1.7vw, 0.85rem); line-height: 1.5;'>
-                        30-50% | Longo prazo<br>
-                        <strong>6-12 meses</strong>
-                    </div>
+                    Pares com Alguma Diferença
                 </div>
-                <div>
-                    <div style='display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;'>
-                        <div style='width: 16px; height: 16px; background: #10b981; border-radius: 4px;'></div>
-                        <span style='color: #065f46; font-weight: 700; font-size: clamp(0.8rem, 1.8vw, 0.9rem);'>Baixo</span>
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.75rem, 1.7vw, 0.85rem); line-height: 1.5;'>
-                        &lt;30% | Contínuo<br>
-                        <strong>Monitoramento</strong>
-                    </div>
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                    {int(np.triu(contagem_sig > 0, k=1).sum())}
                 </div>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    col_prox1, col_prox2 = st.columns(2)
-    
-    with col_prox1:
-        st.markdown("""
-            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(219, 234, 254, 0.8) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
-                        border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(59, 130, 246, 0.25);
-                        border-left: 4px solid #3b82f6;
-                        box-shadow: 0 3px 12px rgba(59, 130, 246, 0.1);'>
-                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
-                    <div style='width: 42px; height: 42px;
-                                background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
-                                border-radius: 10px;
-                                display: flex; align-items: center; justify-content: center;
-                                box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);'>
-                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                            <path d="M9 5l7 7-7 7"/>
-                        </svg>
-                    </div>
-                    <h4 style='margin: 0; color: #1e40af; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
-                        Próximo Passo
-                    </h4>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Em ao menos uma dimensão
                 </div>
-                <p style='margin: 0; color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                    Explore <strong>Análise por Cargo</strong> para entender como os riscos se distribuem por função
-                </p>
             </div>
         """, unsafe_allow_html=True)
     
-    with col_prox2:
-        st.markdown("""
-            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(209, 250, 229, 0.8) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
-                        border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(16, 185, 129, 0.25);
-                        border-left: 4px solid #10b981;
-                        box-shadow: 0 3px 12px rgba(16, 185, 129, 0.1);'>
-                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
-                    <div style='width: 42px; height: 42px;
-                                background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-                                border-radius: 10px;
-                                display: flex; align-items: center; justify-content: center;
-                                box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
-                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                            <path d="M5 13l4 4L19 7"/>
-                        </svg>
-                    </div>
-                    <h4 style='margin: 0; color: #065f46; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
-                        Conformidade NR-01
-                    </h4>
-                </div>
-                <p style='margin: 0; color: #064e3b; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                    Atende requisitos de <strong>avaliação</strong> e <strong>hierarquização</strong> de riscos
+    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Matriz de Diferenças Significativas
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Diferença de score (linha − coluna) nos pares com diferença significativa após a correção - Células vazias não diferem
                 </p>
             </div>
-        """, unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
+    
+    mostrar_texto_comp = len(membros_comp) <= 30
+    dif_exibida = np.where(significativo, dif_subescala, np.nan)
+    limite_cor = float(np.nanmax(np.abs(dif_subescala))) if np.isfinite(dif_subescala).any() else 1.0
+    heatmap_height_comp = calculate_responsive_height(len(membros_comp), min_height=500, item_height=45)
+    
+    fig_comp = go.Figure(data=go.Heatmap(
+        z=dif_exibida,
+        x=membros_comp,
+        y=membros_comp,
+        zmid=0,
+        zmin=-limite_cor,
+        zmax=limite_cor,
+        colorscale='RdBu_r',
+        text=np.round(dif_exibida, 2) if mostrar_texto_comp else None,
+        texttemplate='%{text}' if mostrar_texto_comp else '',
+        textfont={"size": 12, "color": "#1e293b", "family": "Arial", "weight": "bold"},
+        customdata=np.dstack((dif_subescala, p_subescala)),
+        colorbar=dict(
+            title=dict(
+                text="Diferença<br>(linha − coluna)",
+                side='right',
+                font=dict(size=13, color='#5a4a3a', family='Arial', weight='bold')
+            ),
+            tickfont=dict(size=12, color='#6b5847', family='Arial', weight='bold')
+        ),
+        hovertemplate='<b>%{y}</b> vs <b>%{x}</b><br>Diferença: <b>%{customdata[0]:.2f}</b><br>p ajustado: %{customdata[1]:.4f}<extra></extra>'
+    ))
+    
+    layout_config = create_responsive_layout_config()
+    fig_comp.update_layout(
+        **layout_config,
+        height=heatmap_height_comp,
+        xaxis=dict(
+            title='',
+            tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
+            tickangle=-45
+        ),
+        yaxis=dict(
+            title='',
+            tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
+            autorange='reversed'
+        )
+    )
+    exibir_figura(fig_comp, 'fig_comp')
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Quantidade de Dimensões com Diferença por Par
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Em quantas das dimensões psicossociais cada par difere significativamente
+                </p>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    fig_contagem = go.Figure(data=go.Heatmap(
+        z=np.where(np.eye(len(membros_comp), dtype=bool), np.nan, contagem_sig),
+        x=membros_comp,
+        y=membros_comp,
+        colorscale=[[0, '#f8f2e6'], [1, '#b89656']],
+        zmin=0,
+        zmax=len(comparacoes['subescalas']),
+        text=contagem_sig if mostrar_texto_comp else None,
+        texttemplate='%{text}' if mostrar_texto_comp else '',
+        textfont={"size": 12, "color": "#1e293b", "family": "Arial", "weight": "bold"},
+        colorbar=dict(
+            title=dict(
+                text="Dimensões",
+                side='right',
+                font=dict(size=13, color='#5a4a3a', family='Arial', weight='bold')
+            ),
+            tickfont=dict(size=12, color='#6b5847', family='Arial', weight='bold')
+        ),
+        hovertemplate='<b>%{y}</b> vs <b>%{x}</b><br>Dimensões com diferença: <b>%{z}</b><extra></extra>'
+    ))
+    
+    layout_config = create_responsive_layout_config()
+    fig_contagem.update_layout(
+        **layout_config,
+        height=heatmap_height_comp,
+        xaxis=dict(
+            title='',
+            tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
+            tickangle=-45
+        ),
+        yaxis=dict(
+            title='',
+            tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
+            autorange='reversed'
+        )
+    )
+    exibir_figura(fig_contagem, 'fig_contagem')
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    st.markdown(f"""
+        <div style='background: linear-gradient(135deg, rgba(59, 130, 246, 0.1) 0%, rgba(37, 99, 235, 0.05) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(10px, 2vw, 14px);
+                    border-left: 4px solid #3b82f6;
+                    margin-bottom: 2rem;
+                    box-shadow: 0 4px 16px rgba(59, 130, 246, 0.08);'>
+            <h4 style='margin: 0 0 0.8rem 0; color: #1e40af; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
+                Como Ler
+            </h4>
+            <div style='color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.7;'>
+                Cada par é avaliado pelo <strong>teste t de Welch</strong> a partir da média, desvio e quantidade de respondentes, 
+                com correção <strong>{correcao_labels[correcao_comp]}</strong> sobre todos os pares da dimensão. 
+                Valores positivos indicam score maior na linha: <strong>pior</strong> nas dimensões de problema e 
+                <strong>melhor</strong> nas dimensões de proteção.
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
 
-####### ANALISE POR CARGO ########
-elif pagina == "Análise por Cargo":
+
+####### AGRUPAMENTO DE PERFIS ########
+elif pagina == "Agrupamento de Perfis":
     st.markdown("""
         <style>
         .main .block-container {
@@ -1687,10 +8232,10 @@ elif pagina == "Análise por Cargo":
             <div style='display: flex; align-items: center; justify-content: space-between; flex-wrap: wrap; gap: 1rem;'>
                 <div style='flex: 1; min-width: 200px;'>
                     <h1 style='margin: 0; color: #5a4a3a; font-size: clamp(1.5rem, 4vw, 2.2rem); font-weight: 800; letter-spacing: -0.5px;'>
-                        Análise por Cargo
+                        Agrupamento de Perfis
                     </h1>
                     <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.85rem, 2vw, 1rem);'>
-                        Risco associado à atividade profissional, não ao indivíduo
+                        Setores e cargos com perfis de risco semelhantes - Intervenções por grupo
                     </p>
                 </div>
                 <div style='background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
@@ -1710,66 +8255,47 @@ elif pagina == "Análise por Cargo":
     """, unsafe_allow_html=True)
     
     with st.expander("Filtros e Configurações", expanded=False):
-        filter_cols = st.columns([1, 1, 1, 1])
+        filter_cols = st.columns([1, 1])
         
         with filter_cols[0]:
-            unique_cargos = sorted(cargo_data['cargo'].unique().tolist())
-            selected_cargos = st.multiselect(
-                "Cargos",
-                options=unique_cargos,
-                default=unique_cargos,
-                help="Selecione os cargos que deseja analisar"
+            dimensao_agrup = st.selectbox(
+                "Agrupar",
+                options=['setor', 'cargo'],
+                format_func=lambda x: {'setor': 'Setores', 'cargo': 'Cargos'}[x],
+                help="Escolha entre agrupar setores ou cargos",
+                key='agrup_dimensao'
             )
         
-        with filter_cols[1]:
-            unique_subescalas_cargo = sorted(cargo_data['subescala'].unique().tolist())
-            selected_subescalas_cargo = st.multiselect(
-                "Dimensões Psicossociais",
-                options=unique_subescalas_cargo,
-                default=unique_subescalas_cargo,
-                help="Selecione as dimensões para análise",
-                key='cargo_subescalas'
-            )
+        dados_agrup = setor_data if dimensao_agrup == 'setor' else cargo_data
+        n_membros_agrup = dados_agrup[dimensao_agrup].nunique()
         
-        with filter_cols[2]:
-            ordenacao_cargo_options = ['Maior Risco', 'Menor Risco', 'Alfabética A-Z', 'Alfabética Z-A']
-            selected_ordenacao_cargo = st.selectbox(
-                "Ordenação",
-                options=ordenacao_cargo_options,
-                help="Escolha como ordenar os dados",
-                key='cargo_ordenacao'
-            )
+        st.session_state.setdefault('agrup_k', min(4, max(2, n_membros_agrup)))
+        # Valor vindo de link ou de outra dimensão pode passar do máximo desta
+        if st.session_state['agrup_k'] > max(2, min(8, n_membros_agrup)):
+            st.session_state['agrup_k'] = max(2, min(8, n_membros_agrup))
         
-        with filter_cols[3]:
-            show_values_cargo = st.checkbox("Exibir Valores", value=True, help="Mostrar valores nos gráficos", key='cargo_show_values')
+        with filter_cols[1]:
+            k_agrup = st.slider(
+                "Número de Grupos",
+                min_value=2,
+                max_value=max(2, min(8, n_membros_agrup)),
+                help="Quantidade de perfis de risco a identificar",
+                key='agrup_k'
+            )
     
-    filtered_cargo = cargo_data[
-        (cargo_data['cargo'].isin(selected_cargos)) &
-        (cargo_data['subescala'].isin(selected_subescalas_cargo))
-    ]
+    sincronizar_filtros_url(pagina)
     
-    if len(filtered_cargo) == 0:
-        st.warning("Nenhum dado encontrado com os filtros selecionados. Ajuste os filtros acima.")
+    if n_membros_agrup < 3:
+        st.warning("São necessários ao menos três membros para o agrupamento.")
         st.stop()
     
-    # ===== DEFINIR ESCALAS POSITIVAS E NEGATIVAS =====
-    escalas_positivas = {
-        "Qualidade da liderança",          
-        "Confiança horizontal",            
-        "Confiança vertical",              
-        "Justiça e respeito",              
-        "Autoeficácia",                    
-        "Significado do trabalho",         
-        "Compromisso",                     
-        "Satisfação"                       
-    }
-    
-    cargos_unicos = filtered_cargo['cargo'].nunique()
-    cargo_media = filtered_cargo.groupby('cargo')['media'].mean()
-    cargo_critico = cargo_media.idxmax()
-    cargo_critico_nome = cargo_critico.split('(')[0].strip()
-    media_geral = filtered_cargo['media'].mean()
-    diferenca_max = cargo_media.max() - media_geral
+    registrar_acesso('agrupamento', dimensao_agrup, k_agrup)
+    agrupamento = agrupar_perfis_risco(dados_agrup, dimensao_agrup, k_agrup)
+    membros_agrup = agrupamento['membros']
+    grupos_agrup = agrupamento['grupos']
+    tamanhos_agrup = agrupamento['tamanhos']
+    rotulos_grupos = [f"Grupo {g + 1} ({tamanhos_agrup[g]})" for g in range(len(tamanhos_agrup))]
+    cores_grupos = ['#dc2626', '#ea580c', '#f59e0b', '#c4a672', '#84cc16', '#10b981', '#0ea5e9', '#6366f1']
     
     kpi1, kpi2, kpi3 = st.columns(3)
     
@@ -1784,275 +8310,69 @@ elif pagina == "Análise por Cargo":
                         min-height: 120px;
                         display: flex;
                         flex-direction: column;
-                        justify-content: center;'>
-                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Cargos Mapeados
-                </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
-                    {cargos_unicos}
-                </div>
-                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Funções analisadas
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    with kpi2:
-        st.markdown(f"""
-            <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
-                        border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(220, 38, 38, 0.3);
-                        box-shadow: 0 3px 12px rgba(220, 38, 38, 0.12);
-                        text-align: center;
-                        min-height: 120px;
-                        display: flex;
-                        flex-direction: column;
-                        justify-content: center;'>
-                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Cargo Mais Crítico
-                </div>
-                <div style='font-size: clamp(1.1rem, 2.5vw, 1.4rem); font-weight: 800; color: #dc2626; line-height: 1.2; margin-bottom: 0.4rem; min-height: 3.5rem; display: flex; align-items: center; justify-content: center; padding: 0 0.5rem;'>
-                    {cargo_critico_nome}
-                </div>
-                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Score: {cargo_media.max():.2f}
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    with kpi3:
-        st.markdown(f"""
-            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
-                        border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(196, 166, 114, 0.25);
-                        box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
-                        text-align: center;
-                        min-height: 120px;
-                        display: flex;
-                        flex-direction: column;
-                        justify-content: center;'>
-                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Média Organizacional
-                </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #b89656; line-height: 1; margin-bottom: 0.4rem;'>
-                    {media_geral:.2f}
-                </div>
-                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Baseline geral
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
-    
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.1) 0%, rgba(232, 220, 200, 0.06) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(12px, 2vw, 16px);
-                    border-left: 4px solid #c4a672;
-                    margin-bottom: 2rem;
-                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
-            <h3 style='margin: 0 0 1.5rem 0; color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
-                Entendendo o Risco por Função
-            </h3>
-            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: clamp(1rem, 3vw, 2rem);'>
-                <div>
-                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                        Problema Resolvido
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                        Evita interpretação pessoal dos riscos. <strong>Desloca o foco da pessoa para a atividade</strong> profissional
-                    </div>
-                </div>
-                <div>
-                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                        Pergunta Respondida
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6; font-style: italic;'>
-                        "Alguns riscos estão associados ao tipo de função exercida?"
-                    </div>
-                </div>
-                <div>
-                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                        Valor Estratégico
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                        Protege contra personalização e <strong>direciona para mudanças organizacionais</strong>
-                    </div>
-                </div>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    # ===== HEATMAP 1: PROBLEMAS (ESCALAS NEGATIVAS) =====
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(220, 38, 38, 0.08) 0%, rgba(185, 28, 28, 0.05) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(12px, 2vw, 16px);
-                    border: 2px solid rgba(220, 38, 38, 0.2);
-                    border-left: 4px solid #dc2626;
-                    box-shadow: 0 4px 16px rgba(220, 38, 38, 0.08);
-                    margin-bottom: 2rem;'>
-            <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1.5rem;'>
-                <div style='width: 48px; height: 48px;
-                            background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
-                            border-radius: 10px;
-                            display: flex; align-items: center; justify-content: center;
-                            box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);'>
-                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                        <path d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-3L13.732 4c-.77-1.333-2.694-1.333-3.464 0L3.34 16c-.77 1.333.192 3 1.732 3z"/>
-                    </svg>
+                        justify-content: center;'>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Unidades Agrupadas
                 </div>
-                <div>
-                    <h3 style='margin: 0; color: #991b1b; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
-                        Mapa de Problemas por Cargo
-                    </h3>
-                    <p style='margin: 0.3rem 0 0 0; color: #7f1d1d; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
-                        Quanto mais vermelho, maior o problema - Identifica onde os riscos são mais graves
-                    </p>
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                    {len(membros_agrup)}
+                </div>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    {'Setores' if dimensao_agrup == 'setor' else 'Cargos'} com perfil completo
                 </div>
             </div>
-    """, unsafe_allow_html=True)
-    
-    # Filtrar apenas escalas NEGATIVAS
-    filtered_cargo_neg = filtered_cargo[~filtered_cargo['subescala'].isin(escalas_positivas)]
-    
-    if len(filtered_cargo_neg) > 0:
-        cargo_pivot_neg = filtered_cargo_neg.pivot_table(
-            index='cargo',
-            columns='subescala',
-            values='media',
-            aggfunc='mean'
-        )
-        
-        num_cargos_neg = len(cargo_pivot_neg)
-        heatmap_height_neg = calculate_responsive_height(num_cargos_neg, min_height=500, item_height=45)
-
-        fig3_neg = go.Figure(data=go.Heatmap(
-            z=cargo_pivot_neg.values,
-            x=cargo_pivot_neg.columns,
-            y=cargo_pivot_neg.index,
-            colorscale='RdYlGn_r',  # Vermelho = Alto = RUIM ✅
-            text=cargo_pivot_neg.values.round(2),
-            texttemplate='%{text}' if show_values_cargo else '',
-            textfont={"size": 12, "color": "#1e293b", "family": "Arial", "weight": "bold"},
-            colorbar=dict(
-                title=dict(
-                    text="Score<br>(Problema)",
-                    side='right',
-                    font=dict(size=13, color='#991b1b', family='Arial', weight='bold')
-                ),
-                tickfont=dict(size=12, color='#7f1d1d', family='Arial', weight='bold')
-            ),
-            hovertemplate='<b>%{y}</b><br>%{x}<br>Score: <b>%{z:.2f}</b><br>(Quanto maior, pior)<extra></extra>'
-        ))
-
-        layout_config = create_responsive_layout_config()
-        fig3_neg.update_layout(
-            **layout_config,
-            height=heatmap_height_neg,
-            xaxis=dict(
-                title='',
-                tickfont=dict(size=13, color='#991b1b', family='Arial', weight='bold'),
-                tickangle=-45
-            ),
-            yaxis=dict(
-                title='',
-                tickfont=dict(size=13, color='#991b1b', family='Arial', weight='bold')
-            )
-        )
-        st.plotly_chart(fig3_neg, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
-    else:
-        st.info("Nenhuma escala negativa (problemas) selecionada nos filtros.")
+        """, unsafe_allow_html=True)
     
-    st.markdown("</div>", unsafe_allow_html=True)
+    with kpi2:
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(220, 38, 38, 0.3);
+                        box-shadow: 0 3px 12px rgba(220, 38, 38, 0.12);
+                        text-align: center;
+                        min-height: 120px;
+                        display: flex;
+                        flex-direction: column;
+                        justify-content: center;'>
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Perfil Mais Crítico
+                </div>
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1; margin-bottom: 0.4rem;'>
+                    {tamanhos_agrup[0]}
+                </div>
+                <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Unidades no Grupo 1
+                </div>
+            </div>
+        """, unsafe_allow_html=True)
     
-    # ===== HEATMAP 2: PROTEÇÕES (ESCALAS POSITIVAS) =====
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(16, 185, 129, 0.08) 0%, rgba(5, 150, 105, 0.05) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(12px, 2vw, 16px);
-                    border: 2px solid rgba(16, 185, 129, 0.2);
-                    border-left: 4px solid #10b981;
-                    box-shadow: 0 4px 16px rgba(16, 185, 129, 0.08);
-                    margin-bottom: 2rem;'>
-            <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1.5rem;'>
-                <div style='width: 48px; height: 48px;
-                            background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-                            border-radius: 10px;
-                            display: flex; align-items: center; justify-content: center;
-                            box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
-                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                        <path d="M9 12l2 2 4-4m5.618-4.016A11.955 11.955 0 0112 2.944a11.955 11.955 0 01-8.618 3.04A12.02 12.02 0 003 9c0 5.591 3.824 10.29 9 11.622 5.176-1.332 9-6.03 9-11.622 0-1.042-.133-2.052-.382-3.016z"/>
-                    </svg>
+    with kpi3:
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                        padding: clamp(1rem, 3vw, 1.5rem);
+                        border-radius: clamp(10px, 2vw, 14px);
+                        border: 2px solid rgba(196, 166, 114, 0.25);
+                        box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
+                        text-align: center;
+                        min-height: 120px;
+                        display: flex;
+                        flex-direction: column;
+                        justify-content: center;'>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Variância Explicada
                 </div>
-                <div>
-                    <h3 style='margin: 0; color: #065f46; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
-                        Mapa de Proteções por Cargo
-                    </h3>
-                    <p style='margin: 0.3rem 0 0 0; color: #064e3b; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
-                        Quanto mais verde, maior a proteção - Identifica onde há mais fatores protetivos
-                    </p>
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                    {agrupamento['variancia_explicada']:.0%}
+                </div>
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Das diferenças entre unidades
                 </div>
             </div>
-    """, unsafe_allow_html=True)
+        """, unsafe_allow_html=True)
     
-    # Filtrar apenas escalas POSITIVAS
-    filtered_cargo_pos = filtered_cargo[filtered_cargo['subescala'].isin(escalas_positivas)]
-    
-    if len(filtered_cargo_pos) > 0:
-        cargo_pivot_pos = filtered_cargo_pos.pivot_table(
-            index='cargo',
-            columns='subescala',
-            values='media',
-            aggfunc='mean'
-        )
-        
-        num_cargos_pos = len(cargo_pivot_pos)
-        heatmap_height_pos = calculate_responsive_height(num_cargos_pos, min_height=500, item_height=45)
-
-        fig3_pos = go.Figure(data=go.Heatmap(
-            z=cargo_pivot_pos.values,
-            x=cargo_pivot_pos.columns,
-            y=cargo_pivot_pos.index,
-            colorscale='RdYlGn',  # Verde = Alto = BOM ✅ (sem o _r!)
-            text=cargo_pivot_pos.values.round(2),
-            texttemplate='%{text}' if show_values_cargo else '',
-            textfont={"size": 12, "color": "#1e293b", "family": "Arial", "weight": "bold"},
-            colorbar=dict(
-                title=dict(
-                    text="Score<br>(Proteção)",
-                    side='right',
-                    font=dict(size=13, color='#065f46', family='Arial', weight='bold')
-                ),
-                tickfont=dict(size=12, color='#064e3b', family='Arial', weight='bold')
-            ),
-            hovertemplate='<b>%{y}</b><br>%{x}<br>Score: <b>%{z:.2f}</b><br>(Quanto maior, melhor)<extra></extra>'
-        ))
-
-        layout_config = create_responsive_layout_config()
-        fig3_pos.update_layout(
-            **layout_config,
-            height=heatmap_height_pos,
-            xaxis=dict(
-                title='',
-                tickfont=dict(size=13, color='#065f46', family='Arial', weight='bold'),
-                tickangle=-45
-            ),
-            yaxis=dict(
-                title='',
-                tickfont=dict(size=13, color='#065f46', family='Arial', weight='bold')
-            )
-        )
-        st.plotly_chart(fig3_pos, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
-    else:
-        st.info("Nenhuma escala positiva (proteções) selecionada nos filtros.")
+    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
     
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    # ===== RANKING (CONTINUA IGUAL) =====
     st.markdown("""
         <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                     padding: clamp(1.5rem, 3vw, 2rem);
@@ -2062,164 +8382,165 @@ elif pagina == "Análise por Cargo":
                     margin-bottom: 2rem;'>
             <div style='margin-bottom: 1.5rem;'>
                 <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
-                    Ranking de Cargos por Score Médio
+                    Perfil Médio de Cada Grupo
                 </h3>
                 <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
-                    Cargos ordenados do menor ao maior risco médio - Identificação de funções prioritárias
+                    Criticidade média do grupo em cada dimensão - Quanto mais vermelho, pior (escalas de proteção já invertidas)
                 </p>
             </div>
     """, unsafe_allow_html=True)
-
-    cargo_ranking = filtered_cargo.groupby('cargo').agg({
-        'media': 'mean',
-        'qtd': 'first'
-    }).reset_index()
-
-    if selected_ordenacao_cargo == 'Maior Risco':
-        cargo_ranking = cargo_ranking.sort_values('media', ascending=True)
-    elif selected_ordenacao_cargo == 'Menor Risco':
-        cargo_ranking = cargo_ranking.sort_values('media', ascending=False)
-    elif selected_ordenacao_cargo == 'Alfabética A-Z':
-        cargo_ranking = cargo_ranking.sort_values('cargo', ascending=True)
-    elif selected_ordenacao_cargo == 'Alfabética Z-A':
-        cargo_ranking = cargo_ranking.sort_values('cargo', ascending=False)
-
-    colors_cargo = [get_risk_color(score) for score in cargo_ranking['media']]
-
-    num_items_cargo = len(cargo_ranking)
-    chart_height_cargo = calculate_responsive_height(num_items_cargo, min_height=400, item_height=40)
-
-    fig4 = go.Figure(go.Bar(
-        x=cargo_ranking['media'],
-        y=cargo_ranking['cargo'],
-        orientation='h',
-        marker=dict(
-            color=colors_cargo,
-            line=dict(width=1, color='rgba(0,0,0,0.05)')
+    
+    mostrar_texto_agrup = len(agrupamento['subescalas']) * len(rotulos_grupos) <= 400
+    heatmap_height_agrup = calculate_responsive_height(len(rotulos_grupos), min_height=400, item_height=60)
+    
+    fig_centroides = go.Figure(data=go.Heatmap(
+        z=agrupamento['criticidade'],
+        x=agrupamento['subescalas'],
+        y=rotulos_grupos,
+        zmin=1,
+        zmax=5,
+        colorscale='RdYlGn_r',
+        text=np.round(agrupamento['criticidade'], 2) if mostrar_texto_agrup else None,
+        texttemplate='%{text}' if mostrar_texto_agrup else '',
+        textfont={"size": 12, "color": "#1e293b", "family": "Arial", "weight": "bold"},
+        customdata=agrupamento['centroides'],
+        colorbar=dict(
+            title=dict(
+                text="Criticidade",
+                side='right',
+                font=dict(size=13, color='#5a4a3a', family='Arial', weight='bold')
+            ),
+            tickfont=dict(size=12, color='#6b5847', family='Arial', weight='bold')
         ),
-        text=cargo_ranking['media'].round(2) if show_values_cargo else '',
-        textposition='outside',
-        textfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
-        customdata=cargo_ranking['qtd'],
-        hovertemplate='<b>%{y}</b><br>Score: <b>%{x:.2f}</b><br>Respondentes: %{customdata}<extra></extra>'
+        hovertemplate='<b>%{y}</b><br>%{x}<br>Criticidade: <b>%{z:.2f}</b><br>Score médio: %{customdata:.2f}<extra></extra>'
     ))
-
-    layout_config_cargo = create_responsive_layout_config()
-    fig4.update_layout(
-        **layout_config_cargo,
-        height=chart_height_cargo,
-        showlegend=False,
+    
+    layout_config = create_responsive_layout_config()
+    fig_centroides.update_layout(
+        **layout_config,
+        height=heatmap_height_agrup,
         xaxis=dict(
-            range=[0, 5],
-            gridcolor='rgba(196, 166, 114, 0.2)',
-            showline=False,
-            title=dict(
-                text='Score Médio de Risco',
-                font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
-            ),
-            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+            title='',
+            tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
+            tickangle=-45
         ),
         yaxis=dict(
-            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
-            showline=False
+            title='',
+            tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
+            autorange='reversed'
         )
     )
-    st.plotly_chart(fig4, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
+    exibir_figura(fig_centroides, 'fig_centroides')
     st.markdown("</div>", unsafe_allow_html=True)
     
-    st.markdown(f"""
-        <div style='background: linear-gradient(135deg, rgba(59, 130, 246, 0.1) 0%, rgba(37, 99, 235, 0.05) 100%);
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                     padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(10px, 2vw, 14px);
-                    border-left: 4px solid #3b82f6;
-                    margin-bottom: 2rem;
-                    box-shadow: 0 4px 16px rgba(59, 130, 246, 0.08);'>
-            <div style='display: flex; align-items: flex-start; gap: clamp(0.8rem, 2vw, 1.2rem); flex-wrap: wrap;'>
-                <div style='min-width: 48px; height: 48px;
-                            background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
-                            border-radius: 10px;
-                            display: flex; align-items: center; justify-content: center;
-                            box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);'>
-                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                        <path d="M9.663 17h4.673M12 3v1m6.364 1.636l-.707.707M21 12h-1M4 12H3m3.343-5.657l-.707-.707m2.828 9.9a5 5 0 117.072 0l-.548.547A3.374 3.374 0 0014 18.469V19a2 2 0 11-4 0v-.531c0-.895-.356-1.754-.988-2.386l-.548-.547z"/>
-                    </svg>
-                </div>
-                <div style='flex: 1; min-width: 250px;'>
-                    <h4 style='margin: 0 0 0.8rem 0; color: #1e40af; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
-                        Insight Estratégico
-                    </h4>
-                    <div style='color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.7;'>
-                        Os riscos variam <strong>significativamente entre funções</strong>. A diferença de {diferenca_max:.2f} pontos 
-                        entre o cargo mais crítico e a média organizacional evidencia que <strong>o problema não está nas pessoas, 
-                        mas nas condições e demandas da atividade</strong>.
-                        <br><br>
-                        <strong>Recomendação:</strong> Intervenções devem focar em <strong>redesenho de processos</strong>, 
-                        <strong>gestão da carga de trabalho</strong> e <strong>ajuste de demandas por cargo</strong>.
-                    </div>
-                </div>
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Mapa de Semelhança
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Cada ponto é uma unidade - Unidades próximas têm perfis de risco parecidos
+                </p>
             </div>
-        </div>
     """, unsafe_allow_html=True)
     
-    col_prox1, col_prox2 = st.columns(2)
+    coordenadas_agrup = agrupamento['coordenadas']
+    mostrar_rotulos_agrup = len(membros_agrup) <= 40
+    
+    fig_mapa = go.Figure()
+    for g, rotulo in enumerate(rotulos_grupos):
+        no_grupo = grupos_agrup == g
+        fig_mapa.add_trace(go.Scatter(
+            x=coordenadas_agrup[no_grupo, 0],
+            y=coordenadas_agrup[no_grupo, 1],
+            mode='markers+text' if mostrar_rotulos_agrup else 'markers',
+            name=rotulo,
+            text=[membros_agrup[i] for i in np.where(no_grupo)[0]],
+            textposition='top center',
+            textfont=dict(size=11, color='#5a4a3a', family='Arial'),
+            marker=dict(size=14, color=cores_grupos[g % len(cores_grupos)], line=dict(width=2, color='white')),
+            hovertemplate='<b>%{text}</b><br>' + rotulo + '<extra></extra>'
+        ))
     
-    with col_prox1:
-        st.markdown("""
-            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(219, 234, 254, 0.8) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
-                        border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(59, 130, 246, 0.25);
-                        border-left: 4px solid #3b82f6;
-                        box-shadow: 0 3px 12px rgba(59, 130, 246, 0.1);'>
-                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
-                    <div style='width: 42px; height: 42px;
-                                background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
-                                border-radius: 10px;
-                                display: flex; align-items: center; justify-content: center;
-                                box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);'>
-                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                            <path d="M9 5l7 7-7 7"/>
-                        </svg>
-                    </div>
-                    <h4 style='margin: 0; color: #1e40af; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
-                        Próximo Passo
-                    </h4>
-                </div>
-                <p style='margin: 0; color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                    Explore <strong>Análise por Setor</strong> para entender como os riscos se distribuem por área
-                </p>
-            </div>
-        """, unsafe_allow_html=True)
+    layout_config = create_responsive_layout_config()
+    fig_mapa.update_layout(
+        **layout_config,
+        height=550,
+        showlegend=True,
+        xaxis=dict(title='', showticklabels=False, zeroline=False, showgrid=True, gridcolor='rgba(196, 166, 114, 0.15)'),
+        yaxis=dict(title='', showticklabels=False, zeroline=False, showgrid=True, gridcolor='rgba(196, 166, 114, 0.15)')
+    )
+    exibir_figura(fig_mapa, 'fig_mapa')
+    st.markdown("</div>", unsafe_allow_html=True)
     
-    with col_prox2:
-        st.markdown("""
-            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(209, 250, 229, 0.8) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
-                        border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(16, 185, 129, 0.25);
-                        border-left: 4px solid #10b981;
-                        box-shadow: 0 3px 12px rgba(16, 185, 129, 0.1);'>
-                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
-                    <div style='width: 42px; height: 42px;
-                                background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-                                border-radius: 10px;
-                                display: flex; align-items: center; justify-content: center;
-                                box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
-                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                            <path d="M5 13l4 4L19 7"/>
-                        </svg>
-                    </div>
-                    <h4 style='margin: 0; color: #065f46; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
-                        Conformidade NR-01
+    st.markdown("""
+        <div style='margin: 2rem 0 1rem 0;'>
+            <h3 style='color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
+                Composição dos Grupos
+            </h3>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Dimensões que mais distinguem cada grupo da média das unidades
+    desvio_grupos = agrupamento['criticidade'] - np.average(agrupamento['criticidade'], axis=0, weights=tamanhos_agrup)
+    cols_grupos = st.columns(2)
+    
+    for g, rotulo in enumerate(rotulos_grupos):
+        cor = cores_grupos[g % len(cores_grupos)]
+        destaques = np.argsort(-desvio_grupos[g])[:3]
+        destaques_html = "".join(
+            f"<li>{agrupamento['subescalas'][i]} ({desvio_grupos[g, i]:+.2f})</li>" for i in destaques
+        )
+        membros_grupo = ", ".join(membros_agrup[i] for i in np.where(grupos_agrup == g)[0])
+        
+        with cols_grupos[g % 2]:
+            st.markdown(f"""
+                <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                            padding: clamp(1rem, 3vw, 1.5rem);
+                            border-radius: clamp(10px, 2vw, 14px);
+                            border: 2px solid rgba(196, 166, 114, 0.25);
+                            border-left: 4px solid {cor};
+                            box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
+                            margin-bottom: 1.5rem;'>
+                    <h4 style='margin: 0 0 0.6rem 0; color: #5a4a3a; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
+                        {rotulo} - Criticidade média {np.mean(agrupamento['criticidade'][g]):.2f}
                     </h4>
+                    <div style='color: #6b5847; font-size: clamp(0.8rem, 2vw, 0.9rem); line-height: 1.6;'>
+                        <strong>Mais acima da média:</strong>
+                        <ul style='margin: 0.3rem 0 0.6rem 0; padding-left: 1.5rem;'>
+                            {destaques_html}
+                        </ul>
+                        <strong>Membros:</strong> {membros_grupo}
+                    </div>
                 </div>
-                <p style='margin: 0; color: #064e3b; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                    Atende análise de <strong>ambiente</strong> e <strong>organização do trabalho</strong>
-                </p>
+            """, unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(59, 130, 246, 0.1) 0%, rgba(37, 99, 235, 0.05) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(10px, 2vw, 14px);
+                    border-left: 4px solid #3b82f6;
+                    margin-bottom: 2rem;
+                    box-shadow: 0 4px 16px rgba(59, 130, 246, 0.08);'>
+            <h4 style='margin: 0 0 0.8rem 0; color: #1e40af; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
+                Como Usar
+            </h4>
+            <div style='color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.7;'>
+                Os grupos são formados pelo <strong>k-means</strong> sobre o score médio de cada unidade em todas as dimensões 
+                e numerados do perfil <strong>mais crítico</strong> para o menos crítico. Unidades do mesmo grupo podem 
+                receber um <strong>plano de ação comum</strong>, focado nas dimensões em que o grupo mais se afasta da média.
             </div>
-        """, unsafe_allow_html=True)
+        </div>
+    """, unsafe_allow_html=True)
 
-elif pagina == "Análise por Setor":
+####### EVOLUÇÃO ENTRE ONDAS ########
+elif pagina == "Evolução entre Ondas":
     st.markdown("""
         <style>
         .main .block-container {
@@ -2303,10 +8624,10 @@ elif pagina == "Análise por Setor":
             <div style='display: flex; align-items: center; justify-content: space-between; flex-wrap: wrap; gap: 1rem;'>
                 <div style='flex: 1; min-width: 200px;'>
                     <h1 style='margin: 0; color: #5a4a3a; font-size: clamp(1.5rem, 4vw, 2.2rem); font-weight: 800; letter-spacing: -0.5px;'>
-                        Análise por Setor
+                        Evolução entre Ondas
                     </h1>
                     <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.85rem, 2vw, 1rem);'>
-                        Onde agir na organização - Mapeamento territorial dos riscos
+                        Acompanhamento longitudinal - O que mudou desde a última aplicação da pesquisa
                     </p>
                 </div>
                 <div style='background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
@@ -2325,95 +8646,109 @@ elif pagina == "Análise por Setor":
         </div>
     """, unsafe_allow_html=True)
     
+    historico_ondas = carregar_historico_ondas(tuple(listar_ondas()))
+    rotulos_ondas = historico_ondas['rotulos']
+    
+    if len(rotulos_ondas) < 2:
+        st.info("São necessárias ao menos duas ondas em archives/ondas/<rótulo>/ (com os mesmos arquivos de archives/) para a comparação longitudinal.")
+        st.stop()
+    
     with st.expander("Filtros e Configurações", expanded=False):
         filter_cols = st.columns([1, 1, 1, 1])
         
         with filter_cols[0]:
-            unique_setores = sorted(setor_data['setor'].unique().tolist())
-            selected_setores = st.multiselect(
-                "Setores",
-                options=unique_setores,
-                default=unique_setores,
-                help="Selecione os setores que deseja analisar"
+            nivel_labels = {'subescala': 'Organização', 'cargo': 'Cargo', 'setor': 'Setor'}
+            nivel_onda = st.selectbox(
+                "Nível",
+                options=list(nivel_labels.keys()),
+                format_func=lambda x: nivel_labels[x],
+                help="Nível de agregação da comparação",
+                key='onda_nivel'
             )
         
         with filter_cols[1]:
-            unique_subescalas_setor = sorted(setor_data['subescala'].unique().tolist())
-            selected_subescalas_setor = st.multiselect(
-                "Dimensões Psicossociais",
-                options=unique_subescalas_setor,
-                default=unique_subescalas_setor,
-                help="Selecione as dimensões para análise",
-                key='setor_subescalas'
+            onda_atual = st.selectbox(
+                "Onda",
+                options=rotulos_ondas[1:][::-1],
+                help="Onda comparada com a imediatamente anterior",
+                key='onda_atual'
             )
         
+        deltas_onda = historico_ondas['deltas'].get((nivel_onda, onda_atual), pd.DataFrame())
+        tendencia_onda = historico_ondas['tendencia'][nivel_onda]
+        
         with filter_cols[2]:
-            ordenacao_setor_options = ['Maior Risco', 'Menor Risco', 'Alfabética A-Z', 'Alfabética Z-A']
-            selected_ordenacao_setor = st.selectbox(
-                "Ordenação",
-                options=ordenacao_setor_options,
-                help="Escolha como ordenar os dados",
-                key='setor_ordenacao'
-            )
+            if nivel_onda == 'subescala':
+                indicador_onda = st.selectbox(
+                    "Indicador",
+                    options=['media', 'perc_alto'],
+                    format_func=lambda x: {'media': 'Score Médio', 'perc_alto': '% Alto Risco'}[x],
+                    key='onda_indicador'
+                )
+                subescala_onda = None
+            else:
+                indicador_onda = 'media'
+                opcoes_subescala_onda = ordenar_subescalas(deltas_onda['subescala'], registro_subescalas)
+                # Valor vindo de link ou de outra onda pode não existir nesta
+                if opcoes_subescala_onda and st.session_state.get('onda_subescala') not in opcoes_subescala_onda:
+                    st.session_state['onda_subescala'] = '(Média geral)' if '(Média geral)' in opcoes_subescala_onda else opcoes_subescala_onda[0]
+                subescala_onda = st.selectbox(
+                    "Dimensão Psicossocial",
+                    options=opcoes_subescala_onda,
+                    key='onda_subescala'
+                )
         
         with filter_cols[3]:
-            show_values_setor = st.checkbox("Exibir Valores", value=True, help="Mostrar valores nos gráficos", key='setor_show_values')
+            if nivel_onda == 'subescala':
+                opcoes_tendencia = ordenar_subescalas(deltas_onda['subescala'], registro_subescalas)
+            else:
+                opcoes_tendencia = sorted(deltas_onda['grupo'].unique().tolist())
+            # Itens vindos de link ou de outro nível podem não existir neste; sem nenhum
+            # válido, a seleção volta à inicial (uma seleção esvaziada pelo usuário fica vazia)
+            tendencia_atual = st.session_state.get('onda_tendencia')
+            tendencia_valida = [item for item in tendencia_atual or [] if item in opcoes_tendencia]
+            if tendencia_atual is None or (tendencia_atual and not tendencia_valida):
+                tendencia_valida = opcoes_tendencia[:5]
+            st.session_state['onda_tendencia'] = tendencia_valida
+            selecionados_tendencia = st.multiselect(
+                "Linhas de Tendência",
+                options=opcoes_tendencia,
+                help="Itens exibidos no gráfico de tendência",
+                key='onda_tendencia'
+            )
     
-    filtered_setor = setor_data[
-        (setor_data['setor'].isin(selected_setores)) &
-        (setor_data['subescala'].isin(selected_subescalas_setor))
-    ]
+    sincronizar_filtros_url(pagina)
     
-    if len(filtered_setor) == 0:
-        st.warning("Nenhum dado encontrado com os filtros selecionados. Ajuste os filtros acima.")
+    if nivel_onda == 'subescala':
+        deltas_exibidos = deltas_onda.set_index('subescala')
+    else:
+        deltas_exibidos = deltas_onda[deltas_onda['subescala'] == subescala_onda].set_index('grupo')
+    
+    coluna_delta = 'delta_media' if indicador_onda == 'media' else 'delta_perc_alto'
+    deltas_exibidos = deltas_exibidos.dropna(subset=[coluna_delta]).sort_values(coluna_delta)
+    
+    if len(deltas_exibidos) == 0:
+        st.warning("Nenhum item em comum entre as duas ondas selecionadas.")
         st.stop()
     
-    # ===== DEFINIR ESCALAS POSITIVAS E NEGATIVAS =====
-    escalas_positivas = {
-        "Qualidade da liderança",          
-        "Confiança horizontal",            
-        "Confiança vertical",              
-        "Justiça e respeito",              
-        "Autoeficácia",                    
-        "Significado do trabalho",         
-        "Compromisso",                     
-        "Satisfação"   
-    }
+    # Piora = score sobe em escala de problema ou cai em escala de proteção
+    if nivel_onda == 'subescala':
+        positiva = registro_subescalas['positiva'].reindex(deltas_exibidos.index, fill_value=False).to_numpy(dtype=bool)
+    else:
+        positiva = np.full(len(deltas_exibidos), bool(registro_subescalas['positiva'].get(subescala_onda, False)))
+    sinal_piora = np.where(positiva, -1, 1)
+    if indicador_onda == 'perc_alto':
+        sinal_piora = np.ones(len(deltas_exibidos))
+    piora = deltas_exibidos[coluna_delta].to_numpy() * sinal_piora
     
-    setores_unicos = filtered_setor['setor'].nunique()
-    setor_media = filtered_setor.groupby('setor')['media'].mean()
-    setor_critico = setor_media.idxmax()
-    media_org = filtered_setor['media'].mean()
-    diferenca_max = setor_media.max() - media_org
-    desvio_padrao = setor_media.std()
+    n_pioraram = int((piora > 0.05 if indicador_onda == 'media' else piora > 0.02).sum())
+    n_melhoraram = int((piora < -0.05 if indicador_onda == 'media' else piora < -0.02).sum())
+    mudancas_classe = deltas_exibidos[deltas_exibidos['mudou_classe'] == True] if nivel_onda == 'subescala' else pd.DataFrame()
+    onda_anterior = rotulos_ondas[rotulos_ondas.index(onda_atual) - 1]
     
-    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+    kpi1, kpi2, kpi3 = st.columns(3)
     
     with kpi1:
-        st.markdown(f"""
-            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
-                        border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(196, 166, 114, 0.25);
-                        box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
-                        text-align: center;
-                        min-height: 120px;
-                        display: flex;
-                        flex-direction: column;
-                        justify-content: center;'>
-                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Setores Mapeados
-                </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
-                    {setores_unicos}
-                </div>
-                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Áreas organizacionais
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    with kpi2:
         st.markdown(f"""
             <div style='background: linear-gradient(135deg, rgba(254, 226, 226, 0.95) 0%, rgba(252, 205, 205, 0.8) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
@@ -2426,18 +8761,18 @@ elif pagina == "Análise por Setor":
                         flex-direction: column;
                         justify-content: center;'>
                 <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Setor Mais Crítico
+                    Pioraram
                 </div>
-                <div style='font-size: clamp(1.1rem, 2.5vw, 1.4rem); font-weight: 800; color: #dc2626; line-height: 1.2; margin-bottom: 0.4rem; min-height: 3.5rem; display: flex; align-items: center; justify-content: center; padding: 0 0.5rem;'>
-                    {setor_critico}
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #dc2626; line-height: 1; margin-bottom: 0.4rem;'>
+                    {n_pioraram}
                 </div>
                 <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Score: {setor_media.max():.2f}
+                    Desde {onda_anterior}
                 </div>
             </div>
         """, unsafe_allow_html=True)
     
-    with kpi3:
+    with kpi2:
         st.markdown(f"""
             <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
@@ -2450,249 +8785,43 @@ elif pagina == "Análise por Setor":
                         flex-direction: column;
                         justify-content: center;'>
                 <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Média Organizacional
+                    Melhoraram
                 </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #b89656; line-height: 1; margin-bottom: 0.4rem;'>
-                    {media_org:.2f}
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                    {n_melhoraram}
                 </div>
                 <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Baseline geral
+                    Desde {onda_anterior}
                 </div>
             </div>
         """, unsafe_allow_html=True)
     
-    with kpi4:
+    with kpi3:
         st.markdown(f"""
-            <div style='background: linear-gradient(135deg, rgba(254, 243, 199, 0.95) 0%, rgba(253, 224, 171, 0.8) 100%);
+            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                         padding: clamp(1rem, 3vw, 1.5rem);
                         border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(245, 158, 11, 0.3);
-                        box-shadow: 0 3px 12px rgba(245, 158, 11, 0.12);
+                        border: 2px solid rgba(196, 166, 114, 0.25);
+                        box-shadow: 0 3px 12px rgba(107, 88, 71, 0.1);
                         text-align: center;
                         min-height: 120px;
                         display: flex;
                         flex-direction: column;
                         justify-content: center;'>
-                <div style='color: #92400e; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                    Dispersão
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.8rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
+                    Mudanças de Classe
                 </div>
-                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #f59e0b; line-height: 1; margin-bottom: 0.4rem;'>
-                    {desvio_padrao:.2f}
+                <div style='font-size: clamp(2rem, 5vw, 2.5rem); font-weight: 800; color: #c4a672; line-height: 1; margin-bottom: 0.4rem;'>
+                    {len(mudancas_classe) if nivel_onda == 'subescala' else '-'}
                 </div>
-                <div style='color: #92400e; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
-                    Desvio padrão
+                <div style='color: #8b7663; font-size: clamp(0.7rem, 1.5vw, 0.75rem);'>
+                    Matriz de risco
                 </div>
             </div>
         """, unsafe_allow_html=True)
     
     st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
     
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.1) 0%, rgba(232, 220, 200, 0.06) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(12px, 2vw, 16px);
-                    border-left: 4px solid #c4a672;
-                    margin-bottom: 2rem;
-                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
-            <h3 style='margin: 0 0 1.5rem 0; color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
-                Entendendo o Risco Territorial
-            </h3>
-            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: clamp(1rem, 3vw, 2rem);'>
-                <div>
-                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                        Problema Resolvido
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                        Elimina dúvida sobre <strong>onde agir primeiro</strong>. Mapeia geograficamente os pontos críticos da organização
-                    </div>
-                </div>
-                <div>
-                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                        Pergunta Respondida
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6; font-style: italic;'>
-                        "Em quais áreas da empresa esses riscos aparecem com mais força?"
-                    </div>
-                </div>
-                <div>
-                    <div style='color: #c4a672; font-weight: 700; font-size: clamp(0.75rem, 1.5vw, 0.8rem); text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.6rem;'>
-                        Valor Estratégico
-                    </div>
-                    <div style='color: #6b5847; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                        Risco é <strong>contextual</strong> - ligado a processos, fluxos e gestão local. Base para ações territoriais
-                    </div>
-                </div>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    # ===== HEATMAP 1: PROBLEMAS (ESCALAS NEGATIVAS) =====
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(220, 38, 38, 0.08) 0%, rgba(185, 28, 28, 0.05) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(12px, 2vw, 16px);
-                    border: 2px solid rgba(220, 38, 38, 0.2);
-                    border-left: 4px solid #dc2626;
-                    box-shadow: 0 4px 16px rgba(220, 38, 38, 0.08);
-                    margin-bottom: 2rem;'>
-            <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1.5rem;'>
-                <div style='width: 48px; height: 48px;
-                            background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
-                            border-radius: 10px;
-                            display: flex; align-items: center; justify-content: center;
-                            box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);'>
-                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                        <path d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-3L13.732 4c-.77-1.333-2.694-1.333-3.464 0L3.34 16c-.77 1.333.192 3 1.732 3z"/>
-                    </svg>
-                </div>
-                <div>
-                    <h3 style='margin: 0; color: #991b1b; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
-                        Mapa de Problemas por Setor
-                    </h3>
-                    <p style='margin: 0.3rem 0 0 0; color: #7f1d1d; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
-                        Quanto mais vermelho, maior o problema - Identifica onde os riscos são mais graves por área
-                    </p>
-                </div>
-            </div>
-    """, unsafe_allow_html=True)
-    
-    # Filtrar apenas escalas NEGATIVAS
-    filtered_setor_neg = filtered_setor[~filtered_setor['subescala'].isin(escalas_positivas)]
-    
-    if len(filtered_setor_neg) > 0:
-        setor_pivot_neg = filtered_setor_neg.pivot_table(
-            index='setor',
-            columns='subescala',
-            values='media',
-            aggfunc='mean'
-        )
-        
-        num_setores_neg = len(setor_pivot_neg)
-        heatmap_height_setor_neg = calculate_responsive_height(num_setores_neg, min_height=500, item_height=45)
-
-        fig_heatmap_neg = go.Figure(data=go.Heatmap(
-            z=setor_pivot_neg.values,
-            x=setor_pivot_neg.columns,
-            y=setor_pivot_neg.index,
-            colorscale='RdYlGn_r',  # Vermelho = Alto = RUIM ✅
-            text=setor_pivot_neg.values.round(2),
-            texttemplate='%{text}' if show_values_setor else '',
-            textfont={"size": 12, "color": "#1e293b", "family": "Arial", "weight": "bold"},
-            colorbar=dict(
-                title=dict(
-                    text="Score<br>(Problema)",
-                    side='right',
-                    font=dict(size=13, color='#991b1b', family='Arial', weight='bold')
-                ),
-                tickfont=dict(size=12, color='#7f1d1d', family='Arial', weight='bold')
-            ),
-            hovertemplate='<b>%{y}</b><br>%{x}<br>Score: <b>%{z:.2f}</b><br>(Quanto maior, pior)<extra></extra>'
-        ))
-
-        layout_config = create_responsive_layout_config()
-        fig_heatmap_neg.update_layout(
-            **layout_config,
-            height=heatmap_height_setor_neg,
-            xaxis=dict(
-                title='',
-                tickfont=dict(size=13, color='#991b1b', family='Arial', weight='bold'),
-                tickangle=-45
-            ),
-            yaxis=dict(
-                title='',
-                tickfont=dict(size=13, color='#991b1b', family='Arial', weight='bold')
-            )
-        )
-        st.plotly_chart(fig_heatmap_neg, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
-    else:
-        st.info("Nenhuma escala negativa (problemas) selecionada nos filtros.")
-    
-    st.markdown("</div>", unsafe_allow_html=True)
-    
-    # ===== HEATMAP 2: PROTEÇÕES (ESCALAS POSITIVAS) =====
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(16, 185, 129, 0.08) 0%, rgba(5, 150, 105, 0.05) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(12px, 2vw, 16px);
-                    border: 2px solid rgba(16, 185, 129, 0.2);
-                    border-left: 4px solid #10b981;
-                    box-shadow: 0 4px 16px rgba(16, 185, 129, 0.08);
-                    margin-bottom: 2rem;'>
-            <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1.5rem;'>
-                <div style='width: 48px; height: 48px;
-                            background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-                            border-radius: 10px;
-                            display: flex; align-items: center; justify-content: center;
-                            box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
-                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                        <path d="M9 12l2 2 4-4m5.618-4.016A11.955 11.955 0 0112 2.944a11.955 11.955 0 01-8.618 3.04A12.02 12.02 0 003 9c0 5.591 3.824 10.29 9 11.622 5.176-1.332 9-6.03 9-11.622 0-1.042-.133-2.052-.382-3.016z"/>
-                    </svg>
-                </div>
-                <div>
-                    <h3 style='margin: 0; color: #065f46; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
-                        Mapa de Proteções por Setor
-                    </h3>
-                    <p style='margin: 0.3rem 0 0 0; color: #064e3b; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
-                        Quanto mais verde, maior a proteção - Identifica onde há mais fatores protetivos por área
-                    </p>
-                </div>
-            </div>
-    """, unsafe_allow_html=True)
-    
-    # Filtrar apenas escalas POSITIVAS
-    filtered_setor_pos = filtered_setor[filtered_setor['subescala'].isin(escalas_positivas)]
-    
-    if len(filtered_setor_pos) > 0:
-        setor_pivot_pos = filtered_setor_pos.pivot_table(
-            index='setor',
-            columns='subescala',
-            values='media',
-            aggfunc='mean'
-        )
-        
-        num_setores_pos = len(setor_pivot_pos)
-        heatmap_height_setor_pos = calculate_responsive_height(num_setores_pos, min_height=500, item_height=45)
-
-        fig_heatmap_pos = go.Figure(data=go.Heatmap(
-            z=setor_pivot_pos.values,
-            x=setor_pivot_pos.columns,
-            y=setor_pivot_pos.index,
-            colorscale='RdYlGn',  # Verde = Alto = BOM ✅ (sem o _r!)
-            text=setor_pivot_pos.values.round(2),
-            texttemplate='%{text}' if show_values_setor else '',
-            textfont={"size": 12, "color": "#1e293b", "family": "Arial", "weight": "bold"},
-            colorbar=dict(
-                title=dict(
-                    text="Score<br>(Proteção)",
-                    side='right',
-                    font=dict(size=13, color='#065f46', family='Arial', weight='bold')
-                ),
-                tickfont=dict(size=12, color='#064e3b', family='Arial', weight='bold')
-            ),
-            hovertemplate='<b>%{y}</b><br>%{x}<br>Score: <b>%{z:.2f}</b><br>(Quanto maior, melhor)<extra></extra>'
-        ))
-
-        layout_config = create_responsive_layout_config()
-        fig_heatmap_pos.update_layout(
-            **layout_config,
-            height=heatmap_height_setor_pos,
-            xaxis=dict(
-                title='',
-                tickfont=dict(size=13, color='#065f46', family='Arial', weight='bold'),
-                tickangle=-45
-            ),
-            yaxis=dict(
-                title='',
-                tickfont=dict(size=13, color='#065f46', family='Arial', weight='bold')
-            )
-        )
-        st.plotly_chart(fig_heatmap_pos, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
-    else:
-        st.info("Nenhuma escala positiva (proteções) selecionada nos filtros.")
-    
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    # ===== RANKING (CONTINUA IGUAL) =====
     st.markdown("""
         <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                     padding: clamp(1.5rem, 3vw, 2rem);
@@ -2702,232 +8831,149 @@ elif pagina == "Análise por Setor":
                     margin-bottom: 2rem;'>
             <div style='margin-bottom: 1.5rem;'>
                 <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
-                    Ranking de Setores por Score Médio
+                    Variação desde a Onda Anterior
                 </h3>
                 <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
-                    Áreas ordenadas do menor ao maior risco - Priorização territorial de recursos
+                    Vermelho indica piora e verde indica melhora, considerando a polaridade de cada dimensão
                 </p>
             </div>
-    """, unsafe_allow_html=True)
-
-    setor_ranking = filtered_setor.groupby('setor').agg({
-        'media': 'mean',
-        'qtd': 'first'
-    }).reset_index()
-
-    if selected_ordenacao_setor == 'Maior Risco':
-        setor_ranking = setor_ranking.sort_values('media', ascending=True)
-    elif selected_ordenacao_setor == 'Menor Risco':
-        setor_ranking = setor_ranking.sort_values('media', ascending=False)
-    elif selected_ordenacao_setor == 'Alfabética A-Z':
-        setor_ranking = setor_ranking.sort_values('setor', ascending=True)
-    elif selected_ordenacao_setor == 'Alfabética Z-A':
-        setor_ranking = setor_ranking.sort_values('setor', ascending=False)
-
-    colors_setor = [get_risk_color(score) for score in setor_ranking['media']]
-
-    num_items_setor = len(setor_ranking)
-    chart_height_setor = calculate_responsive_height(num_items_setor, min_height=400, item_height=40)
-
-    fig5 = go.Figure(go.Bar(
-        x=setor_ranking['media'],
-        y=setor_ranking['setor'],
+    """, unsafe_allow_html=True)
+    
+    eh_percentual = indicador_onda == 'perc_alto'
+    valores_delta = deltas_exibidos[coluna_delta] * (100 if eh_percentual else 1)
+    colors_onda = ['#dc2626' if p > 0 else '#10b981' for p in piora]
+    
+    fig_onda = go.Figure(go.Bar(
+        x=valores_delta,
+        y=deltas_exibidos.index,
         orientation='h',
         marker=dict(
-            color=colors_setor,
+            color=colors_onda,
             line=dict(width=1, color='rgba(0,0,0,0.05)')
         ),
-        text=setor_ranking['media'].round(2) if show_values_setor else '',
+        text=valores_delta.apply(lambda x: f"{x:+.1f}pp" if eh_percentual else f"{x:+.2f}"),
         textposition='outside',
-        textfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
-        customdata=setor_ranking['qtd'],
-        hovertemplate='<b>%{y}</b><br>Score: <b>%{x:.2f}</b><br>Colaboradores: %{customdata}<extra></extra>'
+        textfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
+        customdata=np.column_stack((
+            deltas_exibidos[indicador_onda + '_anterior'] * (100 if eh_percentual else 1),
+            deltas_exibidos[indicador_onda] * (100 if eh_percentual else 1)
+        )),
+        hovertemplate='<b>%{y}</b><br>' + onda_anterior + ': %{customdata[0]:.2f}<br>' + onda_atual + ': %{customdata[1]:.2f}<br>Variação: <b>%{x:+.2f}</b><extra></extra>'
     ))
-
-    layout_config_setor = create_responsive_layout_config()
-    fig5.update_layout(
-        **layout_config_setor,
-        height=chart_height_setor,
+    
+    layout_config = create_responsive_layout_config()
+    fig_onda.update_layout(
+        **layout_config,
+        height=calculate_responsive_height(len(deltas_exibidos), min_height=400, item_height=35),
         showlegend=False,
         xaxis=dict(
-            range=[0, 5],
             gridcolor='rgba(196, 166, 114, 0.2)',
-            showline=False,
+            zeroline=True,
+            zerolinecolor='rgba(107, 88, 71, 0.4)',
             title=dict(
-                text='Score Médio de Risco',
+                text='Variação em pontos percentuais' if eh_percentual else 'Variação do Score Médio',
                 font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
             ),
             tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
         ),
         yaxis=dict(
-            tickfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+            tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
             showline=False
         )
     )
-    st.plotly_chart(fig5, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
+    exibir_figura(fig_onda, 'fig_onda')
     st.markdown("</div>", unsafe_allow_html=True)
-
-    st.markdown("""
-        <div style='margin: 2rem 0 1rem 0;'>
-            <h3 style='color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
-                Setores Prioritários para Intervenção
-            </h3>
-            <p style='color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem); margin: 0.4rem 0 0 0;'>
-                Áreas que demandam atenção estratégica imediata
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
-    top_setores = setor_ranking.nlargest(3, 'media')
-    cols = st.columns(min(3, len(top_setores)))
-    
-    for idx, (col, row) in enumerate(zip(cols, top_setores.itertuples()), 1):
-        with col:
-            st.markdown(f"""
-                <div style='background: linear-gradient(135deg, rgba(220, 38, 38, 0.08) 0%, rgba(185, 28, 28, 0.05) 100%);
-                            padding: clamp(1.2rem, 3vw, 1.8rem);
-                            border-radius: clamp(10px, 2vw, 14px);
-                            border: 2px solid rgba(220, 38, 38, 0.2);
-                            border-left: 5px solid #dc2626;
-                            box-shadow: 0 4px 16px rgba(220, 38, 38, 0.1);'>
-                    <div style='display: flex; align-items: center; gap: 0.8rem; margin-bottom: 1rem;'>
-                        <div style='width: 40px; height: 40px;
-                                    background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
-                                    border-radius: 10px;
-                                    display: flex; align-items: center; justify-content: center;
-                                    color: white; font-weight: 800; font-size: 1.2rem;
-                                    box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);'>
-                            #{idx}
-                        </div>
-                        <div style='color: #991b1b; font-size: clamp(0.7rem, 1.5vw, 0.75rem); font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px;'>
-                            Prioridade
-                        </div>
-                    </div>
-                    <h3 style='margin: 0 0 1rem 0; color: #7f1d1d; font-size: clamp(1rem, 2.2vw, 1.2rem); font-weight: 700; line-height: 1.3;'>
-                        {row.setor}
-                    </h3>
-                    <div style='margin-bottom: 1rem;'>
-                        <div style='font-size: clamp(2rem, 4.5vw, 2.8rem); font-weight: 800; color: #dc2626; line-height: 1;'>
-                            {row.media:.2f}
-                        </div>
-                        <div style='color: #991b1b; font-size: clamp(0.75rem, 1.8vw, 0.85rem); margin-top: 0.3rem;'>
-                            score médio
-                        </div>
-                    </div>
-                    <div style='background: rgba(220, 38, 38, 0.08);
-                                padding: 0.8rem;
-                                border-radius: 8px;
-                                border-left: 3px solid #dc2626;'>
-                        <div style='color: #7f1d1d; font-size: clamp(0.75rem, 1.8vw, 0.8rem); font-weight: 600;'>
-                            <svg width="14" height="14" fill="none" stroke="currentColor" stroke-width="2.5" viewBox="0 0 24 24" style='display: inline; margin-right: 0.5rem; vertical-align: middle;'>
-                                <path d="M17 20h5v-2a3 3 0 00-5.356-1.857M17 20H7m10 0v-2c0-.656-.126-1.283-.356-1.857M7 20H2v-2a3 3 0 015.356-1.857M7 20v-2c0-.656.126-1.283.356-1.857m0 0a5.002 5.002 0 019.288 0M15 7a3 3 0 11-6 0 3 3 0 016 0zm6 3a2 2 0 11-4 0 2 2 0 014 0zM7 10a2 2 0 11-4 0 2 2 0 014 0z"/>
-                            </svg>
-                            {row.qtd} colaboradores
-                        </div>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-    
-    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
-    
-    st.markdown(f"""
-        <div style='background: linear-gradient(135deg, rgba(16, 185, 129, 0.1) 0%, rgba(5, 150, 105, 0.05) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(10px, 2vw, 14px);
-                    border-left: 4px solid #10b981;
-                    margin-bottom: 2rem;
-                    box-shadow: 0 4px 16px rgba(16, 185, 129, 0.08);'>
-            <div style='display: flex; align-items: flex-start; gap: clamp(0.8rem, 2vw, 1.2rem); flex-wrap: wrap;'>
-                <div style='min-width: 48px; height: 48px;
-                            background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-                            border-radius: 10px;
-                            display: flex; align-items: center; justify-content: center;
-                            box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
-                    <svg width="24" height="24" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                        <path d="M9 12l2 2 4-4m6 2a9 9 0 11-18 0 9 9 0 0118 0z"/>
-                    </svg>
-                </div>
-                <div style='flex: 1; min-width: 250px;'>
-                    <h4 style='margin: 0 0 0.8rem 0; color: #065f46; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
-                        Recomendação Estratégica
-                    </h4>
-                    <div style='color: #064e3b; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.7;'>
-                        Iniciar intervenções pelos <strong>3 setores prioritários</strong> identificados. A diferença de 
-                        {diferenca_max:.2f} pontos entre o setor mais crítico e a média organizacional indica 
-                        <strong>variação contextual significativa</strong>.
-                        <br><br>
-                        <strong>Próximas ações:</strong>
-                        <ul style='margin: 0.5rem 0 0 0; padding-left: 1.5rem;'>
-                            <li>Diagnóstico aprofundado dos setores críticos</li>
-                            <li>Investigar causas raiz: sobrecarga, recursos, conflitos de gestão, ambiente físico</li>
-                            <li>Desenvolver plano de ação <strong>contextualizado</strong> para cada realidade setorial</li>
-                        </ul>
-                    </div>
-                </div>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
     
-    col_prox1, col_prox2 = st.columns(2)
-    
-    with col_prox1:
-        st.markdown("""
-            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(219, 234, 254, 0.8) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
+    if len(mudancas_classe) > 0:
+        itens_mudanca = "".join(
+            f"<div style='margin-bottom: 0.4rem;'><strong>{subescala}</strong>: {row.classe_anterior} → {row.classe}</div>"
+            for subescala, row in mudancas_classe.iterrows()
+        )
+        st.markdown(f"""
+            <div style='background: linear-gradient(135deg, rgba(59, 130, 246, 0.1) 0%, rgba(37, 99, 235, 0.05) 100%);
+                        padding: clamp(1.5rem, 3vw, 2rem);
                         border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(59, 130, 246, 0.25);
                         border-left: 4px solid #3b82f6;
-                        box-shadow: 0 3px 12px rgba(59, 130, 246, 0.1);'>
-                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
-                    <div style='width: 42px; height: 42px;
-                                background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
-                                border-radius: 10px;
-                                display: flex; align-items: center; justify-content: center;
-                                box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);'>
-                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                            <path d="M9 5l7 7-7 7"/>
-                        </svg>
-                    </div>
-                    <h4 style='margin: 0; color: #1e40af; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
-                        Próximo Passo
-                    </h4>
+                        margin-bottom: 2rem;
+                        box-shadow: 0 4px 16px rgba(59, 130, 246, 0.08);'>
+                <h4 style='margin: 0 0 0.8rem 0; color: #1e40af; font-size: clamp(1rem, 2.2vw, 1.1rem); font-weight: 700;'>
+                    Mudanças de Classe na Matriz de Risco
+                </h4>
+                <div style='color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.7;'>
+                    {itens_mudanca}
                 </div>
-                <p style='margin: 0; color: #1e3a8a; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                    Acesse <strong>Matriz de Risco</strong> para visualizar probabilidade × severidade
-                </p>
             </div>
         """, unsafe_allow_html=True)
     
-    with col_prox2:
-        st.markdown("""
-            <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(209, 250, 229, 0.8) 100%);
-                        padding: clamp(1rem, 3vw, 1.5rem);
-                        border-radius: clamp(10px, 2vw, 14px);
-                        border: 2px solid rgba(16, 185, 129, 0.25);
-                        border-left: 4px solid #10b981;
-                        box-shadow: 0 3px 12px rgba(16, 185, 129, 0.1);'>
-                <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem;'>
-                    <div style='width: 42px; height: 42px;
-                                background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-                                border-radius: 10px;
-                                display: flex; align-items: center; justify-content: center;
-                                box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);'>
-                        <svg width="20" height="20" fill="none" stroke="white" stroke-width="2.5" viewBox="0 0 24 24">
-                            <path d="M5 13l4 4L19 7"/>
-                        </svg>
-                    </div>
-                    <h4 style='margin: 0; color: #065f46; font-size: clamp(0.95rem, 2vw, 1.05rem); font-weight: 700;'>
-                        Conformidade NR-01
-                    </h4>
-                </div>
-                <p style='margin: 0; color: #064e3b; font-size: clamp(0.85rem, 2vw, 0.95rem); line-height: 1.6;'>
-                    Atende análise de <strong>ambiente</strong> e <strong>organização do trabalho</strong>
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Tendência ao Longo das Ondas
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Evolução dos itens selecionados em todas as aplicações da pesquisa
                 </p>
             </div>
-        """, unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
+    
+    fig_tendencia = go.Figure()
+    for item_tendencia in selecionados_tendencia:
+        if nivel_onda == 'subescala':
+            chave_tendencia = ('Organização', item_tendencia)
+        else:
+            chave_tendencia = (item_tendencia, subescala_onda)
+        if chave_tendencia not in tendencia_onda.index:
+            continue
+        serie = tendencia_onda.loc[[chave_tendencia]]
+        fig_tendencia.add_trace(go.Scatter(
+            x=serie['onda'],
+            y=serie[indicador_onda] * (100 if eh_percentual else 1),
+            mode='lines+markers',
+            name=item_tendencia,
+            line=dict(width=3),
+            marker=dict(size=9),
+            hovertemplate='<b>' + item_tendencia + '</b><br>%{x}: %{y:.2f}<extra></extra>'
+        ))
+    
+    layout_config = create_responsive_layout_config()
+    fig_tendencia.update_layout(
+        **layout_config,
+        height=450,
+        xaxis=dict(
+            type='category',
+            categoryorder='array',
+            categoryarray=rotulos_ondas,
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+        ),
+        yaxis=dict(
+            range=[0, 100] if eh_percentual else [0, 5],
+            gridcolor='rgba(196, 166, 114, 0.2)',
+            ticksuffix='%' if eh_percentual else '',
+            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+        ),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='center',
+            x=0.5,
+            font=dict(size=12, family='Arial', color='#5a4a3a')
+        )
+    )
+    exibir_figura(fig_tendencia, 'fig_tendencia')
+    st.markdown("</div>", unsafe_allow_html=True)
 
 
 ####### MATRIZ DE RISCO ########
 elif pagina == "Matriz de Risco":
+    semear_filtros(pagina)
     st.markdown("""
         <style>
         .main .block-container {
@@ -3026,90 +9072,48 @@ elif pagina == "Matriz de Risco":
     """, unsafe_allow_html=True)
     
     with st.expander("Filtros e Configurações", expanded=False):
-        filter_cols = st.columns([1, 1])
+        filter_cols = st.columns([1, 1, 1])
         
         with filter_cols[0]:
-            unique_subescalas_matriz2 = sorted(matriz_data['subescala'].unique().tolist())
+            unique_subescalas_matriz2 = ordenar_subescalas(matriz_data['subescala'], registro_subescalas)
             selected_subescalas_matriz2 = st.multiselect(
                 "Fatores Psicossociais",
                 options=unique_subescalas_matriz2,
-                default=unique_subescalas_matriz2,
                 help="Selecione os fatores para visualizar na matriz",
                 key='matriz2_subescalas'
             )
         
         with filter_cols[1]:
-            show_labels_matriz2 = st.checkbox("Exibir Rótulos", value=True, help="Mostrar nomes dos fatores no gráfico", key='matriz2_labels')
-    
-    filtered_matriz2 = matriz_data[matriz_data['subescala'].isin(selected_subescalas_matriz2)].copy()
+            nivel_matriz2 = st.selectbox(
+                "Nível",
+                options=['organizacao', 'setor'],
+                format_func=lambda x: {'organizacao': 'Organização', 'setor': 'Por Setor'}[x],
+                help="Posicionar os fatores da organização ou cada fator em cada setor",
+                key='matriz2_nivel'
+            )
+        
+        with filter_cols[2]:
+            show_labels_matriz2 = st.checkbox("Exibir Rótulos", help="Mostrar nomes dos fatores no gráfico", key='matriz2_labels')
+    
+    chave_visao = sincronizar_filtros_url(pagina)
+    visao_matriz2 = visao_compartilhada(
+        chave_visao, 'matriz',
+        lambda: calcular_visao_matriz(
+            calcular_matriz_setores(setor_data, escores_data) if nivel_matriz2 == 'setor' else matriz_data,
+            selected_subescalas_matriz2, nivel_matriz2
+        )
+    )
+    filtered_matriz2 = visao_matriz2['filtrado']
     
     if len(filtered_matriz2) == 0:
         st.warning("Nenhum dado encontrado com os filtros selecionados. Ajuste os filtros acima.")
         st.stop()
     
-    # ===== FUNÇÃO DE CLASSIFICAÇÃO DE RISCO =====
-    def classificar_risco(prob, sev):
-        """
-        Classifica o risco com base em probabilidade e severidade.
-        
-        Probabilidade (prob): % de pessoas em risco alto (0-1)
-        - ≥0.60 (≥60%) = Permanente (peso 2.0)
-        - 0.40-0.59 (40-59%) = Intermitente (peso 1.5)
-        - 0.20-0.39 (20-39%) = Esporádica (peso 1.0)
-        - <0.20 (<20%) = Eventual (peso 0.5)
-        
-        Severidade (sev): Score médio (0-5)
-        - >3.66 = Crítica (peso 10.0)
-        - 2.33-3.66 = Grave (peso 3.0)
-        - 1.50-2.33 = Moderada (peso 2.0)
-        - <1.50 = Leve (peso 1.0)
-        """
-        # Mapear probabilidade para peso
-        if prob >= 0.60:
-            prob_peso = 2.0
-        elif prob >= 0.40:
-            prob_peso = 1.5
-        elif prob >= 0.20:
-            prob_peso = 1.0
-        else:
-            prob_peso = 0.5
-        
-        # Mapear severidade para peso
-        if sev > 3.66:
-            sev_peso = 10.0
-        elif sev >= 2.33:
-            sev_peso = 3.0
-        elif sev >= 1.50:
-            sev_peso = 2.0
-        else:
-            sev_peso = 1.0
-        
-        # Calcular pontuação
-        pontuacao = prob_peso * sev_peso
-        
-        # Classificar resultado
-        if pontuacao >= 5.0:
-            return 'CRÍTICO', pontuacao
-        elif pontuacao >= 3.0:
-            return 'ALTO', pontuacao
-        elif pontuacao >= 1.5:
-            return 'MÉDIO', pontuacao
-        else:
-            return 'BAIXO', pontuacao
-    
-    # Aplicar classificação
-    filtered_matriz2['classificacao'] = filtered_matriz2.apply(
-        lambda row: classificar_risco(row['probabilidade'], row['severidade'])[0], axis=1
-    )
-    filtered_matriz2['pontuacao'] = filtered_matriz2.apply(
-        lambda row: classificar_risco(row['probabilidade'], row['severidade'])[1], axis=1
-    )
-    
     # Contar por classificação
-    critico = len(filtered_matriz2[filtered_matriz2['classificacao'] == 'CRÍTICO'])
-    alto = len(filtered_matriz2[filtered_matriz2['classificacao'] == 'ALTO'])
-    medio = len(filtered_matriz2[filtered_matriz2['classificacao'] == 'MÉDIO'])
-    baixo = len(filtered_matriz2[filtered_matriz2['classificacao'] == 'BAIXO'])
+    critico = visao_matriz2['contagens'].get('CRÍTICO', 0)
+    alto = visao_matriz2['contagens'].get('ALTO', 0)
+    medio = visao_matriz2['contagens'].get('MÉDIO', 0)
+    baixo = visao_matriz2['contagens'].get('BAIXO', 0)
     
     # KPIs
     kpi1, kpi2, kpi3, kpi4 = st.columns(4)
@@ -3263,221 +9267,53 @@ elif pagina == "Matriz de Risco":
                             <td style='padding: 1rem; border: 1px solid #e5e7eb; text-align: center; background: #eab308; color: white; font-weight: 700;'>MÉDIO<br>2,0</td>
                             <td style='padding: 1rem; border: 1px solid #e5e7eb; text-align: center; background: #eab308; color: white; font-weight: 700;'>MÉDIO<br>1,5</td>
                             <td style='padding: 1rem; border: 1px solid #e5e7eb; text-align: center; background: #3b82f6; color: white; font-weight: 700;'>BAIXO<br>1,0</td>
-                            <td style='padding: 1rem; border: 1px solid #e5e7eb; text-align: center; background: #3b82f6; color: white; font-weight: 700;'>BAIXO<br>0,5</td>
-                        </tr>
-                    </tbody>
-                </table>
-            </div>
-            <div style='margin-top: 1.5rem; padding: 1rem; background: rgba(255, 255, 255, 0.7); border-radius: 8px; border-left: 3px solid #c4a672;'>
-                <p style='margin: 0; color: #6b5847; font-size: 0.9rem; line-height: 1.6;'>
-                    <strong>Probabilidade:</strong> Probabilidade de ocorrência do possível dano e/ou lesão<br>
-                    <strong>Severidade:</strong> Consequências do dano e/ou lesão criados, ou seja, a amplitude da gravidade deste dano
-                </p>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
-                    padding: clamp(1.5rem, 3vw, 2rem);
-                    border-radius: clamp(12px, 2vw, 16px);
-                    border: 2px solid rgba(196, 166, 114, 0.2);
-                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
-                    margin-bottom: 2rem;'>
-            <div style='margin-bottom: 1.5rem;'>
-                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
-                    Distribuição dos Riscos na Matriz
-                </h3>
-                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
-                    Visualização dos fatores psicossociais por nível de criticidade
-                </p>
-            </div>
-    """, unsafe_allow_html=True)
-    
-    # Normalizar probabilidade para eixo X (0-10)
-    filtered_matriz2['prob_norm'] = filtered_matriz2['probabilidade'] * 10
-    
-    # ===== FUNÇÃO PARA SEPARAR PONTOS SOBREPOSTOS =====
-    def separar_pontos_sobrepostos(df, threshold=0.4):
-        """Separa pontos que estão muito próximos na matriz"""
-        import numpy as np
-        
-        df_plot = df.copy()
-        positions = df_plot[['prob_norm', 'severidade']].values.astype(float)
-        n_points = len(positions)
-        
-        if n_points <= 1:
-            df_plot['prob_ajustado'] = df_plot['prob_norm']
-            df_plot['sev_ajustado'] = df_plot['severidade']
-            return df_plot
-        
-        # Aplicar deslocamento iterativo
-        for iteration in range(50):
-            moved = False
-            for i in range(n_points):
-                for j in range(i + 1, n_points):
-                    dx = positions[i, 0] - positions[j, 0]
-                    dy = positions[i, 1] - positions[j, 1]
-                    dist = np.sqrt(dx**2 + dy**2)
-                    
-                    if dist < threshold and dist > 0:
-                        # Normalizar vetor
-                        if dist > 0:
-                            dx /= dist
-                            dy /= dist
-                        else:
-                            angle = np.random.uniform(0, 2 * np.pi)
-                            dx = np.cos(angle)
-                            dy = np.sin(angle)
-                        
-                        # Aplicar deslocamento
-                        offset = 0.15
-                        positions[i, 0] += dx * offset
-                        positions[i, 1] += dy * offset
-                        positions[j, 0] -= dx * offset
-                        positions[j, 1] -= dy * offset
-                        moved = True
-            
-            if not moved:
-                break
-        
-        # Manter dentro dos limites
-        positions[:, 0] = np.clip(positions[:, 0], 0.5, 9.5)
-        positions[:, 1] = np.clip(positions[:, 1], 0.3, 4.7)
-        
-        df_plot['prob_ajustado'] = positions[:, 0]
-        df_plot['sev_ajustado'] = positions[:, 1]
-        
-        return df_plot
-    
-    # Aplicar separação de pontos
-    filtered_matriz2 = separar_pontos_sobrepostos(filtered_matriz2)
-    
-    matriz_height = calculate_responsive_height(len(filtered_matriz2), min_height=600, item_height=25, max_height=850)
-    
-    fig7 = go.Figure()
-
-    # ===== ZONAS COLORIDAS =====
-    # ZONAS CRÍTICAS (Vermelho) - Severidade > 3.66
-    fig7.add_shape(type="rect", x0=6, y0=3.66, x1=10, y1=5, fillcolor="rgba(220, 38, 38, 0.15)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=4, y0=3.66, x1=6, y1=5, fillcolor="rgba(220, 38, 38, 0.15)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=2, y0=3.66, x1=4, y1=5, fillcolor="rgba(220, 38, 38, 0.15)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=0, y0=3.66, x1=2, y1=5, fillcolor="rgba(220, 38, 38, 0.15)", line=dict(width=0), layer="below")
-    
-    # ZONAS ALTAS (Laranja) - Severidade 2.33-3.66
-    fig7.add_shape(type="rect", x0=6, y0=2.33, x1=10, y1=3.66, fillcolor="rgba(245, 158, 11, 0.12)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=4, y0=2.33, x1=6, y1=3.66, fillcolor="rgba(245, 158, 11, 0.12)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=2, y0=2.33, x1=4, y1=3.66, fillcolor="rgba(245, 158, 11, 0.12)", line=dict(width=0), layer="below")
-    
-    # ZONAS MÉDIAS (Amarelo)
-    fig7.add_shape(type="rect", x0=0, y0=2.33, x1=2, y1=3.66, fillcolor="rgba(234, 179, 8, 0.10)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=2, y0=1.50, x1=4, y1=2.33, fillcolor="rgba(234, 179, 8, 0.10)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=4, y0=1.50, x1=6, y1=2.33, fillcolor="rgba(234, 179, 8, 0.10)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=6, y0=1.50, x1=10, y1=2.33, fillcolor="rgba(234, 179, 8, 0.10)", line=dict(width=0), layer="below")
-    
-    # ZONAS BAIXAS (Azul)
-    fig7.add_shape(type="rect", x0=0, y0=0, x1=2, y1=1.50, fillcolor="rgba(59, 130, 246, 0.08)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=2, y0=0, x1=4, y1=1.50, fillcolor="rgba(59, 130, 246, 0.08)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=4, y0=0, x1=6, y1=1.50, fillcolor="rgba(59, 130, 246, 0.08)", line=dict(width=0), layer="below")
-    fig7.add_shape(type="rect", x0=6, y0=0, x1=10, y1=1.50, fillcolor="rgba(59, 130, 246, 0.08)", line=dict(width=0), layer="below")
-    
-    # Adicionar pontos por classificação COM SEPARAÇÃO VISUAL
-    color_map_class = {
-        'CRÍTICO': '#dc2626',
-        'ALTO': '#f59e0b',
-        'MÉDIO': '#eab308',
-        'BAIXO': '#3b82f6'
-    }
-    
-    for classificacao in ['BAIXO', 'MÉDIO', 'ALTO', 'CRÍTICO']:
-        df_class = filtered_matriz2[filtered_matriz2['classificacao'] == classificacao]
-        if len(df_class) > 0:
-            fig7.add_trace(go.Scatter(
-                x=df_class['prob_ajustado'],  # ← USANDO POSIÇÕES AJUSTADAS
-                y=df_class['sev_ajustado'],   # ← USANDO POSIÇÕES AJUSTADAS
-                mode='markers+text' if show_labels_matriz2 else 'markers',
-                name=classificacao,
-                marker=dict(
-                    size=24,
-                    color=color_map_class[classificacao],
-                    line=dict(width=3, color='white'),
-                    opacity=0.9
-                ),
-                text=df_class['subescala'].str[:20] if show_labels_matriz2 else '',
-                textposition='top center',
-                textfont=dict(size=11, color='#1e293b', family='Arial', weight='bold'),
-                hovertemplate='<b>%{text}</b><br>Probabilidade: %{customdata[0]:.1f}/10 (%{customdata[1]:.0%})<br>Severidade: %{customdata[2]:.2f}/5<br>Pontuação: %{customdata[3]:.1f}<br><b>Risco: ' + classificacao + '</b><extra></extra>',
-                customdata=df_class[['prob_norm', 'probabilidade', 'severidade', 'pontuacao']].values
-            ))
-    
-    # ===== LINHAS HORIZONTAIS =====
-    fig7.add_hline(y=3.66, line_dash="dash", line_color="#dc2626", line_width=2.5, 
-                annotation_text="Severidade Crítica (>3.66)", annotation_position="right",
-                annotation_font=dict(size=12, color='#dc2626', family='Arial', weight='bold'))
-    fig7.add_hline(y=2.33, line_dash="dash", line_color="#f59e0b", line_width=2,
-                annotation_text="Severidade Grave (2.33-3.66)", annotation_position="right",
-                annotation_font=dict(size=11, color='#f59e0b', family='Arial'))
-    fig7.add_hline(y=1.50, line_dash="dash", line_color="#eab308", line_width=1.5,
-                annotation_text="Severidade Moderada (1.50-2.33)", annotation_position="right",
-                annotation_font=dict(size=10, color='#eab308', family='Arial'))
+                            <td style='padding: 1rem; border: 1px solid #e5e7eb; text-align: center; background: #3b82f6; color: white; font-weight: 700;'>BAIXO<br>0,5</td>
+                        </tr>
+                    </tbody>
+                </table>
+            </div>
+            <div style='margin-top: 1.5rem; padding: 1rem; background: rgba(255, 255, 255, 0.7); border-radius: 8px; border-left: 3px solid #c4a672;'>
+                <p style='margin: 0; color: #6b5847; font-size: 0.9rem; line-height: 1.6;'>
+                    <strong>Probabilidade:</strong> Probabilidade de ocorrência do possível dano e/ou lesão<br>
+                    <strong>Severidade:</strong> Consequências do dano e/ou lesão criados, ou seja, a amplitude da gravidade deste dano
+                </p>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
     
-    # ===== LINHAS VERTICAIS =====
-    fig7.add_vline(x=6, line_dash="dash", line_color="#dc2626", line_width=2.5,
-                annotation_text="Prob. Permanente (60%)", annotation_position="top",
-                annotation_font=dict(size=12, color='#dc2626', family='Arial', weight='bold'))
-    fig7.add_vline(x=4, line_dash="dash", line_color="#f59e0b", line_width=2,
-                annotation_text="Prob. Intermitente (40%)", annotation_position="top",
-                annotation_font=dict(size=11, color='#f59e0b', family='Arial'))
-    fig7.add_vline(x=2, line_dash="dash", line_color="#eab308", line_width=1.5,
-                annotation_text="Prob. Esporádica (20%)", annotation_position="top",
-                annotation_font=dict(size=10, color='#eab308', family='Arial'))
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Distribuição dos Riscos na Matriz
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Visualização dos fatores psicossociais por nível de criticidade
+                </p>
+            </div>
+    """, unsafe_allow_html=True)
     
-    # Layout
-    layout_config = create_responsive_layout_config()
-    fig7.update_layout(
-        **layout_config,
-        height=matriz_height,
-        xaxis=dict(
-            range=[0, 10],
-            gridcolor='rgba(196, 166, 114, 0.2)',
-            showline=True,
-            linewidth=2,
-            linecolor='rgba(107, 88, 71, 0.3)',
-            title=dict(
-                text='<b>Probabilidade de Ocorrência</b> (0 = Eventual → 10 = Permanente)',
-                font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
-            ),
-            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold'),
-            dtick=1
-        ),
-        yaxis=dict(
-            range=[0, 5],
-            gridcolor='rgba(196, 166, 114, 0.2)',
-            showline=True,
-            linewidth=2,
-            linecolor='rgba(107, 88, 71, 0.3)',
-            title=dict(
-                text='<b>Severidade do Impacto</b> (0 = Leve → 5 = Catastrófica)',
-                font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
-            ),
-            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold'),
-            dtick=1
-        ),
-        showlegend=True,
-        legend=dict(
-            orientation='h',
-            yanchor='bottom',
-            y=1.02,
-            xanchor='center',
-            x=0.5,
-            bgcolor='rgba(255, 255, 255, 0.95)',
-            bordercolor='rgba(196, 166, 114, 0.4)',
-            borderwidth=2,
-            font=dict(size=13, family='Arial', color='#5a4a3a', weight='bold')
-        )
+    pontos_matriz2 = visao_compartilhada(chave_visao, 'matriz_pontos', lambda: posicionar_pontos_matriz(filtered_matriz2))
+    fig7, tamanho_fig7 = figura_compartilhada(
+        chave_visao, 'fig7', lambda: figura_matriz(pontos_matriz2, show_labels_matriz2, snapshot_dados['normas'])
     )
-    
-    st.plotly_chart(fig7, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
+    evento_fig7 = exibir_figura(fig7, 'fig7', selecao='matriz_selecao', tamanho=tamanho_fig7)
+    selecao_matriz = ponto_selecionado({'matriz_selecao': evento_fig7})
+    if selecao_matriz is not None:
+        # Linhas de cada traço, para traduzir o clique (curve_number, point_index)
+        pontos_tracos_matriz = tracos_matriz(pontos_matriz2)
+        if selecao_matriz[1]['curve_number'] < len(pontos_tracos_matriz):
+            ponto_matriz = pontos_tracos_matriz[selecao_matriz[1]['curve_number']][2].iloc[selecao_matriz[1]['point_index']]
+            exibir_resumo_subescala(
+                ponto_matriz['subescala'], 'matriz_abrir_detalhe',
+                (f"{ponto_matriz['setor']}: " if ponto_matriz['rotulo'] != ponto_matriz['subescala'] else '') +
+                f"risco {ponto_matriz['classificacao']}, pontuação {ponto_matriz['pontuacao']:.1f}"
+            )
     st.markdown("</div>", unsafe_allow_html=True)
     
     st.markdown("""
@@ -3650,6 +9486,7 @@ elif pagina == "Matriz de Risco":
         """, unsafe_allow_html=True)
 
 elif pagina == "Detalhamento & Ações":
+    semear_filtros(pagina)
     st.markdown("""
         <style>
         .main .block-container {
@@ -3749,7 +9586,8 @@ elif pagina == "Detalhamento & Ações":
         </div>
     """, unsafe_allow_html=True)
     
-    subscalas_disponiveis = sorted(detalhamento_data['subescala'].unique())
+    indice_detalhamento = snapshot_dados['indice_detalhamento']
+    subscalas_disponiveis = list(indice_detalhamento)
     
     col_sel1, col_sel2, col_sel3 = st.columns([2, 1, 1])
     
@@ -3764,12 +9602,15 @@ elif pagina == "Detalhamento & Ações":
         subscala_selecionada = st.selectbox(
             "",
             options=subscalas_disponiveis,
-            index=0,
-            label_visibility="collapsed"
+            label_visibility="collapsed",
+            key='detalhe_subescala'
         )
     
+    chave_visao = sincronizar_filtros_url(pagina)
+    visao_detalhe = indice_detalhamento[subscala_selecionada]
+    
     with col_sel2:
-        qtd_itens = len(detalhamento_data[detalhamento_data['subescala'] == subscala_selecionada])
+        qtd_itens = visao_detalhe['qtd']
         st.markdown(f"""
             <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                         padding: clamp(0.8rem, 2vw, 1rem);
@@ -3787,8 +9628,7 @@ elif pagina == "Detalhamento & Ações":
         """, unsafe_allow_html=True)
     
     with col_sel3:
-        df_temp = detalhamento_data[detalhamento_data['subescala'] == subscala_selecionada]
-        media_fator = df_temp['media'].mean()
+        media_fator = visao_detalhe['media']
         st.markdown(f"""
             <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
                         padding: clamp(0.8rem, 2vw, 1rem);
@@ -3824,53 +9664,11 @@ elif pagina == "Detalhamento & Ações":
             </div>
     """, unsafe_allow_html=True)
     
-    df_detalhe = detalhamento_data[detalhamento_data['subescala'] == subscala_selecionada].copy()
-    df_detalhe = df_detalhe.sort_values('media', ascending=True)
-    
-    colors_detalhe = [get_risk_color_classe(classe) for classe in df_detalhe['classe_risco']]
-    
-    num_items_detalhe = len(df_detalhe)
-    chart_height_detalhe = calculate_responsive_height(num_items_detalhe, min_height=400, item_height=35)
-
-    fig7 = go.Figure(go.Bar(
-        x=df_detalhe['media'],
-        y=df_detalhe['pergunta'],
-        orientation='h',
-        marker=dict(
-            color=colors_detalhe,
-            line=dict(width=1, color='rgba(0,0,0,0.05)')
-        ),
-        text=df_detalhe['media'].round(2),
-        textposition='outside',
-        textfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
-        customdata=df_detalhe['classe_risco'],
-        hovertemplate='<b>%{y}</b><br>Score Médio: <b>%{x:.2f}</b><br>Classe: %{customdata}<extra></extra>'
-    ))
-
-    layout_config = create_responsive_layout_config()
-    fig7.update_layout(
-        **layout_config,
-        height=chart_height_detalhe,
-        showlegend=False,
-        xaxis=dict(
-            range=[0, 5],
-            gridcolor='rgba(196, 166, 114, 0.2)',
-            showline=False,
-            title=dict(
-                text='Score Médio (0 = Baixo Risco → 5 = Alto Risco)',
-                font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
-            ),
-            tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
-        ),
-        yaxis=dict(
-            tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
-            showline=False
-        )
-    )
-    st.plotly_chart(fig7, use_container_width=True, config={'responsive': True, 'displayModeBar': False})
+    fig7, tamanho_fig7 = figura_compartilhada(chave_visao, 'fig7', lambda: figura_detalhamento(visao_detalhe))
+    exibir_figura(fig7, 'fig7', tamanho=tamanho_fig7)
     st.markdown("</div>", unsafe_allow_html=True)
     
-    item_critico = df_detalhe.nlargest(1, 'media').iloc[0]
+    item_critico = visao_detalhe['item_critico']
     
     st.markdown(f"""
         <div style='background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
@@ -3903,6 +9701,102 @@ elif pagina == "Detalhamento & Ações":
         </div>
     """, unsafe_allow_html=True)
     
+    # ===== CONSISTÊNCIA INTERNA DO FATOR =====
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 2rem;'>
+            <div style='margin-bottom: 1.5rem;'>
+                <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                    Consistência Interna do Fator
+                </h3>
+                <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                    Alfa de Cronbach e contribuição de cada pergunta - Correlação item-total corrigida e alfa se o item for excluído
+                </p>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    arquivo_respostas = caminho_respostas()
+    if arquivo_respostas.exists():
+        estado_confiabilidade = obter_estado_confiabilidade(str(arquivo_respostas), tuple(detalhamento_data['pergunta']))
+        confiabilidade = obter_confiabilidade(estado_confiabilidade, arquivo_respostas, detalhamento_data)
+        confiab_fator = confiabilidade.get(subscala_selecionada)
+        
+        if confiab_fator is None or confiab_fator['itens'] < 2:
+            st.info("Este fator possui um único item; a consistência interna não se aplica.")
+        else:
+            alfa_fator = confiab_fator['alfa']
+            if alfa_fator >= 0.8:
+                leitura_alfa, cor_alfa = 'Boa', '#10b981'
+            elif alfa_fator >= 0.7:
+                leitura_alfa, cor_alfa = 'Aceitável', '#f59e0b'
+            else:
+                leitura_alfa, cor_alfa = 'Baixa', '#dc2626'
+            
+            st.markdown(f"""
+                <div style='display: flex; align-items: baseline; gap: 1rem; margin-bottom: 1rem; flex-wrap: wrap;'>
+                    <span style='color: #8b7663; font-size: clamp(0.8rem, 1.8vw, 0.9rem); font-weight: 700; text-transform: uppercase;'>
+                        Alfa de Cronbach
+                    </span>
+                    <span style='color: {cor_alfa}; font-size: clamp(1.5rem, 4vw, 1.8rem); font-weight: 800;'>
+                        {alfa_fator:.2f}
+                    </span>
+                    <span style='color: {cor_alfa}; font-weight: 700;'>{leitura_alfa}</span>
+                    <span style='color: #8b7663; font-size: clamp(0.75rem, 1.7vw, 0.85rem);'>
+                        {confiab_fator['respondentes']} respondentes
+                    </span>
+                </div>
+            """, unsafe_allow_html=True)
+            
+            itens_confiab = confiab_fator['perguntas']
+            colors_confiab = ['#10b981' if r >= 0.3 else '#dc2626' for r in itens_confiab['r_item_total']]
+            
+            fig_confiab = go.Figure(go.Bar(
+                x=itens_confiab['r_item_total'],
+                y=itens_confiab['pergunta'],
+                orientation='h',
+                marker=dict(
+                    color=colors_confiab,
+                    line=dict(width=1, color='rgba(0,0,0,0.05)')
+                ),
+                text=itens_confiab['r_item_total'].round(2),
+                textposition='outside',
+                textfont=dict(size=14, color='#5a4a3a', family='Arial', weight='bold'),
+                customdata=itens_confiab['alfa_sem_item'],
+                hovertemplate='<b>%{y}</b><br>Correlação item-total: <b>%{x:.2f}</b><br>Alfa se excluído: %{customdata:.2f}<extra></extra>'
+            ))
+            
+            layout_config = create_responsive_layout_config()
+            fig_confiab.update_layout(
+                **layout_config,
+                height=calculate_responsive_height(len(itens_confiab), min_height=300, item_height=35),
+                showlegend=False,
+                xaxis=dict(
+                    range=[min(0, itens_confiab['r_item_total'].min() - 0.1), 1],
+                    gridcolor='rgba(196, 166, 114, 0.2)',
+                    showline=False,
+                    title=dict(
+                        text='Correlação Item-Total Corrigida (referência ≥ 0.30)',
+                        font=dict(size=14, color='#5a4a3a', family='Arial', weight='bold')
+                    ),
+                    tickfont=dict(size=13, color='#6b5847', family='Arial', weight='bold')
+                ),
+                yaxis=dict(
+                    tickfont=dict(size=13, color='#5a4a3a', family='Arial', weight='bold'),
+                    showline=False,
+                    autorange='reversed'
+                )
+            )
+            fig_confiab.add_vline(x=0.3, line_dash="dash", line_color="#b89656", line_width=1.5)
+            exibir_figura(fig_confiab, 'fig_confiab')
+    else:
+        st.info("A consistência interna requer as respostas brutas por respondente (archives/respostas.csv).")
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+    
     st.markdown("""
         <div style='margin: 2rem 0 1.5rem 0;'>
             <h3 style='color: #5a4a3a; font-size: clamp(1.1rem, 2.5vw, 1.3rem); font-weight: 700;'>
@@ -4037,6 +9931,115 @@ elif pagina == "Detalhamento & Ações":
         """, unsafe_allow_html=True)
     
     st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
+
+    # ===== ACOMPANHAMENTO DAS AÇÕES (planos/acoes.db) =====
+    acoes_por_status, acoes_por_setor = contar_acoes_por_status(subscala_selecionada)
+    resumo_status = ' · '.join(f"{status}: <strong>{acoes_por_status.get(status, 0)}</strong>" for status in STATUS_ACOES)
+    st.markdown(f"""
+        <div style='background: linear-gradient(135deg, rgba(255, 255, 255, 0.95) 0%, rgba(248, 242, 230, 0.9) 100%);
+                    padding: clamp(1.5rem, 3vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    border: 2px solid rgba(196, 166, 114, 0.2);
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);
+                    margin-bottom: 1rem;'>
+            <h3 style='margin: 0; color: #5a4a3a; font-size: clamp(1.2rem, 3vw, 1.4rem); font-weight: 700;'>
+                Acompanhamento das Ações
+            </h3>
+            <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                Ações adotadas para <strong>{subscala_selecionada}</strong>, responsáveis e andamento
+            </p>
+            <div style='margin-top: 0.8rem; color: #6b5847; font-size: clamp(0.8rem, 2vw, 0.9rem);'>
+                {resumo_status}
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+
+    def nome_unidade(setor):
+        return setor or 'Toda a organização'
+
+    with st.expander("Registrar nova ação", expanded=False):
+        with st.form('detalhe_nova_acao', clear_on_submit=True):
+            form_cols = st.columns(3)
+            with form_cols[0]:
+                tipo_acao = st.selectbox("Tipo", options=TIPOS_ACOES)
+            with form_cols[1]:
+                setor_acao = st.selectbox("Unidade", options=[''] + sorted(setor_data['setor'].unique().tolist()), format_func=nome_unidade)
+            with form_cols[2]:
+                pergunta_acao = st.selectbox("Pergunta", options=[''] + visao_detalhe['itens']['pergunta'].tolist(), format_func=lambda p: p or 'Todas do fator')
+            descricao_acao = st.text_area("Descrição da ação")
+            form_cols = st.columns(3)
+            with form_cols[0]:
+                responsavel_acao = st.text_input("Responsável")
+            with form_cols[1]:
+                status_acao = st.selectbox("Status", options=STATUS_ACOES)
+            with form_cols[2]:
+                prazo_acao = st.date_input("Prazo", value=None, format="DD/MM/YYYY")
+            if st.form_submit_button("Registrar ação"):
+                if descricao_acao.strip():
+                    gravar_acoes(novas=[{
+                        'subescala': subscala_selecionada,
+                        'setor': setor_acao,
+                        'pergunta': pergunta_acao,
+                        'tipo': tipo_acao,
+                        'descricao': descricao_acao.strip(),
+                        'responsavel': responsavel_acao.strip(),
+                        'status': status_acao,
+                        'prazo': prazo_acao.isoformat() if prazo_acao else None
+                    }])
+                    st.rerun()
+                else:
+                    st.warning("Descreva a ação antes de registrar.")
+
+    if acoes_por_setor:
+        filtro_cols = st.columns([2, 1])
+        with filtro_cols[0]:
+            unidade_acoes = st.selectbox(
+                "Ações abertas por unidade",
+                options=[None] + sorted(acoes_por_setor),
+                format_func=lambda u: f"Todas ({sum(acoes_por_setor.values())})" if u is None else f"{nome_unidade(u)} ({acoes_por_setor[u]})",
+                key='detalhe_acoes_unidade'
+            )
+        total_acoes = sum(acoes_por_setor.values()) if unidade_acoes is None else acoes_por_setor.get(unidade_acoes, 0)
+        paginas_acoes = max(1, -(-total_acoes // ACOES_POR_PAGINA))
+        with filtro_cols[1]:
+            pagina_acoes = st.number_input("Página", min_value=1, max_value=paginas_acoes, value=1, key='detalhe_acoes_pagina') if paginas_acoes > 1 else 1
+
+        acoes_abertas = listar_acoes_abertas(subscala_selecionada, unidade_acoes, pagina_acoes - 1)
+        acoes_abertas['setor'] = acoes_abertas['setor'].map(nome_unidade)
+        st.data_editor(
+            acoes_abertas,
+            key='detalhe_acoes_editor',
+            hide_index=True,
+            use_container_width=True,
+            disabled=['id', 'setor', 'pergunta', 'tipo', 'descricao', 'prazo'],
+            column_config={
+                'id': None,
+                'setor': "Unidade",
+                'pergunta': "Pergunta",
+                'tipo': "Tipo",
+                'descricao': st.column_config.TextColumn("Descrição", width='large'),
+                'responsavel': "Responsável",
+                'status': st.column_config.SelectboxColumn("Status", options=STATUS_ACOES, required=True),
+                'prazo': "Prazo"
+            }
+        )
+        # Só as linhas editadas vão ao banco, todas numa transação
+        edicoes_acoes = st.session_state['detalhe_acoes_editor']['edited_rows']
+        if st.button("Salvar alterações", disabled=not edicoes_acoes, key='detalhe_acoes_salvar'):
+            gravar_acoes(alteracoes=[
+                {
+                    'id': int(acoes_abertas['id'].iat[linha]),
+                    'status': campos.get('status', acoes_abertas['status'].iat[linha]),
+                    'responsavel': campos.get('responsavel', acoes_abertas['responsavel'].iat[linha])
+                }
+                for linha, campos in edicoes_acoes.items()
+            ])
+            del st.session_state['detalhe_acoes_editor']
+            st.rerun()
+    else:
+        st.info("Nenhuma ação aberta para este fator. Registre as ações adotadas acima para acompanhá-las.")
+    
+    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
     
     st.markdown("""
         <div style='background: linear-gradient(135deg, rgba(16, 185, 129, 0.1) 0%, rgba(5, 150, 105, 0.05) 100%);
@@ -4067,6 +10070,198 @@ elif pagina == "Detalhamento & Ações":
         </div>
     """, unsafe_allow_html=True)
 
+elif pagina == "Importar Dados":
+    st.markdown("""
+        <style>
+        .main .block-container {
+            max-width: 100%;
+            padding: clamp(0.5rem, 2vw, 2rem);
+        }
+        @media (max-width: 768px) {
+            .main .block-container {
+                padding: 0.5rem;
+            }
+            [data-testid="stHorizontalBlock"] > div {
+                width: 100% !important;
+                flex: 1 1 100% !important;
+            }
+        }
+        
+        [data-testid="stFileUploader"] section {
+            background: white;
+            border: 2px dashed rgba(196, 166, 114, 0.5);
+            border-radius: 10px;
+        }
+        
+        .stCheckbox label {
+            color: #5a4a3a;
+            font-weight: 500;
+        }
+        
+        .stProgress > div > div > div > div {
+            background: linear-gradient(90deg, #c4a672 0%, #b89656 100%);
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div style='background: linear-gradient(135deg, rgba(196, 166, 114, 0.12) 0%, rgba(232, 220, 200, 0.08) 100%);
+                    padding: clamp(1rem, 3vw, 1.5rem) clamp(1.5rem, 4vw, 2rem);
+                    border-radius: clamp(12px, 2vw, 16px);
+                    margin-bottom: 2rem;
+                    border-left: 4px solid #c4a672;
+                    box-shadow: 0 4px 16px rgba(107, 88, 71, 0.08);'>
+            <div style='display: flex; align-items: center; justify-content: space-between; flex-wrap: wrap; gap: 1rem;'>
+                <div style='flex: 1; min-width: 200px;'>
+                    <h1 style='margin: 0; color: #5a4a3a; font-size: clamp(1.5rem, 4vw, 2.2rem); font-weight: 800; letter-spacing: -0.5px;'>
+                        Importar Dados
+                    </h1>
+                    <p style='margin: 0.4rem 0 0 0; color: #8b7663; font-size: clamp(0.85rem, 2vw, 1rem);'>
+                        Atualização dos painéis a partir da exportação bruta da pesquisa
+                    </p>
+                </div>
+                <div style='background: linear-gradient(135deg, #c4a672 0%, #b89656 100%);
+                            padding: 0.7rem 1.3rem;
+                            border-radius: 10px;
+                            text-align: center;
+                            box-shadow: 0 4px 12px rgba(168, 136, 70, 0.3);'>
+                    <div style='color: rgba(255, 255, 255, 0.85); font-size: 0.7rem; font-weight: 600; letter-spacing: 0.5px;'>
+                        CONFORME
+                    </div>
+                    <div style='color: white; font-size: 1.3rem; font-weight: 800; letter-spacing: 1.5px;'>
+                        NR-01
+                    </div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    sincronizar_filtros_url(pagina)
+    
+    importacoes = obter_importacoes()
+    tarefa_importacao = importacoes['tarefas'].get(importacoes['ultima'])
+    importacao_ativa = tarefa_importacao is not None and tarefa_importacao['situacao'] in SITUACOES_IMPORTACAO_ATIVAS
+    
+    st.markdown(f"""
+        <div style='color: #6b5847; font-size: 0.9rem; line-height: 1.7; margin-bottom: 1rem;'>
+            Envie o CSV exportado da pesquisa, com uma linha por respondente, as colunas
+            <strong>cargo</strong> e <strong>setor</strong> e uma coluna por pergunta (q1, q2, ...),
+            com respostas de {FAIXA_RESPOSTAS[0]} a {FAIXA_RESPOSTAS[1]}. O arquivo é lido em blocos de
+            {f"{TAMANHO_BLOCO_IMPORTACAO:,}".replace(',', '.')} linhas em segundo plano: os painéis continuam
+            disponíveis e são atualizados automaticamente ao final.
+        </div>
+    """, unsafe_allow_html=True)
+    
+    with st.form('importar_formulario', clear_on_submit=True):
+        arquivo_importacao = st.file_uploader(
+            "Exportação bruta (CSV)",
+            type=['csv'],
+            key='importar_arquivo'
+        )
+        cols_onda = st.columns([1, 1])
+        with cols_onda[0]:
+            arquivar_onda = st.checkbox(
+                "Guardar os dados atuais como onda",
+                value=True,
+                help="Copia os arquivos atuais para archives/ondas/<rótulo>/ antes da troca, para a página Evolução entre Ondas",
+                key='importar_arquivar_onda'
+            )
+        with cols_onda[1]:
+            rotulo_onda = st.text_input(
+                "Rótulo da onda atual",
+                value=time.strftime('%Y-%m'),
+                help="Nome da pasta da onda (ex.: 2025-07); define a ordem cronológica",
+                key='importar_rotulo_onda'
+            )
+        enviar_importacao = st.form_submit_button(
+            "Importar",
+            type="primary",
+            disabled=importacao_ativa
+        )
+    
+    if enviar_importacao:
+        rotulo_onda = rotulo_onda.strip()
+        if arquivo_importacao is None:
+            st.warning("Selecione um arquivo CSV.")
+        elif arquivar_onda and (not rotulo_onda or not re.fullmatch(r'[\w.\- ]+', rotulo_onda)):
+            st.warning("Informe um rótulo de onda com letras, números, espaços, '.', '-' ou '_'.")
+        else:
+            try:
+                tarefa_importacao = iniciar_importacao(
+                    arquivo_importacao,
+                    arquivo_importacao.name,
+                    snapshot_dados,
+                    rotulo_onda if arquivar_onda else None
+                )
+                importacao_ativa = True
+            except (ValueError, OSError) as erro:
+                st.error(str(erro))
+    
+    def exibir_progresso_importacao(tarefa, ativa):
+        rotulos_situacao = {
+            'recebida': 'Arquivo recebido',
+            'lendo': 'Lendo e validando respostas',
+            'agregando': 'Calculando os indicadores',
+            'publicando': 'Publicando os novos dados',
+            'concluida': 'Importação concluída',
+            'erro': 'Importação interrompida'
+        }
+        situacao = tarefa['situacao']
+        duracao = (tarefa['fim'] or time.time()) - tarefa['inicio']
+        st.progress(
+            tarefa['progresso'],
+            text=f"{rotulos_situacao[situacao]} - {tarefa['nome']} ({tarefa['progresso']:.0%}, {duracao:.0f} s)"
+        )
+        
+        relatorio = tarefa['relatorio']
+        metricas = st.columns(3)
+        metricas[0].metric("Respondentes válidos", f"{tarefa['linhas']:,}".replace(',', '.'))
+        metricas[1].metric("Linhas descartadas", f"{tarefa['descartadas']:,}".replace(',', '.'))
+        metricas[2].metric(
+            "Respostas inválidas",
+            f"{relatorio.ocorrencias['fora_da_faixa'] / relatorio.respostas:.1%}" if relatorio.respostas else "-",
+            help=f"Valores não numéricos ou fora de {FAIXA_RESPOSTAS[0]}-{FAIXA_RESPOSTAS[1]}; acima de {LIMITE_INVALIDOS_IMPORTACAO:.0%} a importação é interrompida"
+        )
+        for aviso in tarefa['avisos']:
+            st.caption(aviso)
+        
+        tabela_validacao = relatorio.tabela()
+        if len(tabela_validacao):
+            st.markdown("**Relatório de validação**")
+            st.dataframe(
+                tabela_validacao,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    'severidade': st.column_config.TextColumn("Severidade", width='small'),
+                    'regra': st.column_config.TextColumn("Regra", width='large'),
+                    'ocorrencias': st.column_config.NumberColumn("Ocorrências", format="%d"),
+                    'exemplos': st.column_config.TextColumn("Exemplos (linhas ou valores)", width='medium')
+                }
+            )
+        
+        if situacao == 'concluida':
+            onda = f" Os dados anteriores foram guardados na onda '{tarefa['rotulo_onda']}'." if tarefa['rotulo_onda'] else ''
+            st.success(f"{tarefa['mensagem']}{onda} Os painéis serão atualizados em alguns segundos.")
+        elif situacao == 'erro':
+            st.error(tarefa['mensagem'])
+        elif st.button("Cancelar importação", key='importar_cancelar', disabled=tarefa['cancelar'].is_set()):
+            tarefa['cancelar'].set()
+        
+        if ativa and situacao not in SITUACOES_IMPORTACAO_ATIVAS:
+            # Terminou: uma nova execução completa libera o formulário e para a consulta periódica
+            st.rerun()
+    
+    if tarefa_importacao is not None:
+        st.fragment(
+            exibir_progresso_importacao,
+            run_every=INTERVALO_PROGRESSO_IMPORTACAO if importacao_ativa else None
+        )(tarefa_importacao, importacao_ativa)
+    
+    if obter_monitor_arquivos().erro:
+        st.warning(f"Os arquivos de archives/ não puderam ser carregados: {obter_monitor_arquivos().erro}")
+
+
 ## footer geral ##
 
 st.markdown("<div style='height: 3rem;'></div>", unsafe_allow_html=True)